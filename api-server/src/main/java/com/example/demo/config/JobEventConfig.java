@@ -0,0 +1,132 @@
+package com.example.demo.config;
+
+import java.nio.charset.StandardCharsets;
+import java.sql.Connection;
+import java.sql.Statement;
+
+import javax.sql.DataSource;
+
+import org.postgresql.PGConnection;
+import org.postgresql.PGNotification;
+import org.slf4j.Logger;
+import org.slf4j.LoggerFactory;
+import org.springframework.boot.autoconfigure.condition.ConditionalOnProperty;
+import org.springframework.context.SmartLifecycle;
+import org.springframework.context.annotation.Bean;
+import org.springframework.context.annotation.Configuration;
+import org.springframework.data.redis.connection.RedisConnectionFactory;
+import org.springframework.data.redis.listener.ChannelTopic;
+import org.springframework.data.redis.listener.RedisMessageListenerContainer;
+
+import com.example.demo.service.OcrJobWaitService;
+
+/**
+ * 워커의 Job 완료 이벤트 구독 설정.
+ *
+ * ocr.job-events.source 로 워커의 OCR_JOB_EVENTS 와 같은 방식을 고른다.
+ * - redis    : Redis Pub/Sub 채널 ocr:job-events (기본값)
+ * - postgres : Postgres LISTEN ocr_job_events
+ */
+@Configuration
+public class JobEventConfig {
+
+	private static final Logger log = LoggerFactory.getLogger(JobEventConfig.class);
+
+	public static final String REDIS_CHANNEL = "ocr:job-events";
+	public static final String PG_CHANNEL = "ocr_job_events";
+
+	@Bean
+	@ConditionalOnProperty(name = "ocr.job-events.source", havingValue = "redis", matchIfMissing = true)
+	RedisMessageListenerContainer jobEventListenerContainer(RedisConnectionFactory connectionFactory,
+			OcrJobWaitService ocrJobWaitService) {
+		RedisMessageListenerContainer container = new RedisMessageListenerContainer();
+		container.setConnectionFactory(connectionFactory);
+		container.addMessageListener((message, pattern) -> ocrJobWaitService
+				.onJobEventMessage(new String(message.getBody(), StandardCharsets.UTF_8)),
+				new ChannelTopic(REDIS_CHANNEL));
+
+		log.info("[JobEvent] Subscribing redis channel={}", REDIS_CHANNEL);
+		return container;
+	}
+
+	@Bean
+	@ConditionalOnProperty(name = "ocr.job-events.source", havingValue = "postgres")
+	SmartLifecycle postgresJobEventListener(DataSource dataSource, OcrJobWaitService ocrJobWaitService) {
+		return new PostgresJobEventListener(dataSource, ocrJobWaitService);
+	}
+
+	/**
+	 * 전용 커넥션 하나로 LISTEN 하고, 알림을 폴링해서 OcrJobWaitService 로 넘긴다.
+	 */
+	static class PostgresJobEventListener implements SmartLifecycle {
+
+		private static final int POLL_TIMEOUT_MS = 500;
+		private static final long RECONNECT_DELAY_MS = 1_000L;
+
+		private final DataSource dataSource;
+		private final OcrJobWaitService ocrJobWaitService;
+
+		private volatile boolean running;
+		private Thread thread;
+
+		PostgresJobEventListener(DataSource dataSource, OcrJobWaitService ocrJobWaitService) {
+			this.dataSource = dataSource;
+			this.ocrJobWaitService = ocrJobWaitService;
+		}
+
+		@Override
+		public void start() {
+			running = true;
+			thread = new Thread(this::listenLoop, "pg-job-event-listener");
+			thread.setDaemon(true);
+			thread.start();
+		}
+
+		@Override
+		public void stop() {
+			running = false;
+			if (thread != null) {
+				thread.interrupt();
+			}
+		}
+
+		@Override
+		public boolean isRunning() {
+			return running;
+		}
+
+		private void listenLoop() {
+			while (running) {
+				try (Connection connection = dataSource.getConnection()) {
+					connection.setAutoCommit(true);
+					try (Statement statement = connection.createStatement()) {
+						statement.execute("LISTEN " + PG_CHANNEL);
+					}
+					log.info("[JobEvent] Listening postgres channel={}", PG_CHANNEL);
+
+					PGConnection pgConnection = connection.unwrap(PGConnection.class);
+					while (running) {
+						PGNotification[] notifications = pgConnection.getNotifications(POLL_TIMEOUT_MS);
+						if (notifications == null) {
+							continue;
+						}
+						for (PGNotification notification : notifications) {
+							ocrJobWaitService.onJobEventMessage(notification.getParameter());
+						}
+					}
+				} catch (Exception e) {
+					if (!running) {
+						return;
+					}
+					log.warn("[JobEvent] Postgres listener error, reconnecting. error={}", e.getMessage());
+					try {
+						Thread.sleep(RECONNECT_DELAY_MS);
+					} catch (InterruptedException ie) {
+						Thread.currentThread().interrupt();
+						return;
+					}
+				}
+			}
+		}
+	}
+}
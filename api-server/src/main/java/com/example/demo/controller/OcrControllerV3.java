@@ -6,11 +6,14 @@ import org.springframework.web.bind.annotation.PathVariable;
 import org.springframework.web.bind.annotation.PostMapping;
 import org.springframework.web.bind.annotation.RequestBody;
 import org.springframework.web.bind.annotation.RequestMapping;
+import org.springframework.web.bind.annotation.RequestParam;
 import org.springframework.web.bind.annotation.RestController;
+import org.springframework.web.context.request.async.DeferredResult;
 
 import com.example.demo.dto.request.OcrRequest;
 import com.example.demo.dto.response.OcrJobCreateResponse;
 import com.example.demo.dto.response.OcrJobStatusResponse;
+import com.example.demo.service.OcrJobWaitService;
 import com.example.demo.service.OcrService;
 
 import lombok.RequiredArgsConstructor;
@@ -23,6 +26,7 @@ import lombok.extern.slf4j.Slf4j;
 public class OcrControllerV3 {
 
 	private final OcrService ocrService;
+	private final OcrJobWaitService ocrJobWaitService;
 
 	@PostMapping("/jobs")
 	public ResponseEntity<OcrJobCreateResponse> post(@RequestBody OcrRequest request) {
@@ -35,4 +39,14 @@ public class OcrControllerV3 {
 		OcrJobStatusResponse response = ocrService.getJobStatus(jobId);
 		return ResponseEntity.ok(response);
 	}
+
+	/**
+	 * Long-poll: Job 이 DONE/FAILED 가 되는 즉시(워커 완료 이벤트) 응답한다.
+	 * timeoutMs 안에 끝나지 않으면 그 시점의 상태(PENDING/PROCESSING)로 응답한다.
+	 */
+	@GetMapping("/jobs/{jobId}/wait")
+	public DeferredResult<ResponseEntity<OcrJobStatusResponse>> waitJob(@PathVariable("jobId") Long jobId,
+			@RequestParam(name = "timeoutMs", defaultValue = "30000") long timeoutMs) {
+		return ocrJobWaitService.await(jobId, timeoutMs);
+	}
 }
@@ -35,6 +35,54 @@ public class OcrJob {
 	@Column(name = "created_at", nullable = false)
 	private LocalDateTime createdAt;
 
+	// 워커가 문서 크기로 분류한 lane (NULL 이면 small, 큰 문서는 large). DB 워커의 lane 별 조회에 사용
+	@Column(name = "lane", length = 10)
+	private String lane;
+
+	// 큰 PDF 를 워커가 페이지 범위로 나눈 sub-job 이면 부모 Job id 와 페이지 범위 [pageStart, pageEnd)
+	@Column(name = "parent_id")
+	private Long parentId;
+
+	@Column(name = "page_start")
+	private Integer pageStart;
+
+	@Column(name = "page_end")
+	private Integer pageEnd;
+
+	// 부모 Job 의 sub-job 진행 상황 (fan-out 된 경우에만 채워짐)
+	@Column(name = "subjob_total")
+	private Integer subjobTotal;
+
+	@Column(name = "subjob_done")
+	private Integer subjobDone;
+
+	@Column(name = "subjob_failed")
+	private Integer subjobFailed;
+
+	// 단계별 시각 (워커가 기록, ocr-worker/tools/latency_report.py 로 구간별 지연 분석)
+	// enqueue(메시지 createdAt, DB 큐는 created_at) → pick(claim) → OCR 시작 / 끝 → 완료(DONE/FAILED)
+	@Column(name = "enqueued_at")
+	private LocalDateTime enqueuedAt;
+
+	@Column(name = "picked_at")
+	private LocalDateTime pickedAt;
+
+	@Column(name = "ocr_started_at")
+	private LocalDateTime ocrStartedAt;
+
+	@Column(name = "ocr_ended_at")
+	private LocalDateTime ocrEndedAt;
+
+	@Column(name = "finished_at")
+	private LocalDateTime finishedAt;
+
+	// 처리한 워커(CONSUMER_NAME 또는 hostname-pid)와 큐 백엔드(db / redis / rabbit / kafka, async 런타임은 "-async")
+	@Column(name = "worker_id", length = 100)
+	private String workerId;
+
+	@Column(name = "backend", length = 20)
+	private String backend;
+
 	@Builder
 	private OcrJob(OcrJobStatus status, String pdfName, LocalDateTime createdAt) {
 		this.status = status;
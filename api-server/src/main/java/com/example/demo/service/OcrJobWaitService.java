@@ -0,0 +1,99 @@
+package com.example.demo.service;
+
+import java.util.Map;
+import java.util.Set;
+import java.util.concurrent.ConcurrentHashMap;
+import java.util.concurrent.ConcurrentMap;
+
+import org.springframework.boot.json.JsonParserFactory;
+import org.springframework.http.ResponseEntity;
+import org.springframework.stereotype.Service;
+import org.springframework.web.context.request.async.DeferredResult;
+
+import com.example.demo.dto.response.OcrJobStatusResponse;
+import com.example.demo.entity.OcrJobStatus;
+
+import lombok.RequiredArgsConstructor;
+import lombok.extern.slf4j.Slf4j;
+
+/**
+ * Job 완료 long-poll 대기열.
+ *
+ * 워커가 발행한 완료 이벤트(Redis Pub/Sub 또는 Postgres NOTIFY)를 받으면
+ * 해당 Job 을 기다리는 요청을 즉시 깨운다. 이벤트를 못 받으면 timeout 시점의 DB 상태로 응답한다.
+ */
+@Service
+@RequiredArgsConstructor
+@Slf4j
+public class OcrJobWaitService {
+
+	public static final long DEFAULT_TIMEOUT_MS = 30_000L;
+	public static final long MAX_TIMEOUT_MS = 60_000L;
+
+	private final OcrService ocrService;
+
+	private final ConcurrentMap<Long, Set<DeferredResult<ResponseEntity<OcrJobStatusResponse>>>> waiters =
+			new ConcurrentHashMap<>();
+
+	public DeferredResult<ResponseEntity<OcrJobStatusResponse>> await(Long jobId, long timeoutMs) {
+		long timeout = Math.max(1L, Math.min(timeoutMs, MAX_TIMEOUT_MS));
+		DeferredResult<ResponseEntity<OcrJobStatusResponse>> result = new DeferredResult<>(timeout);
+
+		// 이벤트를 놓치지 않도록 먼저 등록하고, 그 다음 현재 상태를 확인한다.
+		waiters.computeIfAbsent(jobId, id -> ConcurrentHashMap.newKeySet()).add(result);
+		result.onCompletion(() -> remove(jobId, result));
+		result.onTimeout(() -> result.setResult(ResponseEntity.ok(ocrService.getJobStatus(jobId))));
+
+		OcrJobStatusResponse current;
+		try {
+			current = ocrService.getJobStatus(jobId);
+		} catch (RuntimeException e) {
+			remove(jobId, result);
+			throw e;
+		}
+
+		if (isFinished(current.status())) {
+			result.setResult(ResponseEntity.ok(current));
+		}
+		return result;
+	}
+
+	public void onJobEvent(Long jobId, OcrJobStatus status) {
+		if (!isFinished(status)) {
+			return;
+		}
+
+		Set<DeferredResult<ResponseEntity<OcrJobStatusResponse>>> jobWaiters = waiters.remove(jobId);
+		if (jobWaiters == null) {
+			return;
+		}
+
+		OcrJobStatusResponse response = new OcrJobStatusResponse(jobId, status);
+		jobWaiters.forEach(waiter -> waiter.setResult(ResponseEntity.ok(response)));
+	}
+
+	/**
+	 * 워커가 발행한 JSON 이벤트({"jobId": 1, "status": "DONE", ...})를 처리한다.
+	 */
+	public void onJobEventMessage(String payload) {
+		try {
+			Map<String, Object> event = JsonParserFactory.getJsonParser().parseMap(payload);
+			Long jobId = ((Number) event.get("jobId")).longValue();
+			OcrJobStatus status = OcrJobStatus.valueOf(String.valueOf(event.get("status")));
+			onJobEvent(jobId, status);
+		} catch (RuntimeException e) {
+			log.warn("[JobEvent] Invalid job event ignored. payload={}, error={}", payload, e.getMessage());
+		}
+	}
+
+	private void remove(Long jobId, DeferredResult<ResponseEntity<OcrJobStatusResponse>> result) {
+		waiters.computeIfPresent(jobId, (id, jobWaiters) -> {
+			jobWaiters.remove(result);
+			return jobWaiters.isEmpty() ? null : jobWaiters;
+		});
+	}
+
+	private static boolean isFinished(OcrJobStatus status) {
+		return status == OcrJobStatus.DONE || status == OcrJobStatus.FAILED;
+	}
+}
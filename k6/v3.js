@@ -16,6 +16,12 @@ const POLL_INTERVAL_SECONDS = __ENV.POLL_INTERVAL_SECONDS
   ? parseFloat(__ENV.POLL_INTERVAL_SECONDS)
   : 1;
 
+// LONG_POLL=1 이면 1초 polling 대신 /jobs/{id}/wait long-poll 로 완료를 기다린다.
+const LONG_POLL = __ENV.LONG_POLL === "1";
+const LONG_POLL_TIMEOUT_MS = __ENV.LONG_POLL_TIMEOUT_MS
+  ? parseInt(__ENV.LONG_POLL_TIMEOUT_MS, 10)
+  : 30000;
+
 export const options = iterationsEnv
   ? {
       vus,
@@ -66,9 +72,14 @@ export default function () {
       break;
     }
 
-    const statusRes = http.get(`${BASE_URL}/jobs/${jobId}`, {
-      timeout: "10s",
-    });
+    const statusRes = LONG_POLL
+      ? http.get(
+          `${BASE_URL}/jobs/${jobId}/wait?timeoutMs=${LONG_POLL_TIMEOUT_MS}`,
+          { timeout: `${Math.ceil(LONG_POLL_TIMEOUT_MS / 1000) + 10}s` }
+        )
+      : http.get(`${BASE_URL}/jobs/${jobId}`, {
+          timeout: "10s",
+        });
 
     if (statusRes.status !== 200) {
       finalStatus = "HTTP_ERROR";
@@ -79,7 +90,9 @@ export default function () {
     const status = statusBody.status;
 
     if (status === "PENDING" || status === "PROCESSING") {
-      sleep(POLL_INTERVAL_SECONDS);
+      if (!LONG_POLL) {
+        sleep(POLL_INTERVAL_SECONDS);
+      }
       continue;
     }
 
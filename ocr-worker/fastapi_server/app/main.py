@@ -3,11 +3,14 @@ from contextlib import asynccontextmanager
 from fastapi import FastAPI
 
 from .routes import ocr_router
+from ocr_engine.cpu_budget import apply_cpu_budget, cpu_budget_from_env
 from ocr_engine.model_loader import get_pipeline
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    # 모델 로드 전에 코어 예산 적용 (V2 처럼 한 호스트에 OCR 서버 여러 개를 띄울 때)
+    apply_cpu_budget(cpu_budget_from_env())
     _ = get_pipeline()
     yield
     
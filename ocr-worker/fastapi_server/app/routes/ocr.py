@@ -1,10 +1,18 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Body
 
-from ocr_engine.schemas import PredictRequest, PredictResponse
+from ocr_engine.schemas import PredictRequest, PredictResponse, WorkerPredictRequest
 from ocr_engine.predictor import run_ocr
 
 router = APIRouter()
 
 @router.post("/predict", response_model=PredictResponse)
 def predict(req: PredictRequest) -> PredictResponse:
-    return run_ocr(req)
+    return run_ocr(WorkerPredictRequest(**req.model_dump()))
+
+
+@router.post("/predict/pdf", response_model=PredictResponse)
+def predict_pdf(
+    pdf: bytes = Body(..., media_type="application/pdf"),
+) -> PredictResponse:
+    # 요청 본문(PDF 바이트)을 디스크에 저장하지 않고 그대로 엔진에 넘긴다.
+    return run_ocr(WorkerPredictRequest(), pdf_data=pdf)
@@ -0,0 +1,84 @@
+# ocr_engine/backends.py
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from .config import MODEL_ROOT
+
+
+__all__ = ["InferenceBackend", "BACKENDS", "get_backend"]
+
+
+@dataclass(frozen=True)
+class InferenceBackend:
+    """
+    OCRPipelines 가 사용할 추론 백엔드 정의.
+
+    - model_dir_suffix: 모델 디렉터리 이름 규칙. MODEL_ROOT / f"{모델명}{suffix}"
+      (INT8 양자화 모델은 "_int8_infer" 디렉터리에 따로 둔다. 아래 "INT8 모델 준비" 참고)
+    - pipeline_options: FormulaRecognitionPipeline 생성자에 그대로 넘길 옵션
+      (enable_mkldnn, enable_hpi, precision, cpu_threads 등)
+    """
+
+    name: str
+    description: str
+    model_dir_suffix: str = "_infer"
+    pipeline_options: dict[str, Any] = field(default_factory=dict)
+
+    def model_dir(self, model_name: str) -> Path:
+        return MODEL_ROOT / f"{model_name}{self.model_dir_suffix}"
+
+
+# ------------------------------------------------------------
+# INT8 모델 준비 (paddle_int8)
+# ------------------------------------------------------------
+# *_int8_infer 디렉터리는 이 저장소가 만들지 않는다. 배포 전에 한 번, 오프라인에서 만든다.
+#
+# 1. 기본 FP32 추론 모델(MODEL_ROOT / "<모델명>_infer")을 준비한다. (PaddleX 공식 추론 모델)
+# 2. PaddleSlim 의 정적 PTQ(post-training quantization, paddleslim.quant.quant_post_static)로
+#    FP32 모델을 INT8 로 양자화한다.
+#    - 보정(calibration) 데이터: 실제 트래픽과 비슷한 PDF 페이지 수십~수백 장을
+#      PaddleX 추론과 같은 전처리(레이아웃: 리사이즈 + 정규화, 수식: 수식 영역 crop)로 넣는다.
+#    - 레이아웃(PP-DocLayout*)과 수식(PP-FormulaNet*) 모델을 각각 양자화한다.
+# 3. 결과를 MODEL_ROOT / "<모델명>_int8_infer" 에 저장하고, FP32 디렉터리의 inference.yml
+#    (전처리 / 후처리 설정)을 그대로 복사한다.
+# 4. python -m tools.compare_backends --candidate paddle_int8 으로 FP32 대비 CER 과 처리량을 확인한 뒤에만
+#    OCR_INFERENCE_BACKEND=paddle_int8 로 바꾼다.
+#
+# 디렉터리가 없으면 파이프라인 로드가 실패한다. (compare_backends 는 시작 전에 확인한다)
+BACKENDS: dict[str, InferenceBackend] = {
+    backend.name: backend
+    for backend in (
+        InferenceBackend(
+            name="paddle",
+            description="Paddle Inference, FP32 모델 (기본값)",
+        ),
+        InferenceBackend(
+            name="paddle_mkldnn",
+            description="Paddle Inference + oneDNN(MKL-DNN) 커널 / IR 그래프 최적화, FP32 모델",
+            pipeline_options={"enable_mkldnn": True},
+        ),
+        InferenceBackend(
+            name="paddle_int8",
+            description="PaddleSlim INT8 양자화 모델 + oneDNN INT8 커널",
+            model_dir_suffix="_int8_infer",
+            pipeline_options={"enable_mkldnn": True},
+        ),
+        InferenceBackend(
+            name="hpi",
+            description="PaddleX 고성능 추론 플러그인 (CPU 에서는 ONNX Runtime / OpenVINO 자동 선택)",
+            pipeline_options={"enable_hpi": True},
+        ),
+    )
+}
+
+
+def get_backend(name: str) -> InferenceBackend:
+    try:
+        return BACKENDS[name]
+    except KeyError:
+        raise ValueError(
+            f"unknown inference backend: {name} (available: {', '.join(BACKENDS)})"
+        ) from None
@@ -0,0 +1,304 @@
+# ocr_engine/checkpoint.py
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Optional
+
+from .config import CHECKPOINT_BACKEND, CHECKPOINT_PG_DSN, CHECKPOINT_SQLITE_PATH
+
+
+__all__ = [
+    "CheckpointStore",
+    "SqliteCheckpointStore",
+    "PostgresCheckpointStore",
+    "get_checkpoint_store",
+    "page_result_to_json",
+]
+
+
+def page_result_to_json(result: Any) -> str:
+    """
+    파이프라인의 페이지 결과 객체를 JSON 문자열로 직렬화한다.
+
+    - PaddleX 결과 객체는 .json 프로퍼티로 JSON 호환 dict 를 제공한다.
+    - 그 외 타입(테스트용 dict 등)은 그대로 직렬화한다.
+    """
+    payload = getattr(result, "json", result)
+    return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class CheckpointStore(ABC):
+    """
+    Job 의 페이지별 OCR 결과를 저장하는 체크포인트 저장소 인터페이스.
+
+    - 키: (job_id, page_index). pdf_digest 도 함께 저장해서,
+      같은 job_id 로 다른 내용의 PDF 가 들어오면 이전 체크포인트를 무시한다.
+    - 완료된 Job 의 페이지 결과도 그대로 남으므로, 이 저장소가 곧 Job 결과 저장소다.
+      (result_ref 로 위치를 알려준다)
+    - 결과는 OCR_CHECKPOINT_TTL_HOURS 가 지나면 purge 로 지운다 (workers/job_reaper.py 가 주기적으로 호출).
+      fan-out sub-job 의 결과는 부모 아래로 모은 뒤 delete 로 바로 지운다.
+    - shared: 여러 호스트가 같은 저장소를 보는지 (purge 를 한 곳에서만 돌리면 되는지)
+    """
+
+    shared = False
+
+    # purge / delete 한 번에 지우는 행 수 (긴 잠금 / 큰 트랜잭션을 피함)
+    delete_batch = 5000
+
+    @abstractmethod
+    def load(self, job_id: int, pdf_digest: str) -> dict[int, str]:
+        """완료된 페이지 결과를 {page_index: result_json} 으로 반환한다."""
+
+    @abstractmethod
+    def save(self, job_id: int, pdf_digest: str, page_index: int, result_json: str) -> None:
+        """페이지 하나의 결과를 저장한다 (같은 키면 덮어씀)."""
+
+    @abstractmethod
+    def result_ref(self, job_id: int) -> str:
+        """Job 결과 위치를 가리키는 문자열."""
+
+    @abstractmethod
+    def delete(self, job_ids: list[int]) -> int:
+        """job_ids 의 페이지 결과를 지우고 지운 행 수를 반환한다."""
+
+    @abstractmethod
+    def purge(self, older_than_sec: float) -> int:
+        """older_than_sec 보다 오래 전에 저장된 페이지 결과를 지우고 지운 행 수를 반환한다."""
+
+    def merge(self, target_job_id: int, source_job_ids: list[int], pdf_digest: str) -> int:
+        """
+        여러 Job(페이지 범위 sub-job)의 페이지 결과를 target_job_id 아래로 모은다.
+
+        - sub-job 은 원본 문서 기준 page_index 로 저장하므로 그대로 합치면 된다.
+        - 반환값: 모은 페이지 수
+        """
+        merged = 0
+        for job_id in source_job_ids:
+            for page_index, result_json in self.load(job_id, pdf_digest).items():
+                self.save(target_job_id, pdf_digest, page_index, result_json)
+                merged += 1
+        return merged
+
+
+class SqliteCheckpointStore(CheckpointStore):
+    """
+    호스트 로컬 SQLite 파일 기반 체크포인트 저장소.
+
+    - 같은 호스트의 워커 프로세스들이 파일을 공유한다 (WAL 모드 + busy_timeout).
+    - 다른 호스트로 재전달된 Job 은 이어서 처리할 수 없다 → 그 경우 PostgresCheckpointStore 사용.
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path).expanduser()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            str(self.path), timeout=5.0, isolation_level=None, check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS ocr_page_result (
+                job_id      INTEGER NOT NULL,
+                page_index  INTEGER NOT NULL,
+                pdf_digest  TEXT    NOT NULL,
+                result      TEXT    NOT NULL,
+                created_at  REAL    NOT NULL DEFAULT (CAST(strftime('%s', 'now') AS REAL)),
+                PRIMARY KEY (job_id, page_index)
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS ocr_page_result_created_at_idx ON ocr_page_result (created_at)"
+        )
+
+    def load(self, job_id: int, pdf_digest: str) -> dict[int, str]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT page_index, result FROM ocr_page_result WHERE job_id = ? AND pdf_digest = ?",
+                (job_id, pdf_digest),
+            ).fetchall()
+        return {page_index: result for page_index, result in rows}
+
+    def save(self, job_id: int, pdf_digest: str, page_index: int, result_json: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT INTO ocr_page_result (job_id, page_index, pdf_digest, result)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT (job_id, page_index)
+                DO UPDATE SET pdf_digest = excluded.pdf_digest, result = excluded.result,
+                              created_at = excluded.created_at
+                """,
+                (job_id, page_index, pdf_digest, result_json),
+            )
+
+    def result_ref(self, job_id: int) -> str:
+        return f"sqlite://{self.path}#ocr_page_result?job_id={job_id}"
+
+    def delete(self, job_ids: list[int]) -> int:
+        if not job_ids:
+            return 0
+        placeholders = ", ".join("?" for _ in job_ids)
+        with self._lock:
+            cur = self._conn.execute(f"DELETE FROM ocr_page_result WHERE job_id IN ({placeholders})", job_ids)
+        return cur.rowcount
+
+    def purge(self, older_than_sec: float) -> int:
+        cutoff = time.time() - older_than_sec
+        deleted = 0
+        while True:
+            with self._lock:
+                cur = self._conn.execute(
+                    """
+                    DELETE FROM ocr_page_result WHERE rowid IN (
+                        SELECT rowid FROM ocr_page_result WHERE created_at < ? LIMIT ?
+                    )
+                    """,
+                    (cutoff, self.delete_batch),
+                )
+            deleted += cur.rowcount
+            if cur.rowcount < self.delete_batch:
+                return deleted
+
+
+class PostgresCheckpointStore(CheckpointStore):
+    """
+    PostgreSQL(ocr_job 과 같은 DB) 기반 체크포인트 저장소.
+
+    - 어느 호스트의 워커가 재전달을 받아도 이어서 처리할 수 있다.
+    - 커넥션은 autocommit 으로 하나만 열어 두고, 끊기면 한 번 재접속한다.
+    """
+
+    shared = True
+
+    def __init__(self, dsn: str) -> None:
+        import psycopg2
+
+        self._psycopg2 = psycopg2
+        self._dsn = dsn
+        self._lock = threading.Lock()
+        self._conn = None
+
+        self._execute(
+            """
+            CREATE TABLE IF NOT EXISTS ocr_page_result (
+                job_id      BIGINT      NOT NULL,
+                page_index  INTEGER     NOT NULL,
+                pdf_digest  VARCHAR(64) NOT NULL,
+                result      JSONB       NOT NULL,
+                created_at  TIMESTAMP   NOT NULL DEFAULT now(),
+                PRIMARY KEY (job_id, page_index)
+            )
+            """
+        )
+        self._execute("CREATE INDEX IF NOT EXISTS ocr_page_result_created_at_idx ON ocr_page_result (created_at)")
+
+    def _connect(self):
+        conn = self._psycopg2.connect(self._dsn)
+        conn.autocommit = True
+        return conn
+
+    def _execute(self, sql: str, params: tuple = (), fetch: bool = False) -> list:
+        with self._lock:
+            for attempt in range(2):
+                if self._conn is None or self._conn.closed:
+                    self._conn = self._connect()
+                try:
+                    with self._conn.cursor() as cur:
+                        cur.execute(sql, params)
+                        return cur.fetchall() if fetch else []
+                except (self._psycopg2.OperationalError, self._psycopg2.InterfaceError):
+                    self._conn = None
+                    if attempt == 1:
+                        raise
+        return []
+
+    def load(self, job_id: int, pdf_digest: str) -> dict[int, str]:
+        rows = self._execute(
+            "SELECT page_index, result::text FROM ocr_page_result WHERE job_id = %s AND pdf_digest = %s",
+            (job_id, pdf_digest),
+            fetch=True,
+        )
+        return {page_index: result for page_index, result in rows}
+
+    def save(self, job_id: int, pdf_digest: str, page_index: int, result_json: str) -> None:
+        self._execute(
+            """
+            INSERT INTO ocr_page_result (job_id, page_index, pdf_digest, result)
+            VALUES (%s, %s, %s, %s::jsonb)
+            ON CONFLICT (job_id, page_index)
+            DO UPDATE SET pdf_digest = EXCLUDED.pdf_digest, result = EXCLUDED.result, created_at = now()
+            """,
+            (job_id, page_index, pdf_digest, result_json),
+        )
+
+    def result_ref(self, job_id: int) -> str:
+        return f"postgres://ocr_page_result?job_id={job_id}"
+
+    def delete(self, job_ids: list[int]) -> int:
+        if not job_ids:
+            return 0
+        rows = self._execute(
+            "WITH d AS (DELETE FROM ocr_page_result WHERE job_id = ANY(%s) RETURNING 1) SELECT count(*) FROM d",
+            (list(job_ids),),
+            fetch=True,
+        )
+        return rows[0][0]
+
+    def purge(self, older_than_sec: float) -> int:
+        deleted = 0
+        while True:
+            rows = self._execute(
+                """
+                WITH d AS (
+                    DELETE FROM ocr_page_result WHERE ctid IN (
+                        SELECT ctid FROM ocr_page_result
+                        WHERE created_at < now() - make_interval(secs => %s)
+                        LIMIT %s
+                    )
+                    RETURNING 1
+                )
+                SELECT count(*) FROM d
+                """,
+                (older_than_sec, self.delete_batch),
+                fetch=True,
+            )
+            deleted += rows[0][0]
+            if rows[0][0] < self.delete_batch:
+                return deleted
+
+
+_checkpoint_store: Optional[CheckpointStore] = None
+_checkpoint_store_lock = threading.Lock()
+
+
+def get_checkpoint_store() -> Optional[CheckpointStore]:
+    """
+    설정(CHECKPOINT_BACKEND)에 맞는 프로세스 전역 체크포인트 저장소를 반환한다.
+
+    - "off" 이면 None 을 반환한다 (체크포인트 없이 문서 전체를 한 번에 처리).
+    - async 런타임의 여러 OCR 스레드가 동시에 불러도 저장소(연결)는 하나만 만든다.
+    """
+    global _checkpoint_store
+
+    if CHECKPOINT_BACKEND == "off":
+        return None
+
+    if _checkpoint_store is None:
+        with _checkpoint_store_lock:
+            if _checkpoint_store is None:
+                if CHECKPOINT_BACKEND == "postgres":
+                    _checkpoint_store = PostgresCheckpointStore(CHECKPOINT_PG_DSN)
+                elif CHECKPOINT_BACKEND == "sqlite":
+                    _checkpoint_store = SqliteCheckpointStore(CHECKPOINT_SQLITE_PATH)
+                else:
+                    raise ValueError(f"unknown OCR_CHECKPOINT_BACKEND: {CHECKPOINT_BACKEND}")
+
+    return _checkpoint_store
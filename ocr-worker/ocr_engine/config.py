@@ -1,4 +1,5 @@
 # ocr_engine/config.py
+import os
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parents[1]
@@ -6,10 +7,60 @@ BASE_DIR = Path(__file__).resolve().parents[1]
 DATA_DIR = BASE_DIR / "data" / "pdfs"
 MODEL_ROOT = BASE_DIR / "models"
 
-FORMULA_MODEL_DIR = MODEL_ROOT / "PP-FormulaNet_plus-L_infer"
-LAYOUT_MODEL_DIR = MODEL_ROOT / "PP-DocLayout_plus-L_infer"
+# 모델 디렉터리는 백엔드별 규칙으로 정해진다 (backends.InferenceBackend.model_dir)
+# - 기본(FP32): MODEL_ROOT / "PP-FormulaNet_plus-L_infer"
+# - INT8     : MODEL_ROOT / "PP-FormulaNet_plus-L_int8_infer" (직접 양자화해서 둔다. backends.py 의 "INT8 모델 준비")
 
 FORMULA_MODEL_NAME = "PP-FormulaNet_plus-L"
 LAYOUT_MODEL_NAME = "PP-DocLayout_plus-L"
 
 DEVICE = "cpu"
+
+# 추론 백엔드 (ocr_engine/backends.py 의 BACKENDS 키)
+# - paddle        : 기본 Paddle Inference, FP32 모델 (기존 동작)
+# - paddle_mkldnn : oneDNN 커널 + 그래프 최적화
+# - paddle_int8   : INT8 양자화 모델(*_int8_infer) + oneDNN
+# - hpi           : PaddleX 고성능 추론(ONNX Runtime / OpenVINO 자동 선택)
+INFERENCE_BACKEND = os.getenv("OCR_INFERENCE_BACKEND", "paddle")
+
+# ------------------------------------------------------------
+# PDF 렌더링 설정
+# ------------------------------------------------------------
+# PaddleX 의 PDF reader 기본값(zoom=2.0)과 동일하게 맞춘다.
+PDF_RENDER_SCALE = float(os.getenv("OCR_PDF_RENDER_SCALE", "2.0"))
+# 페이지 한 장의 최대 픽셀 수. 넘는 페이지(대형 도면/스캔 등)는 이 안에 들어오도록 배율을 낮춰 렌더링 (0 이면 제한 없음)
+MAX_PAGE_PIXELS = int(os.getenv("OCR_MAX_PAGE_PIXELS", str(4096 * 4096)))
+
+# ------------------------------------------------------------
+# 대용량 PDF 스트리밍 처리 (문서 길이와 무관하게 메모리 상한 유지)
+# ------------------------------------------------------------
+# 한 번에 추론하는 페이지 수 = 동시에 메모리에 올라가는 페이지 이미지 최대 개수
+STREAM_WINDOW_PAGES = int(os.getenv("OCR_STREAM_WINDOW_PAGES", "4"))
+# 처리할 수 있는 최대 페이지 수 (0 이면 제한 없음). 넘으면 "pdf too large" 로 실패
+MAX_PDF_PAGES = int(os.getenv("OCR_MAX_PDF_PAGES", "500"))
+
+# ------------------------------------------------------------
+# 페이지 이미지 캐시 (재시도/중복 Job 의 PDF 디코딩·렌더링 생략용)
+# ------------------------------------------------------------
+PAGE_CACHE_ENABLED = os.getenv("OCR_PAGE_CACHE_ENABLED", "1") == "1"
+PAGE_CACHE_DIR = Path(os.getenv("OCR_PAGE_CACHE_DIR", str(BASE_DIR / "cache" / "pages")))
+# 캐시 디렉터리 전체 크기 상한 (기본 2GB). 넘으면 가장 오래 안 쓰인 페이지부터 삭제
+PAGE_CACHE_MAX_BYTES = int(os.getenv("OCR_PAGE_CACHE_MAX_BYTES", str(2 * 1024**3)))
+
+# ------------------------------------------------------------
+# 페이지 단위 체크포인트 (재전달된 Job 이 마지막 미완료 페이지부터 이어서 처리)
+# ------------------------------------------------------------
+# "sqlite"  : 호스트 로컬 SQLite 파일 (기본값)
+# "postgres": ocr_job 과 같은 DB 의 ocr_page_result 테이블 (여러 호스트 간 공유)
+# "off"     : 체크포인트 사용 안 함
+CHECKPOINT_BACKEND = os.getenv("OCR_CHECKPOINT_BACKEND", "sqlite")
+CHECKPOINT_SQLITE_PATH = Path(
+    os.getenv("OCR_CHECKPOINT_SQLITE_PATH", str(BASE_DIR / "cache" / "checkpoints.sqlite3"))
+)
+CHECKPOINT_PG_DSN = os.getenv(
+    "OCR_CHECKPOINT_PG_DSN",
+    "host=localhost port=5432 dbname=mq_database user=jewan password=jewan",
+)
+# 페이지 결과 보관 시간. 이보다 오래 전에 저장된 결과는 reaper 가 지운다 (0 이면 지우지 않음)
+# 끝난 Job 은 OCR_ARCHIVE_RETENTION_HOURS(기본 24) 뒤 ocr_job 에서 빠져 API 로 조회되지 않으므로 같은 기본값
+CHECKPOINT_TTL_HOURS = float(os.getenv("OCR_CHECKPOINT_TTL_HOURS", "24"))
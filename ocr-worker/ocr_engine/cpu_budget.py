@@ -0,0 +1,208 @@
+# ocr_engine/cpu_budget.py
+from __future__ import annotations
+
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+
+__all__ = [
+    "CpuBudget",
+    "plan_cpu_budget",
+    "cpu_budget_from_env",
+    "apply_cpu_budget",
+    "get_active_cpu_budget",
+    "ThroughputMeter",
+    "get_throughput_meter",
+]
+
+# 추론 스레드 수를 제한할 때 함께 맞춰 주는 수학 라이브러리 스레드 환경변수
+_THREAD_ENV_VARS = (
+    "OMP_NUM_THREADS",
+    "MKL_NUM_THREADS",
+    "OPENBLAS_NUM_THREADS",
+    "NUMEXPR_NUM_THREADS",
+)
+
+# 처리량 로그 출력 주기(초)
+THROUGHPUT_REPORT_INTERVAL_SEC = float(os.getenv("OCR_THROUGHPUT_REPORT_SEC", "30"))
+
+
+@dataclass(frozen=True)
+class CpuBudget:
+    """
+    한 워커 프로세스에 할당된 CPU 코어 목록.
+
+    - cores   : 이 프로세스를 pinning 할 논리 코어 번호들
+    - threads : 추론 intra-op 스레드 수 (= 할당 코어 수)
+    """
+
+    cores: tuple[int, ...]
+
+    @property
+    def threads(self) -> int:
+        return len(self.cores)
+
+
+def _available_cores() -> list[int]:
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def plan_cpu_budget(
+    worker_index: int,
+    worker_count: int,
+    total_cores: Optional[int] = None,
+    available: Optional[list[int]] = None,
+) -> CpuBudget:
+    """
+    호스트의 코어를 worker_count 개 워커에 겹치지 않게 나눠, worker_index 번째 몫을 반환한다.
+
+    - total_cores 를 주면 앞에서부터 그 개수의 코어만 사용한다 (호스트 일부만 OCR 에 배정).
+    - 나누어 떨어지지 않으면 앞쪽 워커가 한 코어씩 더 가진다.
+    - 워커 수가 코어 수보다 많으면, 워커마다 코어 하나를 돌아가며 공유한다.
+    """
+    if worker_count < 1 or not (0 <= worker_index < worker_count):
+        raise ValueError(f"invalid worker slot: index={worker_index}, count={worker_count}")
+
+    cores = _available_cores() if available is None else sorted(available)
+    if total_cores is not None:
+        cores = cores[: max(1, total_cores)]
+
+    if worker_count >= len(cores):
+        return CpuBudget(cores=(cores[worker_index % len(cores)],))
+
+    base, extra = divmod(len(cores), worker_count)
+    start = worker_index * base + min(worker_index, extra)
+    size = base + (1 if worker_index < extra else 0)
+    return CpuBudget(cores=tuple(cores[start:start + size]))
+
+
+def cpu_budget_from_env() -> Optional[CpuBudget]:
+    """
+    환경변수로 코어 예산을 읽는다. 아무것도 지정하지 않으면 None (기존처럼 제한 없음).
+
+    - OCR_WORKER_INDEX : 이 프로세스의 워커 번호 (0부터, 기본 0)
+    - OCR_WORKER_COUNT : 같은 호스트에서 코어를 나눠 쓸 워커 수 (기본 1)
+    - OCR_CPU_CORES    : OCR 에 쓸 총 코어 수 (기본: 프로세스가 쓸 수 있는 전체)
+    """
+    index = os.getenv("OCR_WORKER_INDEX")
+    count = os.getenv("OCR_WORKER_COUNT")
+    total = os.getenv("OCR_CPU_CORES")
+    if index is None and count is None and total is None:
+        return None
+
+    return plan_cpu_budget(
+        worker_index=int(index or 0),
+        worker_count=int(count or 1),
+        total_cores=int(total) if total else None,
+    )
+
+
+_active_budget: Optional[CpuBudget] = None
+
+
+def apply_cpu_budget(budget: Optional[CpuBudget]) -> None:
+    """
+    현재 프로세스를 budget 의 코어에 pinning 하고, 스레드 수를 코어 수에 맞춘다.
+
+    - 모델(paddle)이 로드되기 전, 즉 get_pipeline() 첫 호출 전에 불러야 효과가 있다.
+    - budget 이 None 이면 아무것도 하지 않는다.
+    - 추론 스레드 수는 model_loader 가 get_active_cpu_budget() 으로 읽어 cpu_threads 로 넘긴다.
+    """
+    global _active_budget
+
+    if budget is None:
+        return
+
+    if hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, budget.cores)
+
+    for name in _THREAD_ENV_VARS:
+        os.environ[name] = str(budget.threads)
+
+    try:
+        import cv2
+
+        cv2.setNumThreads(budget.threads)
+    except ImportError:
+        pass
+
+    _active_budget = budget
+    print(
+        f"[OCR] cpu budget applied: cores={list(budget.cores)}, threads={budget.threads}",
+        flush=True,
+    )
+
+
+def get_active_cpu_budget() -> Optional[CpuBudget]:
+    return _active_budget
+
+
+class ThroughputMeter:
+    """
+    OCR 처리량을 코어당 값으로 환산해 주기적으로 출력한다.
+
+    - busy  : 추론에 쓴 시간 기준 pages/s (OCR 자체 속도)
+    - wall  : 첫 Job 이후 경과 시간 기준 pages/s (대기 포함, 실제 처리 능력)
+    - 코어 예산 적용 전/후 로그의 pages/s/core 를 비교하면 oversubscription 개선 효과를 볼 수 있다.
+    """
+
+    def __init__(self, report_interval_sec: float = THROUGHPUT_REPORT_INTERVAL_SEC) -> None:
+        self.report_interval_sec = report_interval_sec
+        self._lock = threading.Lock()
+        self._pages = 0
+        self._busy_sec = 0.0
+        self._started_at: Optional[float] = None
+        self._last_report_at = 0.0
+
+    def record(self, pages: int, busy_sec: float) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if self._started_at is None:
+                self._started_at = now - busy_sec
+                self._last_report_at = now
+            self._pages += pages
+            self._busy_sec += busy_sec
+            if now - self._last_report_at < self.report_interval_sec:
+                return
+            self._last_report_at = now
+            snapshot = self.snapshot(now)
+
+        print(
+            "[OCR] throughput "
+            f"pages={snapshot['pages']} cores={snapshot['cores']} "
+            f"busy={snapshot['busy_pages_per_sec']:.3f}p/s "
+            f"wall={snapshot['wall_pages_per_sec']:.3f}p/s "
+            f"per_core={snapshot['wall_pages_per_sec_per_core']:.3f}p/s/core",
+            flush=True,
+        )
+
+    def snapshot(self, now: Optional[float] = None) -> dict:
+        now = time.monotonic() if now is None else now
+        budget = get_active_cpu_budget()
+        cores = budget.threads if budget is not None else len(_available_cores())
+        wall = now - self._started_at if self._started_at is not None else 0.0
+        wall_rate = self._pages / wall if wall > 0 else 0.0
+        return {
+            "pages": self._pages,
+            "cores": cores,
+            "busy_pages_per_sec": self._pages / self._busy_sec if self._busy_sec > 0 else 0.0,
+            "wall_pages_per_sec": wall_rate,
+            "wall_pages_per_sec_per_core": wall_rate / cores,
+        }
+
+
+_throughput_meter: Optional[ThroughputMeter] = None
+
+
+def get_throughput_meter() -> ThroughputMeter:
+    global _throughput_meter
+
+    if _throughput_meter is None:
+        _throughput_meter = ThroughputMeter()
+
+    return _throughput_meter
@@ -0,0 +1,179 @@
+# ocr_engine/formula_gate.py
+from __future__ import annotations
+
+import ctypes
+import os
+import re
+import threading
+import time
+from typing import Iterable, Optional
+
+import pypdfium2 as pdfium
+import pypdfium2.raw as pdfium_c
+
+from .pdf_render import PDFIUM_LOCK
+
+
+__all__ = ["FORMULA_GATE_ENABLED", "FormulaGate", "get_formula_gate", "skipped_page_result"]
+
+# 1 이면 수식 후보가 없는 페이지는 렌더링 / 레이아웃 검출 / 수식 인식을 모두 건너뛴다.
+# 텍스트 레이어 휴리스틱이 놓친 수식은 결과에서 빠지므로 기본은 끄고, 결과를 비교해 본 배포에서만 켠다.
+FORMULA_GATE_ENABLED = os.getenv("OCR_FORMULA_GATE", "0") == "1"
+# 텍스트 레이어 글자 수가 이보다 적으면 스캔 / 이미지 페이지로 보고 판단하지 않는다 (항상 추론).
+MIN_TEXT_CHARS = int(os.getenv("OCR_FORMULA_GATE_MIN_CHARS", "200"))
+GATE_REPORT_INTERVAL_SEC = float(os.getenv("OCR_THROUGHPUT_REPORT_SEC", "30"))
+
+# 수식에만 주로 나오는 문자: 그리스 문자, 수학 연산자, 화살표, 수학용 영숫자, 위/아래 첨자 숫자
+_MATH_CHARS = re.compile(
+    "[\u0370-\u03ff\u2070-\u209f\u2190-\u21ff\u2200-\u22ff\u27c0-\u27ef\u2980-\u2aff"
+    "\U0001d400-\U0001d7ff]"
+)
+# "x = 3", "a + b", "n^2", "f(x) <" 처럼 피연산자 사이의 연산자. 하이픈(-)은 본문에도 흔해서 제외
+_OPERATOR = re.compile(r"[A-Za-z0-9)\]]\s*[=<>+*/^_]\s*[A-Za-z0-9(\[]")
+# TeX / 수식 편집기 계열 폰트
+_MATH_FONT = re.compile(r"(?i)(math|symbol|cmmi|cmsy|cmex|msam|msbm|stix|euler|mt ?extra|esint|rsfs)")
+
+SKIP_REASON = "no_formula_candidates"
+
+
+def skipped_page_result(page_index: int) -> dict:
+    """건너뛴 페이지의 결과 (수식 0개). 체크포인트에 저장해서 결과 페이지 목록이 비지 않게 한다."""
+    return {"res": {"page_index": page_index, "formula_res_list": [], "skipped": SKIP_REASON}}
+
+
+class FormulaGate:
+    """
+    PDF 텍스트 레이어로 "수식 후보가 전혀 없는 페이지" 를 골라내는 가벼운 필터.
+
+    FormulaRecognitionPipeline 은 페이지마다 레이아웃 검출 → 수식 영역 crop → 수식 인식을 돈다.
+    레이아웃 검출에서 수식 영역이 없으면 수식 인식은 이미 건너뛰므로(영역 단위 gating),
+    여기서는 그 앞 단계까지 통째로 건너뛸 수 있는 페이지를 찾는다.
+
+    판단 (보수적으로, 확실히 본문뿐인 페이지만 건너뜀):
+    - 이미지 객체가 있는 페이지 → 판단 불가 (그림 속 수식일 수 있음) → 추론
+    - 텍스트가 MIN_TEXT_CHARS 미만 → 스캔 / 그림 위주 페이지 → 추론
+    - 수학 문자, 피연산자 사이 연산자, 수식 폰트 중 하나라도 있으면 → 추론
+    - 나머지(충분한 본문 텍스트만 있는 페이지) → 건너뜀
+
+    건너뛴 페이지 수와 절약한 추론 시간 추정치(건너뛴 페이지 × 페이지당 처리 시간)를 누적해 주기적으로 출력한다.
+    """
+
+    def __init__(self, report_interval_sec: float = GATE_REPORT_INTERVAL_SEC) -> None:
+        self.report_interval_sec = report_interval_sec
+        self._lock = threading.Lock()
+        self.pages_checked = 0
+        self.pages_skipped = 0
+        self.pages_undecided = 0
+        self.saved_sec = 0.0
+        self.scan_sec = 0.0
+        self._last_report_at = time.monotonic()
+
+    # --------------------------------------------------------
+    # 공개 API
+    # --------------------------------------------------------
+    def scan(self, pdf: pdfium.PdfDocument, page_indices: Iterable[int], sec_per_page: float = 0.0) -> set[int]:
+        """
+        건너뛰어도 되는 page_index 집합을 반환한다.
+
+        - sec_per_page: 현재 프로필의 페이지당 처리 시간 추정치 (절약 시간 통계용)
+        """
+        started_at = time.perf_counter()
+        checked = undecided = 0
+        skippable = set()
+        for page_index in page_indices:
+            checked += 1
+            verdict = self._classify(pdf, page_index)
+            if verdict is None:
+                undecided += 1
+            elif not verdict:
+                skippable.add(page_index)
+        elapsed = time.perf_counter() - started_at
+        self._record(checked, len(skippable), undecided, len(skippable) * sec_per_page, elapsed)
+        return skippable
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "pages_checked": self.pages_checked,
+                "pages_skipped": self.pages_skipped,
+                "pages_undecided": self.pages_undecided,
+                "saved_sec": self.saved_sec,
+                "scan_sec": self.scan_sec,
+            }
+
+    # --------------------------------------------------------
+    # 내부 구현
+    # --------------------------------------------------------
+    def _classify(self, pdf: pdfium.PdfDocument, page_index: int) -> Optional[bool]:
+        """수식 후보가 있으면 True, 없으면 False, 판단할 수 없으면 None."""
+        with PDFIUM_LOCK:
+            page = pdf[page_index]
+            try:
+                if any(True for _ in page.get_objects(filter=(pdfium_c.FPDF_PAGEOBJ_IMAGE,), max_depth=2)):
+                    return None
+                textpage = page.get_textpage()
+                try:
+                    text = textpage.get_text_range()
+                    if len(text.strip()) < MIN_TEXT_CHARS:
+                        return None
+                    if _MATH_CHARS.search(text) or _OPERATOR.search(text):
+                        return True
+                    return self._has_math_font(textpage)
+                finally:
+                    textpage.close()
+            finally:
+                page.close()
+
+    @staticmethod
+    def _has_math_font(textpage: pdfium.PdfTextPage) -> bool:
+        buf = ctypes.create_string_buffer(128)
+        seen = set()
+        for index in range(textpage.count_chars()):
+            if not pdfium_c.FPDFText_GetFontInfo(textpage.raw, index, buf, len(buf), None):
+                continue
+            name = buf.value
+            if name in seen:
+                continue
+            seen.add(name)
+            if _MATH_FONT.search(name.decode("latin-1")):
+                return True
+        return False
+
+    def _record(self, checked: int, skipped: int, undecided: int, saved_sec: float, scan_sec: float) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self.pages_checked += checked
+            self.pages_skipped += skipped
+            self.pages_undecided += undecided
+            self.saved_sec += saved_sec
+            self.scan_sec += scan_sec
+            if now - self._last_report_at < self.report_interval_sec:
+                return
+            self._last_report_at = now
+            total, skipped_total = self.pages_checked, self.pages_skipped
+            undecided_total, saved, scan = self.pages_undecided, self.saved_sec, self.scan_sec
+
+        print(
+            "[OCR] formula_gate "
+            f"checked={total} skipped={skipped_total} ({skipped_total / max(1, total) * 100:.1f}%) "
+            f"undecided={undecided_total} saved~{saved:.1f}s scan={scan:.2f}s",
+            flush=True,
+        )
+
+
+_formula_gate: Optional[FormulaGate] = None
+
+
+def get_formula_gate() -> Optional[FormulaGate]:
+    """
+    프로세스 전역 FormulaGate. OCR_FORMULA_GATE=1 일 때만 만든다 (기본 0 → None).
+    """
+    global _formula_gate
+
+    if not FORMULA_GATE_ENABLED:
+        return None
+
+    if _formula_gate is None:
+        _formula_gate = FormulaGate()
+
+    return _formula_gate
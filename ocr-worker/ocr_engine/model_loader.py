@@ -1,41 +1,70 @@
 # ocr_engine/model_loader.py
+import threading
 from typing import Optional
 
+from .backends import InferenceBackend, get_backend
+from .cpu_budget import get_active_cpu_budget
 from .config import (
-    FORMULA_MODEL_NAME,
-    FORMULA_MODEL_DIR,
-    LAYOUT_MODEL_NAME,
-    LAYOUT_MODEL_DIR,
     DEVICE,
+    INFERENCE_BACKEND,
 )
 from .pipeline import OCRPipelines
+from .profiles import ProcessingProfile, get_profile
 
-_pipeline: Optional[OCRPipelines] = None
+# 프로필 이름 → OCRPipelines. 쓰인 프로필만 지연 생성한다.
+_pipelines: dict[str, OCRPipelines] = {}
+_pipelines_lock = threading.Lock()
 
 
-def _load_pipeline() -> OCRPipelines:
+def build_pipeline(backend: InferenceBackend, profile: Optional[ProcessingProfile] = None) -> OCRPipelines:
+    """
+    지정한 추론 백엔드로 OCRPipelines 를 새로 생성한다. (캐시하지 않음)
+
+    - 백엔드 비교 도구(tools/compare_backends.py)처럼 한 프로세스에서
+      여러 백엔드를 번갈아 만들어야 할 때 사용한다.
+    - profile 을 주면 그 프로필의 레이아웃 / 수식 모델 변형을 쓴다. (없으면 기본 프로필)
+    - 코어 예산(apply_cpu_budget)이 적용돼 있으면 추론 스레드 수를 할당 코어 수에 맞춘다.
+    """
+    profile = profile or get_profile()
+    options = dict(backend.pipeline_options)
+    budget = get_active_cpu_budget()
+    if budget is not None:
+        options.setdefault("cpu_threads", budget.threads)
+
     pipeline = OCRPipelines(
-        formula_model_name=FORMULA_MODEL_NAME,
-        formula_model_dir=FORMULA_MODEL_DIR,
-        layout_model_name=LAYOUT_MODEL_NAME,
-        layout_model_dir=LAYOUT_MODEL_DIR,
+        formula_model_name=profile.formula_model_name,
+        formula_model_dir=backend.model_dir(profile.formula_model_name),
+        layout_model_name=profile.layout_model_name,
+        layout_model_dir=backend.model_dir(profile.layout_model_name),
         device=DEVICE,
         use_doc_orientation_classify=False,
         use_doc_unwarping=False,
+        **options,
     )
     return pipeline
 
 
-def get_pipeline() -> OCRPipelines:
+def _load_pipeline(profile: ProcessingProfile) -> OCRPipelines:
+    return build_pipeline(get_backend(INFERENCE_BACKEND), profile)
+
+
+def get_pipeline(profile_name: Optional[str] = None) -> OCRPipelines:
     """
     외부에서 호출하는 공개 함수.
 
-    - 전역 캐시에 저장된 OCRPipelines 인스턴스를 반환한다.
+    - 프로필별 전역 캐시에 저장된 OCRPipelines 인스턴스를 반환한다.
     - 아직 생성되지 않았다면 _load_pipeline() 을 호출해 생성 후 캐시에 저장한다.
+    - 추론 백엔드는 config.INFERENCE_BACKEND(OCR_INFERENCE_BACKEND 환경변수)로 정한다.
+    - 처리 프로필은 profile_name (없으면 OCR_PROFILE 기본 프로필)로 정한다.
+      다른 프로필을 처음 쓰면 그 프로필의 모델을 추가로 로드한다.
     """
-    global _pipeline
+    profile = get_profile(profile_name)
+    pipeline = _pipelines.get(profile.name)
+    if pipeline is None:
+        with _pipelines_lock:
+            pipeline = _pipelines.get(profile.name)
+            if pipeline is None:
+                pipeline = _load_pipeline(profile)
+                _pipelines[profile.name] = pipeline
 
-    if _pipeline is None:
-        _pipeline = _load_pipeline()
-
-    return _pipeline
+    return pipeline
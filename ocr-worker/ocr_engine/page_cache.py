@@ -0,0 +1,248 @@
+# ocr_engine/page_cache.py
+from __future__ import annotations
+
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Iterator, Optional
+
+import numpy as np
+
+from .config import PAGE_CACHE_DIR, PAGE_CACHE_MAX_BYTES
+from .pdf_render import RenderSettings, clamp_pages, render_page
+from .pdf_source import PdfSource
+
+
+__all__ = ["PageImageCache", "get_page_cache"]
+
+# 캐시 크기가 상한을 넘으면, 이 비율까지 줄어들 때까지 삭제한다 (eviction 빈도 완화)
+_EVICT_LOW_WATERMARK = 0.9
+
+
+class PageImageCache:
+    """
+    렌더링된 PDF 페이지 이미지를 로컬 디스크에 보관하는 캐시.
+
+    - 키: (PDF 내용 해시, 페이지 인덱스, 렌더 설정)
+    - 값: 페이지 이미지의 raw 배열(.npy). 읽을 때는 np.load(mmap_mode="r") 로
+      메모리 매핑만 하므로, 히트 시 PDF 디코딩/렌더링/배열 복사가 모두 생략된다.
+    - 같은 호스트의 여러 워커 프로세스가 디렉터리를 공유한다.
+      쓰기는 임시 파일 → os.replace 로 원자적으로 처리해서 반쯤 쓰인 파일을 읽지 않게 한다.
+    - 파일 mtime 을 "마지막 사용 시각"으로 사용하는 LRU 방식으로,
+      전체 크기가 max_bytes 를 넘으면 오래된 페이지부터 삭제한다.
+
+    디렉터리 구조:
+      <root>/<digest[:2]>/<digest>/<settings.tag>/meta.json
+      <root>/<digest[:2]>/<digest>/<settings.tag>/page-00000.npy
+    """
+
+    def __init__(self, root: str | Path, max_bytes: int) -> None:
+        self.root = Path(root).expanduser()
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        # 프로세스 내 추정치. 다른 프로세스의 쓰기는 eviction 시 전체 스캔으로 보정된다.
+        self._approx_bytes = self._scan_total_bytes()
+
+    # --------------------------------------------------------
+    # 공개 API
+    # --------------------------------------------------------
+    def iter_pages(
+        self,
+        source: PdfSource,
+        settings: RenderSettings,
+        skip: frozenset[int] = frozenset(),
+        pages: Optional[range] = None,
+    ) -> Iterator[tuple[int, np.ndarray]]:
+        """
+        PDF 의 페이지 이미지를 (page_index, image) 로 순서대로 반환한다.
+
+        - 캐시에 있는 페이지는 memory-mapped 배열로 바로 반환한다.
+        - 없는 페이지만 PDF 를 열어 렌더링하고, 캐시에 저장한 뒤 반환한다.
+        - 모든 페이지가 캐시에 있으면 PDF 문서는 열지도 않는다.
+        - skip 에 든 페이지(이미 체크포인트된 페이지)는 읽지도 렌더링하지도 않는다.
+        - pages 를 주면 그 범위의 페이지만 반환한다 (sub-job 의 페이지 범위).
+        """
+        doc_dir = self._doc_dir(source.digest(), settings)
+        pdf = None
+        try:
+            page_count = self._read_page_count(doc_dir)
+            if page_count is None:
+                pdf = source.open_document()
+                page_count = len(pdf)
+                self._write_meta(doc_dir, page_count)
+
+            for page_index in clamp_pages(pages, page_count):
+                if page_index in skip:
+                    continue
+
+                cached = self._load(doc_dir, page_index)
+                if cached is not None:
+                    self.hits += 1
+                    yield page_index, cached
+                    continue
+
+                if pdf is None:
+                    pdf = source.open_document()
+                image = render_page(pdf, page_index, settings)
+                self._store(doc_dir, page_index, image)
+                self.misses += 1
+                yield page_index, image
+        finally:
+            if pdf is not None:
+                pdf.close()
+
+    def page_count(self, source: PdfSource, settings: RenderSettings) -> int:
+        """
+        PDF 페이지 수. 캐시 메타에 있으면 PDF 를 열지 않고 반환한다.
+        """
+        doc_dir = self._doc_dir(source.digest(), settings)
+        page_count = self._read_page_count(doc_dir)
+        if page_count is None:
+            pdf = source.open_document()
+            try:
+                page_count = len(pdf)
+            finally:
+                pdf.close()
+            self._write_meta(doc_dir, page_count)
+        return page_count
+
+    # --------------------------------------------------------
+    # 내부 구현
+    # --------------------------------------------------------
+    def _doc_dir(self, digest: str, settings: RenderSettings) -> Path:
+        return self.root / digest[:2] / digest / settings.tag
+
+    @staticmethod
+    def _page_path(doc_dir: Path, page_index: int) -> Path:
+        return doc_dir / f"page-{page_index:05d}.npy"
+
+    @staticmethod
+    def _read_page_count(doc_dir: Path) -> Optional[int]:
+        try:
+            with open(doc_dir / "meta.json", "r", encoding="utf-8") as f:
+                return int(json.load(f)["page_count"])
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _write_meta(self, doc_dir: Path, page_count: int) -> None:
+        tmp = doc_dir / f".meta.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            doc_dir.mkdir(parents=True, exist_ok=True)
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"page_count": page_count}, f)
+            os.replace(tmp, doc_dir / "meta.json")
+        except OSError as e:
+            # 다른 프로세스의 eviction 이 디렉터리를 막 지운 경우 등. 메타는 다음에 다시 쓴다.
+            print(f"[PageCache] failed to store {doc_dir / 'meta.json'}: {e}", flush=True)
+            tmp.unlink(missing_ok=True)
+
+    def _load(self, doc_dir: Path, page_index: int) -> Optional[np.ndarray]:
+        path = self._page_path(doc_dir, page_index)
+        try:
+            image = np.load(path, mmap_mode="r")
+            # LRU: 마지막 사용 시각 갱신
+            os.utime(path)
+            return image
+        except (OSError, ValueError):
+            # 파일이 없거나(다른 프로세스가 evict) 손상된 경우 → miss 로 처리
+            return None
+
+    def _store(self, doc_dir: Path, page_index: int, image: np.ndarray) -> None:
+        doc_dir.mkdir(parents=True, exist_ok=True)
+        path = self._page_path(doc_dir, page_index)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            with open(tmp, "wb") as f:
+                np.save(f, image, allow_pickle=False)
+            os.replace(tmp, path)
+        except OSError as e:
+            # 캐시 저장 실패(디스크 부족 등)는 OCR 자체를 실패시키지 않는다.
+            print(f"[PageCache] failed to store {path}: {e}", flush=True)
+            tmp.unlink(missing_ok=True)
+            return
+
+        with self._lock:
+            self._approx_bytes += path.stat().st_size
+            need_evict = self._approx_bytes > self.max_bytes
+        if need_evict:
+            self._evict()
+
+    def _scan_total_bytes(self) -> int:
+        total = 0
+        for path in self.root.rglob("*.npy"):
+            try:
+                total += path.stat().st_size
+            except OSError:
+                pass
+        return total
+
+    def _evict(self) -> None:
+        """
+        전체 캐시를 스캔해서 mtime 이 오래된 페이지부터 삭제한다.
+
+        - 다른 프로세스가 동시에 삭제했을 수 있으므로 FileNotFoundError 는 무시한다.
+        - 페이지가 하나도 남지 않은 문서는 meta.json 과 빈 디렉터리까지 지운다.
+        """
+        with self._lock:
+            entries = []
+            for path in self.root.rglob("*.npy"):
+                try:
+                    st = path.stat()
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+
+            total = sum(size for _, size, _ in entries)
+            target = int(self.max_bytes * _EVICT_LOW_WATERMARK)
+            entries.sort()
+
+            touched: set[Path] = set()
+            for _, size, path in entries:
+                if total <= target:
+                    break
+                try:
+                    path.unlink()
+                except FileNotFoundError:
+                    pass
+                total -= size
+                touched.add(path.parent)
+
+            self._approx_bytes = total
+
+            for doc_dir in touched:
+                self._remove_empty_doc(doc_dir)
+
+    @staticmethod
+    def _remove_empty_doc(doc_dir: Path) -> None:
+        """<digest>/<tag> 에 페이지가 남지 않았으면 meta.json 과 빈 상위 디렉터리를 지운다."""
+        if any(doc_dir.glob("*.npy")):
+            return
+        (doc_dir / "meta.json").unlink(missing_ok=True)
+        # <tag> → <digest> → <digest[:2]> 순서로, 비어 있는 동안만 올라간다.
+        for d in (doc_dir, doc_dir.parent, doc_dir.parent.parent):
+            try:
+                d.rmdir()
+            except OSError:
+                # 다른 렌더 설정의 페이지나 다른 프로세스가 쓰는 중인 임시 파일이 남아 있음
+                break
+
+
+_page_cache: Optional[PageImageCache] = None
+
+
+def get_page_cache() -> PageImageCache:
+    """
+    프로세스 전역 PageImageCache 인스턴스를 반환한다. (get_pipeline 과 같은 지연 생성 방식)
+    """
+    global _page_cache
+
+    if _page_cache is None:
+        _page_cache = PageImageCache(PAGE_CACHE_DIR, PAGE_CACHE_MAX_BYTES)
+
+    return _page_cache
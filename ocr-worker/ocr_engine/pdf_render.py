@@ -0,0 +1,93 @@
+# ocr_engine/pdf_render.py
+from __future__ import annotations
+
+import math
+import threading
+from dataclasses import dataclass
+from typing import Iterator, Optional
+
+import numpy as np
+import pypdfium2 as pdfium
+
+
+__all__ = ["PDFIUM_LOCK", "RenderSettings", "clamp_pages", "iter_rendered_pages", "render_page"]
+
+# pdfium 은 thread-safe 하지 않다. 추론 스레드와 입력 준비 스레드(prepare_input)가
+# 동시에 렌더링할 수 있으므로, 문서 열기 / 페이지 렌더링은 이 lock 안에서만 한다.
+PDFIUM_LOCK = threading.RLock()
+
+
+@dataclass(frozen=True)
+class RenderSettings:
+    """
+    PDF 페이지를 이미지로 렌더링할 때 사용하는 설정.
+
+    - scale: 72dpi 기준 배율 (2.0 → 144dpi)
+    - max_pixels: 페이지 한 장의 최대 픽셀 수 (0 이면 제한 없음).
+      넘는 페이지는 이 안에 들어오도록 그 페이지만 배율을 낮춘다.
+    - tag 는 페이지 캐시 키의 일부로 쓰이므로, 렌더 결과에 영향을 주는
+      필드가 추가되면 tag 에도 반드시 반영해야 한다.
+    """
+
+    scale: float = 2.0
+    max_pixels: int = 0
+
+    @property
+    def tag(self) -> str:
+        tag = f"scale{self.scale:g}"
+        if self.max_pixels:
+            tag += f"-px{self.max_pixels}"
+        return tag
+
+    def scale_for(self, width_pt: float, height_pt: float) -> float:
+        """페이지 크기(pt)에 대해 max_pixels 를 넘지 않는 렌더링 배율을 구한다."""
+        pixels = width_pt * height_pt * self.scale * self.scale
+        if not self.max_pixels or pixels <= self.max_pixels:
+            return self.scale
+        return self.scale * math.sqrt(self.max_pixels / pixels)
+
+
+def clamp_pages(pages: Optional[range], page_count: int) -> range:
+    """요청한 페이지 범위를 실제 문서 페이지 수 안으로 자른다. None 이면 전체."""
+    if pages is None:
+        return range(page_count)
+    return range(max(0, pages.start), min(page_count, pages.stop))
+
+
+def render_page(
+    pdf: pdfium.PdfDocument, page_index: int, settings: RenderSettings
+) -> np.ndarray:
+    """
+    PDF 한 페이지를 BGR uint8 배열(H, W, 3)로 렌더링한다.
+
+    - PaddleX 파이프라인은 cv2 관례(BGR)의 ndarray 입력을 그대로 받는다.
+    - pdfium 의 기본 바이트 순서가 BGR 이므로 별도 변환이 필요 없다.
+    """
+    with PDFIUM_LOCK:
+        page = pdf[page_index]
+        try:
+            bitmap = page.render(scale=settings.scale_for(*page.get_size()))
+            try:
+                # to_numpy() 는 bitmap 버퍼를 참조하므로, close 전에 복사해 둔다.
+                return np.array(bitmap.to_numpy()[:, :, :3], copy=True)
+            finally:
+                bitmap.close()
+        finally:
+            page.close()
+
+
+def iter_rendered_pages(
+    pdf: pdfium.PdfDocument,
+    settings: RenderSettings,
+    skip: frozenset[int] = frozenset(),
+    pages: Optional[range] = None,
+) -> Iterator[tuple[int, np.ndarray]]:
+    """
+    페이지 캐시를 쓰지 않을 때, 문서의 페이지를 (page_index, image) 로 순서대로 렌더링한다.
+
+    - pages 를 주면 그 범위(원본 문서 기준 page_index)만 렌더링한다. (sub-job 의 페이지 범위)
+    """
+    for page_index in clamp_pages(pages, len(pdf)):
+        if page_index in skip:
+            continue
+        yield page_index, render_page(pdf, page_index, settings)
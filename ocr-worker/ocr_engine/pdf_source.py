@@ -0,0 +1,199 @@
+# ocr_engine/pdf_source.py
+from __future__ import annotations
+
+import hashlib
+import io
+import mmap
+import os
+from multiprocessing.shared_memory import SharedMemory
+from pathlib import Path
+from typing import Any, Optional
+
+import pypdfium2 as pdfium
+
+from .pdf_render import PDFIUM_LOCK
+
+
+__all__ = ["PdfSource", "file_digest"]
+
+_DIGEST_CHUNK = 1024 * 1024
+
+# (path, size, mtime_ns) → sha256 hex. 같은 파일을 매번 다시 해시하지 않기 위한 캐시
+_digest_memo: dict[tuple[str, int, int], str] = {}
+
+
+def file_digest(path: str | Path) -> str:
+    """
+    PDF 파일 내용의 sha256 해시를 구한다.
+
+    - 파일 이름이 아니라 내용 기준이므로, 같은 PDF 가 다른 이름으로 들어와도 캐시를 공유한다.
+    - (경로, 크기, 수정시각)이 같으면 프로세스 내 메모에서 바로 반환한다.
+    """
+    st = os.stat(path)
+    memo_key = (str(path), st.st_size, st.st_mtime_ns)
+    digest = _digest_memo.get(memo_key)
+    if digest is not None:
+        return digest
+
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(_DIGEST_CHUNK)
+            if not chunk:
+                break
+            h.update(chunk)
+    digest = h.hexdigest()
+    _digest_memo[memo_key] = digest
+    return digest
+
+
+class _BufferReader(io.RawIOBase):
+    """
+    memoryview 를 pdfium 이 요구하는 byte stream(seek/tell/read/readinto)으로 노출한다.
+
+    - io.BytesIO 와 달리 원본 버퍼를 복사하지 않는다.
+    - pdfium 이 요청하는 블록만 readinto 로 pdfium 쪽 버퍼에 채워 준다.
+    """
+
+    def __init__(self, view: memoryview) -> None:
+        super().__init__()
+        self._view = view
+        self._pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        if whence == os.SEEK_SET:
+            self._pos = offset
+        elif whence == os.SEEK_CUR:
+            self._pos += offset
+        elif whence == os.SEEK_END:
+            self._pos = len(self._view) + offset
+        else:
+            raise ValueError(f"invalid whence: {whence}")
+        return self._pos
+
+    def tell(self) -> int:
+        return self._pos
+
+    def readinto(self, buffer: Any) -> int:
+        dst = memoryview(buffer).cast("B")
+        n = max(0, min(len(dst), len(self._view) - self._pos))
+        dst[:n] = self._view[self._pos:self._pos + n]
+        self._pos += n
+        return n
+
+
+class PdfSource:
+    """
+    OCR 입력 PDF 를 "바이트 버퍼" 로 추상화한 클래스.
+
+    - from_path          : DATA_DIR 의 파일을 mmap 으로 매핑 (read() 로 메모리에 올리지 않음)
+    - from_buffer        : 이미 메모리에 있는 bytes / bytearray / memoryview (예: HTTP 업로드 본문)
+    - from_shared_memory : 다른 프로세스가 만든 SharedMemory 세그먼트에 attach
+
+    어느 경우든 내부적으로는 memoryview 하나만 들고 있고,
+    해시 계산(page cache 키)과 pdfium 문서 열기 모두 그 view 를 직접 읽는다.
+    즉 프로듀서 → 추론까지 임시 파일이나 중간 복사본을 만들지 않는다.
+
+    사용 후에는 close() (또는 with 문)로 mmap / SharedMemory 를 해제해야 한다.
+    """
+
+    def __init__(
+        self,
+        view: memoryview,
+        label: str,
+        path: Optional[Path] = None,
+        closers: tuple = (),
+    ) -> None:
+        self._view = view
+        self.label = label
+        self.path = path
+        self._closers = closers
+        self._digest: Optional[str] = None
+
+    # --------------------------------------------------------
+    # 생성자
+    # --------------------------------------------------------
+    @classmethod
+    def from_path(cls, path: str | Path) -> "PdfSource":
+        path = Path(path)
+        with open(path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(memoryview(mm), label=path.name, path=path, closers=(mm.close,))
+
+    @classmethod
+    def from_buffer(cls, buffer: Any, label: str = "<buffer>") -> "PdfSource":
+        return cls(memoryview(buffer).cast("B"), label=label)
+
+    @classmethod
+    def from_shared_memory(cls, name: str, size: Optional[int] = None) -> "PdfSource":
+        """
+        이름으로 SharedMemory 에 attach 한다.
+
+        - SharedMemory 는 페이지 단위로 잡히므로 실제 PDF 크기(size)를 함께 받아 잘라 쓴다.
+        - 세그먼트의 소유(unlink)는 만든 쪽(같은 호스트의 프로듀서)의 책임이다.
+        """
+        buf, closers = _attach_shared_memory(name)
+        view = buf if size is None else buf[:size]
+        return cls(view, label=f"shm:{name}", closers=closers)
+
+    # --------------------------------------------------------
+    # 공개 API
+    # --------------------------------------------------------
+    @property
+    def size(self) -> int:
+        return len(self._view)
+
+    def digest(self) -> str:
+        if self._digest is None:
+            if self.path is not None:
+                self._digest = file_digest(self.path)
+            else:
+                self._digest = hashlib.sha256(self._view).hexdigest()
+        return self._digest
+
+    def open_document(self) -> pdfium.PdfDocument:
+        with PDFIUM_LOCK:
+            return pdfium.PdfDocument(_BufferReader(self._view))
+
+    def close(self) -> None:
+        self._view.release()
+        for close in self._closers:
+            close()
+        self._closers = ()
+
+    def __enter__(self) -> "PdfSource":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+def _attach_shared_memory(name: str) -> tuple[memoryview, tuple]:
+    """
+    이름으로 SharedMemory 세그먼트에 읽기 전용으로 attach 한다. (버퍼, 닫을 때 부를 함수들) 반환.
+
+    - 3.12 이하의 SharedMemory(name=...) 는 attach 만 해도 resource tracker 에 등록되어,
+      이 프로세스가 끝날 때 남의 세그먼트를 unlink 한다. 그렇다고 등록을 지우면(unregister)
+      같은 프로세스가 만든 세그먼트의 등록까지 지워져 만든 쪽의 unlink 가 실패한다.
+      → POSIX 에서는 tracker 를 거치지 않고 shm_open + mmap 으로 직접 연다.
+    """
+    if os.name == "nt":
+        # Windows 는 resource tracker 를 쓰지 않는다 (마지막 핸들이 닫히면 세그먼트가 사라짐)
+        shm = SharedMemory(name=name)
+        return shm.buf, (shm.close,)
+
+    import _posixshmem
+
+    fd = _posixshmem.shm_open(name if name.startswith("/") else f"/{name}", os.O_RDONLY, mode=0o600)
+    try:
+        mm = mmap.mmap(fd, os.fstat(fd).st_size, access=mmap.ACCESS_READ)
+    finally:
+        os.close(fd)
+    view = memoryview(mm)
+    return view, (view.release, mm.close)
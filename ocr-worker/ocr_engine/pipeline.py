@@ -15,6 +15,7 @@ class OCRPipelines:
 
     - 초기화 시 수식 인식 모델/레이아웃 모델의 디렉터리와 이름, 디바이스를 전달받아
       FormulaRecognitionPipeline 인스턴스를 생성한다.
+    - pipeline_options 로 추론 백엔드 관련 옵션(enable_mkldnn, enable_hpi 등)을 그대로 전달한다.
     - predict() 메서드에서는 내부적으로 Lock 을 사용하여 thread-safe 하게
       model.predict() 를 호출한다.
     """
@@ -28,6 +29,7 @@ class OCRPipelines:
         device: str = "cpu",
         use_doc_orientation_classify: bool = False,
         use_doc_unwarping: bool = False,
+        **pipeline_options: Any,
     ) -> None:
         try:
             from paddleocr import FormulaRecognitionPipeline
@@ -54,8 +56,18 @@ class OCRPipelines:
             use_doc_orientation_classify=use_doc_orientation_classify,
             use_doc_unwarping=use_doc_unwarping,
             device=device,
+            **pipeline_options,
         )
 
     def predict(self, input_path: str, batch_size: int = 1) -> Any:
         with self._lock:
             return self.model.predict(input=input_path, batch_size=batch_size)
+
+    def predict_images(self, images: list[Any], batch_size: int = 1) -> Any:
+        """
+        이미 렌더링된 페이지 이미지(ndarray) 목록을 입력으로 추론한다.
+
+        - 페이지 캐시를 사용할 때 PDF 디코딩/렌더링 단계를 건너뛰기 위한 경로.
+        """
+        with self._lock:
+            return self.model.predict(input=images, batch_size=batch_size)
@@ -1,23 +1,407 @@
 # ocr_engine/predictor.py
+import time
+from itertools import islice
 from pathlib import Path
+from typing import Any, Iterator, Optional
 
-from .config import DATA_DIR
+import numpy as np
+
+from .checkpoint import CheckpointStore, get_checkpoint_store, page_result_to_json
+from .cpu_budget import get_throughput_meter
+from .formula_gate import get_formula_gate, skipped_page_result
+from .config import (
+    DATA_DIR,
+    MAX_PAGE_PIXELS,
+    MAX_PDF_PAGES,
+    PAGE_CACHE_ENABLED,
+    PDF_RENDER_SCALE,
+    STREAM_WINDOW_PAGES,
+)
 from .model_loader import get_pipeline
-from .schemas import PredictRequest, PredictResponse
+from .page_cache import get_page_cache
+from .pdf_render import RenderSettings, clamp_pages, iter_rendered_pages
+from .pdf_source import PdfSource
+from .profiles import ProcessingProfile, get_profile, get_profile_speeds
+from .schemas import PredictResponse, WorkerPredictRequest
+
+# 페이지 수 조회용 렌더 설정 (페이지 캐시 메타 위치). 실제 렌더링은 프로필의 render_settings 를 쓴다.
+_RENDER_SETTINGS = RenderSettings(scale=PDF_RENDER_SCALE, max_pixels=MAX_PAGE_PIXELS)
+
+# page_end 없이 page_start 만 준 경우의 끝 (문서 끝까지)
+MAX_PAGE_INDEX = 1 << 31
+
+
+def _open_source(req: WorkerPredictRequest, pdf_data: Optional[Any]) -> PdfSource | str:
+    """
+    요청에 맞는 PdfSource 를 연다. 열 수 없으면 실패 메시지(str)를 반환한다.
+    """
+    if pdf_data is not None:
+        return PdfSource.from_buffer(pdf_data)
 
+    if req.shm_name is not None:
+        try:
+            return PdfSource.from_shared_memory(req.shm_name, req.shm_size)
+        except FileNotFoundError:
+            return f"pdf not found: shm:{req.shm_name}"
 
-def run_ocr(req: PredictRequest) -> PredictResponse:
-   
-    pipelines = get_pipeline()
+    if req.pdf_name is None:
+        return "pdf not found: no pdf source given"
 
     pdf_path: Path = DATA_DIR / req.pdf_name
     if not pdf_path.is_file():
-        return PredictResponse(
-            message=f"pdf not found: {pdf_path}"
+        return f"pdf not found: {pdf_path}"
+    try:
+        return PdfSource.from_path(pdf_path)
+    except ValueError:
+        # 빈 파일은 mmap 할 수 없다.
+        return f"pdf not found: {pdf_path} is empty"
+
+
+def _page_range(req: WorkerPredictRequest) -> Optional[range]:
+    """sub-job 이면 처리할 페이지 범위, 아니면 None(전체)."""
+    if req.page_start is None and req.page_end is None:
+        return None
+    start = req.page_start or 0
+    stop = req.page_end if req.page_end is not None else MAX_PAGE_INDEX
+    return range(start, stop)
+
+
+def _iter_pages(
+    source: PdfSource,
+    settings: RenderSettings,
+    skip: frozenset[int] = frozenset(),
+    pages: Optional[range] = None,
+) -> Iterator[tuple[int, np.ndarray]]:
+    if PAGE_CACHE_ENABLED:
+        # 재시도/중복 Job 이면 캐시 히트 → PDF 디코딩/렌더링 없이 바로 추론
+        yield from get_page_cache().iter_pages(source, settings, skip, pages)
+        return
+
+    pdf = source.open_document()
+    try:
+        yield from iter_rendered_pages(pdf, settings, skip, pages)
+    finally:
+        pdf.close()
+
+
+def _page_count(source: PdfSource) -> int:
+    if PAGE_CACHE_ENABLED:
+        return get_page_cache().page_count(source, _RENDER_SETTINGS)
+
+    pdf = source.open_document()
+    try:
+        return len(pdf)
+    finally:
+        pdf.close()
+
+
+def _check_limits(source: PdfSource, pages: Optional[range] = None) -> Optional[str]:
+    """
+    처리 한도를 넘는 문서면 실패 메시지(str)를 반환한다.
+
+    - 페이지 범위(sub-job)가 주어지면 그 범위의 페이지 수로 판단한다.
+    """
+    if MAX_PDF_PAGES > 0:
+        page_count = len(clamp_pages(pages, _page_count(source)))
+        if page_count > MAX_PDF_PAGES:
+            return f"pdf too large: {page_count} pages (limit {MAX_PDF_PAGES})"
+    return None
+
+
+def _iter_windows(
+    pages: Iterator[tuple[int, np.ndarray]], size: int
+) -> Iterator[list[tuple[int, np.ndarray]]]:
+    """
+    페이지를 최대 size 장씩 묶어서 반환한다.
+
+    - 다음 창을 만들기 전에 이전 창 리스트의 참조를 놓으므로,
+      호출자가 창을 다 쓰고 버리면 메모리에는 항상 최대 size 장만 남는다.
+    """
+    window: list[tuple[int, np.ndarray]] = []
+    for item in pages:
+        window.append(item)
+        if len(window) >= size:
+            yield window
+            window = []
+    if window:
+        yield window
+
+
+class PreparedInput:
+    """
+    추론 직전까지 준비해 둔 OCR 입력 한 건.
+
+    - 열어 둔 PdfSource, 체크포인트에서 복원한 페이지 목록, 미리 렌더링한 첫 창(STREAM_WINDOW_PAGES 장)을 들고 있다.
+    - 파이프라인 워커가 앞 Job 을 추론하는 동안 다음 Job 의 디스크 읽기 / 해시 / 렌더링을 끝내 두는 데 쓴다.
+    - 렌더링 해상도와 추론 모델은 req.profile 의 처리 프로필을 따른다.
+    - gated 는 수식 후보가 없어 렌더링 / 추론을 통째로 건너뛸 페이지 (formula_gate).
+    - message 가 있으면 준비 단계에서 이미 실패한 입력이다 (pdf not found / pdf too large).
+
+    run_ocr 에 넘기면 run_ocr 가 close 한다. 넘기지 못하고 버릴 때는 직접 close() 해야 한다.
+    """
+
+    def __init__(
+        self,
+        req: WorkerPredictRequest,
+        source: Optional[PdfSource] = None,
+        message: Optional[str] = None,
+        done: Optional[dict[int, str]] = None,
+        head: Optional[list[tuple[int, np.ndarray]]] = None,
+    ) -> None:
+        self.req = req
+        self.profile: ProcessingProfile = get_profile(req.profile)
+        self.source = source
+        self.message = message
+        self.done = done or {}
+        self.gated: set[int] = set()
+        self.head = head or []
+
+    def close(self) -> None:
+        self.head = []
+        if self.source is not None:
+            self.source.close()
+            self.source = None
+
+    def __enter__(self) -> "PreparedInput":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+def prepare_input(req: WorkerPredictRequest, pdf_data: Optional[Any] = None) -> PreparedInput:
+    """
+    PDF 를 열고(mmap) 한도 검사, 체크포인트 조회, 첫 창 렌더링까지 해 둔다.
+
+    - 추론 파이프라인은 건드리지 않으므로, 추론과 다른 스레드에서 돌려도 된다.
+    """
+    source = _open_source(req, pdf_data)
+    if isinstance(source, str):
+        return PreparedInput(req, message=source)
+
+    prepared = PreparedInput(req, source=source)
+    try:
+        pages = _page_range(req)
+        too_large = _check_limits(source, pages)
+        if too_large is not None:
+            prepared.close()
+            return PreparedInput(req, message=too_large)
+
+        if req.job_id is not None:
+            prepared.done = _load_checkpoint(source, req.job_id)
+        prepared.gated = _gate_pages(prepared, pages)
+
+        page_iter = _iter_pages(
+            source, prepared.profile.render_settings, skip=_skipped(prepared), pages=pages
         )
+        try:
+            prepared.head = list(islice(page_iter, max(1, STREAM_WINDOW_PAGES)))
+        finally:
+            page_iter.close()
+    except BaseException:
+        prepared.close()
+        raise
+    return prepared
+
+
+def _load_checkpoint(source: PdfSource, job_id: int) -> dict[int, str]:
+    store = get_checkpoint_store()
+    if store is None:
+        return {}
+    try:
+        done = store.load(job_id, source.digest())
+    except Exception as e:
+        print(f"[OCR] checkpoint load failed job_id={job_id}: {e}", flush=True)
+        return {}
 
-    _ = pipelines.predict(input_path=str(pdf_path), batch_size=1)
+    if done:
+        print(f"[OCR] job_id={job_id} resume: {len(done)} page(s) already done", flush=True)
+    return done
 
-    return PredictResponse(
-        message="ok"
+
+def _gate_pages(prepared: PreparedInput, pages: Optional[range]) -> set[int]:
+    """
+    텍스트 레이어로 수식 후보가 없는 페이지를 고른다. (OCR_FORMULA_GATE=1 이 아니면 빈 집합)
+
+    - gating 실패는 OCR 을 막지 않는다 (모든 페이지를 그대로 추론할 뿐).
+    """
+    gate = get_formula_gate()
+    if gate is None:
+        return set()
+
+    source = prepared.source
+    try:
+        candidates = [
+            page_index
+            for page_index in clamp_pages(pages, _page_count(source))
+            if page_index not in prepared.done
+        ]
+        if not candidates:
+            return set()
+        pdf = source.open_document()
+        try:
+            return gate.scan(pdf, candidates, get_profile_speeds().estimate(prepared.profile.name))
+        finally:
+            pdf.close()
+    except Exception as e:
+        print(f"[OCR] formula gate failed for {source.label}: {e}", flush=True)
+        return set()
+
+
+def _skipped(prepared: PreparedInput) -> frozenset[int]:
+    """렌더링 / 추론하지 않을 페이지: 체크포인트에 이미 있는 페이지 + 수식 후보가 없는 페이지."""
+    return frozenset(prepared.done) | prepared.gated
+
+
+def _iter_prepared_windows(prepared: PreparedInput) -> Iterator[list[tuple[int, np.ndarray]]]:
+    """
+    미리 렌더링한 첫 창을 먼저 내보내고, 나머지 페이지는 그 뒤로 이어서 렌더링한다.
+    """
+    head, prepared.head = prepared.head, []
+    skip = _skipped(prepared)
+    if head:
+        skip |= {page_index for page_index, _ in head}
+        yield head
+        if len(head) < max(1, STREAM_WINDOW_PAGES):
+            # 첫 창을 다 못 채웠다 → 남은 페이지 없음
+            return
+        del head
+    page_iter = _iter_pages(
+        prepared.source, prepared.profile.render_settings, skip=skip, pages=_page_range(prepared.req)
     )
+    yield from _iter_windows(page_iter, max(1, STREAM_WINDOW_PAGES))
+
+
+def _run_streaming(pipelines: Any, prepared: PreparedInput) -> int:
+    """
+    체크포인트 없이 페이지를 STREAM_WINDOW_PAGES 장씩 렌더링 → 추론 → 해제한다.
+
+    - 문서 전체 페이지를 한 번에 메모리에 올리지 않으므로, peak 메모리는 문서 길이와 무관하다.
+
+    반환값: 추론한 페이지 수
+    """
+    processed = 0
+    for window in _iter_prepared_windows(prepared):
+        images = [image for _, image in window]
+        results = pipelines.predict_images(images, batch_size=1)
+        processed += len(images)
+        # 다음 창을 렌더링하기 전에 이번 창의 이미지/결과를 놓는다.
+        del window, images, results
+    return processed
+
+
+def _run_with_checkpoint(
+    pipelines: Any,
+    prepared: PreparedInput,
+    job_id: int,
+    store: CheckpointStore,
+) -> tuple[int, int]:
+    """
+    페이지 단위로 추론하면서, 페이지가 끝날 때마다 결과를 체크포인트에 저장한다.
+
+    - 이미 저장된 페이지(prepared.done)는 렌더링/추론 모두 건너뛴다 (재전달 시 첫 미완료 페이지부터 이어서).
+    - 수식 후보가 없어 건너뛴 페이지(prepared.gated)는 "수식 0개" 결과로 바로 저장한다.
+    - 체크포인트 저장소 장애는 OCR 자체를 실패시키지 않는다 (처음부터 다시 할 뿐).
+
+    반환값: (체크포인트에서 복원된 페이지 수, 이번에 추론한 페이지 수)
+    """
+    digest = prepared.source.digest()
+    for page_index in sorted(prepared.gated):
+        try:
+            store.save(job_id, digest, page_index, page_result_to_json(skipped_page_result(page_index)))
+        except Exception as e:
+            print(
+                f"[OCR] checkpoint save failed job_id={job_id}, page={page_index}: {e}",
+                flush=True,
+            )
+
+    processed = 0
+    for window in _iter_prepared_windows(prepared):
+        results = pipelines.predict_images([image for _, image in window], batch_size=1)
+        processed += len(window)
+        for (page_index, _), result in zip(window, results):
+            try:
+                store.save(job_id, digest, page_index, page_result_to_json(result))
+            except Exception as e:
+                print(
+                    f"[OCR] checkpoint save failed job_id={job_id}, page={page_index}: {e}",
+                    flush=True,
+                )
+        del window, results
+
+    return len(prepared.done), processed
+
+
+def _record_speed(profile: ProcessingProfile, processed: int, elapsed_sec: float) -> None:
+    get_throughput_meter().record(processed, elapsed_sec)
+    get_profile_speeds().record(profile.name, processed, elapsed_sec)
+
+
+def run_ocr(
+    req: WorkerPredictRequest, pdf_data: Optional[Any] = None, prepared: Optional[PreparedInput] = None
+) -> PredictResponse:
+    """
+    PDF 한 건에 대해 OCR 을 수행한다.
+
+    입력 PDF 는 다음 중 하나에서 읽는다 (모두 파일 복사/임시 파일 없이 버퍼를 직접 사용).
+    - pdf_data     : 호출자가 넘긴 bytes / memoryview / mmap
+    - req.shm_name : 다른 프로세스가 만든 SharedMemory 세그먼트
+    - req.pdf_name : DATA_DIR 아래 파일 (mmap)
+
+    prepared 를 주면(prepare_input 결과) 입력 준비를 건너뛰고 바로 추론한다.
+    req.profile 로 처리 프로필(fast / balanced / accurate)을 고르면 렌더링 해상도와 모델이 바뀐다.
+
+    req.job_id 가 있으면 페이지 단위 체크포인트를 남기고, 재전달된 Job 은 이어서 처리한다.
+    페이지는 STREAM_WINDOW_PAGES 장씩 처리하고, MAX_PDF_PAGES 를 넘는 문서는 "pdf too large" 로 실패한다.
+    req.page_start / req.page_end 가 있으면 그 범위의 페이지만 처리한다 (fan-out sub-job).
+    텍스트 레이어에 수식 후보가 없는 페이지는 추론하지 않는다 (formula_gate, OCR_FORMULA_GATE).
+    """
+    if prepared is None:
+        prepared = prepare_input(req, pdf_data)
+
+    with prepared:
+        if prepared.message is not None:
+            return PredictResponse(
+                message=prepared.message
+            )
+
+        profile = prepared.profile
+        pipelines = get_pipeline(profile.name)
+
+        store = get_checkpoint_store() if req.job_id is not None else None
+
+        started_at = time.perf_counter()
+        if store is not None:
+            resumed, processed = _run_with_checkpoint(pipelines, prepared, req.job_id, store)
+            _record_speed(profile, processed, time.perf_counter() - started_at)
+            return PredictResponse(
+                message="ok",
+                resumed_pages=resumed,
+                skipped_pages=len(prepared.gated),
+                result_ref=store.result_ref(req.job_id),
+            )
+
+        processed = _run_streaming(pipelines, prepared)
+        _record_speed(profile, processed, time.perf_counter() - started_at)
+
+        return PredictResponse(
+            message="ok",
+            skipped_pages=len(prepared.gated),
+        )
+
+
+def count_pdf_pages(pdf_name: str) -> Optional[int]:
+    """
+    DATA_DIR 아래 PDF 의 페이지 수. 파일이 없거나 열 수 없으면 None.
+
+    - 워커가 큰 문서를 페이지 범위 sub-job 으로 나눌지 결정할 때 사용한다.
+    - 페이지 캐시 메타를 같이 쓰므로, 이후 OCR 단계에서 다시 세지 않는다.
+    """
+    source = _open_source(WorkerPredictRequest(pdf_name=pdf_name), None)
+    if isinstance(source, str):
+        return None
+    with source:
+        try:
+            return _page_count(source)
+        except Exception:
+            return None
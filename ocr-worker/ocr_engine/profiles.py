@@ -0,0 +1,189 @@
+# ocr_engine/profiles.py
+"""
+속도/품질 처리 프로필 (accurate / balanced / fast).
+
+낮은 프로필은 더 작은 모델을 쓰므로, 쓰려면 MODEL_ROOT(ocr-worker/models) 아래에 모델을 따로 받아 둬야 한다.
+(PaddleX 공식 추론 모델. 디렉터리 이름은 백엔드 규칙을 따른다: 기본 백엔드면 f"{모델명}_infer")
+- balanced : PP-DocLayout-M_infer, PP-FormulaNet_plus-M_infer
+- fast     : PP-DocLayout-S_infer, PP-FormulaNet_plus-S_infer
+
+모델 디렉터리가 없는 프로필은 choose_profile 이 고르지 않는다 (기본 프로필로 그대로 처리).
+"""
+from __future__ import annotations
+
+import os
+import threading
+from dataclasses import dataclass
+from typing import Optional
+
+from .backends import get_backend
+from .config import FORMULA_MODEL_NAME, INFERENCE_BACKEND, LAYOUT_MODEL_NAME, MAX_PAGE_PIXELS, PDF_RENDER_SCALE
+from .pdf_render import RenderSettings
+
+
+__all__ = [
+    "ProcessingProfile",
+    "PROFILES",
+    "PROFILE_ORDER",
+    "DEFAULT_PROFILE",
+    "get_profile",
+    "choose_profile",
+    "get_profile_speeds",
+    "profile_available",
+]
+
+
+@dataclass(frozen=True)
+class ProcessingProfile:
+    """
+    속도/품질 처리 프로필.
+
+    - render_scale: PDF 렌더링 배율 (72dpi 기준). 낮을수록 렌더링 / 레이아웃 검출이 빠르다.
+    - layout_model_name / formula_model_name: 프로필별 모델 변형.
+      모델 디렉터리는 백엔드 규칙을 따른다 (MODEL_ROOT / f"{모델명}{backend.model_dir_suffix}").
+    - sec_per_page: 페이지당 예상 처리 시간(초) 초기값. 실제 처리 시간이 쌓이면 측정값으로 대체된다.
+    """
+
+    name: str
+    description: str
+    render_scale: float
+    layout_model_name: str
+    formula_model_name: str
+    sec_per_page: float
+
+    @property
+    def render_settings(self) -> RenderSettings:
+        return RenderSettings(scale=self.render_scale, max_pixels=MAX_PAGE_PIXELS)
+
+
+def _parse_sec_per_page(spec: str) -> dict[str, float]:
+    """OCR_PROFILE_SEC_PER_PAGE="fast=1.5,accurate=8" 형식."""
+    values = {}
+    for item in spec.split(","):
+        if "=" not in item:
+            continue
+        name, value = item.split("=", 1)
+        try:
+            values[name.strip()] = float(value)
+        except ValueError:
+            continue
+    return values
+
+
+_SEC_PER_PAGE = _parse_sec_per_page(os.getenv("OCR_PROFILE_SEC_PER_PAGE", ""))
+
+# 품질 높은 순. 마감이 부족하면 이 순서로 한 단계씩 내린다.
+PROFILE_ORDER = ("accurate", "balanced", "fast")
+
+PROFILES: dict[str, ProcessingProfile] = {
+    profile.name: profile
+    for profile in (
+        ProcessingProfile(
+            name="accurate",
+            description="현재 설정 그대로 (OCR_PDF_RENDER_SCALE, plus-L 레이아웃 / 수식 모델)",
+            render_scale=PDF_RENDER_SCALE,
+            layout_model_name=LAYOUT_MODEL_NAME,
+            formula_model_name=FORMULA_MODEL_NAME,
+            sec_per_page=_SEC_PER_PAGE.get("accurate", 6.0),
+        ),
+        ProcessingProfile(
+            name="balanced",
+            description="같은 해상도, 중간 크기 레이아웃 / 수식 모델",
+            render_scale=PDF_RENDER_SCALE,
+            layout_model_name="PP-DocLayout-M",
+            formula_model_name="PP-FormulaNet_plus-M",
+            sec_per_page=_SEC_PER_PAGE.get("balanced", 3.0),
+        ),
+        ProcessingProfile(
+            name="fast",
+            description="낮은 해상도(1.5배), 작은 레이아웃 / 수식 모델",
+            render_scale=1.5,
+            layout_model_name="PP-DocLayout-S",
+            formula_model_name="PP-FormulaNet_plus-S",
+            sec_per_page=_SEC_PER_PAGE.get("fast", 1.5),
+        ),
+    )
+}
+
+# PredictRequest.profile 을 주지 않았을 때 쓰는 프로필 (기본은 기존 동작과 같은 accurate)
+DEFAULT_PROFILE = os.getenv("OCR_PROFILE", "accurate")
+# 예상 처리 시간이 남은 시간의 이 비율 안에 들어와야 그 프로필을 고른다 (대기 / 상태 변경 여유분)
+DEADLINE_MARGIN = float(os.getenv("OCR_PROFILE_DEADLINE_MARGIN", "0.8"))
+
+
+def get_profile(name: Optional[str] = None) -> ProcessingProfile:
+    name = name or DEFAULT_PROFILE
+    try:
+        return PROFILES[name]
+    except KeyError:
+        raise ValueError(
+            f"unknown processing profile: {name} (available: {', '.join(PROFILES)})"
+        ) from None
+
+
+class ProfileSpeeds:
+    """
+    프로필별 페이지당 처리 시간의 지수 이동 평균(EWMA).
+
+    - 측정값이 없으면 ProcessingProfile.sec_per_page 를 쓴다.
+    - run_ocr 가 Job 마다 (페이지 수, 걸린 시간) 을 기록한다.
+    """
+
+    def __init__(self, alpha: float = 0.2) -> None:
+        self.alpha = alpha
+        self._lock = threading.Lock()
+        self._sec_per_page: dict[str, float] = {}
+
+    def record(self, name: str, pages: int, elapsed_sec: float) -> None:
+        if pages <= 0:
+            return
+        sample = elapsed_sec / pages
+        with self._lock:
+            prev = self._sec_per_page.get(name)
+            self._sec_per_page[name] = sample if prev is None else prev + self.alpha * (sample - prev)
+
+    def estimate(self, name: str) -> float:
+        with self._lock:
+            measured = self._sec_per_page.get(name)
+        return measured if measured is not None else get_profile(name).sec_per_page
+
+
+def profile_available(name: str) -> bool:
+    """현재 추론 백엔드(OCR_INFERENCE_BACKEND)로 이 프로필의 모델 디렉터리가 모두 있는지."""
+    profile = get_profile(name)
+    backend = get_backend(INFERENCE_BACKEND)
+    return all(
+        backend.model_dir(model_name).is_dir()
+        for model_name in (profile.layout_model_name, profile.formula_model_name)
+    )
+
+
+_profile_speeds: Optional[ProfileSpeeds] = None
+
+
+def get_profile_speeds() -> ProfileSpeeds:
+    global _profile_speeds
+
+    if _profile_speeds is None:
+        _profile_speeds = ProfileSpeeds()
+
+    return _profile_speeds
+
+
+def choose_profile(page_count: int, remaining_sec: float, preferred: Optional[str] = None) -> str:
+    """
+    남은 시간 안에 끝날 것으로 보이는 가장 품질 높은 프로필 이름을 고른다.
+
+    - preferred 보다 높은 프로필로 올리지는 않는다.
+    - 모델 디렉터리가 없는 프로필은 건너뛴다 (모델 로드에 실패해 Job 이 FAILED 되는 것보다 늦게라도 끝내는 게 낫다).
+    - 어느 프로필로도 안 되면 쓸 수 있는 가장 빠른 프로필을 쓴다. (그래도 타임아웃보다는 늦은 결과가 낫다)
+    """
+    preferred = get_profile(preferred).name
+    candidates = PROFILE_ORDER[PROFILE_ORDER.index(preferred):] if preferred in PROFILE_ORDER else (preferred,)
+    candidates = (preferred, *(name for name in candidates[1:] if profile_available(name)))
+    speeds = get_profile_speeds()
+    budget = remaining_sec * DEADLINE_MARGIN
+    for name in candidates:
+        if speeds.estimate(name) * page_count <= budget:
+            return name
+    return candidates[-1]
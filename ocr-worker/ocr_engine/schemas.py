@@ -1,8 +1,42 @@
 # ocr_engine/schemas.py
-from pydantic import BaseModel, Field
+from typing import Optional
 
+from pydantic import BaseModel, Field, model_validator
+
+from .profiles import PROFILES
+
+
+class _PredictOptions(BaseModel):
+    """HTTP 요청과 워커 내부 요청이 함께 쓰는 처리 옵션."""
+
+    page_start: Optional[int] = Field(
+        None,
+        ge=0,
+        description="처리할 첫 페이지(0부터, 포함). 큰 문서를 나눈 sub-job 에서 사용한다.",
+    )
+    page_end: Optional[int] = Field(
+        None,
+        ge=1,
+        description="처리할 마지막 페이지(미포함). 없으면 문서 끝까지.",
+    )
+    profile: Optional[str] = Field(
+        None,
+        description="처리 프로필 (fast / balanced / accurate). 렌더링 해상도와 레이아웃 / 수식 모델이 바뀐다. 없으면 서버 기본값(OCR_PROFILE).",
+        examples=["balanced"],
+    )
+
+    @model_validator(mode="after")
+    def _check_options(self):
+        if self.page_start is not None and self.page_end is not None and self.page_end <= self.page_start:
+            raise ValueError("page_end 는 page_start 보다 커야 합니다.")
+        if self.profile is not None and self.profile not in PROFILES:
+            raise ValueError(f"알 수 없는 profile 입니다: {self.profile} (가능: {', '.join(PROFILES)})")
+        return self
+
+
+class PredictRequest(_PredictOptions):
+    """POST /predict 요청 본문."""
 
-class PredictRequest(BaseModel):
     pdf_name: str = Field(
         ...,
         description="ocr-worker/data/pdf 디렉터리 아래에 존재하는 PDF 파일 이름",
@@ -10,5 +44,42 @@ class PredictRequest(BaseModel):
     )
 
 
+class WorkerPredictRequest(_PredictOptions):
+    """
+    run_ocr 에 넘기는 내부 요청. 워커와 같은 프로세스의 호출자만 만든다.
+
+    - SharedMemory 세그먼트 이름이나 체크포인트용 job_id 는 HTTP 클라이언트가 정할 값이 아니므로
+      PredictRequest(HTTP 스키마)에는 두지 않고 여기에만 둔다.
+    """
+
+    pdf_name: Optional[str] = Field(None, description="ocr-worker/data/pdf 아래의 PDF 파일 이름")
+    shm_name: Optional[str] = Field(
+        None,
+        description="PDF 내용이 들어 있는 SharedMemory 세그먼트 이름 (같은 호스트의 프로세스 간 전달용)",
+    )
+    shm_size: Optional[int] = Field(
+        None,
+        ge=1,
+        description="SharedMemory 세그먼트 안의 실제 PDF 바이트 수",
+    )
+    job_id: Optional[int] = Field(
+        None,
+        description="워커가 처리 중인 Job ID. 지정하면 페이지 단위 체크포인트를 남기고, 재전달 시 이어서 처리한다.",
+    )
+
+    @model_validator(mode="after")
+    def _check_single_source(self) -> "WorkerPredictRequest":
+        # 입력 경로는 최대 하나만 허용한다.
+        # (둘 다 없으면 run_ocr(req, pdf_data=...) 로 버퍼를 직접 넘기는 경우)
+        if self.pdf_name is not None and self.shm_name is not None:
+            raise ValueError("pdf_name 과 shm_name 은 동시에 지정할 수 없습니다.")
+        return self
+
+
 class PredictResponse(BaseModel):
     message: str = Field(..., description="처리 결과 메시지")
+    resumed_pages: int = Field(0, description="체크포인트에서 복원되어 추론을 건너뛴 페이지 수")
+    skipped_pages: int = Field(0, description="텍스트 레이어에 수식 후보가 없어 추론을 건너뛴 페이지 수")
+    result_ref: Optional[str] = Field(
+        None, description="페이지 결과가 저장된 위치 (체크포인트를 사용한 경우)"
+    )
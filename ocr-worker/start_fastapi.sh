@@ -4,5 +4,9 @@ set -e
 # 코드 위치로 이동
 cd /app/ocr-worker
 
+# 한 호스트에 OCR 서버를 여러 개 띄울 때는 코어 예산을 환경변수로 넘긴다.
+#   OCR_WORKER_INDEX=0 OCR_WORKER_COUNT=4 [OCR_CPU_CORES=8] ./start_fastapi.sh
+# → 코어를 4등분해서 이 프로세스를 0번 몫에 pinning 하고, 추론 스레드 수도 그만큼으로 맞춘다.
+
 # FastAPI 서버 실행
 exec uvicorn fastapi_server.app.main:app --host 0.0.0.0 --port 8000
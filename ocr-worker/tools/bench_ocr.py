@@ -0,0 +1,289 @@
+# ocr-worker/tools/bench_ocr.py
+"""
+ocr_engine 마이크로 벤치마크 + 회귀 검사 도구.
+
+고정 코퍼스(tools/fixtures/bench/, make_bench_fixtures 로 생성)로 아래를 측정하고,
+저장해 둔 기준값(bench_baseline.json)과 비교해 임계치 이상 나빠진 항목을 표시한다.
+
+- cold load : 새 프로세스에서 paddleocr import + 파이프라인 생성까지 걸린 시간, 그 시점 RSS
+- render    : 페이지 렌더링(pypdfium2) 평균 시간
+- warm      : 워밍업 후 페이지 1장씩 추론한 지연 p50/p95 (전체 / fixture 별 p50)
+- throughput: batch_size 별 코퍼스 전체 추론 처리량(pages/s)
+- peak RSS  : 측정 프로세스의 최대 RSS
+
+paddleocr 업그레이드나 config.py 변경 전후로 같은 머신에서 돌려 비교하는 용도다.
+기준값은 머신마다 다르므로, 처음 한 번 --save-baseline 으로 저장한 뒤 비교한다.
+회귀가 하나라도 있으면 종료 코드 1 로 끝난다.
+
+사용 예 (ocr-worker 디렉터리에서):
+    python -m tools.bench_ocr --save-baseline
+    python -m tools.bench_ocr --backend paddle_mkldnn --batch-sizes 1,4 --threshold 0.15
+    python -m tools.bench_ocr --profile fast
+"""
+import argparse
+import importlib
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+from ocr_engine.backends import BACKENDS, get_backend
+from ocr_engine.config import BASE_DIR, INFERENCE_BACKEND, MAX_PAGE_PIXELS
+from ocr_engine.profiles import DEFAULT_PROFILE, PROFILES, get_profile
+from tools.compare_backends import load_corpus, percentile
+from tools.make_bench_fixtures import FIXTURE_DIR
+
+BASELINE_PATH = Path(__file__).resolve().parent / "bench_baseline.json"
+
+# 값이 클수록 좋은 지표 (나머지는 작을수록 좋음)
+_HIGHER_IS_BETTER_SUFFIX = "_pps"
+
+
+def _peak_rss_mb() -> float:
+    # Linux 의 ru_maxrss 단위는 KB (macOS 는 byte)
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        rss /= 1024
+    return rss / 1024
+
+
+def cold_probe(backend_name: str, profile_name: str) -> dict:
+    """
+    --cold-probe 로 띄운 새 프로세스 안에서 실행된다.
+
+    - 모듈 import 비용까지 포함해야 하므로 부모 프로세스에서 재면 안 된다.
+    """
+    t0 = time.perf_counter()
+    importlib.import_module("paddleocr")
+    from ocr_engine.model_loader import build_pipeline
+
+    import_sec = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    build_pipeline(get_backend(backend_name), get_profile(profile_name))
+    load_sec = time.perf_counter() - t0
+    return {"import_sec": import_sec, "load_sec": load_sec, "rss_mb": _peak_rss_mb()}
+
+
+def measure_cold(backend_name: str, profile_name: str, runs: int) -> dict:
+    """새 프로세스를 runs 번 띄워 cold load 를 재고 중앙값을 쓴다."""
+    samples = []
+    for i in range(runs):
+        out = subprocess.run(
+            [
+                sys.executable, "-m", "tools.bench_ocr", "--cold-probe",
+                "--backend", backend_name, "--profile", profile_name,
+            ],
+            cwd=BASE_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        sample = json.loads(out.stdout.strip().splitlines()[-1])
+        samples.append(sample)
+        print(
+            f"[Bench] cold #{i + 1}: import={sample['import_sec']:.2f}s, "
+            f"load={sample['load_sec']:.2f}s, rss={sample['rss_mb']:.0f}MB",
+            flush=True,
+        )
+    return {
+        "cold_import_sec": statistics.median(s["import_sec"] for s in samples),
+        "cold_load_sec": statistics.median(s["load_sec"] for s in samples),
+        "cold_rss_mb": statistics.median(s["rss_mb"] for s in samples),
+    }
+
+
+def measure_warm(
+    backend_name: str,
+    profile_name: str,
+    pages: list[tuple[str, int, Any]],
+    warmup: int,
+    repeat: int,
+    batch_sizes: list[int],
+) -> dict:
+    """
+    한 프로세스에서 파이프라인을 만든 뒤 warm 지연과 batch_size 별 처리량을 잰다.
+    """
+    from ocr_engine.model_loader import build_pipeline
+
+    pipeline = build_pipeline(get_backend(backend_name), get_profile(profile_name))
+    images = [image for _, _, image in pages]
+
+    for image in images[:warmup]:
+        pipeline.predict_images([image], batch_size=1)
+
+    latencies: list[float] = []
+    by_fixture: dict[str, list[float]] = {}
+    for _ in range(repeat):
+        for pdf_name, page_index, image in pages:
+            t0 = time.perf_counter()
+            pipeline.predict_images([image], batch_size=1)
+            elapsed = time.perf_counter() - t0
+            latencies.append(elapsed)
+            by_fixture.setdefault(Path(pdf_name).stem, []).append(elapsed)
+
+    metrics = {
+        "warm_p50_ms": percentile(latencies, 50) * 1000,
+        "warm_p95_ms": percentile(latencies, 95) * 1000,
+    }
+    for name, values in sorted(by_fixture.items()):
+        metrics[f"fixture.{name}.p50_ms"] = percentile(values, 50) * 1000
+
+    for batch_size in batch_sizes:
+        best = None
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            # predict 결과가 generator 일 수 있으므로 끝까지 소비해야 추론이 끝난다
+            list(pipeline.predict_images(images, batch_size=batch_size))
+            elapsed = time.perf_counter() - t0
+            best = elapsed if best is None else min(best, elapsed)
+        pps = len(images) / best if best else 0.0
+        metrics[f"throughput_b{batch_size}_pps"] = pps
+        print(f"[Bench] batch_size={batch_size}: {pps:.2f} pages/s", flush=True)
+
+    return metrics
+
+
+def environment(backend_name: str, profile_name: str) -> dict:
+    try:
+        from importlib.metadata import version
+
+        paddleocr_version = version("paddleocr")
+    except Exception:
+        paddleocr_version = None
+    profile = get_profile(profile_name)
+    return {
+        "backend": backend_name,
+        "profile": profile.name,
+        "layout_model": profile.layout_model_name,
+        "formula_model": profile.formula_model_name,
+        "paddleocr": paddleocr_version,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "render_scale": profile.render_scale,
+        "max_page_pixels": MAX_PAGE_PIXELS,
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list[dict]:
+    """
+    지표별 변화율을 구한다. 나빠지는 방향으로 threshold(비율)를 넘으면 regression.
+
+    - 기준값에 없는 지표(새로 추가한 batch_size 등)는 비교하지 않는다.
+    """
+    rows = []
+    for key, value in current.items():
+        base = baseline.get(key)
+        if base is None or base == 0:
+            rows.append({"metric": key, "value": value, "baseline": base, "change": None, "regression": False})
+            continue
+        change = (value - base) / base
+        worse = -change if key.endswith(_HIGHER_IS_BETTER_SUFFIX) else change
+        rows.append(
+            {"metric": key, "value": value, "baseline": base, "change": change, "regression": worse > threshold}
+        )
+    return rows
+
+
+def load_baseline(path: Path, key: str) -> Optional[dict]:
+    if not path.exists():
+        return None
+    data = json.loads(path.read_text(encoding="utf-8"))
+    return data.get(key)
+
+
+def save_baseline(path: Path, key: str, metrics: dict, env: dict) -> None:
+    """백엔드:프로필 별로 기준값을 저장한다. 다른 조합의 기준값은 그대로 둔다."""
+    data = json.loads(path.read_text(encoding="utf-8")) if path.exists() else {}
+    data[key] = {"metrics": metrics, "env": env}
+    path.write_text(json.dumps(data, ensure_ascii=False, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+
+
+def print_report(rows: list[dict], threshold: float) -> None:
+    print()
+    print(f"{'metric':<34}{'baseline':>12}{'current':>12}{'change':>10}")
+    for row in rows:
+        base = "-" if row["baseline"] is None else f"{row['baseline']:.2f}"
+        change = "-" if row["change"] is None else f"{row['change'] * 100:+.1f}%"
+        flag = "  REGRESSION" if row["regression"] else ""
+        print(f"{row['metric']:<34}{base:>12}{row['value']:>12.2f}{change:>10}{flag}")
+    print()
+    regressions = [row["metric"] for row in rows if row["regression"]]
+    if regressions:
+        print(f"[Bench] {len(regressions)} regression(s) beyond {threshold * 100:.0f}%: {', '.join(regressions)}")
+    else:
+        print(f"[Bench] no regression beyond {threshold * 100:.0f}%")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="ocr_engine 벤치마크 / 기준값 대비 회귀 검사")
+    parser.add_argument("--backend", default=INFERENCE_BACKEND, choices=sorted(BACKENDS))
+    parser.add_argument("--profile", default=DEFAULT_PROFILE, choices=sorted(PROFILES))
+    parser.add_argument("--corpus", type=Path, default=FIXTURE_DIR, help="fixture PDF 디렉터리")
+    parser.add_argument("--batch-sizes", default="1,2,4,8", help="처리량을 잴 batch_size 목록 (쉼표 구분)")
+    parser.add_argument("--warmup", type=int, default=2, help="측정 전 워밍업 페이지 수")
+    parser.add_argument("--repeat", type=int, default=3, help="warm / 처리량 측정 반복 횟수")
+    parser.add_argument("--cold-runs", type=int, default=3, help="cold load 를 잴 새 프로세스 수 (0 이면 생략)")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH, help="기준값 JSON 경로")
+    parser.add_argument("--save-baseline", action="store_true", help="이번 결과를 기준값으로 저장")
+    parser.add_argument("--threshold", type=float, default=0.10, help="회귀로 볼 변화율 (0.10 = 10%%)")
+    parser.add_argument("--json", type=Path, default=None, help="결과를 JSON 으로 저장할 경로")
+    parser.add_argument("--cold-probe", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.cold_probe:
+        print(json.dumps(cold_probe(args.backend, args.profile)), flush=True)
+        return
+
+    batch_sizes = [int(b) for b in args.batch_sizes.split(",") if b.strip()]
+    settings = get_profile(args.profile).render_settings
+    baseline_key = f"{args.backend}:{args.profile}"
+
+    metrics: dict[str, float] = {}
+    if args.cold_runs > 0:
+        metrics.update(measure_cold(args.backend, args.profile, args.cold_runs))
+
+    t0 = time.perf_counter()
+    pages = load_corpus(args.corpus, settings)
+    if not pages:
+        raise SystemExit(f"no pdf found in {args.corpus} (python -m tools.make_bench_fixtures)")
+    metrics["render_ms_per_page"] = (time.perf_counter() - t0) * 1000 / len(pages)
+    print(f"[Bench] backend={args.backend}, profile={args.profile}, corpus={args.corpus}, pages={len(pages)}", flush=True)
+
+    metrics.update(measure_warm(args.backend, args.profile, pages, args.warmup, args.repeat, batch_sizes))
+    metrics["peak_rss_mb"] = _peak_rss_mb()
+    env = environment(args.backend, args.profile)
+
+    baseline = load_baseline(args.baseline, baseline_key)
+    rows = compare(metrics, baseline["metrics"] if baseline else {}, args.threshold)
+    if baseline and baseline.get("env") != env:
+        print(f"[Bench] warning: baseline env differs: {baseline.get('env')} -> {env}", flush=True)
+    print_report(rows, args.threshold)
+
+    if args.json is not None:
+        args.json.write_text(
+            json.dumps({"env": env, "metrics": metrics, "comparison": rows}, ensure_ascii=False, indent=2),
+            encoding="utf-8",
+        )
+
+    if args.save_baseline:
+        save_baseline(args.baseline, baseline_key, metrics, env)
+        print(f"[Bench] baseline saved: {args.baseline}", flush=True)
+        return
+
+    if baseline is None:
+        print(f"[Bench] no baseline for {baseline_key} in {args.baseline} (--save-baseline)", flush=True)
+        return
+
+    if any(row["regression"] for row in rows):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
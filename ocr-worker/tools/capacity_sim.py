@@ -0,0 +1,384 @@
+# ocr-worker/tools/capacity_sim.py
+"""
+측정한 OCR 처리 시간으로 큐 백엔드 / 워커 수별 지연을 예측하는 이산 사건 시뮬레이터 + 워커 수 추천.
+
+워커 수나 백엔드를 정하려면 지금은 구성마다 k6 실험을 한 번씩 돌려야 한다. 여기서는
+- 페이지당 OCR 처리 시간 분포 (ocr_job 의 ocr_started_at / ocr_ended_at 로 측정한 값, 또는 JSON 샘플)
+- 도착 패턴 (trace_replay 로 기록한 trace, 또는 "초당 요청 수:지속 시간" 구간의 포아송 도착)
+- 워커 수와 백엔드별 오버헤드
+로 큐를 시뮬레이션해서 처리량, 큐 대기 / 전체 지연 p50/p95/p99, MAX_WAIT_SEC(60초)를 넘겨 만료되는 비율을 내고,
+SLA(전체 지연 p95, 만료 비율)를 만족하는 최소 워커 수를 백엔드별로 추천한다.
+
+백엔드별 오버헤드는 각 워커의 idle 동작을 따른다. (BACKEND_OVERHEADS, --overhead 로 바꿀 수 있음)
+- block_sec : 큐가 비었을 때 blocking 으로 기다리는 시간. 이 동안 들어온 Job 은 바로 가져간다.
+              (redis XREADGROUP block 5초, kafka poll 1초. db / rabbit 은 non-blocking 조회라 0)
+- idle_sec  : 빈 조회(또는 block 시간 초과) 뒤 쉬는 시간. 이 동안 들어온 Job 은 다음 조회까지 기다린다.
+              (모든 워커의 POLL_INTERVAL_SEC = 1초)
+- fetch_sec : 메시지 조회 + DB claim 왕복
+- ack_sec   : 상태 기록 + ack / commit
+fetch_sec / ack_sec 기본값은 로컬 docker 환경 기준 대략값이므로, latency_report 의 queue / finish 구간을 보고 맞춘다.
+
+- Job 의 처리 시간은 페이지마다 분포에서 하나씩 뽑아 더한다. (페이지 수는 trace 또는 --pages)
+- 대기가 MAX_WAIT_SEC 를 넘은 Job 은 워커처럼 OCR 없이 만료 처리한다 (fetch 비용만 씀).
+- lane 분리와 큰 문서 fan-out 은 모델링하지 않는다. 큰 문서 비중이 크면 실제보다 꼬리 지연이 크게 나온다.
+
+사용 예 (ocr-worker 디렉터리에서):
+    python -m tools.capacity_sim --service-from-db --since "2026-10-19 09:00" --rate 0.5:600
+    python -m tools.capacity_sim --service-json page_times.json --trace trace.json --speed 2 --backend redis
+    python -m tools.capacity_sim --page-sec 1.2 --rate 0.2:300,1:120,0.2:300 --pages 1,1,2,8 --sla-p95-sec 20
+"""
+import argparse
+import heapq
+import json
+import random
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+import psycopg2
+
+from ocr_engine.predictor import count_pdf_pages
+from tools.compare_backends import percentile
+from tools.latency_report import QUANTILES
+from workers.db_worker import DB_CONFIG
+from workers.job_reaper import MAX_WAIT_SEC
+
+BACKEND_OVERHEADS = {
+    "db": {"block_sec": 0.0, "idle_sec": 1.0, "fetch_sec": 0.004, "ack_sec": 0.003},
+    "redis": {"block_sec": 5.0, "idle_sec": 1.0, "fetch_sec": 0.003, "ack_sec": 0.004},
+    "rabbit": {"block_sec": 0.0, "idle_sec": 1.0, "fetch_sec": 0.004, "ack_sec": 0.004},
+    "kafka": {"block_sec": 1.0, "idle_sec": 1.0, "fetch_sec": 0.004, "ack_sec": 0.005},
+}
+
+
+@dataclass
+class SimJob:
+    arrival: float
+    pages: int
+    picked: Optional[float] = None
+    finished: Optional[float] = None
+    expired: bool = False
+
+
+# ------------------------------------------------------------
+# 입력: 처리 시간 분포 / 도착 패턴
+# ------------------------------------------------------------
+def fetch_page_times(conn, since: Optional[datetime], until: Optional[datetime]) -> list[float]:
+    """
+    OCR 까지 끝난 Job 의 페이지당 처리 시간(초) 샘플.
+
+    - sub-job 은 페이지 범위로, 일반 Job 은 PDF 페이지 수로 나눈다. (fan-out 부모는 OCR 시각이 없어 빠짐)
+    """
+    where = ["ocr_started_at IS NOT NULL", "ocr_ended_at IS NOT NULL", "status = 'DONE'"]
+    params: list = []
+    if since is not None:
+        where.append("ocr_started_at >= %s")
+        params.append(since)
+    if until is not None:
+        where.append("ocr_started_at < %s")
+        params.append(until)
+
+    with conn.cursor() as cur:
+        cur.execute(
+            "SELECT pdf_name, page_start, page_end, EXTRACT(EPOCH FROM ocr_ended_at - ocr_started_at) "
+            f"FROM ocr_job WHERE {' AND '.join(where)}",
+            params,
+        )
+        rows = cur.fetchall()
+
+    pages_by_pdf: dict[str, Optional[int]] = {}
+    samples = []
+    for pdf_name, page_start, page_end, seconds in rows:
+        if page_start is not None and page_end is not None:
+            pages = page_end - page_start
+        else:
+            if pdf_name not in pages_by_pdf:
+                pages_by_pdf[pdf_name] = count_pdf_pages(pdf_name)
+            pages = pages_by_pdf[pdf_name]
+        if pages:
+            samples.append(float(seconds) / pages)
+    return samples
+
+
+def load_trace_arrivals(path: Path, speed: float) -> list[tuple[float, int]]:
+    """trace_replay 의 trace → [(도착 시각, 페이지 수)]. 페이지 수를 모르는 항목은 1쪽으로 본다."""
+    jobs = json.loads(path.read_text())["jobs"]
+    return [(entry["t"] / speed, entry.get("pages") or 1) for entry in jobs]
+
+
+def parse_rate_profile(value: str) -> list[tuple[float, float]]:
+    """"0.5:600,2:120" → [(초당 요청 수, 지속 시간 초), ...]"""
+    segments = []
+    for part in value.split(","):
+        rate, _, duration = part.partition(":")
+        segments.append((float(rate), float(duration)))
+    return segments
+
+
+def poisson_arrivals(segments: list[tuple[float, float]], pages: list[int], rng: random.Random) -> list[tuple[float, int]]:
+    """구간별 초당 요청 수로 포아송 도착을 만든다. 페이지 수는 pages 에서 고르게 뽑는다."""
+    arrivals = []
+    start = 0.0
+    for rate, duration in segments:
+        t = start
+        while rate > 0:
+            t += rng.expovariate(rate)
+            if t >= start + duration:
+                break
+            arrivals.append((t, rng.choice(pages)))
+        start += duration
+    return arrivals
+
+
+# ------------------------------------------------------------
+# 시뮬레이션
+# ------------------------------------------------------------
+def simulate(
+    arrivals: list[tuple[float, int]],
+    page_times: list[float],
+    workers: int,
+    overhead: dict,
+    max_wait_sec: float,
+    rng: random.Random,
+) -> list[SimJob]:
+    """
+    워커 workers 개가 FIFO 큐 하나를 나눠 처리하는 과정을 사건 순서대로 따라간다.
+
+    워커 상태는 세 가지다.
+    - busy     : Job 처리 중. 끝나면 바로 다시 조회한다.
+    - blocked  : 빈 큐를 block_sec 동안 기다리는 중. 그 사이 도착한 Job 을 바로 가져간다.
+    - sleeping : idle_sec 동안 쉬는 중. 깨어나서 조회할 때까지 도착한 Job 은 큐에 남는다.
+    """
+    block_sec = overhead["block_sec"]
+    idle_sec = overhead["idle_sec"]
+    fetch_sec = overhead["fetch_sec"]
+    ack_sec = overhead["ack_sec"]
+
+    jobs = [SimJob(arrival, pages) for arrival, pages in sorted(arrivals)]
+    queue: deque[SimJob] = deque()
+    blocked: dict[int, int] = {}  # 워커 → block 세대 (block 시간 초과 사건이 이미 지난 block 을 건드리지 않도록)
+    generation = [0] * workers
+    events: list[tuple] = []
+    seq = 0
+
+    def push(at: float, kind: str, payload) -> None:
+        nonlocal seq
+        heapq.heappush(events, (at, seq, kind, payload))
+        seq += 1
+
+    def take(worker: int, job: SimJob, now: float) -> None:
+        job.picked = now + fetch_sec
+        if job.picked - job.arrival > max_wait_sec:
+            job.expired = True
+            job.finished = job.picked
+            push(job.picked, "wake", worker)
+            return
+        service = sum(rng.choice(page_times) for _ in range(job.pages))
+        job.finished = job.picked + service + ack_sec
+        push(job.finished, "wake", worker)
+
+    for job in jobs:
+        push(job.arrival, "arrive", job)
+    for worker in range(workers):
+        push(0.0, "wake", worker)
+
+    remaining = len(jobs)
+    while events and remaining:
+        now, _, kind, payload = heapq.heappop(events)
+        if kind == "arrive":
+            if blocked:
+                # 가장 먼저 block 에 들어간 워커가 받는다 (dict 는 삽입 순서 유지)
+                worker = next(iter(blocked))
+                del blocked[worker]
+                remaining -= 1
+                take(worker, payload, now)
+            else:
+                queue.append(payload)
+        elif kind == "wake":
+            worker = payload
+            if queue:
+                remaining -= 1
+                take(worker, queue.popleft(), now)
+            elif block_sec > 0:
+                generation[worker] += 1
+                blocked[worker] = generation[worker]
+                push(now + fetch_sec + block_sec, "unblock", (worker, generation[worker]))
+            else:
+                push(now + fetch_sec + idle_sec, "wake", worker)
+        elif kind == "unblock":
+            worker, gen = payload
+            if blocked.get(worker) == gen:
+                del blocked[worker]
+                push(now + idle_sec, "wake", worker)
+    return jobs
+
+
+def summarize_sim(backend: str, workers: int, jobs: list[SimJob]) -> dict:
+    """처리량 / 큐 대기 / 전체 지연 백분위 / 만료 비율."""
+    done = [job for job in jobs if not job.expired]
+    waits = [job.picked - job.arrival for job in done]
+    totals = [job.finished - job.arrival for job in done]
+    span = max(job.finished for job in jobs) - min(job.arrival for job in jobs) if jobs else 0.0
+    return {
+        "backend": backend,
+        "workers": workers,
+        "jobs": len(jobs),
+        "expired": len(jobs) - len(done),
+        "breach_rate": (len(jobs) - len(done)) / len(jobs) if jobs else 0.0,
+        "throughput_jobs_per_sec": len(done) / span if span > 0 else 0.0,
+        "throughput_pages_per_sec": sum(job.pages for job in done) / span if span > 0 else 0.0,
+        "wait": {f"p{q}": percentile(waits, q) for q in QUANTILES} if waits else {},
+        "total": {f"p{q}": percentile(totals, q) for q in QUANTILES} if totals else {},
+    }
+
+
+def meets_sla(row: dict, sla_p95_sec: float, sla_breach: float) -> bool:
+    return bool(row["total"]) and row["total"]["p95"] <= sla_p95_sec and row["breach_rate"] <= sla_breach
+
+
+def plan_capacity(
+    arrivals: list[tuple[float, int]],
+    page_times: list[float],
+    backends: list[str],
+    overheads: dict,
+    max_workers: int,
+    sla_p95_sec: float,
+    sla_breach: float,
+    seed: int,
+) -> tuple[list[dict], dict[str, Optional[int]]]:
+    """
+    백엔드마다 워커 1개부터 늘려 가며 시뮬레이션하고, SLA 를 처음 만족하는 워커 수를 추천한다.
+    (같은 seed 를 써서 워커 수 사이 차이가 난수가 아니라 구성 차이로 나오게 한다)
+    """
+    rows = []
+    recommended: dict[str, Optional[int]] = {}
+    for backend in backends:
+        recommended[backend] = None
+        for workers in range(1, max_workers + 1):
+            jobs = simulate(arrivals, page_times, workers, overheads[backend], MAX_WAIT_SEC, random.Random(seed))
+            row = summarize_sim(backend, workers, jobs)
+            rows.append(row)
+            if meets_sla(row, sla_p95_sec, sla_breach):
+                recommended[backend] = workers
+                break
+    return rows, recommended
+
+
+def print_plan(rows: list[dict], recommended: dict[str, Optional[int]], sla_p95_sec: float, sla_breach: float) -> None:
+    header = (
+        f"{'backend':<10}{'workers':>8}{'jobs':>7}{'exp':>6}{'breach':>9}{'jobs/s':>9}{'pages/s':>9}  "
+        f"{'wait p50/p95/p99 (s)':>26}{'total p50/p95/p99 (s)':>26}"
+    )
+    print(header, flush=True)
+    for row in rows:
+        cells = []
+        for key in ("wait", "total"):
+            values = row[key]
+            text = "/".join(f"{values['p%d' % q]:.2f}" for q in QUANTILES) if values else "-"
+            cells.append(f"{text:>26}")
+        print(
+            f"{row['backend']:<10}{row['workers']:>8}{row['jobs']:>7}{row['expired']:>6}{row['breach_rate']:>9.2%}"
+            f"{row['throughput_jobs_per_sec']:>9.2f}{row['throughput_pages_per_sec']:>9.2f}  " + "".join(cells),
+            flush=True,
+        )
+
+    print(f"[Sim] SLA: total p95 <= {sla_p95_sec}s, breach(>{MAX_WAIT_SEC}s) <= {sla_breach:.2%}", flush=True)
+    for backend, workers in recommended.items():
+        if workers is None:
+            print(f"[Sim] {backend}: SLA not met within the worker range", flush=True)
+        else:
+            print(f"[Sim] {backend}: recommend workers={workers}", flush=True)
+
+
+# ------------------------------------------------------------
+# CLI
+# ------------------------------------------------------------
+def _parse_time(value: str) -> datetime:
+    return datetime.fromisoformat(value)
+
+
+def apply_overrides(values: list[str]) -> dict:
+    """--overhead redis.fetch_sec=0.002 처럼 백엔드별 오버헤드를 바꾼다."""
+    overheads = {backend: dict(params) for backend, params in BACKEND_OVERHEADS.items()}
+    for value in values:
+        key, _, number = value.partition("=")
+        backend, _, name = key.partition(".")
+        if backend not in overheads or name not in overheads[backend]:
+            raise SystemExit(f"[Sim] unknown overhead: {key}")
+        overheads[backend][name] = float(number)
+    return overheads
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="큐 시뮬레이션으로 백엔드 / 워커 수별 지연 예측 + 워커 수 추천")
+    service = parser.add_mutually_exclusive_group(required=True)
+    service.add_argument("--service-from-db", action="store_true", help="ocr_job 의 OCR 시각으로 페이지당 처리 시간 측정")
+    service.add_argument("--service-json", type=Path, default=None, help="페이지당 처리 시간(초) 샘플 JSON 배열")
+    service.add_argument("--page-sec", type=float, default=None, help="페이지당 처리 시간을 이 값으로 고정")
+    parser.add_argument("--since", type=_parse_time, default=None, help="--service-from-db: 이 시각 이후 Job")
+    parser.add_argument("--until", type=_parse_time, default=None, help="--service-from-db: 이 시각 이전 Job")
+
+    arrival = parser.add_mutually_exclusive_group(required=True)
+    arrival.add_argument("--trace", type=Path, default=None, help="tools.trace_replay record 로 만든 trace")
+    arrival.add_argument("--rate", type=parse_rate_profile, default=None, help='도착 구간 "초당 요청 수:초,..."')
+    parser.add_argument("--speed", type=float, default=1.0, help="--trace 재생 배속")
+    parser.add_argument("--pages", default="1", help="--rate: Job 페이지 수 후보 (쉼표 구분, 고르게 뽑음)")
+
+    parser.add_argument("--backend", action="append", default=[], help="백엔드 (여러 번 지정 가능, 기본 전체)")
+    parser.add_argument("--overhead", action="append", default=[], help="오버헤드 변경 (예: redis.block_sec=2)")
+    parser.add_argument("--max-workers", type=int, default=16, help="추천 시 늘려 볼 최대 워커 수")
+    parser.add_argument("--sla-p95-sec", type=float, default=30.0, help="SLA: 전체 지연 p95 (초)")
+    parser.add_argument("--sla-breach", type=float, default=0.01, help=f"SLA: {MAX_WAIT_SEC}초 초과(만료) 비율")
+    parser.add_argument("--seed", type=int, default=0, help="난수 seed")
+    parser.add_argument("--json", type=Path, default=None, help="결과를 JSON 으로 저장할 경로")
+    args = parser.parse_args()
+
+    backends = args.backend or list(BACKEND_OVERHEADS)
+    for backend in backends:
+        if backend not in BACKEND_OVERHEADS:
+            parser.error(f"unknown backend: {backend}")
+    overheads = apply_overrides(args.overhead)
+
+    if args.service_from_db:
+        conn = psycopg2.connect(**DB_CONFIG)
+        try:
+            page_times = fetch_page_times(conn, args.since, args.until)
+        finally:
+            conn.close()
+    elif args.service_json is not None:
+        page_times = [float(v) for v in json.loads(args.service_json.read_text())]
+    else:
+        page_times = [args.page_sec]
+    if not page_times:
+        raise SystemExit("[Sim] no page service-time samples")
+
+    if args.trace is not None:
+        arrivals = load_trace_arrivals(args.trace, args.speed)
+    else:
+        pages = [int(p) for p in args.pages.split(",")]
+        arrivals = poisson_arrivals(args.rate, pages, random.Random(args.seed))
+    if not arrivals:
+        raise SystemExit("[Sim] no arrivals")
+
+    print(
+        f"[Sim] jobs={len(arrivals)} span={arrivals[-1][0] - arrivals[0][0]:.1f}s "
+        f"page_sec p50/p95={percentile(page_times, 50):.3f}/{percentile(page_times, 95):.3f} "
+        f"samples={len(page_times)}",
+        flush=True,
+    )
+    rows, recommended = plan_capacity(
+        arrivals, page_times, backends, overheads, args.max_workers, args.sla_p95_sec, args.sla_breach, args.seed
+    )
+    print_plan(rows, recommended, args.sla_p95_sec, args.sla_breach)
+
+    if args.json is not None:
+        args.json.write_text(
+            json.dumps({"overheads": overheads, "rows": rows, "recommended": recommended}, indent=2, ensure_ascii=False)
+        )
+        print(f"[Sim] saved {args.json}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+# ocr-worker/tools/compare_backends.py
+"""
+추론 백엔드 정확도/속도 비교 도구.
+
+같은 PDF 코퍼스를 기준(baseline) 백엔드와 후보(candidate) 백엔드로 각각 돌려서
+- 속도: 모델 로드 시간, 페이지당 지연(p50/p95), 처리량(pages/s), 속도 향상 배율
+- 정확도: 페이지별 인식 수식 문자열의 문자 오류율(CER), 완전 일치 페이지 비율
+을 비교한다. "정확도를 얼마나 내주고 처리량을 얼마나 얻는지" 를 숫자로 보기 위한 용도.
+
+사용 예 (ocr-worker 디렉터리에서):
+    python -m tools.compare_backends --baseline paddle --candidate paddle_int8
+    python -m tools.compare_backends --corpus /data/pdfs --candidate hpi --json result.json
+
+paddle_int8 은 MODEL_ROOT 아래의 *_int8_infer 모델이 필요하다.
+이 저장소에는 없으므로 먼저 직접 양자화해 둔다 (ocr_engine/backends.py 의 "INT8 모델 준비").
+"""
+import argparse
+import gc
+import json
+import statistics
+import time
+from pathlib import Path
+from typing import Any
+
+from ocr_engine.backends import BACKENDS, get_backend
+from ocr_engine.config import DATA_DIR, PDF_RENDER_SCALE
+from ocr_engine.model_loader import build_pipeline
+from ocr_engine.pdf_render import RenderSettings, iter_rendered_pages
+from ocr_engine.pdf_source import PdfSource
+from ocr_engine.profiles import get_profile
+
+
+def load_corpus(corpus_dir: Path, settings: RenderSettings) -> list[tuple[str, int, Any]]:
+    """
+    코퍼스 디렉터리의 모든 PDF 를 미리 렌더링한다.
+
+    - 렌더링 시간이 백엔드 비교에 섞이지 않도록, 두 백엔드가 같은 페이지 이미지를 쓰게 한다.
+    - 반환값: [(pdf 이름, page_index, image), ...]
+    """
+    pages = []
+    for pdf_path in sorted(corpus_dir.glob("*.pdf")):
+        with PdfSource.from_path(pdf_path) as source:
+            pdf = source.open_document()
+            try:
+                for page_index, image in iter_rendered_pages(pdf, settings):
+                    pages.append((pdf_path.name, page_index, image))
+            finally:
+                pdf.close()
+    return pages
+
+
+def extract_formulas(result: Any) -> list[str]:
+    """페이지 결과에서 인식된 수식(LaTeX) 문자열 목록을 꺼낸다."""
+    payload = getattr(result, "json", result)
+    if isinstance(payload, dict):
+        payload = payload.get("res", payload)
+        items = payload.get("formula_res_list", [])
+        return [str(item.get("rec_formula", "")) for item in items]
+    return []
+
+
+def edit_distance(a: str, b: str) -> int:
+    """문자 단위 Levenshtein 거리."""
+    if len(a) < len(b):
+        a, b = b, a
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        cur = [i]
+        for j, cb in enumerate(b, 1):
+            cur.append(min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ca != cb)))
+        prev = cur
+    return prev[-1]
+
+
+def percentile(values: list[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, round(q / 100 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+def check_models(name: str) -> None:
+    """백엔드의 모델 디렉터리가 모두 있는지 확인한다. 없으면 코퍼스를 렌더링하기 전에 종료한다."""
+    backend = get_backend(name)
+    profile = get_profile()
+    missing = [
+        backend.model_dir(model_name)
+        for model_name in (profile.layout_model_name, profile.formula_model_name)
+        if not backend.model_dir(model_name).is_dir()
+    ]
+    if missing:
+        hint = " (see \"INT8 모델 준비\" in ocr_engine/backends.py)" if name == "paddle_int8" else ""
+        raise SystemExit(f"backend={name}: model dir not found: {', '.join(map(str, missing))}{hint}")
+
+
+def run_backend(name: str, pages: list[tuple[str, int, Any]], warmup: int) -> dict:
+    """
+    한 백엔드로 코퍼스 전체를 추론하고, 시간/결과를 모아 반환한다.
+
+    - 끝나면 파이프라인을 해제해서, 다음 백엔드 측정에 메모리가 섞이지 않게 한다.
+    """
+    backend = get_backend(name)
+    print(f"[Compare] loading backend={name} ({backend.description})", flush=True)
+
+    t0 = time.perf_counter()
+    pipeline = build_pipeline(backend)
+    load_sec = time.perf_counter() - t0
+
+    for _, _, image in pages[:warmup]:
+        pipeline.predict_images([image], batch_size=1)
+
+    latencies = []
+    formulas = []
+    for pdf_name, page_index, image in pages:
+        t0 = time.perf_counter()
+        results = pipeline.predict_images([image], batch_size=1)
+        latencies.append(time.perf_counter() - t0)
+        formulas.append(extract_formulas(results[0]))
+        print(
+            f"[Compare] backend={name} {pdf_name}#{page_index} {latencies[-1] * 1000:.0f}ms",
+            flush=True,
+        )
+
+    del pipeline
+    gc.collect()
+
+    total = sum(latencies)
+    return {
+        "backend": name,
+        "load_sec": load_sec,
+        "pages": len(pages),
+        "total_sec": total,
+        "pages_per_sec": len(pages) / total if total > 0 else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "formulas": formulas,
+    }
+
+
+def compare_accuracy(baseline: list[list[str]], candidate: list[list[str]]) -> dict:
+    """
+    페이지별로 수식 문자열을 이어 붙여 baseline 대비 CER 을 구한다.
+
+    - 레이아웃 검출 결과가 달라 수식 개수가 바뀌는 경우도 CER 에 그대로 반영된다.
+    """
+    cers = []
+    exact = 0
+    for base_page, cand_page in zip(baseline, candidate):
+        base_text = "\n".join(base_page)
+        cand_text = "\n".join(cand_page)
+        if base_text == cand_text:
+            exact += 1
+        cers.append(edit_distance(base_text, cand_text) / max(1, len(base_text)))
+
+    return {
+        "mean_cer": statistics.fmean(cers) if cers else 0.0,
+        "max_cer": max(cers) if cers else 0.0,
+        "exact_match_pages": exact,
+        "pages": len(cers),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="OCR 추론 백엔드 정확도/속도 비교")
+    parser.add_argument("--corpus", type=Path, default=DATA_DIR, help="PDF 코퍼스 디렉터리")
+    parser.add_argument("--baseline", default="paddle", choices=sorted(BACKENDS))
+    parser.add_argument("--candidate", default="paddle_int8", choices=sorted(BACKENDS))
+    parser.add_argument("--warmup", type=int, default=1, help="측정 전 워밍업 페이지 수")
+    parser.add_argument("--json", type=Path, default=None, help="결과를 JSON 으로 저장할 경로")
+    args = parser.parse_args()
+
+    for name in (args.baseline, args.candidate):
+        check_models(name)
+
+    pages = load_corpus(args.corpus, RenderSettings(scale=PDF_RENDER_SCALE))
+    if not pages:
+        raise SystemExit(f"no pdf found in {args.corpus}")
+    print(f"[Compare] corpus={args.corpus}, pages={len(pages)}", flush=True)
+
+    base = run_backend(args.baseline, pages, args.warmup)
+    cand = run_backend(args.candidate, pages, args.warmup)
+    accuracy = compare_accuracy(base.pop("formulas"), cand.pop("formulas"))
+    speedup = base["total_sec"] / cand["total_sec"] if cand["total_sec"] > 0 else 0.0
+
+    print()
+    print(f"{'backend':<16}{'load(s)':>10}{'p50(ms)':>10}{'p95(ms)':>10}{'pages/s':>10}")
+    for r in (base, cand):
+        print(
+            f"{r['backend']:<16}{r['load_sec']:>10.1f}{r['p50_ms']:>10.0f}"
+            f"{r['p95_ms']:>10.0f}{r['pages_per_sec']:>10.2f}"
+        )
+    print()
+    print(f"speedup (candidate vs baseline) : x{speedup:.2f}")
+    print(f"mean CER vs baseline            : {accuracy['mean_cer'] * 100:.2f}%")
+    print(f"max CER vs baseline             : {accuracy['max_cer'] * 100:.2f}%")
+    print(f"exact match pages               : {accuracy['exact_match_pages']}/{accuracy['pages']}")
+
+    if args.json is not None:
+        args.json.write_text(
+            json.dumps(
+                {"baseline": base, "candidate": cand, "speedup": speedup, "accuracy": accuracy},
+                ensure_ascii=False,
+                indent=2,
+            ),
+            encoding="utf-8",
+        )
+
+
+if __name__ == "__main__":
+    main()
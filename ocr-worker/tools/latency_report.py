@@ -0,0 +1,247 @@
+# ocr-worker/tools/latency_report.py
+"""
+ocr_job 단계별 시각으로 백엔드 / 워커 수별 지연 구간을 나눠 보는 리포트.
+
+워커가 기록한 enqueued_at / picked_at / ocr_started_at / ocr_ended_at / finished_at
+(workers/job_timing.py)으로 Job 마다 아래 구간을 계산하고 p50 / p95 / p99 를 낸다.
+
+- queue    : enqueue → pick     (큐에서 기다린 시간)
+- prepare  : pick → OCR 시작    (fan-out 판단 / 프로필 선택 / 입력 준비 대기)
+- ocr      : OCR 시작 → OCR 끝  (run_ocr)
+- finish   : OCR 끝 → 완료      (상태 기록 / sub-job 집계)
+- total    : enqueue → 완료     (클라이언트가 체감하는 시간)
+
+README 의 V3~V6 비교처럼 "같은 백엔드를 워커 1/2/4 개로 돌린 실행" 들을 한 번에 보기 위해,
+같은 백엔드의 Job 을 enqueue 시각 순으로 보고 --gap-sec 이상 비어 있으면 다른 실행(run)으로 나눈다.
+run 의 워커 수는 그 run 에서 Job 을 처리한 worker_id 개수이고, 결과는 (백엔드, 워커 수) 별로 모은다.
+
+- 부모 Job 만 집계한다 (fan-out sub-job 은 부모의 total 에 포함됨. --include-subjobs 로 따로 볼 수 있음)
+- 만료로 OCR 없이 FAILED 된 Job 은 total 에서 빼고 expired 개수로만 센다.
+  reaper 가 만료시킨 Job 은 claim 되지 않아 backend / enqueued_at 이 비어 있으므로
+  enqueue 시각은 created_at 으로 보고, 백엔드는 시간상 가장 가까운 claim 된 Job 의 것으로 센다.
+  (한 번에 한 백엔드만 돌리는 실험 기준. 근처에 claim 된 Job 이 없으면 "unknown")
+- 보관 기간이 지나 ocr_job_archive 로 옮겨진 Job(workers/job_archiver.py)은 --include-archive 로 같이 본다.
+
+사용 예 (ocr-worker 디렉터리에서):
+    python -m tools.latency_report
+    python -m tools.latency_report --since "2026-10-19 14:00" --backend redis --backend kafka
+    python -m tools.latency_report --gap-sec 60 --json latency.json
+"""
+import argparse
+import json
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+import psycopg2
+
+from tools.compare_backends import percentile
+from workers.db_worker import DB_CONFIG
+
+# (구간 이름, 시작 컬럼, 끝 컬럼)
+STAGES = (
+    ("queue", "enqueued_at", "picked_at"),
+    ("prepare", "picked_at", "ocr_started_at"),
+    ("ocr", "ocr_started_at", "ocr_ended_at"),
+    ("finish", "ocr_ended_at", "finished_at"),
+    ("total", "enqueued_at", "finished_at"),
+)
+QUANTILES = (50, 95, 99)
+
+_COLUMNS = (
+    "id", "backend", "worker_id", "status", "parent_id", "subjob_total",
+    "enqueued_at", "picked_at", "ocr_started_at", "ocr_ended_at", "finished_at",
+)
+# claim 되지 않고 만료된 Job 은 enqueued_at 이 비어 있으므로 created_at 으로 대신한다.
+_ENQUEUED_AT = "COALESCE(enqueued_at, created_at)"
+_SELECT = ", ".join(_ENQUEUED_AT if column == "enqueued_at" else column for column in _COLUMNS)
+
+UNKNOWN_BACKEND = "unknown"
+
+
+def fetch_jobs(
+    conn,
+    since: Optional[datetime],
+    until: Optional[datetime],
+    backends: list[str],
+    include_subjobs: bool,
+    include_archive: bool = False,
+) -> list[dict]:
+    """끝난(finished_at 있음) Job 의 단계별 시각을 백엔드 / enqueue 순으로 가져온다."""
+    where = ["finished_at IS NOT NULL"]
+    params: list = []
+    if since is not None:
+        where.append(f"{_ENQUEUED_AT} >= %s")
+        params.append(since)
+    if until is not None:
+        where.append(f"{_ENQUEUED_AT} < %s")
+        params.append(until)
+    if not include_subjobs:
+        where.append("parent_id IS NULL")
+
+    source = "ocr_job"
+    if include_archive:
+        columns = ", ".join((*_COLUMNS, "created_at"))
+        source = f"(SELECT {columns} FROM ocr_job UNION ALL SELECT {columns} FROM ocr_job_archive) j"
+
+    with conn.cursor() as cur:
+        cur.execute(
+            f"SELECT {_SELECT} FROM {source} WHERE {' AND '.join(where)} ORDER BY {_ENQUEUED_AT}",
+            params,
+        )
+        jobs = attribute_unclaimed([dict(zip(_COLUMNS, row)) for row in cur.fetchall()])
+
+    # 백엔드 필터는 claim 되지 않은 Job 의 백엔드를 정한 뒤에 건다.
+    if backends:
+        jobs = [job for job in jobs if job["backend"] in backends]
+    return sorted(jobs, key=lambda job: (job["backend"], job["enqueued_at"]))
+
+
+def attribute_unclaimed(jobs: list[dict]) -> list[dict]:
+    """
+    backend 가 비어 있는 Job(claim 전에 reaper 가 만료시킴)에 enqueue 시각이 가장 가까운 claim 된 Job 의 백엔드를 채운다.
+
+    - jobs 는 enqueue 순으로 정렬되어 있어야 한다.
+    """
+    previous: list[Optional[dict]] = []
+    last = None
+    for job in jobs:
+        previous.append(last)
+        if job["backend"] is not None:
+            last = job
+
+    following = None
+    for index in range(len(jobs) - 1, -1, -1):
+        job = jobs[index]
+        if job["backend"] is not None:
+            following = job
+            continue
+        candidates = [n for n in (previous[index], following) if n is not None]
+        if not candidates:
+            job["backend"] = UNKNOWN_BACKEND
+            continue
+        nearest = min(candidates, key=lambda n: abs((n["enqueued_at"] - job["enqueued_at"]).total_seconds()))
+        job["backend"] = nearest["backend"]
+    return jobs
+
+
+def split_runs(jobs: list[dict], gap_sec: float) -> list[list[dict]]:
+    """같은 백엔드에서 enqueue 간격이 gap_sec 이상 벌어지면 다른 실행으로 본다."""
+    runs: list[list[dict]] = []
+    current: list[dict] = []
+    for job in jobs:
+        if current and (
+            job["backend"] != current[-1]["backend"]
+            or (job["enqueued_at"] - current[-1]["enqueued_at"]).total_seconds() >= gap_sec
+        ):
+            runs.append(current)
+            current = []
+        current.append(job)
+    if current:
+        runs.append(current)
+    return runs
+
+
+def stage_seconds(job: dict, start: str, end: str) -> Optional[float]:
+    if job[start] is None or job[end] is None:
+        return None
+    return (job[end] - job[start]).total_seconds()
+
+
+def summarize(runs: list[list[dict]]) -> list[dict]:
+    """(백엔드, 워커 수) 별 구간 지연 백분위."""
+    groups: dict[tuple[str, int], dict] = defaultdict(
+        lambda: {"runs": 0, "jobs": 0, "failed": 0, "expired": 0, "stages": defaultdict(list)}
+    )
+    for run in runs:
+        workers = len({job["worker_id"] for job in run if job["worker_id"]})
+        group = groups[(run[0]["backend"], workers)]
+        group["runs"] += 1
+        for job in run:
+            # 만료: OCR 없이 FAILED 된 Job (fan-out 부모는 OCR 시각이 sub-job 에만 있으므로 제외)
+            if job["ocr_started_at"] is None and job["subjob_total"] is None and job["status"] == "FAILED":
+                group["expired"] += 1
+                continue
+            group["jobs"] += 1
+            if job["status"] == "FAILED":
+                group["failed"] += 1
+            for name, start, end in STAGES:
+                seconds = stage_seconds(job, start, end)
+                if seconds is not None:
+                    group["stages"][name].append(seconds)
+
+    report = []
+    for (backend, workers), group in sorted(groups.items()):
+        stages = {
+            name: {f"p{q}": percentile(group["stages"][name], q) for q in QUANTILES}
+            for name, _, _ in STAGES
+            if group["stages"][name]
+        }
+        report.append(
+            {
+                "backend": backend,
+                "workers": workers,
+                "runs": group["runs"],
+                "jobs": group["jobs"],
+                "failed": group["failed"],
+                "expired": group["expired"],
+                "stages": stages,
+            }
+        )
+    return report
+
+
+def print_report(report: list[dict]) -> None:
+    if not report:
+        print("[Latency] no finished jobs with timing columns in the window", flush=True)
+        return
+
+    header = f"{'backend':<14}{'workers':>8}{'jobs':>7}{'fail':>6}{'exp':>6}  " + "".join(
+        f"{name + ' p50/p95/p99 (s)':>28}" for name, _, _ in STAGES
+    )
+    print(header, flush=True)
+    for row in report:
+        cells = []
+        for name, _, _ in STAGES:
+            values = row["stages"].get(name)
+            text = "/".join(f"{values['p%d' % q]:.2f}" for q in QUANTILES) if values else "-"
+            cells.append(f"{text:>28}")
+        print(
+            f"{row['backend']:<14}{row['workers']:>8}{row['jobs']:>7}{row['failed']:>6}{row['expired']:>6}  "
+            + "".join(cells),
+            flush=True,
+        )
+
+
+def _parse_time(value: str) -> datetime:
+    return datetime.fromisoformat(value)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="ocr_job 단계별 지연 리포트 (백엔드 / 워커 수별)")
+    parser.add_argument("--since", type=_parse_time, default=None, help="이 시각 이후 enqueue 된 Job (로컬 시각)")
+    parser.add_argument("--until", type=_parse_time, default=None, help="이 시각 이전 enqueue 된 Job (로컬 시각)")
+    parser.add_argument("--backend", action="append", default=[], help="백엔드 필터 (여러 번 지정 가능)")
+    parser.add_argument("--gap-sec", type=float, default=30.0, help="이 시간 이상 비면 다른 실행(run)으로 나눔")
+    parser.add_argument("--include-subjobs", action="store_true", help="fan-out sub-job 도 집계")
+    parser.add_argument("--include-archive", action="store_true", help="ocr_job_archive 로 옮겨진 Job 도 집계")
+    parser.add_argument("--json", type=Path, default=None, help="결과를 JSON 으로 저장할 경로")
+    args = parser.parse_args()
+
+    conn = psycopg2.connect(**DB_CONFIG)
+    try:
+        jobs = fetch_jobs(conn, args.since, args.until, args.backend, args.include_subjobs, args.include_archive)
+    finally:
+        conn.close()
+
+    report = summarize(split_runs(jobs, args.gap_sec))
+    print_report(report)
+
+    if args.json is not None:
+        args.json.write_text(json.dumps(report, indent=2, ensure_ascii=False))
+        print(f"[Latency] saved {args.json}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+# ocr-worker/tools/make_bench_fixtures.py
+"""
+벤치마크(tools/bench_ocr.py)용 고정 PDF 코퍼스 생성기.
+
+- 외부 라이브러리 없이 PDF 를 직접 써서, 실행할 때마다 바이트 단위로 같은 파일이 나온다.
+  (난수는 고정 seed, 날짜/ID 같은 가변 메타데이터 없음)
+- 페이지 수 / 페이지당 수식 수(밀도)를 달리한 작은 문서들로 구성한다.
+  수식은 Times-Italic 변수 + 위첨자(text rise) + 분수선으로 그린 인라인/블록 수식이다.
+- 수식이 없는 본문 전용 문서도 하나 넣어, 레이아웃 검출만 도는 경우의 비용도 본다.
+
+생성한 파일은 tools/fixtures/bench/ 에 커밋되어 있다. 코퍼스 정의를 바꿨을 때만 다시 생성하고,
+그 경우 기준값(bench_baseline.json)도 새로 저장해야 한다.
+
+사용 예 (ocr-worker 디렉터리에서):
+    python -m tools.make_bench_fixtures
+"""
+import argparse
+import random
+from pathlib import Path
+
+FIXTURE_DIR = Path(__file__).resolve().parent / "fixtures" / "bench"
+
+# (파일 이름, 페이지별 수식 수). 0 이면 본문만 있는 페이지
+CORPUS: list[tuple[str, list[int]]] = [
+    ("p1_sparse.pdf", [2]),
+    ("p1_dense.pdf", [18]),
+    ("p2_text_only.pdf", [0, 0]),
+    ("p4_medium.pdf", [8, 8, 8, 8]),
+    ("p8_mixed.pdf", [2, 12, 0, 6, 18, 4, 10, 1]),
+]
+
+SEED = 20240601
+PAGE_WIDTH, PAGE_HEIGHT = 612, 792
+MARGIN = 72
+
+_VARS = "abcnxyzkt"
+_WORDS = (
+    "let the function be defined on the interval and consider its derivative where "
+    "the constant depends only on the boundary condition so that the series converges"
+).split()
+
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def _prose_line(rng: random.Random, x: float, y: float) -> str:
+    words = " ".join(rng.choice(_WORDS) for _ in range(rng.randint(8, 12)))
+    return f"BT /F1 11 Tf {x:.1f} {y:.1f} Td ({_escape(words.capitalize())}.) Tj ET"
+
+
+def _formula(rng: random.Random, x: float, y: float) -> tuple[str, float]:
+    """
+    수식 하나를 그리는 content stream 조각과 차지한 높이를 반환한다.
+
+    - 절반은 "a^2 + b^2 = c^2" 꼴의 인라인 수식, 절반은 분수선이 있는 블록 수식.
+    """
+    if rng.random() < 0.5:
+        terms = []
+        for _ in range(rng.randint(2, 4)):
+            var = rng.choice(_VARS)
+            power = rng.randint(2, 4)
+            terms.append(f"/F2 14 Tf 0 Ts ({var}) Tj /F2 9 Tf 6 Ts ({power}) Tj /F1 14 Tf 0 Ts ( + ) Tj")
+        body = " ".join(terms)[: -len("( + ) Tj")] + f"( = {rng.randint(1, 99)}) Tj"
+        return f"BT {x:.1f} {y:.1f} Td {body} ET", 26.0
+
+    num = f"{rng.choice(_VARS)} + {rng.randint(1, 9)}"
+    den = f"{rng.choice(_VARS)} - {rng.randint(1, 9)}"
+    width = 60.0
+    parts = [
+        f"BT /F2 14 Tf {x + 8:.1f} {y:.1f} Td ({num}) Tj ET",
+        f"1 w {x:.1f} {y - 6:.1f} m {x + width:.1f} {y - 6:.1f} l S",
+        f"BT /F2 14 Tf {x + 8:.1f} {y - 22:.1f} Td ({den}) Tj ET",
+        f"BT /F1 14 Tf {x + width + 8:.1f} {y - 12:.1f} Td (= {rng.randint(1, 9)}) Tj ET",
+    ]
+    return "\n".join(parts), 44.0
+
+
+def page_content(rng: random.Random, formulas: int) -> bytes:
+    """본문 줄과 수식을 번갈아 배치한 페이지 content stream."""
+    ops = []
+    y = PAGE_HEIGHT - MARGIN
+    remaining = formulas
+    # 빽빽한 페이지(12개 이상)는 수식을 두 열로 배치
+    two_columns = formulas >= 12
+    column, row_height = 0, 0.0
+    while y > MARGIN + 44:
+        if remaining > 0 and (two_columns or rng.random() < 0.5):
+            x = MARGIN + column * (PAGE_WIDTH - 2 * MARGIN) / 2
+            op, height = _formula(rng, x, y)
+            ops.append(op)
+            remaining -= 1
+            row_height = max(row_height, height)
+            if two_columns and column == 0 and remaining > 0:
+                column = 1
+                continue
+            y -= row_height
+            column, row_height = 0, 0.0
+        else:
+            ops.append(_prose_line(rng, MARGIN, y))
+            y -= 16
+    return "\n".join(ops).encode("latin-1")
+
+
+def build_pdf(pages: list[bytes]) -> bytes:
+    """content stream 목록으로 최소 구성 PDF(1.4)를 만든다."""
+    objects: list[bytes] = []
+    font_ids = (3, 4)
+    first_page_id = 5
+    page_ids = [first_page_id + 2 * i for i in range(len(pages))]
+
+    objects.append(b"<< /Type /Catalog /Pages 2 0 R >>")
+    kids = " ".join(f"{pid} 0 R" for pid in page_ids)
+    objects.append(f"<< /Type /Pages /Kids [{kids}] /Count {len(pages)} >>".encode())
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Times-Italic >>")
+    for pid, content in zip(page_ids, pages):
+        objects.append(
+            (
+                f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+                f"/Resources << /Font << /F1 {font_ids[0]} 0 R /F2 {font_ids[1]} 0 R >> >> "
+                f"/Contents {pid + 1} 0 R >>"
+            ).encode()
+        )
+        objects.append(b"<< /Length %d >>\nstream\n" % len(content) + content + b"\nendstream")
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for i, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % i + body + b"\nendobj\n"
+
+    xref_at = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref_at)
+    return bytes(out)
+
+
+def generate(out_dir: Path = FIXTURE_DIR) -> list[Path]:
+    out_dir.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for index, (name, densities) in enumerate(CORPUS):
+        rng = random.Random(SEED + index)
+        pdf = build_pdf([page_content(rng, formulas) for formulas in densities])
+        path = out_dir / name
+        path.write_bytes(pdf)
+        paths.append(path)
+        print(f"[Fixtures] {path.name}: pages={len(densities)}, formulas={sum(densities)}", flush=True)
+    return paths
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="벤치마크용 고정 PDF 코퍼스 생성")
+    parser.add_argument("--out", type=Path, default=FIXTURE_DIR)
+    args = parser.parse_args()
+    generate(args.out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,395 @@
+# ocr-worker/tools/trace_replay.py
+"""
+실제 Job 도착 패턴(trace)을 기록하고, 그대로 네 백엔드 중 하나에 다시 흘려 보는 도구.
+
+k6 시나리오(k6/v*.js)는 일정한 RPS 로 같은 PDF 를 보내므로, 몰렸다 비었다 하는 실제 도착 패턴이나
+문서 크기 분포에서 백엔드가 어떻게 버티는지는 보이지 않는다. 여기서는
+
+1) record : ocr_job 에서 기간 안에 들어온 요청(부모 Job)의 도착 시각 / PDF 이름 / 페이지 수 / 파일 크기를
+            trace JSON 으로 저장한다. (t 는 첫 요청 기준 초)
+2) replay : trace 를 1배속 또는 --speed 배속으로 재생한다. API 서버를 거치지 않고 API 와 같은 방식으로
+            - ocr_job 에 PENDING 행을 만들고 (created_at = 지금)
+            - 커밋 후 백엔드에 API 와 같은 형식(jobId / pdfName / createdAt)의 메시지를 넣는다.
+              (db 는 행만 만들면 워커가 SKIP LOCKED 로 가져감)
+            모든 Job 이 끝나거나 --wait-sec 이 지나면, 재생한 Job 의 단계별 시각으로
+            latency_report 와 같은 지연 백분위와 만료(타임아웃) 비율을 낸다.
+
+- trace 의 PDF 가 DATA_DIR 에 있으면 그대로 쓰고, 없으면 페이지 수(같으면 파일 크기)가 가장 가까운 PDF 로 바꾼다.
+- 재생 시각보다 늦게 보낸 정도(dispatch lag)도 같이 보여 준다. 크면 재생기 자체가 병목이라 결과를 믿기 어렵다.
+- 워커는 따로 띄워 둔다. (예: python -m workers.redis_worker 를 N 개)
+
+사용 예 (ocr-worker 디렉터리에서):
+    python -m tools.trace_replay record --since "2026-10-19 09:00" --until "2026-10-19 10:00" --out trace.json
+    python -m tools.trace_replay replay trace.json --backend redis
+    python -m tools.trace_replay replay trace.json --backend kafka --speed 4 --json replay.json
+"""
+import argparse
+import json
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+import psycopg2
+
+from ocr_engine.config import DATA_DIR
+from ocr_engine.predictor import count_pdf_pages
+from tools.compare_backends import percentile
+from tools.latency_report import QUANTILES, _COLUMNS, _SELECT, print_report, summarize
+from workers.db_worker import DB_CONFIG
+from workers.job_reaper import MAX_WAIT_SEC
+
+BACKENDS = ("db", "redis", "rabbit", "kafka")
+
+_INSERT_JOB_SQL = "INSERT INTO ocr_job (status, pdf_name, created_at) VALUES ('PENDING', %s, %s) RETURNING id"
+
+
+# ------------------------------------------------------------
+# record
+# ------------------------------------------------------------
+def fetch_arrivals(conn, since: Optional[datetime], until: Optional[datetime], include_archive: bool) -> list[tuple]:
+    """기간 안에 들어온 요청(부모 Job)의 (created_at, pdf_name) 을 도착 순으로."""
+    where = ["parent_id IS NULL"]
+    params: list = []
+    if since is not None:
+        where.append("created_at >= %s")
+        params.append(since)
+    if until is not None:
+        where.append("created_at < %s")
+        params.append(until)
+
+    source = "ocr_job"
+    if include_archive:
+        source = (
+            "(SELECT created_at, pdf_name, parent_id FROM ocr_job "
+            "UNION ALL SELECT created_at, pdf_name, parent_id FROM ocr_job_archive) j"
+        )
+
+    with conn.cursor() as cur:
+        cur.execute(
+            f"SELECT created_at, pdf_name FROM {source} WHERE {' AND '.join(where)} ORDER BY created_at",
+            params,
+        )
+        return cur.fetchall()
+
+
+def pdf_size(pdf_name: str) -> Optional[int]:
+    path = DATA_DIR / pdf_name
+    return path.stat().st_size if path.is_file() else None
+
+
+def build_trace(arrivals: list[tuple]) -> list[dict]:
+    """도착 목록 → trace 항목. 페이지 수 / 크기는 PDF 마다 한 번만 센다."""
+    if not arrivals:
+        return []
+    first = arrivals[0][0]
+    meta: dict[str, tuple] = {}
+    trace = []
+    for created_at, pdf_name in arrivals:
+        if pdf_name not in meta:
+            meta[pdf_name] = (count_pdf_pages(pdf_name), pdf_size(pdf_name))
+        pages, size = meta[pdf_name]
+        trace.append(
+            {
+                "t": round((created_at - first).total_seconds(), 3),
+                "pdf_name": pdf_name,
+                "pages": pages,
+                "bytes": size,
+            }
+        )
+    return trace
+
+
+# ------------------------------------------------------------
+# replay
+# ------------------------------------------------------------
+def load_corpus() -> list[tuple[str, int, int]]:
+    """DATA_DIR 의 PDF 목록 [(이름, 페이지 수, 크기)]. 페이지 수를 셀 수 없는 파일은 뺀다."""
+    corpus = []
+    for path in sorted(DATA_DIR.glob("*.pdf")):
+        pages = count_pdf_pages(path.name)
+        if pages is not None:
+            corpus.append((path.name, pages, path.stat().st_size))
+    return corpus
+
+
+def pick_pdf(entry: dict, corpus: list[tuple[str, int, int]]) -> str:
+    """trace 항목을 재생할 PDF. 같은 이름이 있으면 그대로, 없으면 페이지 수 → 크기 순으로 가장 가까운 것."""
+    names = {name for name, _, _ in corpus}
+    if entry["pdf_name"] in names:
+        return entry["pdf_name"]
+    pages = entry.get("pages") or 1
+    size = entry.get("bytes") or 0
+    return min(corpus, key=lambda item: (abs(item[1] - pages), abs(item[2] - size)))[0]
+
+
+class DbEnqueuer:
+    """DB 큐: 행만 만들면 db_worker 가 가져간다."""
+
+    def send(self, job_id: int, pdf_name: str, created_at_ms: int) -> None:
+        pass
+
+    def sleep(self, seconds: float) -> None:
+        time.sleep(seconds)
+
+    def close(self) -> None:
+        pass
+
+
+class RedisEnqueuer(DbEnqueuer):
+    """API 서버(RedisOcrJobQueueClient)처럼 ocr:jobs 에 XADD."""
+
+    def __init__(self) -> None:
+        import redis
+
+        from workers.redis_worker import REDIS_CONFIG, STREAM_KEY
+
+        self.stream_key = STREAM_KEY
+        self.r = redis.Redis(**REDIS_CONFIG)
+
+    def send(self, job_id: int, pdf_name: str, created_at_ms: int) -> None:
+        self.r.xadd(self.stream_key, {"jobId": str(job_id), "pdfName": pdf_name, "createdAt": str(created_at_ms)})
+
+    def close(self) -> None:
+        self.r.close()
+
+
+class RabbitEnqueuer(DbEnqueuer):
+    """API 서버(RabbitOcrJobQueueClient)처럼 ocr.jobs.exchange / ocr.jobs 로 JSON 발행."""
+
+    def __init__(self) -> None:
+        import pika
+
+        from workers.rabbit_worker import EXCHANGE_NAME, QUEUE_NAME, RABBITMQ_CONFIG, RABBITMQ_HEARTBEAT_SEC
+
+        self.pika = pika
+        self.exchange = EXCHANGE_NAME
+        self.routing_key = QUEUE_NAME  # RabbitMqConfig.ROUTING_KEY 와 같음
+        credentials = pika.PlainCredentials(RABBITMQ_CONFIG["username"], RABBITMQ_CONFIG["password"])
+        self.connection = pika.BlockingConnection(
+            pika.ConnectionParameters(
+                host=RABBITMQ_CONFIG["host"],
+                port=RABBITMQ_CONFIG["port"],
+                credentials=credentials,
+                heartbeat=RABBITMQ_HEARTBEAT_SEC,
+            )
+        )
+        self.channel = self.connection.channel()
+
+    def send(self, job_id: int, pdf_name: str, created_at_ms: int) -> None:
+        body = json.dumps({"jobId": str(job_id), "pdfName": pdf_name, "createdAt": str(created_at_ms)})
+        self.channel.basic_publish(
+            exchange=self.exchange,
+            routing_key=self.routing_key,
+            body=body,
+            properties=self.pika.BasicProperties(delivery_mode=2),
+        )
+
+    def sleep(self, seconds: float) -> None:
+        # 1배속 재생에서 요청 사이가 길게 비어도 heartbeat 를 처리하도록 connection.sleep 을 쓴다.
+        self.connection.sleep(seconds)
+
+    def close(self) -> None:
+        self.connection.close()
+
+
+class KafkaEnqueuer(DbEnqueuer):
+    """API 서버(KafkaOcrJobQueueClient)처럼 ocr.jobs 의 jobId % 4 파티션으로 JSON 발행."""
+
+    def __init__(self) -> None:
+        from kafka import KafkaProducer
+
+        from workers.kafka_worker import KAFKA_BOOTSTRAP_SERVERS, KAFKA_PARTITIONS, KAFKA_TOPIC
+
+        self.topic = KAFKA_TOPIC
+        self.partitions = KAFKA_PARTITIONS
+        self.producer = KafkaProducer(
+            bootstrap_servers=KAFKA_BOOTSTRAP_SERVERS.split(","),
+            value_serializer=lambda v: json.dumps(v).encode("utf-8"),
+        )
+
+    def send(self, job_id: int, pdf_name: str, created_at_ms: int) -> None:
+        fields = {"jobId": str(job_id), "pdfName": pdf_name, "createdAt": str(created_at_ms)}
+        self.producer.send(self.topic, value=fields, partition=job_id % self.partitions)
+
+    def close(self) -> None:
+        self.producer.flush()
+        self.producer.close()
+
+
+ENQUEUERS = {"db": DbEnqueuer, "redis": RedisEnqueuer, "rabbit": RabbitEnqueuer, "kafka": KafkaEnqueuer}
+
+
+def replay(conn, trace: list[dict], corpus: list, enqueuer, speed: float) -> tuple[list[int], list[float]]:
+    """trace 를 speed 배속으로 재생하고 (만든 Job id 목록, 항목별 dispatch lag 초) 를 반환한다."""
+    job_ids = []
+    lags = []
+    start = time.monotonic()
+    for entry in trace:
+        due = start + entry["t"] / speed
+        wait = due - time.monotonic()
+        if wait > 0:
+            enqueuer.sleep(wait)
+        lags.append(max(0.0, time.monotonic() - due))
+
+        pdf_name = pick_pdf(entry, corpus)
+        with conn:
+            with conn.cursor() as cur:
+                cur.execute(_INSERT_JOB_SQL, (pdf_name, datetime.now()))
+                job_id = cur.fetchone()[0]
+        # API 서버처럼 커밋 이후에 enqueue (워커가 아직 없는 행을 읽지 않도록)
+        enqueuer.send(job_id, pdf_name, int(time.time() * 1000))
+        job_ids.append(job_id)
+    return job_ids, lags
+
+
+def wait_finished(conn, job_ids: list[int], wait_sec: float) -> int:
+    """모든 Job 이 끝나거나 wait_sec 이 지날 때까지 기다린다. 남은(안 끝난) Job 수를 반환."""
+    deadline = time.monotonic() + wait_sec
+    while True:
+        with conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT count(*) FROM ocr_job WHERE id = ANY(%s) AND finished_at IS NULL", (job_ids,))
+                remaining = cur.fetchone()[0]
+        if remaining == 0 or time.monotonic() >= deadline:
+            return remaining
+        print(f"[Replay] waiting... unfinished={remaining}", flush=True)
+        time.sleep(2)
+
+
+def fetch_replayed(conn, job_ids: list[int]) -> list[dict]:
+    with conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                f"SELECT {_SELECT} FROM ocr_job WHERE id = ANY(%s) AND finished_at IS NOT NULL ORDER BY id",
+                (job_ids,),
+            )
+            return [dict(zip(_COLUMNS, row)) for row in cur.fetchall()]
+
+
+def replay_report(backend: str, jobs: list[dict], sent: int, unfinished: int, lags: list[float]) -> dict:
+    """
+    재생 결과 요약. 지연 백분위는 latency_report.summarize 와 같고,
+    timeout 은 만료(OCR 없이 FAILED) + 기다리는 동안 끝나지 않은 Job 을 합친 비율이다.
+    """
+    for job in jobs:
+        # reaper 가 만료시킨 Job 은 claim 되지 않아 backend 가 비어 있다.
+        job["backend"] = job["backend"] or backend
+    rows = summarize([jobs]) if jobs else []
+    expired = sum(row["expired"] for row in rows)
+    return {
+        "backend": backend,
+        "sent": sent,
+        "finished": len(jobs),
+        "unfinished": unfinished,
+        "expired": expired,
+        "timeout_rate": (expired + unfinished) / sent if sent else 0.0,
+        "max_wait_sec": MAX_WAIT_SEC,
+        "dispatch_lag": {f"p{q}": percentile(lags, q) for q in QUANTILES} if lags else {},
+        "latency": rows,
+    }
+
+
+def print_replay(result: dict) -> None:
+    lag = result["dispatch_lag"]
+    if lag:
+        print(
+            "[Replay] dispatch lag p50/p95/p99 (s): " + "/".join(f"{lag['p%d' % q]:.3f}" for q in QUANTILES),
+            flush=True,
+        )
+    print_report(result["latency"])
+    print(
+        f"[Replay] backend={result['backend']} sent={result['sent']} finished={result['finished']} "
+        f"unfinished={result['unfinished']} expired={result['expired']} "
+        f"timeout_rate={result['timeout_rate']:.2%} (max_wait={result['max_wait_sec']}s)",
+        flush=True,
+    )
+
+
+# ------------------------------------------------------------
+# CLI
+# ------------------------------------------------------------
+def _parse_time(value: str) -> datetime:
+    return datetime.fromisoformat(value)
+
+
+def cmd_record(args) -> None:
+    conn = psycopg2.connect(**DB_CONFIG)
+    try:
+        arrivals = fetch_arrivals(conn, args.since, args.until, args.include_archive)
+    finally:
+        conn.close()
+
+    trace = build_trace(arrivals)
+    args.out.write_text(json.dumps({"recorded_at": datetime.now().isoformat(), "jobs": trace}, indent=2, ensure_ascii=False))
+    duration = trace[-1]["t"] if trace else 0.0
+    print(f"[Replay] recorded {len(trace)} jobs over {duration:.1f}s → {args.out}", flush=True)
+
+
+def cmd_replay(args) -> None:
+    trace = json.loads(args.trace.read_text())["jobs"]
+    if args.limit:
+        trace = trace[: args.limit]
+    if not trace:
+        print("[Replay] empty trace", flush=True)
+        return
+
+    corpus = load_corpus()
+    if not corpus:
+        raise SystemExit(f"[Replay] no readable PDFs in {DATA_DIR}")
+
+    print(
+        f"[Replay] backend={args.backend} jobs={len(trace)} speed={args.speed}x "
+        f"duration={trace[-1]['t'] / args.speed:.1f}s corpus={len(corpus)} pdfs",
+        flush=True,
+    )
+    enqueuer = ENQUEUERS[args.backend]()
+    conn = psycopg2.connect(**DB_CONFIG)
+    try:
+        try:
+            job_ids, lags = replay(conn, trace, corpus, enqueuer, args.speed)
+        finally:
+            enqueuer.close()
+        unfinished = wait_finished(conn, job_ids, args.wait_sec)
+        jobs = fetch_replayed(conn, job_ids)
+    finally:
+        conn.close()
+
+    result = replay_report(args.backend, jobs, len(job_ids), unfinished, lags)
+    print_replay(result)
+
+    if args.json is not None:
+        args.json.write_text(json.dumps(result, indent=2, ensure_ascii=False))
+        print(f"[Replay] saved {args.json}", flush=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Job 도착 trace 기록 / 백엔드 재생")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    record = sub.add_parser("record", help="ocr_job 에서 도착 trace 를 기록")
+    record.add_argument("--since", type=_parse_time, default=None, help="이 시각 이후 요청 (로컬 시각)")
+    record.add_argument("--until", type=_parse_time, default=None, help="이 시각 이전 요청 (로컬 시각)")
+    record.add_argument("--include-archive", action="store_true", help="ocr_job_archive 로 옮겨진 Job 도 포함")
+    record.add_argument("--out", type=Path, default=Path("trace.json"), help="trace 저장 경로")
+    record.set_defaults(func=cmd_record)
+
+    play = sub.add_parser("replay", help="trace 를 백엔드에 재생하고 지연 / 타임아웃을 리포트")
+    play.add_argument("trace", type=Path, help="record 로 만든 trace JSON")
+    play.add_argument("--backend", choices=BACKENDS, required=True, help="재생할 큐 백엔드")
+    play.add_argument("--speed", type=float, default=1.0, help="재생 배속 (2 면 도착 간격을 절반으로)")
+    play.add_argument("--limit", type=int, default=0, help="앞에서부터 이 개수만 재생 (0 이면 전체)")
+    play.add_argument(
+        "--wait-sec", type=float, default=MAX_WAIT_SEC * 2, help="재생 후 Job 이 끝나길 기다리는 최대 시간(초)"
+    )
+    play.add_argument("--json", type=Path, default=None, help="결과를 JSON 으로 저장할 경로")
+    play.set_defaults(func=cmd_replay)
+
+    args = parser.parse_args()
+    if getattr(args, "speed", 1.0) <= 0:
+        parser.error("--speed 는 0 보다 커야 합니다")
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
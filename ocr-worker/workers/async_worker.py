@@ -0,0 +1,1163 @@
+# ocr-worker/workers/async_worker.py
+"""
+asyncio 기반 워커 런타임 (db / redis / rabbit / kafka 공통).
+
+기존 워커들은 psycopg2 / redis-py / kafka-python / pika BlockingConnection 위의 blocking 루프라서
+메시지 가져오기 → claim → OCR → 상태 변경 → ACK 가 한 줄로 직렬화된다.
+OCR 이 도는 동안에는 다음 메시지를 가져오지도, 끝난 Job 을 ACK 하지도 못한다.
+
+여기서는
+- 브로커 / DB 호출은 비동기 클라이언트(asyncpg, redis.asyncio, aio-pika, aiokafka)로 이벤트 루프에서 처리하고,
+- OCR 은 스레드 executor(OCR_ASYNC_OCR_THREADS 개)에서 돌린다.
+- fetch 루프는 OCR 이 도는 동안 다음 Job 을 가져와 검사/claim 해서 준비 큐에 넣어 둔다.
+  (OCR 슬롯 + OCR_ASYNC_PREFETCH 개까지만 미리 claim → 다른 워커 몫을 과하게 가져오지 않음)
+- claim 한 Job 은 입력 준비 스레드가 PDF 읽기(mmap + 해시) / 체크포인트 조회 / 첫 창 렌더링까지 미리 해 둔다.
+  (OCR_ASYNC_PREPARE_INPUT=0 이면 끔) → Job N 추론 중에 Job N+1 의 I/O 가 끝나 있다.
+- 끝난 Job 의 상태 변경 + ACK 는 별도 task 로 돌려서, 다음 OCR 이 바로 시작된다.
+
+--ocr-threads 1 --prefetch 1 이면 "추론 1 + 준비 1 + 완료 처리" 의 double buffering 이 되고,
+워커 처리량은 순수 추론 처리량에 가까워진다.
+
+드물게 일어나는 경로(fan-out, sub-job 완료, 만료 Job 일괄 FAILED)는 기존 동기 코드를 그대로 쓰고,
+전용 스레드 하나 + psycopg2 커넥션 하나에서 순서대로 실행한다.
+
+종료(SIGINT / SIGTERM) 시:
+- 새 메시지를 더 가져오지 않고, 진행 중인 OCR 과 ACK 를 마친다.
+- claim 만 하고 시작하지 못한 Job 은 PENDING 으로 되돌리고 ACK 하지 않는다 → 브로커가 다시 전달한다.
+
+사용 예 (ocr-worker 디렉터리에서):
+    python -m workers.async_worker --backend redis --ocr-threads 1 --prefetch 2
+"""
+import argparse
+import asyncio
+import functools
+import json
+import os
+import signal
+import socket
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Optional
+
+import psycopg2
+
+from ocr_engine.cpu_budget import apply_cpu_budget, cpu_budget_from_env
+from ocr_engine.schemas import WorkerPredictRequest
+from ocr_engine.predictor import PreparedInput, count_pdf_pages, prepare_input, run_ocr
+from workers.deadline import deadline_from_message, deadline_from_row, profile_for_job
+from workers.fanout import PageRange, SubJob, finish_subjob, maybe_fan_out, page_range_from_message, subjob_message
+from workers.idempotency import LEASE_SEC, begin_claim, finish_claim, release_claim
+from workers.job_claim import (
+    ASYNC_CLAIM_SQL,
+    CLAIMED,
+    EXPIRED,
+    LEASED,
+    NOT_FOUND,
+    NOT_PENDING,
+    ExpiredJobBuffer,
+    is_message_expired,
+    reclaim_before,
+)
+from workers.job_events import JOB_EVENTS_MODE, PG_EVENT_CHANNEL, build_job_event, publish_after_commit
+from workers.job_reaper import expired_claim_filter, start_job_reaper
+from workers.job_timing import WORKER_ID, OcrTiming, enqueued_at_from_message
+from workers.lanes import LANE_LARGE, LANE_SMALL, WORKER_LANES, LaneScheduler, should_move_to_large
+from workers.stream_trimmer import STREAM_TRIM_ENABLED, StreamTrimmer
+from workers.worker_log import get_worker_logger
+
+# ------------------------------------------------------------
+# 접속 설정 (각 워커와 동일)
+# ------------------------------------------------------------
+DB_CONFIG = {
+    "host": "localhost",
+    "port": 5432,
+    "dbname": "mq_database",
+    "user": "jewan",
+    "password": "jewan",
+}
+# asyncpg 는 dbname 대신 database 를 쓴다.
+ASYNCPG_CONFIG = {
+    "host": DB_CONFIG["host"],
+    "port": DB_CONFIG["port"],
+    "database": DB_CONFIG["dbname"],
+    "user": DB_CONFIG["user"],
+    "password": DB_CONFIG["password"],
+}
+
+REDIS_CONFIG = {
+    "host": "localhost",
+    "port": 6379,
+    "db": 0,
+    "decode_responses": True,
+}
+STREAM_KEYS = {LANE_SMALL: "ocr:jobs", LANE_LARGE: "ocr:jobs:large"}
+GROUP_NAME = "ocr-workers"
+
+RABBITMQ_CONFIG = {
+    "host": "localhost",
+    "port": 5672,
+    "username": "jewan",
+    "password": "jewan",
+}
+QUEUE_NAMES = {LANE_SMALL: "ocr.jobs", LANE_LARGE: "ocr.jobs.large"}
+EXCHANGE_NAME = "ocr.jobs.exchange"
+LARGE_ROUTING_KEY = "ocr.jobs.large"
+
+KAFKA_BOOTSTRAP_SERVERS = os.getenv("KAFKA_BOOTSTRAP_SERVERS", "localhost:9092")
+KAFKA_TOPICS = {LANE_SMALL: "ocr.jobs", LANE_LARGE: "ocr.jobs.large"}
+KAFKA_GROUP_ID = "ocr-workers"
+KAFKA_PARTITIONS = 4
+
+_env_name = os.getenv("CONSUMER_NAME")
+if _env_name:
+    CONSUMER_NAME = _env_name
+else:
+    CONSUMER_NAME = f"{socket.gethostname()}-{os.getpid()}"
+
+# ------------------------------------------------------------
+# 런타임 설정
+# ------------------------------------------------------------
+# 동시에 돌리는 OCR 수 (executor 스레드 수)
+OCR_THREADS = int(os.getenv("OCR_ASYNC_OCR_THREADS", "1"))
+# OCR 슬롯 외에 미리 claim 해 둘 Job 수
+PREFETCH = int(os.getenv("OCR_ASYNC_PREFETCH", "2"))
+# claim 한 Job 의 입력(PDF 읽기 / 첫 창 렌더링)을 OCR 슬롯이 나기 전에 미리 준비할지
+PREPARE_INPUT = os.getenv("OCR_ASYNC_PREPARE_INPUT", "1") == "1"
+
+# 요청 후 몇 초가 지나면 타임아웃으로 간주할지 (요구사항: 60초)
+MAX_WAIT_SEC = 60
+# 처리할 Job 이 없을 때 다시 조회하기까지 대기 시간(초)
+POLL_INTERVAL_SEC = 1.0
+# Redis XREADGROUP block 시간 (ms). 종료 신호에 빨리 반응하도록 동기 워커보다 짧게 둔다.
+REDIS_BLOCK_MS = 1000
+# XAUTOCLAIM 기준 / 확인 주기 (redis_worker 와 동일)
+RECLAIM_MIN_IDLE_MS = 30000
+RECLAIM_CHECK_SEC = 10.0
+# lane 하나만 보고 기다리는 시간(ms) (kafka_worker 와 동일)
+LANE_POLL_MS = 100
+# 에러 후 재시도 대기(초)
+RETRY_SLEEP_SEC = 3.0
+
+log = get_worker_logger()
+
+
+class Delivery:
+    """
+    브로커(또는 DB)에서 가져온 Job 한 건.
+
+    - token   : ACK 에 필요한 백엔드별 정보 (stream message id, aio-pika 메시지, kafka offset ...)
+    - reclaim : 이전 워커가 처리 도중 죽었을 수 있는 메시지 (PROCESSING 도 다시 claim)
+    - claimed : 가져오면서 이미 PROCESSING 으로 바꾼 경우 (DB 백엔드)
+    - deadline: 마감 시각(epoch 초). 처리 프로필 선택에 쓴다 (없으면 메시지 createdAt 으로 계산)
+    - prepared: 입력 준비 스레드에서 돌고 있는 prepare_job 의 future (준비하지 않으면 None)
+    - page_count: PDF 페이지 수. 메시지마다 한 번 세서 lane 이동 / fan-out / 프로필 선택이 같이 쓴다 (sub-job 은 None)
+    """
+
+    __slots__ = (
+        "job_id", "pdf_name", "fields", "lane", "reclaim", "token", "pages", "claimed", "deadline", "prepared",
+        "page_count",
+    )
+
+    def __init__(
+        self,
+        job_id: int,
+        pdf_name: str,
+        fields: dict,
+        lane: str,
+        reclaim: bool,
+        token=None,
+        pages: Optional[PageRange] = None,
+        claimed: bool = False,
+        deadline: Optional[float] = None,
+        page_count: Optional[int] = None,
+    ) -> None:
+        self.job_id = job_id
+        self.pdf_name = pdf_name
+        self.fields = fields
+        self.lane = lane
+        self.reclaim = reclaim
+        self.token = token
+        self.pages = pages if pages is not None else page_range_from_message(fields)
+        self.claimed = claimed
+        self.deadline = deadline if deadline is not None else deadline_from_message(fields.get("createdAt"))
+        self.prepared: Optional[asyncio.Future] = None
+        self.page_count = page_count
+
+
+def _parse_fields(fields: dict, **where) -> Optional[tuple[int, str]]:
+    """메시지에서 (job_id, pdf_name) 을 꺼낸다. 잘못된 메시지면 로그를 남기고 None."""
+    job_id_str = fields.get("jobId")
+    pdf_name = fields.get("pdfName")
+    if job_id_str is None or pdf_name is None:
+        log.warn("invalid_message", reason="jobId/pdfName missing", **where)
+        return None
+    try:
+        return int(job_id_str), str(pdf_name)
+    except ValueError:
+        log.warn("invalid_message", reason="jobId not int", job_id=job_id_str, **where)
+        return None
+
+
+async def notify_in_tx_async(conn, event: dict) -> None:
+    """job_events.notify_in_tx 의 asyncpg 버전 (트랜잭션 안에서 호출)."""
+    if JOB_EVENTS_MODE == "postgres":
+        await conn.execute("SELECT pg_notify($1, $2)", PG_EVENT_CHANNEL, json.dumps(event))
+
+
+# ------------------------------------------------------------
+# 백엔드별 Job source
+# ------------------------------------------------------------
+class JobSource(ABC):
+    """
+    백엔드별 메시지 가져오기 / ACK / lane 이동 / sub-job 넣기.
+
+    - fetch 는 lane 가중치 순서대로 최대 몇 건을 가져온다. 없으면 잠시 기다렸다가 빈 리스트.
+    - 잘못된 메시지는 fetch 안에서 바로 ACK 하고 돌려주지 않는다.
+    """
+
+    name = ""
+    # reclaim 메시지가 PROCESSING Job 을 재수거하려면 picked_at 이 이만큼 지나야 함 (None 이면 바로 재수거)
+    reclaim_lease_sec: Optional[float] = None
+    # lease 가 남아 재수거하지 못한 메시지를 ACK 하지 않고 남겨 둘지 (나중에 다시 재수거할 수 있는 브로커만)
+    hold_leased = False
+    # 동시에 가지고 있을 수 있는 메시지 수 (AsyncWorker 가 OCR 슬롯 + prefetch 로 맞춘다)
+    capacity = 1
+
+    @property
+    def backend(self) -> str:
+        """ocr_job.backend 에 기록하는 이름. 동기 워커와 구분되도록 "-async" 를 붙인다."""
+        return f"{self.name}-async"
+
+    @abstractmethod
+    async def open(self, pool) -> None:
+        """브로커에 연결한다. pool 은 asyncpg 풀 (DbSource 만 사용)."""
+
+    @abstractmethod
+    async def fetch(self, scheduler: LaneScheduler) -> list[Delivery]:
+        """lane 순서대로 메시지를 가져온다."""
+
+    @abstractmethod
+    async def ack(self, delivery: Delivery) -> None:
+        """처리가 끝난(또는 버릴) 메시지를 ACK 한다."""
+
+    @abstractmethod
+    async def move_to_large(self, delivery: Delivery) -> None:
+        """메시지를 large lane 으로 옮기고 원래 메시지를 ACK 한다."""
+
+    @abstractmethod
+    async def publish_subjobs(self, delivery: Delivery, subjobs: list[SubJob]) -> None:
+        """fan-out sub-job 메시지를 large lane 에 넣는다."""
+
+    async def close(self) -> None:
+        pass
+
+
+class DbSource(JobSource):
+    """
+    ocr_job 테이블 polling (db_worker 와 같은 SELECT ... FOR UPDATE SKIP LOCKED).
+
+    - 가져오면서 PROCESSING 으로 바꾸므로 claim 단계가 없다. ACK 도 없다.
+    - 페이지 수(lane 분류)는 커밋 후에 센다. large lane 으로 갈 Job 은 PENDING 으로 되돌린다 (db_worker 와 같음).
+    - 만료된 행은 reaper 가 처리하므로 조회하지 않는다 (OCR_REAPER=0 이면 여기서 FAILED + 이벤트 발행).
+    """
+
+    name = "db"
+
+    async def open(self, pool) -> None:
+        self.pool = pool
+
+    async def fetch(self, scheduler: LaneScheduler) -> list[Delivery]:
+        while True:
+            skip_before = expired_claim_filter(MAX_WAIT_SEC)
+            expired_events: list[dict] = []
+            delivery = None
+            async with self.pool.acquire() as conn:
+                async with conn.transaction():
+                    for lane in scheduler.order():
+                        delivery = await self._pick_from_lane(conn, lane, skip_before, expired_events)
+                        if delivery is not None:
+                            break
+
+            # 커밋 이후에 발행 → 이벤트를 받은 API 서버가 항상 최종 상태를 읽는다.
+            for event in expired_events:
+                await asyncio.to_thread(publish_after_commit, event)
+            if delivery is None:
+                await asyncio.sleep(POLL_INTERVAL_SEC)
+                return []
+
+            # 페이지 수는 커밋 후에 센다 (파일 I/O 동안 행 잠금을 잡지 않도록)
+            if delivery.pages is None:
+                delivery.page_count = await asyncio.to_thread(count_pdf_pages, delivery.pdf_name)
+            if not should_move_to_large(delivery.lane, delivery.page_count, delivery.pages is not None):
+                log.info("picked", job_id=delivery.job_id, pdf_name=delivery.pdf_name, lane=delivery.lane)
+                return [delivery]
+
+            # small lane 의 큰 문서 → large lane 의 PENDING 으로 되돌리고 다음 후보를 본다.
+            async with self.pool.acquire() as conn:
+                await conn.execute(
+                    """
+                    UPDATE ocr_job
+                    SET status = 'PENDING', lane = $1, picked_at = NULL, worker_id = NULL, backend = NULL
+                    WHERE id = $2 AND status = 'PROCESSING' AND worker_id = $3
+                    """,
+                    LANE_LARGE,
+                    delivery.job_id,
+                    WORKER_ID,
+                )
+            log.info("lane_moved", job_id=delivery.job_id, lane=LANE_LARGE)
+
+    async def _pick_from_lane(
+        self, conn, lane: str, skip_before: Optional[datetime] = None, expired_events: Optional[list] = None
+    ) -> Optional[Delivery]:
+        while True:
+            row = await conn.fetchrow(
+                """
+                SELECT id, pdf_name, created_at, parent_id, page_start, page_end
+                FROM ocr_job
+                WHERE status = 'PENDING' AND COALESCE(lane, 'small') = $1
+                  AND ($2::timestamp IS NULL OR parent_id IS NOT NULL OR created_at >= $2)
+                ORDER BY id
+                LIMIT 1
+                FOR UPDATE SKIP LOCKED
+                """,
+                lane,
+                skip_before,
+            )
+            if row is None:
+                return None
+
+            job_id, pdf_name = row["id"], row["pdf_name"]
+            pages = None
+            if row["parent_id"] is not None:
+                pages = PageRange(row["parent_id"], row["page_start"], row["page_end"])
+
+            # 생성 후 60초가 지났으면 타임아웃 → FAILED (sub-job 은 만료 대상 아님)
+            if pages is None and datetime.now() - row["created_at"] > timedelta(seconds=MAX_WAIT_SEC):
+                log.info("expired", job_id=job_id, check="db")
+                await conn.execute(
+                    """
+                    UPDATE ocr_job
+                    SET status = 'FAILED', finished_at = $1, backend = COALESCE(backend, $2),
+                        enqueued_at = COALESCE(enqueued_at, created_at)
+                    WHERE id = $3
+                    """,
+                    datetime.now(),
+                    self.backend,
+                    job_id,
+                )
+                event = build_job_event(job_id, "FAILED")
+                await notify_in_tx_async(conn, event)
+                if expired_events is not None:
+                    expired_events.append(event)
+                continue
+
+            await conn.execute(
+                """
+                UPDATE ocr_job
+                SET status = 'PROCESSING', picked_at = $1, worker_id = $2, backend = $3,
+                    enqueued_at = COALESCE(enqueued_at, created_at)
+                WHERE id = $4
+                """,
+                datetime.now(),
+                WORKER_ID,
+                self.backend,
+                job_id,
+            )
+            return Delivery(
+                job_id,
+                str(pdf_name),
+                {},
+                lane,
+                reclaim=True,
+                pages=pages,
+                claimed=True,
+                deadline=deadline_from_row(row["created_at"]),
+            )
+
+    async def ack(self, delivery: Delivery) -> None:
+        pass
+
+    async def move_to_large(self, delivery: Delivery) -> None:
+        pass
+
+    async def publish_subjobs(self, delivery: Delivery, subjobs: list[SubJob]) -> None:
+        # PENDING sub-job 행이 곧 큐
+        pass
+
+
+class RedisSource(JobSource):
+    """
+    redis.asyncio 로 Streams Consumer Group 을 읽는다 (redis_worker 와 같은 stream / group).
+
+    - XAUTOCLAIM 은 OCR 중인 메시지도 idle 시간만 보고 가져오므로, PROCESSING Job 은 lease 가 지났을 때만 재수거한다.
+      lease 가 남았으면 ACK 하지 않고 PEL 에 남겨 둔다 (원래 컨슈머가 XACK 하거나, 죽었다면 나중에 다시 재수거).
+    """
+
+    name = "redis"
+    reclaim_lease_sec = LEASE_SEC
+    hold_leased = True
+
+    async def open(self, pool) -> None:
+        import redis.asyncio as aioredis
+
+        self._errors = aioredis.ResponseError
+        self.r = aioredis.Redis(**REDIS_CONFIG)
+        for lane, start_id in ((LANE_SMALL, "$"), (LANE_LARGE, "0")):
+            try:
+                await self.r.xgroup_create(
+                    name=STREAM_KEYS[lane], groupname=GROUP_NAME, id=start_id, mkstream=True
+                )
+            except aioredis.ResponseError as e:
+                if "BUSYGROUP" not in str(e):
+                    raise
+        self._lane_by_stream = {key: lane for lane, key in STREAM_KEYS.items()}
+        self._last_reclaim_at = 0.0
+        # ACK 된 엔트리를 주기적으로 지운다 (workers/stream_trimmer.py, OCR_STREAM_TRIM)
+        self._trimmer = StreamTrimmer(STREAM_KEYS.values()) if STREAM_TRIM_ENABLED else None
+
+    def _deliveries(self, entries, reclaim: bool) -> tuple[list[Delivery], list[tuple[str, str]]]:
+        deliveries, invalid = [], []
+        for stream_key, messages in entries:
+            for message_id, fields in messages:
+                parsed = _parse_fields(fields, message_id=message_id)
+                if parsed is None:
+                    invalid.append((stream_key, message_id))
+                    continue
+                lane = self._lane_by_stream.get(stream_key, LANE_SMALL)
+                deliveries.append(
+                    Delivery(*parsed, fields, lane, reclaim=reclaim, token=(stream_key, message_id))
+                )
+        return deliveries, invalid
+
+    async def _read(self, scheduler: LaneScheduler):
+        # 주기적으로 다른 컨슈머가 처리 도중 멈춘 메시지를 먼저 재수거한다.
+        if time.monotonic() - self._last_reclaim_at >= RECLAIM_CHECK_SEC:
+            self._last_reclaim_at = time.monotonic()
+            for lane in WORKER_LANES:
+                result = await self.r.xautoclaim(
+                    STREAM_KEYS[lane], GROUP_NAME, CONSUMER_NAME,
+                    min_idle_time=RECLAIM_MIN_IDLE_MS, start_id="0-0", count=1,
+                )
+                messages = [(mid, fields) for mid, fields in result[1] if fields]
+                if messages:
+                    log.info("reclaimed")
+                    return [(STREAM_KEYS[lane], messages)], True
+
+        for lane in scheduler.order():
+            entries = await self.r.xreadgroup(
+                groupname=GROUP_NAME, consumername=CONSUMER_NAME,
+                streams={STREAM_KEYS[lane]: ">"}, count=1,
+            )
+            if entries:
+                return entries, False
+
+        entries = await self.r.xreadgroup(
+            groupname=GROUP_NAME, consumername=CONSUMER_NAME,
+            streams={STREAM_KEYS[lane]: ">" for lane in WORKER_LANES},
+            count=1, block=REDIS_BLOCK_MS,
+        )
+        return entries or [], False
+
+    async def fetch(self, scheduler: LaneScheduler) -> list[Delivery]:
+        if self._trimmer is not None:
+            await self._trimmer.trim_if_due_async(self.r)
+        entries, reclaim = await self._read(scheduler)
+        deliveries, invalid = self._deliveries(entries, reclaim)
+        for stream_key, message_id in invalid:
+            await self.r.xack(stream_key, GROUP_NAME, message_id)
+        return deliveries
+
+    async def ack(self, delivery: Delivery) -> None:
+        stream_key, message_id = delivery.token
+        await self.r.xack(stream_key, GROUP_NAME, message_id)
+
+    async def move_to_large(self, delivery: Delivery) -> None:
+        stream_key, message_id = delivery.token
+        async with self.r.pipeline(transaction=True) as pipe:
+            pipe.xadd(STREAM_KEYS[LANE_LARGE], delivery.fields)
+            pipe.xack(stream_key, GROUP_NAME, message_id)
+            await pipe.execute()
+
+    async def publish_subjobs(self, delivery: Delivery, subjobs: list[SubJob]) -> None:
+        for sub in subjobs:
+            await self.r.xadd(STREAM_KEYS[LANE_LARGE], subjob_message(sub, delivery.pdf_name, delivery.job_id))
+
+    async def close(self) -> None:
+        await self.r.aclose()
+
+
+class RabbitSource(JobSource):
+    """
+    aio-pika 로 lane 큐를 읽는다 (rabbit_worker 와 같은 큐 / exchange).
+
+    - 두 lane 큐를 consume(push) 으로 구독해서 lane 별로 받아 두고, fetch 는 가중치 차례인 lane 부터 꺼낸다.
+      (queue.get polling 은 빈 큐에서 POLL_INTERVAL_SEC 만큼 늦게 받는다)
+    - prefetch 는 컨슈머(lane 큐)마다 capacity 건 → lane 마다 그 이상 받아 두지 않는다.
+    """
+
+    name = "rabbit"
+
+    async def open(self, pool) -> None:
+        import aio_pika
+
+        self._aio_pika = aio_pika
+        self.conn = await aio_pika.connect_robust(
+            host=RABBITMQ_CONFIG["host"],
+            port=RABBITMQ_CONFIG["port"],
+            login=RABBITMQ_CONFIG["username"],
+            password=RABBITMQ_CONFIG["password"],
+        )
+        self.channel = await self.conn.channel()
+        self.exchange = await self.channel.declare_exchange(
+            EXCHANGE_NAME, aio_pika.ExchangeType.TOPIC, durable=True
+        )
+        self.queues = {}
+        for lane in (LANE_SMALL, LANE_LARGE):
+            self.queues[lane] = await self.channel.declare_queue(QUEUE_NAMES[lane], durable=True)
+        await self.queues[LANE_LARGE].bind(self.exchange, routing_key=LARGE_ROUTING_KEY)
+
+        await self.channel.set_qos(prefetch_count=max(1, self.capacity))
+        self._waiting = {lane: deque() for lane in WORKER_LANES}
+        self._arrived = asyncio.Event()
+        for lane in WORKER_LANES:
+            await self.queues[lane].consume(functools.partial(self._on_message, lane), no_ack=False)
+
+    async def _on_message(self, lane: str, message) -> None:
+        self._waiting[lane].append(message)
+        self._arrived.set()
+
+    async def fetch(self, scheduler: LaneScheduler) -> list[Delivery]:
+        if not any(self._waiting.values()):
+            # 받아 둔 메시지가 없으면 도착할 때까지 기다린다 (종료 신호를 보도록 POLL_INTERVAL_SEC 마다 돌아감)
+            self._arrived.clear()
+            try:
+                await asyncio.wait_for(self._arrived.wait(), POLL_INTERVAL_SEC)
+            except asyncio.TimeoutError:
+                return []
+
+        for lane in scheduler.order():
+            if not self._waiting[lane]:
+                continue
+            message = self._waiting[lane].popleft()
+            try:
+                fields = json.loads(message.body.decode("utf-8"))
+            except ValueError:
+                fields = {}
+            parsed = _parse_fields(fields, delivery_tag=message.delivery_tag)
+            if parsed is None:
+                await message.ack()
+                return []
+            return [Delivery(*parsed, fields, lane, reclaim=bool(message.redelivered), token=message)]
+        return []
+
+    async def ack(self, delivery: Delivery) -> None:
+        await delivery.token.ack()
+
+    async def _publish_large(self, body: bytes) -> None:
+        await self.exchange.publish(
+            self._aio_pika.Message(body=body, delivery_mode=self._aio_pika.DeliveryMode.PERSISTENT),
+            routing_key=LARGE_ROUTING_KEY,
+        )
+
+    async def move_to_large(self, delivery: Delivery) -> None:
+        await self._publish_large(delivery.token.body)
+        await delivery.token.ack()
+
+    async def publish_subjobs(self, delivery: Delivery, subjobs: list[SubJob]) -> None:
+        for sub in subjobs:
+            body = json.dumps(subjob_message(sub, delivery.pdf_name, delivery.job_id)).encode("utf-8")
+            await self._publish_large(body)
+
+    async def close(self) -> None:
+        await self.conn.close()
+
+
+class OffsetTracker:
+    """
+    Kafka 파티션별로 처리 중인 offset 을 추적해서, 커밋해도 되는 offset 을 계산한다.
+
+    - 여러 Job 이 동시에 끝나므로 순서가 뒤바뀔 수 있다.
+      아직 안 끝난 가장 작은 offset 까지만 커밋해야, 죽었을 때 그 메시지부터 다시 읽는다.
+    """
+
+    def __init__(self) -> None:
+        self._in_flight: dict = {}
+        self._highest: dict = {}
+        self._committed: dict = {}
+
+    def start(self, tp, offset: int) -> None:
+        self._in_flight.setdefault(tp, set()).add(offset)
+        self._highest[tp] = max(self._highest.get(tp, -1), offset)
+
+    def finish(self, tp, offset: int) -> Optional[int]:
+        """커밋할 offset (다음에 읽을 위치). 새로 커밋할 게 없으면 None."""
+        in_flight = self._in_flight.get(tp, set())
+        in_flight.discard(offset)
+        commit = min(in_flight) if in_flight else self._highest[tp] + 1
+        if self._committed.get(tp) == commit:
+            return None
+        self._committed[tp] = commit
+        return commit
+
+
+class KafkaSource(JobSource):
+    """
+    aiokafka 로 lane 토픽을 읽는다 (kafka_worker 와 같은 토픽 / 그룹).
+
+    - 커밋하지 않은 메시지는 이전 컨슈머가 죽었거나 파티션을 뺏긴 뒤 다시 읽은 것일 수 있으므로 reclaim 으로 본다.
+      단 PROCESSING Job 은 picked_at 이 OCR_IDEMPOTENCY_LEASE_SEC 보다 오래됐을 때만 재수거한다
+      (이전 소유자가 아직 OCR 중일 수 있음 → 그 전에는 중복으로 보고 넘김).
+    - 동시에 끝나는 Job 들의 커밋 순서는 OffsetTracker 가 맞춘다.
+    """
+
+    name = "kafka"
+    reclaim_lease_sec = LEASE_SEC
+
+    async def open(self, pool) -> None:
+        from aiokafka import AIOKafkaConsumer, AIOKafkaProducer
+        from aiokafka.admin import AIOKafkaAdminClient, NewTopic
+        from aiokafka.errors import TopicAlreadyExistsError
+
+        servers = KAFKA_BOOTSTRAP_SERVERS.split(",")
+
+        # large lane 토픽은 구독 전에 만들어 둔다 (kafka_worker.ensure_large_topic 과 같은 이유)
+        admin = AIOKafkaAdminClient(bootstrap_servers=servers)
+        await admin.start()
+        try:
+            await admin.create_topics(
+                [NewTopic(KAFKA_TOPICS[LANE_LARGE], num_partitions=KAFKA_PARTITIONS, replication_factor=1)]
+            )
+        except TopicAlreadyExistsError:
+            pass
+        finally:
+            await admin.close()
+
+        self.consumer = AIOKafkaConsumer(
+            *(KAFKA_TOPICS[lane] for lane in WORKER_LANES),
+            bootstrap_servers=servers,
+            group_id=KAFKA_GROUP_ID,
+            client_id=CONSUMER_NAME,
+            enable_auto_commit=False,
+            auto_offset_reset="latest",
+            value_deserializer=lambda v: json.loads(v.decode("utf-8")),
+        )
+        self.producer = AIOKafkaProducer(
+            bootstrap_servers=servers,
+            value_serializer=lambda v: json.dumps(v).encode("utf-8"),
+        )
+        await self.consumer.start()
+        await self.producer.start()
+        self.tracker = OffsetTracker()
+        self._lane_by_topic = {topic: lane for lane, topic in KAFKA_TOPICS.items()}
+
+    async def _poll(self, scheduler: LaneScheduler) -> dict:
+        assigned = self.consumer.assignment()
+        for lane in scheduler.order():
+            lane_partitions = [tp for tp in assigned if tp.topic == KAFKA_TOPICS[lane]]
+            if not lane_partitions:
+                continue
+            batch = await self.consumer.getmany(*lane_partitions, timeout_ms=LANE_POLL_MS, max_records=1)
+            if batch:
+                return batch
+        return await self.consumer.getmany(timeout_ms=1000, max_records=1)
+
+    async def fetch(self, scheduler: LaneScheduler) -> list[Delivery]:
+        deliveries = []
+        for tp, messages in (await self._poll(scheduler)).items():
+            lane = self._lane_by_topic.get(tp.topic, LANE_SMALL)
+            for msg in messages:
+                self.tracker.start(tp, msg.offset)
+                fields = msg.value if isinstance(msg.value, dict) else {}
+                parsed = _parse_fields(fields, offset=msg.offset)
+                if parsed is None:
+                    await self._commit(tp, msg.offset)
+                    continue
+                deliveries.append(Delivery(*parsed, fields, lane, reclaim=True, token=(tp, msg.offset)))
+        return deliveries
+
+    async def _commit(self, tp, offset: int) -> None:
+        commit = self.tracker.finish(tp, offset)
+        if commit is None:
+            return
+        try:
+            await self.consumer.commit({tp: commit})
+        except Exception as e:
+            # 리밸런스로 파티션을 뺏긴 경우 등. 새 소유자가 다시 읽어서 이어서 처리한다.
+            log.warn("commit_failed", partition=tp.partition, offset=offset, error=e)
+
+    async def ack(self, delivery: Delivery) -> None:
+        await self._commit(*delivery.token)
+
+    async def move_to_large(self, delivery: Delivery) -> None:
+        await self.producer.send_and_wait(
+            KAFKA_TOPICS[LANE_LARGE], value=delivery.fields, partition=delivery.job_id % KAFKA_PARTITIONS
+        )
+        await self.ack(delivery)
+
+    async def publish_subjobs(self, delivery: Delivery, subjobs: list[SubJob]) -> None:
+        for sub in subjobs:
+            await self.producer.send(
+                KAFKA_TOPICS[LANE_LARGE],
+                value=subjob_message(sub, delivery.pdf_name, delivery.job_id),
+                partition=sub.job_id % KAFKA_PARTITIONS,
+            )
+        await self.producer.flush()
+
+    async def close(self) -> None:
+        await self.consumer.stop()
+        await self.producer.stop()
+
+
+SOURCES = {"db": DbSource, "redis": RedisSource, "rabbit": RabbitSource, "kafka": KafkaSource}
+
+
+# ------------------------------------------------------------
+# OCR (executor 스레드에서 실행)
+# ------------------------------------------------------------
+def _build_request(
+    job_id: int,
+    pdf_name: str,
+    pages: Optional[PageRange],
+    deadline: Optional[float],
+    page_count: Optional[int],
+) -> WorkerPredictRequest:
+    return WorkerPredictRequest(
+        pdf_name=pdf_name,
+        job_id=job_id,
+        page_start=pages.page_start if pages is not None else None,
+        page_end=pages.page_end if pages is not None else None,
+        # 마감까지 남은 시간이 부족하면 더 빠른 처리 프로필로 낮춘다.
+        profile=profile_for_job(job_id, page_count, pages, deadline),
+    )
+
+
+def prepare_job(
+    job_id: int,
+    pdf_name: str,
+    pages: Optional[PageRange] = None,
+    deadline: Optional[float] = None,
+    page_count: Optional[int] = None,
+) -> Optional[PreparedInput]:
+    """
+    입력 준비 스레드에서 실행된다. 실패하면 None → OCR 단계에서 처음부터 다시 연다.
+    """
+    try:
+        return prepare_input(_build_request(job_id, pdf_name, pages, deadline, page_count))
+    except Exception as e:
+        log.warn("prepare_failed", job_id=job_id, error=e)
+        return None
+
+
+def process_job(
+    job_id: int,
+    pdf_name: str,
+    pages: Optional[PageRange] = None,
+    prepared: Optional[PreparedInput] = None,
+    deadline: Optional[float] = None,
+    page_count: Optional[int] = None,
+) -> bool:
+    """
+    실제 OCR 작업을 수행한다. (각 워커의 process_job 과 동일)
+
+    - prepared 가 있으면(prepare_job 결과) 입력 준비를 건너뛰고 바로 추론한다.
+
+    반환값:
+    - 성공 시 True, 실패 시 False
+    """
+    try:
+        req = prepared.req if prepared is not None else _build_request(job_id, pdf_name, pages, deadline, page_count)
+        log.info(
+            "ocr_start",
+            job_id=job_id,
+            pdf_name=pdf_name,
+            pages=pages,
+            profile=req.profile,
+            prepared=prepared is not None,
+        )
+        res = run_ocr(req, prepared=prepared)
+
+        if res.message.startswith(("pdf not found", "pdf too large")):
+            log.warn("ocr_failed", job_id=job_id, message=res.message)
+            return False
+
+        log.info("ocr_done", job_id=job_id, message=res.message)
+        return True
+    except Exception as e:
+        log.error("ocr_error", job_id=job_id, error=e)
+        return False
+
+
+# ------------------------------------------------------------
+# 런타임
+# ------------------------------------------------------------
+class AsyncWorker:
+    """
+    fetch 루프 1개 + OCR runner N개 + 완료 처리 task 들로 구성된 워커.
+
+    fetch 루프: 메시지 가져오기 → 만료 / lane / 중복 검사 → claim → 입력 준비 시작 → 준비 큐
+    입력 준비 : 전용 스레드 하나에서 PDF 읽기 / 체크포인트 조회 / 첫 창 렌더링 (prepare_job)
+    runner    : 준비 큐에서 꺼내 입력 준비를 기다린 뒤 executor 에서 OCR → 완료 처리 task 생성 → 바로 다음 Job
+    완료 처리 : DONE/FAILED 기록 + 이벤트 발행 + ACK
+    """
+
+    def __init__(
+        self,
+        source: JobSource,
+        ocr_threads: int = OCR_THREADS,
+        prefetch: int = PREFETCH,
+        prepare_input: bool = PREPARE_INPUT,
+    ) -> None:
+        self.source = source
+        self.source.capacity = max(1, ocr_threads) + max(0, prefetch)
+        self.ocr_threads = max(1, ocr_threads)
+        self.prefetch = max(0, prefetch)
+        self.prepare_input = prepare_input
+        self.scheduler = LaneScheduler()
+        self.expired_jobs = ExpiredJobBuffer(backend=source.backend)
+
+        self._ocr_executor = ThreadPoolExecutor(max_workers=self.ocr_threads, thread_name_prefix="ocr")
+        # 입력 준비는 디스크 / 렌더링 위주라 스레드 하나면 추론보다 앞서 간다.
+        self._prepare_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="prepare")
+        # 동기 코드(fan-out / sub-job 완료 / 만료 일괄 처리)는 이 스레드 하나에서 순서대로 실행
+        self._side_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="side-db")
+        self._stopping = asyncio.Event()
+        self._completions: set[asyncio.Task] = set()
+
+    # --------------------------------------------------------
+    # 보조
+    # --------------------------------------------------------
+    async def _side(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._side_executor, fn, *args)
+
+    async def _notify(self, conn, event: dict) -> None:
+        await notify_in_tx_async(conn, event)
+
+    async def _claim(self, job_id: int, allow_reclaim: bool, created_at_ms=None) -> str:
+        """job_claim.claim_job 의 asyncpg 버전 (같은 조건부 UPDATE 한 문장)."""
+        now = datetime.now()
+        cutoff = now - timedelta(seconds=MAX_WAIT_SEC)
+        event = None
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                row = await conn.fetchrow(
+                    ASYNC_CLAIM_SQL,
+                    job_id,
+                    cutoff,
+                    allow_reclaim,
+                    now,
+                    WORKER_ID,
+                    self.source.backend,
+                    enqueued_at_from_message(created_at_ms),
+                    reclaim_before(now, self.source.reclaim_lease_sec),
+                )
+                new_status, old_status = row[0], row[1]
+                if new_status == "PROCESSING":
+                    return CLAIMED
+                if new_status == "FAILED":
+                    event = build_job_event(job_id, "FAILED")
+                    await self._notify(conn, event)
+                elif old_status is None:
+                    return NOT_FOUND
+                elif allow_reclaim and old_status == "PROCESSING":
+                    return LEASED
+                else:
+                    return NOT_PENDING
+
+        await asyncio.to_thread(publish_after_commit, event)
+        return EXPIRED
+
+    async def _update_status(self, job_id: int, success: bool, timing: Optional[OcrTiming] = None) -> None:
+        status = "DONE" if success else "FAILED"
+        event = build_job_event(job_id, status)
+        started_at, ended_at = (timing.started_at, timing.ended_at) if timing is not None else (None, None)
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                # job_timing.FINISH_SET_SQL 의 asyncpg 버전
+                # (job_timing.FINISH_WHERE_SQL: 이 워커가 아직 PROCESSING 으로 잡고 있을 때만)
+                updated = await conn.fetchval(
+                    """
+                    UPDATE ocr_job
+                    SET status = $1,
+                        ocr_started_at = COALESCE($2, ocr_started_at),
+                        ocr_ended_at = COALESCE($3, ocr_ended_at),
+                        finished_at = $4
+                    WHERE id = $5 AND status = 'PROCESSING' AND worker_id = $6
+                    RETURNING id
+                    """,
+                    status,
+                    started_at,
+                    ended_at,
+                    datetime.now(),
+                    job_id,
+                    WORKER_ID,
+                )
+                if updated is not None:
+                    await self._notify(conn, event)
+        await asyncio.to_thread(finish_claim, job_id)
+        if updated is None:
+            # 리퍼가 이미 FAILED 로 돌렸거나 다른 워커가 다시 가져간 Job → 상태도 이벤트도 건드리지 않는다.
+            log.warn("status_update_skipped", job_id=job_id, status=status)
+            return
+        log.info("status_updated", job_id=job_id, status=status)
+
+        # 커밋 이후에 발행 → 이벤트를 받은 API 서버가 항상 최종 상태를 읽는다.
+        await asyncio.to_thread(publish_after_commit, event)
+
+    # --------------------------------------------------------
+    # fetch 루프
+    # --------------------------------------------------------
+    async def _admit(self, d: Delivery) -> bool:
+        """
+        OCR 로 넘길 Job 이면 True. 그 외(만료 / lane 이동 / 중복 / fan-out)는 여기서 ACK 까지 끝낸다.
+        """
+        if not d.claimed:
+            # 메시지의 createdAt 으로 이미 만료된 Job → DB claim 없이 ACK (FAILED 는 모아서 한 번에)
+            if d.pages is None and not d.reclaim and is_message_expired(d.fields.get("createdAt"), MAX_WAIT_SEC):
+                log.info("expired", job_id=d.job_id, check="message")
+                await self._side(self.expired_jobs.add, self.side_conn, d.job_id)
+                await self.source.ack(d)
+                return False
+
+            # 중복 전달은 페이지 수를 세기 전에 idempotency 키로 먼저 거른다 (PDF 를 열지 않고 ACK)
+            if not await asyncio.to_thread(begin_claim, d.job_id, d.reclaim):
+                log.info("duplicate", job_id=d.job_id)
+                await self.source.ack(d)
+                return False
+
+            # 페이지 수는 메시지마다 한 번만 센다 (DB 백엔드는 fetch 에서 이미 셌다)
+            if d.pages is None:
+                d.page_count = await asyncio.to_thread(count_pdf_pages, d.pdf_name)
+
+            # small lane 의 큰 문서 → large lane 으로 옮김 (재전달 메시지는 옮기지 않음)
+            if not d.reclaim and should_move_to_large(d.lane, d.page_count, d.pages is not None):
+                await self.source.move_to_large(d)
+                await asyncio.to_thread(release_claim, d.job_id)
+                log.info("lane_moved", job_id=d.job_id, lane=LANE_LARGE)
+                return False
+
+            outcome = await self._claim(d.job_id, d.reclaim, d.fields.get("createdAt"))
+            if outcome != CLAIMED:
+                if outcome == EXPIRED:
+                    log.info("expired", job_id=d.job_id, check="db")
+                elif outcome == NOT_FOUND:
+                    log.warn("not_found", job_id=d.job_id)
+                elif outcome == LEASED:
+                    log.info("reclaim_leased", job_id=d.job_id)
+                    if self.source.hold_leased:
+                        # 이전 소유자가 아직 처리 중 → ACK 하지 않고 남겨 둔다
+                        return False
+                else:
+                    log.info("not_pending", job_id=d.job_id)
+                if outcome in (EXPIRED, NOT_FOUND):
+                    await asyncio.to_thread(finish_claim, d.job_id)
+                await self.source.ack(d)
+                return False
+            log.info("picked", job_id=d.job_id, lane=d.lane)
+
+        # 큰 문서면 페이지 범위 sub-job 으로 나눠 large lane 에 넣는다.
+        if d.pages is None:
+            subjobs = await self._side(maybe_fan_out, self.side_conn, d.job_id, d.pdf_name, d.page_count)
+            if subjobs is not None:
+                await self.source.publish_subjobs(d, subjobs)
+                await self.source.ack(d)
+                return False
+
+        return True
+
+    async def _acquire_slot(self) -> bool:
+        """OCR 슬롯을 하나 잡는다. 기다리는 중에 종료 요청이 오면 False."""
+        acquire = asyncio.ensure_future(self._slots.acquire())
+        stopping = asyncio.ensure_future(self._stopping.wait())
+        await asyncio.wait({acquire, stopping}, return_when=asyncio.FIRST_COMPLETED)
+        stopping.cancel()
+        if not acquire.done():
+            acquire.cancel()
+            return False
+        if self._stopping.is_set():
+            self._slots.release()
+            return False
+        return True
+
+    async def _fetch_loop(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                if not await self._acquire_slot():
+                    break
+
+                deliveries = await self.source.fetch(self.scheduler)
+                if not deliveries:
+                    self._slots.release()
+                    continue
+
+                for i, d in enumerate(deliveries):
+                    # 한 번에 여러 건이 오면(예: Redis blocking read 에서 lane 마다 1건) 슬롯을 더 잡는다.
+                    if i > 0:
+                        await self._slots.acquire()
+                    if await self._admit(d):
+                        if self.prepare_input:
+                            d.prepared = asyncio.get_running_loop().run_in_executor(
+                                self._prepare_executor,
+                                prepare_job,
+                                d.job_id,
+                                d.pdf_name,
+                                d.pages,
+                                d.deadline,
+                                d.page_count,
+                            )
+                        await self._ready.put(d)
+                    else:
+                        self._slots.release()
+            except Exception as e:
+                log.error("unexpected_error", error=e)
+                await asyncio.sleep(RETRY_SLEEP_SEC)
+
+    async def _flush_loop(self) -> None:
+        """메시지가 뜸해도 모아 둔 만료 Job 이 오래 남지 않도록 주기적으로 flush."""
+        while not self._stopping.is_set():
+            await asyncio.sleep(self.expired_jobs.flush_sec)
+            try:
+                await self._side(self.expired_jobs.flush_if_due, self.side_conn)
+            except Exception as e:
+                log.error("expired_flush_failed", error=e)
+
+    # --------------------------------------------------------
+    # OCR runner / 완료 처리
+    # --------------------------------------------------------
+    async def _runner(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            d = await self._ready.get()
+            if d is None:
+                return
+            try:
+                prepared = await d.prepared if d.prepared is not None else None
+                timing = OcrTiming()
+                success = await loop.run_in_executor(
+                    self._ocr_executor, process_job, d.job_id, d.pdf_name, d.pages, prepared, d.deadline, d.page_count
+                )
+                timing.stop()
+            finally:
+                self._slots.release()
+
+            task = asyncio.create_task(self._complete(d, success, timing))
+            self._completions.add(task)
+            task.add_done_callback(self._completions.discard)
+
+    async def _complete(self, d: Delivery, success: bool, timing: Optional[OcrTiming] = None) -> None:
+        try:
+            # sub-job 이면 부모 진행 카운터를 올리고, 마지막이면 부모를 확정
+            if d.pages is not None:
+                await self._side(finish_subjob, self.side_conn, d.job_id, d.pages.parent_id, success, timing)
+            else:
+                await self._update_status(d.job_id, success, timing)
+            await self.source.ack(d)
+            log.debug("acked", job_id=d.job_id)
+        except Exception as e:
+            # ACK 하지 않은 메시지는 브로커가 다시 전달한다 (reclaim 경로)
+            log.error("complete_failed", job_id=d.job_id, error=e)
+
+    async def _release_unstarted(self) -> None:
+        """claim 만 하고 OCR 을 시작하지 못한 Job 을 PENDING 으로 되돌린다. (ACK 하지 않음)"""
+        job_ids = []
+        while not self._ready.empty():
+            d = self._ready.get_nowait()
+            if d is not None:
+                job_ids.append(d.job_id)
+                if d.prepared is not None:
+                    prepared = await d.prepared
+                    if prepared is not None:
+                        prepared.close()
+        if not job_ids:
+            return
+        async with self.pool.acquire() as conn:
+            await conn.execute(
+                "UPDATE ocr_job SET status = 'PENDING' WHERE id = ANY($1::bigint[]) AND status = 'PROCESSING'",
+                job_ids,
+            )
+        log.info("released_unstarted", count=len(job_ids))
+
+    # --------------------------------------------------------
+    # 실행 / 종료
+    # --------------------------------------------------------
+    def stop(self) -> None:
+        if not self._stopping.is_set():
+            print("[Worker] stop requested. finishing in-flight jobs...", flush=True)
+            self._stopping.set()
+
+    async def run(self) -> None:
+        import asyncpg
+
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, self.stop)
+
+        self.pool = await asyncpg.create_pool(**ASYNCPG_CONFIG, min_size=1, max_size=4)
+        self.side_conn = await self._side(lambda: psycopg2.connect(**DB_CONFIG))
+        await self.source.open(self.pool)
+
+        self._slots = asyncio.Semaphore(self.ocr_threads + self.prefetch)
+        self._ready: asyncio.Queue = asyncio.Queue()
+
+        print(
+            f"[Worker] async runtime started backend={self.source.name}, consumer={CONSUMER_NAME}, "
+            f"ocr_threads={self.ocr_threads}, prefetch={self.prefetch}, prepare_input={self.prepare_input}, "
+            f"lanes={','.join(WORKER_LANES)} weights={self.scheduler.weights}",
+            flush=True,
+        )
+
+        runners = [asyncio.create_task(self._runner()) for _ in range(self.ocr_threads)]
+        flusher = asyncio.create_task(self._flush_loop())
+        try:
+            await self._fetch_loop()
+        finally:
+            flusher.cancel()
+            await self._release_unstarted()
+            for _ in runners:
+                self._ready.put_nowait(None)
+            await asyncio.gather(*runners, return_exceptions=True)
+            if self._completions:
+                await asyncio.gather(*self._completions, return_exceptions=True)
+            try:
+                await self._side(self.expired_jobs.flush, self.side_conn)
+            except Exception as e:
+                log.error("expired_flush_failed", error=e)
+            await self.source.close()
+            await self.pool.close()
+            await self._side(self.side_conn.close)
+            self._side_executor.shutdown()
+            self._ocr_executor.shutdown()
+            self._prepare_executor.shutdown()
+            print("[Worker] async runtime stopped.", flush=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="asyncio 기반 OCR 워커")
+    parser.add_argument("--backend", required=True, choices=sorted(SOURCES))
+    parser.add_argument("--ocr-threads", type=int, default=OCR_THREADS,
+                        help="동시에 돌리는 OCR 수 (executor 스레드 수)")
+    parser.add_argument("--prefetch", type=int, default=PREFETCH,
+                        help="OCR 슬롯 외에 미리 claim 해 둘 Job 수")
+    parser.add_argument("--no-prepare-input", action="store_true",
+                        help="claim 한 Job 의 PDF 읽기 / 첫 창 렌더링을 미리 하지 않음")
+    args = parser.parse_args()
+
+    # 같은 호스트의 워커들이 코어를 나눠 쓰도록 pinning (OCR_WORKER_INDEX / OCR_WORKER_COUNT / OCR_CPU_CORES)
+    apply_cpu_budget(cpu_budget_from_env())
+
+    # 만료 / 멈춘 Job 을 모아서 FAILED 처리 (워커 중 하나만 실제로 돈다, OCR_REAPER)
+    start_job_reaper(DB_CONFIG)
+
+    worker = AsyncWorker(
+        SOURCES[args.backend](),
+        ocr_threads=args.ocr_threads,
+        prefetch=args.prefetch,
+        prepare_input=PREPARE_INPUT and not args.no_prepare_input,
+    )
+    asyncio.run(worker.run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,410 @@
+# ocr-worker/workers/autoscaler.py
+"""
+큐 적체량(backlog) 기반 워커 오토스케일러 (로컬 supervisor).
+
+- 활성 백엔드의 backlog 를 주기적으로 읽는다.
+    db     : ocr_job 의 PENDING 개수
+    redis  : ocr:jobs(+ :large) 스트림에서 그룹이 아직 받지 않은 엔트리(lag) + pending 엔트리
+    rabbit : ocr.jobs(+ .large) 큐의 ready 메시지 수
+    kafka  : ocr.jobs(+ .large) 토픽의 컨슈머 그룹 lag 합계
+    (small / large lane 을 합산한다. workers/lanes.py)
+- ocr_job 의 DONE 증가량으로 워커 1개의 Job 처리 시간(service time)을 측정한다.
+- "지금 들어온 Job 의 예상 대기시간 = backlog × service_time / 워커 수" 가
+  TARGET_WAIT_SEC(기본 45초, 60초 만료보다 여유 있게) 이하가 되도록 하는 최소 워커 수를 구한다.
+- 워커 프로세스(workers.<backend>_worker)를 코어 예산 안에서 띄우고/내린다.
+    - scale up  : 즉시
+    - scale down: 필요 워커 수가 SCALE_DOWN_TICKS 번 연속 현재보다 적을 때, 한 번에 1개씩 (hysteresis)
+- 각 워커는 OCR_WORKER_INDEX(slot) / OCR_WORKER_COUNT / OCR_CPU_CORES 로 자기 코어 몫에 pinning 된다.
+
+사용 예 (ocr-worker 디렉터리에서):
+    python -m workers.autoscaler --backend redis --cpu-cores 8 --cores-per-worker 2
+"""
+import argparse
+import math
+import os
+import signal
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Optional
+
+import psycopg2
+
+# DB / Redis / RabbitMQ 접속 설정은 각 워커 모듈의 것을 그대로 쓴다 (브로커 쪽은 make_backlog_reader 에서 import)
+from workers.db_worker import DB_CONFIG
+
+# ------------------------------------------------------------
+# Kafka 설정 (각 워커와 동일)
+# ------------------------------------------------------------
+KAFKA_BOOTSTRAP_SERVERS = os.getenv("KAFKA_BOOTSTRAP_SERVERS", "localhost:9092")
+KAFKA_TOPICS = ("ocr.jobs", "ocr.jobs.large")
+KAFKA_GROUP_ID = "ocr-workers"
+
+# ------------------------------------------------------------
+# 스케일링 정책 기본값
+# ------------------------------------------------------------
+# 요청 후 몇 초가 지나면 타임아웃으로 간주할지 (요구사항: 60초)
+MAX_WAIT_SEC = 60
+# 예상 대기시간 목표. 만료(60초)까지 OCR 시간만큼의 여유를 남긴다.
+TARGET_WAIT_SEC = 45.0
+# backlog 확인 주기(초)
+TICK_SEC = 10.0
+# 이만큼 연속으로 "워커가 남는다" 고 판단될 때만 1개 줄인다.
+SCALE_DOWN_TICKS = 6
+# service time 측정 전 사용할 초기값(초/Job)
+INITIAL_SERVICE_TIME_SEC = 15.0
+# service time EWMA 가중치
+SERVICE_TIME_ALPHA = 0.3
+# 워커 종료 시 SIGINT 후 기다리는 시간(초). 넘으면 SIGKILL
+STOP_GRACE_SEC = 90.0
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+
+
+# ------------------------------------------------------------
+# backlog 측정
+# ------------------------------------------------------------
+def make_backlog_reader(backend: str, conn) -> Callable[[], int]:
+    """
+    백엔드별 backlog 측정 함수를 만든다. 브로커 클라이언트는 필요한 것만 import 한다.
+    """
+    if backend == "db":
+        def read_db() -> int:
+            with conn:
+                with conn.cursor() as cur:
+                    cur.execute("SELECT count(*) FROM ocr_job WHERE status = 'PENDING'")
+                    return int(cur.fetchone()[0])
+
+        return read_db
+
+    if backend == "redis":
+        import redis
+
+        from workers.redis_worker import GROUP_NAME, REDIS_CONFIG, STREAM_KEYS
+
+        r = redis.Redis(**REDIS_CONFIG)
+
+        def read_stream(stream_key: str) -> int:
+            try:
+                groups = r.xinfo_groups(stream_key)
+            except redis.ResponseError:
+                # 아직 만들어지지 않은 stream (large lane 을 쓰는 워커가 없음)
+                return 0
+            for group in groups:
+                if group["name"] != GROUP_NAME:
+                    continue
+                # lag(아직 그룹에 전달 안 된 엔트리 수)는 Redis 7+ 에서만 제공된다.
+                lag = group.get("lag")
+                if lag is None:
+                    lag = r.xlen(stream_key)
+                return int(lag) + int(group["pending"])
+            return r.xlen(stream_key)
+
+        def read_redis() -> int:
+            return sum(read_stream(key) for key in STREAM_KEYS.values())
+
+        return read_redis
+
+    if backend == "rabbit":
+        import pika
+
+        from workers.rabbit_worker import QUEUE_NAMES, RABBITMQ_CONFIG
+
+        credentials = pika.PlainCredentials(
+            RABBITMQ_CONFIG["username"], RABBITMQ_CONFIG["password"]
+        )
+        params = pika.ConnectionParameters(
+            host=RABBITMQ_CONFIG["host"],
+            port=RABBITMQ_CONFIG["port"],
+            credentials=credentials,
+        )
+        state = {"conn": None, "channel": None}
+
+        def read_queue(queue_name: str) -> int:
+            if state["conn"] is None or state["conn"].is_closed:
+                state["conn"] = pika.BlockingConnection(params)
+            if state["channel"] is None or state["channel"].is_closed:
+                state["channel"] = state["conn"].channel()
+            # passive=True: 큐를 만들지 않고 상태만 조회
+            try:
+                ok = state["channel"].queue_declare(queue=queue_name, durable=True, passive=True)
+            except pika.exceptions.ChannelClosedByBroker:
+                # 아직 만들어지지 않은 큐 (채널은 브로커가 닫으므로 다음에 다시 연다)
+                return 0
+            return int(ok.method.message_count)
+
+        def read_rabbit() -> int:
+            return sum(read_queue(name) for name in QUEUE_NAMES.values())
+
+        return read_rabbit
+
+    if backend == "kafka":
+        from kafka import KafkaAdminClient, KafkaConsumer
+
+        servers = KAFKA_BOOTSTRAP_SERVERS.split(",")
+        admin = KafkaAdminClient(bootstrap_servers=servers)
+        offsets_consumer = KafkaConsumer(bootstrap_servers=servers)
+
+        def read_kafka() -> int:
+            committed = admin.list_consumer_group_offsets(KAFKA_GROUP_ID)
+            partitions = _kafka_topic_partitions(offsets_consumer)
+            begin_offsets = offsets_consumer.beginning_offsets(partitions)
+            end_offsets = offsets_consumer.end_offsets(partitions)
+            lag = 0
+            for tp, end in end_offsets.items():
+                # 커밋된 offset 이 없거나 retention 으로 지워진 구간을 가리키면 남아 있는 첫 offset 부터 센다.
+                floor = begin_offsets.get(tp, 0)
+                meta = committed.get(tp)
+                position = meta.offset if meta is not None and meta.offset >= 0 else floor
+                lag += end - max(position, floor)
+            return lag
+
+        return read_kafka
+
+    raise ValueError(f"unknown backend: {backend}")
+
+
+def _kafka_topic_partitions(consumer):
+    from kafka import TopicPartition
+
+    return [
+        TopicPartition(topic, p)
+        for topic in KAFKA_TOPICS
+        for p in sorted(consumer.partitions_for_topic(topic) or set())
+    ]
+
+
+def kafka_partition_count() -> int:
+    from kafka import KafkaConsumer
+
+    consumer = KafkaConsumer(bootstrap_servers=KAFKA_BOOTSTRAP_SERVERS.split(","))
+    try:
+        return sum(len(consumer.partitions_for_topic(topic) or ()) for topic in KAFKA_TOPICS)
+    finally:
+        consumer.close()
+
+
+def read_done_count(conn) -> int:
+    with conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT count(*) FROM ocr_job WHERE status = 'DONE'")
+            return int(cur.fetchone()[0])
+
+
+# ------------------------------------------------------------
+# 워커 프로세스 관리
+# ------------------------------------------------------------
+class WorkerPool:
+    """
+    workers.<backend>_worker (runtime=async 이면 workers.async_worker) 프로세스들을 slot 번호로 관리한다.
+
+    - slot 은 코어 몫의 번호(OCR_WORKER_INDEX)이기도 하다.
+      빈 slot 중 가장 작은 번호부터 채우고, 내릴 때는 가장 큰 번호부터 내린다.
+    """
+
+    def __init__(self, backend: str, max_slots: int, cpu_cores: int, runtime: str = "sync") -> None:
+        self.backend = backend
+        self.runtime = runtime
+        self.max_slots = max_slots
+        self.cpu_cores = cpu_cores
+        self.procs: dict[int, subprocess.Popen] = {}
+
+    @property
+    def size(self) -> int:
+        return len(self.procs)
+
+    def reap(self) -> None:
+        """비정상 종료한 워커를 정리한다. (다음 tick 에 필요하면 다시 띄운다)"""
+        for slot, proc in list(self.procs.items()):
+            code = proc.poll()
+            if code is not None:
+                print(f"[Autoscaler] worker slot={slot} exited (code={code})", flush=True)
+                del self.procs[slot]
+
+    def scale_to(self, target: int) -> None:
+        while self.size < target:
+            self._start(min(set(range(self.max_slots)) - set(self.procs)))
+        while self.size > target:
+            self._stop(max(self.procs))
+
+    def stop_all(self) -> None:
+        for slot in sorted(self.procs, reverse=True):
+            self._stop(slot)
+
+    def _start(self, slot: int) -> None:
+        env = dict(os.environ)
+        env["OCR_WORKER_INDEX"] = str(slot)
+        env["OCR_WORKER_COUNT"] = str(self.max_slots)
+        env["OCR_CPU_CORES"] = str(self.cpu_cores)
+        if self.runtime == "async":
+            cmd = [sys.executable, "-m", "workers.async_worker", "--backend", self.backend]
+        else:
+            cmd = [sys.executable, "-m", f"workers.{self.backend}_worker"]
+        proc = subprocess.Popen(
+            cmd,
+            cwd=str(BASE_DIR),
+            env=env,
+        )
+        self.procs[slot] = proc
+        print(f"[Autoscaler] started worker slot={slot}, pid={proc.pid}", flush=True)
+
+    def _stop(self, slot: int) -> None:
+        proc = self.procs.pop(slot)
+        print(f"[Autoscaler] stopping worker slot={slot}, pid={proc.pid}", flush=True)
+        # 워커들은 KeyboardInterrupt(SIGINT) 에서 커넥션을 정리하고 종료한다.
+        proc.send_signal(signal.SIGINT)
+        try:
+            proc.wait(timeout=STOP_GRACE_SEC)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.wait()
+
+
+# ------------------------------------------------------------
+# 스케일링 결정
+# ------------------------------------------------------------
+class ScalingPolicy:
+    """
+    backlog 와 service time 으로 필요한 워커 수를 계산하고, hysteresis 를 적용한다.
+    """
+
+    def __init__(
+        self,
+        min_workers: int,
+        max_workers: int,
+        target_wait_sec: float = TARGET_WAIT_SEC,
+        scale_down_ticks: int = SCALE_DOWN_TICKS,
+        service_time_sec: float = INITIAL_SERVICE_TIME_SEC,
+    ) -> None:
+        self.min_workers = min_workers
+        self.max_workers = max_workers
+        self.target_wait_sec = target_wait_sec
+        self.scale_down_ticks = scale_down_ticks
+        self.service_time_sec = service_time_sec
+        self._below_ticks = 0
+
+    def observe_service(self, done_delta: int, busy_workers: int, elapsed_sec: float) -> None:
+        """
+        워커가 모두 바빴던 구간에서의 DONE 증가량으로 service time 을 갱신한다.
+
+        - backlog 가 0 이었던 구간(워커가 놀았던 구간)은 호출하지 않는다.
+        """
+        if done_delta <= 0 or busy_workers <= 0 or elapsed_sec <= 0:
+            return
+        measured = busy_workers * elapsed_sec / done_delta
+        self.service_time_sec = (
+            SERVICE_TIME_ALPHA * measured + (1 - SERVICE_TIME_ALPHA) * self.service_time_sec
+        )
+
+    def predicted_wait(self, backlog: int, workers: int) -> float:
+        if workers <= 0:
+            return math.inf if backlog > 0 else 0.0
+        return backlog * self.service_time_sec / workers
+
+    def required_workers(self, backlog: int) -> int:
+        needed = math.ceil(backlog * self.service_time_sec / self.target_wait_sec)
+        return max(self.min_workers, min(self.max_workers, needed))
+
+    def decide(self, backlog: int, current: int) -> int:
+        needed = self.required_workers(backlog)
+
+        if needed > current:
+            self._below_ticks = 0
+            return needed
+
+        if needed < current:
+            self._below_ticks += 1
+            if self._below_ticks >= self.scale_down_ticks:
+                self._below_ticks = 0
+                return current - 1
+            return current
+
+        self._below_ticks = 0
+        return current
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="큐 적체량 기반 OCR 워커 오토스케일러")
+    parser.add_argument("--backend", required=True, choices=["db", "redis", "rabbit", "kafka"])
+    parser.add_argument("--runtime", choices=["sync", "async"], default="sync",
+                        help="async 이면 workers.async_worker 로 워커를 띄운다")
+    parser.add_argument("--cpu-cores", type=int, default=os.cpu_count() or 1,
+                        help="워커들에게 나눠 줄 총 코어 수 (core budget)")
+    parser.add_argument("--cores-per-worker", type=int, default=1)
+    parser.add_argument("--min-workers", type=int, default=1)
+    parser.add_argument("--target-wait", type=float, default=TARGET_WAIT_SEC,
+                        help="예상 대기시간 목표(초). MAX_WAIT_SEC 보다 작아야 한다.")
+    parser.add_argument("--tick", type=float, default=TICK_SEC)
+    parser.add_argument("--scale-down-ticks", type=int, default=SCALE_DOWN_TICKS)
+    parser.add_argument("--service-time", type=float, default=INITIAL_SERVICE_TIME_SEC,
+                        help="측정 전 초기 service time(초/Job)")
+    args = parser.parse_args()
+
+    if args.target_wait >= MAX_WAIT_SEC:
+        raise SystemExit(f"--target-wait must be < MAX_WAIT_SEC({MAX_WAIT_SEC})")
+
+    max_slots = max(1, args.cpu_cores // args.cores_per_worker)
+    if args.backend == "kafka":
+        # 파티션보다 많은 컨슈머는 할당받을 파티션이 없어 놀기만 한다.
+        max_slots = min(max_slots, max(1, kafka_partition_count()))
+
+    conn = psycopg2.connect(**DB_CONFIG)
+    read_backlog = make_backlog_reader(args.backend, conn)
+    pool = WorkerPool(args.backend, max_slots=max_slots, cpu_cores=args.cpu_cores, runtime=args.runtime)
+    policy = ScalingPolicy(
+        min_workers=min(args.min_workers, max_slots),
+        max_workers=max_slots,
+        target_wait_sec=args.target_wait,
+        scale_down_ticks=args.scale_down_ticks,
+        service_time_sec=args.service_time,
+    )
+
+    print(
+        f"[Autoscaler] backend={args.backend}, cpu_cores={args.cpu_cores}, "
+        f"cores_per_worker={args.cores_per_worker}, max_workers={max_slots}",
+        flush=True,
+    )
+
+    pool.scale_to(policy.min_workers)
+    last_done: Optional[int] = None
+    last_at = time.monotonic()
+    last_backlog = 0
+
+    try:
+        while True:
+            time.sleep(args.tick)
+            pool.reap()
+
+            now = time.monotonic()
+            try:
+                backlog = read_backlog()
+                done = read_done_count(conn)
+            except Exception as e:
+                print(f"[Autoscaler] failed to read backlog: {e}, keep current size", flush=True)
+                continue
+
+            # 직전 구간에도 backlog 가 있었다면 워커가 모두 바빴던 것 → service time 측정
+            if last_done is not None and last_backlog > 0:
+                policy.observe_service(done - last_done, pool.size, now - last_at)
+            last_done, last_at, last_backlog = done, now, backlog
+
+            target = policy.decide(backlog, pool.size)
+            print(
+                f"[Autoscaler] backlog={backlog}, service_time={policy.service_time_sec:.1f}s, "
+                f"workers={pool.size}, predicted_wait={policy.predicted_wait(backlog, pool.size):.1f}s, "
+                f"target_workers={target}",
+                flush=True,
+            )
+            if target != pool.size:
+                pool.scale_to(target)
+
+    except KeyboardInterrupt:
+        print("[Autoscaler] KeyboardInterrupt received. stopping workers...", flush=True)
+    finally:
+        pool.stop_all()
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
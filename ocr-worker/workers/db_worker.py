@@ -1,11 +1,20 @@
 # ocr-worker/workers/db_worker.py
 import time
 from datetime import datetime, timedelta
+from typing import Optional
 
 import psycopg2
 
-from ocr_engine.schemas import PredictRequest
-from ocr_engine.predictor import run_ocr
+from ocr_engine.cpu_budget import apply_cpu_budget, cpu_budget_from_env
+from ocr_engine.schemas import WorkerPredictRequest
+from ocr_engine.predictor import count_pdf_pages, run_ocr
+from workers.deadline import deadline_from_row, profile_for_job
+from workers.fanout import PageRange, finish_subjob, maybe_fan_out
+from workers.lanes import LANE_LARGE, LANE_SMALL, WORKER_LANES, LaneScheduler, should_move_to_large
+from workers.job_events import build_job_event, notify_in_tx, publish_after_commit
+from workers.job_reaper import expired_claim_filter, start_job_reaper
+from workers.job_timing import FINISH_SET_SQL, FINISH_WHERE_SQL, WORKER_ID, OcrTiming, finish_params
+from workers.worker_log import get_worker_logger
 
 # ------------------------------------------------------------
 # DB 접속 설정
@@ -24,6 +33,12 @@ POLL_INTERVAL_SEC = 1.0
 # 요청 후 몇 초가 지나면 타임아웃으로 간주할지 (요구사항: 60초)
 MAX_WAIT_SEC = 60
 
+# ocr_job.backend 에 기록하는 큐 백엔드 이름 (tools/latency_report.py)
+BACKEND = "db"
+
+# 메시지 단위 로그는 백그라운드 스레드가 모아서 출력 (OCR_LOG_LEVEL / OCR_LOG_SAMPLE / OCR_LOG_RATE_LIMIT)
+log = get_worker_logger()
+
 
 def get_db_connection():
     """
@@ -41,70 +56,139 @@ def get_db_connection():
     return conn
 
 
-def fetch_next_pending_job(conn):
+def fetch_next_pending_job(conn, lanes: tuple[str, ...] = (LANE_SMALL,)):
     """
     PENDING 상태의 Job 하나를 가져오고, 즉시 PROCESSING 으로 상태를 변경한다.
 
     동작 요약:
-    1) status = 'PENDING' 인 Job 을 id 순으로 한 건 가져온다.
+    1) lanes 순서대로(가중치 round robin 결과) 각 lane 에서 status = 'PENDING' 인 Job 을 id 순으로 한 건 가져온다.
        - SELECT ... FOR UPDATE SKIP LOCKED 사용으로 동시성 제어
          (다른 워커가 잡고 있는 행은 SKIP).
-    2) created_at 기준으로 60초가 넘은 Job 이면, 즉시 FAILED 로 바꾸고
-       다음 Job 을 다시 조회한다.
-    3) 아직 유효한(만료 안 된) Job 을 찾으면, 그 Job 을 PROCESSING 으로 바꾸고 반환한다.
+       - lane 컬럼이 NULL 이면 small lane (API 서버가 만든 행)
+    2) 만료된(created_at 기준 60초가 넘은) Job 은 reaper(workers/job_reaper.py)가 모아서 FAILED 로 바꾸므로
+       조회 대상에서 뺀다. reaper 를 끈 경우(OCR_REAPER=0)에만 여기서 하나씩 FAILED 로 바꾸고 다음 Job 을 본다.
+       (FAILED 이벤트는 다른 종료 경로와 같이 트랜잭션 안에서 NOTIFY, 커밋 후 발행)
+    3) 아직 유효한(만료 안 된) Job 을 찾으면, 그 Job 을 PROCESSING 으로 바꾸고 커밋한다.
+    4) 커밋 후에 페이지 수를 센다 (파일 I/O 동안 행 잠금 / 트랜잭션을 잡고 있지 않도록).
+       small lane 의 큰 문서면 lane = 'large', PENDING 으로 되돌리고 다음 Job 을 본다.
 
     반환값:
-    - (job_id, pdf_name) 또는 처리할 Job 이 없으면 (None, None)
+    - (job_id, pdf_name, pages, deadline, page_count) 또는 처리할 Job 이 없으면 (None, None, None, None, None)
+      pages 는 fan-out sub-job 이면 PageRange, 아니면 None
+      deadline 은 created_at 기준 마감 시각(epoch 초, 처리 프로필 선택용)
+      page_count 는 lane 분류 때 센 PDF 페이지 수 (sub-job 이면 None, fan-out / 프로필 선택에 다시 쓴다)
     """
+    while True:
+        skip_before = expired_claim_filter(MAX_WAIT_SEC)
+        expired_events: list[dict] = []
+        job = None
+        with conn:
+            with conn.cursor() as cur:
+                for lane in lanes:
+                    job = _pick_from_lane(cur, lane, skip_before, expired_events)
+                    if job is not None:
+                        break
+
+        # 커밋 이후에 발행 → 이벤트를 받은 API 서버가 항상 최종 상태를 읽는다.
+        for event in expired_events:
+            publish_after_commit(event)
+        if job is None:
+            return None, None, None, None, None
+
+        job_id, pdf_name, pages, deadline, lane = job
+        # 페이지 수는 여기서 한 번만 센다 (sub-job 은 셀 필요 없음)
+        page_count = count_pdf_pages(str(pdf_name)) if pages is None else None
+
+        # small lane 의 큰 문서는 large lane 으로 돌려보내고 다음 후보를 본다.
+        if should_move_to_large(lane, page_count, pages is not None):
+            _release_to_large(conn, job_id)
+            continue
+
+        log.info("picked", job_id=job_id, pdf_name=pdf_name, lane=lane)
+        return job_id, pdf_name, pages, deadline, page_count
+
+
+def _release_to_large(conn, job_id: int) -> None:
+    """방금 PROCESSING 으로 가져온 Job 을 large lane 의 PENDING 으로 되돌린다."""
     with conn:
         with conn.cursor() as cur:
-            while True:
-                cur.execute(
-                    """
-                    SELECT id, pdf_name, created_at
-                    FROM ocr_job
-                    WHERE status = 'PENDING'
-                    ORDER BY id
-                    LIMIT 1
-                    FOR UPDATE SKIP LOCKED
-                    """
-                )
-                row = cur.fetchone()
-
-                # 처리할 Job 이 전혀 없으면 끝
-                if row is None:
-                    return None, None
-
-                job_id, pdf_name, created_at = row
-
-                now = datetime.now()
-                # 생성 후 60초가 지났으면 타임아웃으로 간주 → FAILED 처리
-                if now - created_at > timedelta(seconds=MAX_WAIT_SEC):
-                    print(
-                        f"[Worker] job_id={job_id} expired "
-                        f"(created_at={created_at}, now={now}), mark FAILED",
-                        flush=True,
-                    )
-                    cur.execute(
-                        "UPDATE ocr_job SET status = 'FAILED' WHERE id = %s",
-                        (job_id,),
-                    )
-                    # 다음 후보를 보기 위해 while 루프 계속
-                    continue
-
-                # 아직 유효한 Job 이면 PROCESSING 으로 변경 후 반환
-                print(
-                    f"[Worker] picked job_id={job_id}, pdf_name={pdf_name}",
-                    flush=True,
-                )
-                cur.execute(
-                    "UPDATE ocr_job SET status = 'PROCESSING' WHERE id = %s",
-                    (job_id,),
-                )
-                return job_id, pdf_name
-
-
-def update_job_status(conn, job_id: int, success: bool):
+            cur.execute(
+                """
+                UPDATE ocr_job
+                SET status = 'PENDING', lane = %s, picked_at = NULL, worker_id = NULL, backend = NULL
+                WHERE id = %s AND status = 'PROCESSING' AND worker_id = %s
+                """,
+                (LANE_LARGE, job_id, WORKER_ID),
+            )
+    log.info("lane_moved", job_id=job_id, lane=LANE_LARGE)
+
+
+def _pick_from_lane(cur, lane: str, skip_before: Optional[datetime] = None, expired_events: Optional[list] = None):
+    """
+    fetch_next_pending_job 의 lane 하나 처리. 가져올 Job 이 없으면 None.
+    트랜잭션 안에서 돌므로 파일 I/O(페이지 수 세기 등)는 하지 않는다.
+
+    - skip_before: 이보다 먼저 만들어진(만료된) 부모 Job 은 조회하지 않는다 (reaper 가 처리).
+    - expired_events: 여기서 FAILED 로 바꾼 Job 의 이벤트를 담는다 (커밋 후 발행은 호출한 쪽에서).
+    """
+    while True:
+        cur.execute(
+            """
+            SELECT id, pdf_name, created_at, parent_id, page_start, page_end
+            FROM ocr_job
+            WHERE status = 'PENDING' AND COALESCE(lane, 'small') = %s
+              AND (%s::timestamp IS NULL OR parent_id IS NOT NULL OR created_at >= %s)
+            ORDER BY id
+            LIMIT 1
+            FOR UPDATE SKIP LOCKED
+            """,
+            (lane, skip_before, skip_before),
+        )
+        row = cur.fetchone()
+
+        # 이 lane 에 처리할 Job 이 전혀 없으면 끝
+        if row is None:
+            return None
+
+        job_id, pdf_name, created_at, parent_id, page_start, page_end = row
+        # fan-out sub-job 이면 페이지 범위
+        pages = PageRange(parent_id, page_start, page_end) if parent_id is not None else None
+
+        now = datetime.now()
+        # 생성 후 60초가 지났으면 타임아웃으로 간주 → FAILED 처리 (sub-job 은 만료 대상 아님)
+        if pages is None and now - created_at > timedelta(seconds=MAX_WAIT_SEC):
+            log.info("expired", job_id=job_id, created_at=created_at, now=now)
+            cur.execute(
+                f"""
+                UPDATE ocr_job
+                SET {FINISH_SET_SQL}, backend = COALESCE(backend, %s),
+                    enqueued_at = COALESCE(enqueued_at, created_at)
+                WHERE id = %s
+                """,
+                (*finish_params("FAILED", None), BACKEND, job_id),
+            )
+            event = build_job_event(job_id, "FAILED")
+            notify_in_tx(cur, event)
+            if expired_events is not None:
+                expired_events.append(event)
+            # 다음 후보를 보기 위해 while 루프 계속
+            continue
+
+        # 아직 유효한 Job 이면 PROCESSING 으로 변경 후 반환
+        # DB 큐는 행 INSERT 가 곧 enqueue 이므로 enqueued_at = created_at (workers/job_timing.py)
+        cur.execute(
+            """
+            UPDATE ocr_job
+            SET status = 'PROCESSING', picked_at = %s, worker_id = %s, backend = %s,
+                enqueued_at = COALESCE(enqueued_at, created_at)
+            WHERE id = %s
+            """,
+            (now, WORKER_ID, BACKEND, job_id),
+        )
+        return job_id, pdf_name, pages, deadline_from_row(created_at), lane
+
+
+def update_job_status(conn, job_id: int, success: bool, timing: Optional[OcrTiming] = None):
     """
     Job 처리 결과에 따라 상태를 DONE / FAILED 로 업데이트한다.
 
@@ -114,47 +198,62 @@ def update_job_status(conn, job_id: int, success: bool):
     """
     status = "DONE" if success else "FAILED"
 
+    event = build_job_event(job_id, status)
+
     with conn:
         with conn.cursor() as cur:
             cur.execute(
-                "UPDATE ocr_job SET status = %s WHERE id = %s",
-                (status, job_id),
+                f"UPDATE ocr_job SET {FINISH_SET_SQL} WHERE {FINISH_WHERE_SQL}",
+                (*finish_params(status, timing), job_id, WORKER_ID),
             )
-    print(f"[Worker] job_id={job_id} -> status={status}", flush=True)
-
-
-def process_job(job_id: int, pdf_name: str) -> bool:
+            updated = cur.rowcount > 0
+            if updated:
+                notify_in_tx(cur, event)
+    if not updated:
+        # 리퍼가 이미 FAILED 로 돌렸거나 다른 워커가 다시 가져간 Job → 상태도 이벤트도 건드리지 않는다.
+        log.warn("status_update_skipped", job_id=job_id, status=status)
+        return
+    log.info("status_updated", job_id=job_id, status=status)
+
+    # 커밋 이후에 발행 → 이벤트를 받은 API 서버가 항상 최종 상태를 읽는다.
+    publish_after_commit(event)
+
+
+def process_job(
+    job_id: int, pdf_name: str, pages: Optional[PageRange] = None, profile: Optional[str] = None
+) -> bool:
     """
     실제 OCR 작업을 수행한다.
 
-    - FastAPI HTTP 호출 없이, ocr_engine 의 run_ocr(PredictRequest)를 직접 호출한다.
+    - FastAPI HTTP 호출 없이, ocr_engine 의 run_ocr(WorkerPredictRequest)를 직접 호출한다.
     - PDF 존재 여부 등은 run_ocr 의 결과 message 로 판단한다.
 
     반환값:
     - 성공 시 True, 실패 시 False
     """
-    print(f"[Worker] run_ocr start job_id={job_id}, pdf_name={pdf_name}", flush=True)
+    log.info("ocr_start", job_id=job_id, pdf_name=pdf_name, pages=pages, profile=profile)
 
     try:
-        req = PredictRequest(pdf_name=pdf_name)
+        # job_id 를 넘기면 페이지 단위 체크포인트 → 재전달 시 이어서 처리
+        req = WorkerPredictRequest(
+            pdf_name=pdf_name,
+            job_id=job_id,
+            page_start=pages.page_start if pages is not None else None,
+            page_end=pages.page_end if pages is not None else None,
+            profile=profile,
+        )
         res = run_ocr(req)
 
-        # message 내용으로 성공/실패 판별 (예시: pdf not found)
-        if res.message.startswith("pdf not found"):
-            print(
-                f"[Worker] job_id={job_id} failed: {res.message}",
-                flush=True,
-            )
+        # message 내용으로 성공/실패 판별 (예시: pdf not found, pdf too large)
+        if res.message.startswith(("pdf not found", "pdf too large")):
+            log.warn("ocr_failed", job_id=job_id, message=res.message)
             return False
 
-        print(
-            f"[Worker] job_id={job_id} succeeded (message={res.message})",
-            flush=True,
-        )
+        log.info("ocr_done", job_id=job_id, message=res.message)
         return True
     except Exception as e:
         # 예외 발생 시 실패 처리
-        print(f"[Worker] job_id={job_id} ERROR: {e}", flush=True)
+        log.error("ocr_error", job_id=job_id, error=e)
         return False
 
 
@@ -165,20 +264,41 @@ def main_loop():
     - 무한 루프를 돌면서 PENDING Job 을 계속 가져와 처리한다.
     - 처리할 Job 이 없으면 POLL_INTERVAL_SEC 만큼 대기 후 다시 조회한다.
     """
+    # 같은 호스트의 워커들이 코어를 나눠 쓰도록 pinning (OCR_WORKER_INDEX / OCR_WORKER_COUNT / OCR_CPU_CORES)
+    apply_cpu_budget(cpu_budget_from_env())
+
+    # 만료 / 멈춘 Job 을 모아서 FAILED 처리 (워커 중 하나만 실제로 돈다, OCR_REAPER)
+    start_job_reaper(DB_CONFIG)
+
     print("[Worker] starting main loop...", flush=True)
     conn = get_db_connection()
+    scheduler = LaneScheduler()
+    print(f"[Worker] lanes={','.join(WORKER_LANES)} weights={scheduler.weights}", flush=True)
 
     try:
         while True:
-            job_id, pdf_name = fetch_next_pending_job(conn)
+            # lane 가중치(OCR_LANE_WEIGHTS) 순서로 조회 → 큰 문서가 작은 Job 을 막지 않음
+            job_id, pdf_name, pages, deadline, page_count = fetch_next_pending_job(conn, tuple(scheduler.order()))
 
             # 처리할 Job 이 없으면 잠시 대기
             if job_id is None:
                 time.sleep(POLL_INTERVAL_SEC)
                 continue
 
-            success = process_job(job_id, str(pdf_name))
-            update_job_status(conn, job_id, success)
+            # 큰 문서면 페이지 범위 sub-job 행으로 나눈다.
+            # PENDING sub-job 행이 곧 큐이므로, 이 워커와 다른 워커들이 이어서 가져간다.
+            if pages is None and maybe_fan_out(conn, job_id, str(pdf_name), page_count) is not None:
+                continue
+
+            # 마감까지 남은 시간이 부족하면 더 빠른 처리 프로필로 낮춘다.
+            profile = profile_for_job(job_id, page_count, pages, deadline)
+            timing = OcrTiming()
+            success = process_job(job_id, str(pdf_name), pages, profile)
+            timing.stop()
+            if pages is not None:
+                finish_subjob(conn, job_id, pages.parent_id, success, timing)
+            else:
+                update_job_status(conn, job_id, success, timing)
     finally:
         conn.close()
         print("[Worker] DB connection closed.", flush=True)
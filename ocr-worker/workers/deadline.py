@@ -0,0 +1,76 @@
+# ocr-worker/workers/deadline.py
+"""
+남은 마감 시간에 맞춰 처리 프로필(ocr_engine/profiles.py)을 고른다.
+
+Job 은 요청 후 JOB_DEADLINE_SEC(기본 60초) 안에 끝나야 한다.
+부하가 몰려 큐에서 오래 기다린 Job 을 accurate 프로필로 돌리면 마감을 넘기므로,
+claim 한 시점의 남은 시간과 페이지 수로 "마감 안에 끝날 가장 품질 높은 프로필" 로 낮춘다.
+(accurate → balanced → fast. 프로필별 페이지당 시간은 실제 처리 시간의 이동 평균으로 갱신된다)
+
+- 마감 기준 시각: 메시지의 createdAt(epoch ms) 또는 DB 행의 created_at.
+- fan-out sub-job 은 만료 대상이 아니므로 기본 프로필로 처리한다.
+- 다른 프로필을 처음 쓰면 그 프로필 모델을 추가로 로드한다 (워커 프로세스당 한 번).
+  낮은 프로필의 모델(PP-DocLayout-M/-S, PP-FormulaNet_plus-M/-S)은 MODEL_ROOT 에 따로 받아 둬야 하고
+  (ocr_engine/profiles.py), 없는 프로필은 고르지 않는다.
+- 과부하 중에 두 번째 모델 세트를 로드하게 되므로 기본은 끈다. 모델을 준비하고 미리 로드해 둔 배포에서만 켠다.
+
+환경변수:
+- OCR_AUTO_PROFILE     : 1 이면 자동으로 낮춤 (기본 0 → 항상 기본 프로필)
+- OCR_JOB_DEADLINE_SEC : 요청 후 마감까지 시간(초, 기본 60)
+"""
+import os
+import time
+from datetime import datetime
+from typing import Optional
+
+from ocr_engine.profiles import DEFAULT_PROFILE, choose_profile
+from workers.fanout import PageRange
+from workers.worker_log import get_worker_logger
+
+AUTO_PROFILE = os.getenv("OCR_AUTO_PROFILE", "0") == "1"
+JOB_DEADLINE_SEC = float(os.getenv("OCR_JOB_DEADLINE_SEC", "60"))
+
+log = get_worker_logger()
+
+
+def deadline_from_message(created_at_ms) -> Optional[float]:
+    """메시지 createdAt(epoch ms 문자열) → 마감 시각(epoch 초). 없거나 잘못된 값이면 None."""
+    if created_at_ms is None:
+        return None
+    try:
+        return float(created_at_ms) / 1000 + JOB_DEADLINE_SEC
+    except (TypeError, ValueError):
+        return None
+
+
+def deadline_from_row(created_at: Optional[datetime]) -> Optional[float]:
+    """DB created_at(로컬 시각, naive) → 마감 시각(epoch 초)."""
+    if created_at is None:
+        return None
+    return created_at.timestamp() + JOB_DEADLINE_SEC
+
+
+def profile_for_job(
+    job_id: int, page_count: Optional[int], pages: Optional[PageRange], deadline: Optional[float]
+) -> Optional[str]:
+    """
+    이 Job 에 쓸 프로필 이름. 기본 프로필 그대로면 None (PredictRequest.profile 생략).
+
+    - page_count: 워커가 메시지를 받을 때 센 PDF 페이지 수 (모르면 None → 기본 프로필)
+    """
+    if not AUTO_PROFILE or pages is not None or deadline is None or page_count is None:
+        return None
+
+    remaining = deadline - time.time()
+    profile = choose_profile(page_count, remaining)
+    if profile == DEFAULT_PROFILE:
+        return None
+
+    log.info(
+        "profile_downgraded",
+        job_id=job_id,
+        profile=profile,
+        pages=page_count,
+        remaining_sec=round(remaining, 1),
+    )
+    return profile
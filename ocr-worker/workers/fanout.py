@@ -0,0 +1,336 @@
+# ocr-worker/workers/fanout.py
+"""
+큰 PDF 를 페이지 범위 sub-job 으로 나눠 워커들에게 분산(fan-out)한다.
+
+흐름:
+1) 워커가 부모 Job 을 claim 한 뒤 페이지 수를 센다.
+   OCR_FANOUT_MIN_PAGES 이상이면 OCR 을 직접 하지 않고,
+   OCR_FANOUT_CHUNK_PAGES 페이지씩 나눈 sub-job 행을 ocr_job 에 만든다.
+   (parent_id / page_start / page_end, 부모에는 subjob_total)
+2) 각 백엔드 워커가 sub-job 메시지를 자기 large lane 큐(stream / queue / topic)에 다시 넣는다.
+   DB 워커는 PENDING 행 자체가 큐이므로 따로 넣지 않는다.
+3) sub-job 이 끝날 때마다 부모의 subjob_done / subjob_failed 를 올리고,
+   마지막 sub-job 을 끝낸 워커가 페이지 결과를 부모 Job 아래로 모은 뒤 부모를 DONE / FAILED 로 바꾼다.
+   (모은 뒤 sub-job 의 페이지 결과는 지운다)
+
+- 부모는 sub-job 이 도는 동안 PROCESSING 으로 남는다. (클라이언트는 부모 jobId 만 본다)
+- sub-job 은 MAX_WAIT_SEC 만료 대상이 아니다. 부모가 이미 만료 전에 처리를 시작한 Job 이기 때문.
+- sub-job 은 어느 호스트의 워커에서든 돌 수 있으므로, 결과를 모으려면 체크포인트 저장소가 공유되어야 한다.
+  OCR_CHECKPOINT_BACKEND=sqlite(호스트 로컬, 기본값)이면 fan-out 하지 않는다. (postgres 또는 off 에서만 나눔)
+"""
+import os
+import time
+from datetime import datetime, timedelta
+from typing import NamedTuple, Optional
+
+from ocr_engine.checkpoint import get_checkpoint_store
+from ocr_engine.config import CHECKPOINT_BACKEND, DATA_DIR, MAX_PDF_PAGES
+from ocr_engine.pdf_source import file_digest
+from workers.idempotency import finish_claim
+from workers.lanes import LANE_LARGE
+from workers.job_events import build_job_event, notify_in_tx, publish_after_commit
+from workers.job_timing import FINISH_SET_SQL, FINISH_WHERE_SQL, WORKER_ID, OcrTiming, finish_params
+from workers.worker_log import get_worker_logger
+
+# 이 페이지 수 이상인 문서는 sub-job 으로 나눈다 (0 이면 fan-out 하지 않음)
+FANOUT_MIN_PAGES = int(os.getenv("OCR_FANOUT_MIN_PAGES", "16"))
+# sub-job 하나가 맡는 페이지 수
+FANOUT_CHUNK_PAGES = int(os.getenv("OCR_FANOUT_CHUNK_PAGES", "4"))
+
+log = get_worker_logger()
+
+# sqlite 저장소는 호스트마다 따로라서, 다른 호스트에서 끝난 sub-job 결과를 부모로 모을 수 없다.
+# (모든 sub-job 이 성공해도 부모가 "merge incomplete" 로 FAILED 가 됨)
+FANOUT_ENABLED = FANOUT_MIN_PAGES > 0 and CHECKPOINT_BACKEND != "sqlite"
+if FANOUT_MIN_PAGES > 0 and not FANOUT_ENABLED:
+    log.warn("fanout_disabled", reason="OCR_CHECKPOINT_BACKEND=sqlite is host-local; use postgres to fan out")
+
+
+class PageRange(NamedTuple):
+    """sub-job 이 맡은 원본 문서의 페이지 범위 [page_start, page_end)."""
+
+    parent_id: int
+    page_start: int
+    page_end: int
+
+
+class SubJob(NamedTuple):
+    job_id: int
+    page_start: int
+    page_end: int
+
+
+def plan_page_ranges(page_count: int, chunk_pages: int = FANOUT_CHUNK_PAGES) -> list[tuple[int, int]]:
+    chunk = max(1, chunk_pages)
+    return [(start, min(start + chunk, page_count)) for start in range(0, page_count, chunk)]
+
+
+def page_range_from_message(fields: dict) -> Optional[PageRange]:
+    """
+    메시지의 parentId / pageStart / pageEnd 로 sub-job 여부를 판단한다. 부모(일반) Job 이면 None.
+    """
+    parent_id = fields.get("parentId")
+    if parent_id in (None, ""):
+        return None
+    try:
+        return PageRange(int(parent_id), int(fields["pageStart"]), int(fields["pageEnd"]))
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def subjob_message(sub: SubJob, pdf_name: str, parent_id: int) -> dict[str, str]:
+    """
+    sub-job 큐 메시지. API 서버가 만드는 메시지와 같은 필드(모두 문자열)에 페이지 범위를 더한다.
+    """
+    return {
+        "jobId": str(sub.job_id),
+        "pdfName": pdf_name,
+        "createdAt": str(int(time.time() * 1000)),
+        "parentId": str(parent_id),
+        "pageStart": str(sub.page_start),
+        "pageEnd": str(sub.page_end),
+    }
+
+
+def maybe_fan_out(conn, job_id: int, pdf_name: str, page_count: Optional[int]) -> Optional[list[SubJob]]:
+    """
+    부모 Job 이 fan-out 대상이면 sub-job 을 만들고, 큐에 넣어야 할 sub-job 목록을 반환한다.
+    대상이 아니면 None (워커가 직접 OCR).
+
+    - page_count: 워커가 메시지를 받을 때 센 PDF 페이지 수 (lane 분류 / 프로필 선택과 같은 값)
+
+    - 처리 한도(OCR_MAX_PDF_PAGES)를 넘는 문서는 나누지 않고 부모를 FAILED 로 끝낸 뒤 빈 목록을 반환한다.
+      (sub-job 은 자기 페이지 범위만 한도와 비교하므로, 나누고 나면 한도가 적용되지 않는다)
+
+    - 이미 나눈 Job 이 재전달된 경우(나눈 뒤 ACK 전에 워커가 죽음), 새로 나누지 않고
+      아직 PENDING 인 sub-job 들을 다시 반환한다. 중복 메시지는 claim 단계에서 걸러진다.
+    """
+    if not FANOUT_ENABLED:
+        return None
+
+    if page_count is None or page_count < FANOUT_MIN_PAGES:
+        return None
+
+    if MAX_PDF_PAGES > 0 and page_count > MAX_PDF_PAGES:
+        _fail_too_large(conn, job_id, page_count)
+        return []
+
+    ranges = plan_page_ranges(page_count)
+    if len(ranges) < 2:
+        return None
+
+    with conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT subjob_total FROM ocr_job WHERE id = %s FOR UPDATE", (job_id,))
+            row = cur.fetchone()
+            if row is None:
+                return None
+
+            if row[0] is not None:
+                cur.execute(
+                    """
+                    SELECT id, page_start, page_end FROM ocr_job
+                    WHERE parent_id = %s AND status = 'PENDING'
+                    ORDER BY page_start
+                    """,
+                    (job_id,),
+                )
+                subjobs = [SubJob(*r) for r in cur.fetchall()]
+                log.info("fanout_resumed", job_id=job_id, pending=len(subjobs))
+                return subjobs
+
+            cur.execute(
+                """
+                INSERT INTO ocr_job (status, pdf_name, created_at, parent_id, page_start, page_end, lane)
+                SELECT 'PENDING', %s, %s, %s, r.page_start, r.page_end, %s
+                FROM unnest(%s::int[], %s::int[]) AS r(page_start, page_end)
+                RETURNING id, page_start, page_end
+                """,
+                (
+                    pdf_name,
+                    datetime.now(),
+                    job_id,
+                    LANE_LARGE,
+                    [start for start, _ in ranges],
+                    [end for _, end in ranges],
+                ),
+            )
+            subjobs = sorted((SubJob(*r) for r in cur.fetchall()), key=lambda s: s.page_start)
+            cur.execute(
+                """
+                UPDATE ocr_job
+                SET subjob_total = %s, subjob_done = 0, subjob_failed = 0
+                WHERE id = %s
+                """,
+                (len(subjobs), job_id),
+            )
+
+    log.info("fanout", job_id=job_id, pages=page_count, subjobs=len(subjobs))
+    return subjobs
+
+
+def _fail_too_large(conn, job_id: int, page_count: int) -> None:
+    event = build_job_event(job_id, "FAILED")
+    with conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                f"UPDATE ocr_job SET {FINISH_SET_SQL} WHERE {FINISH_WHERE_SQL}",
+                (*finish_params("FAILED", None), job_id, WORKER_ID),
+            )
+            updated = cur.rowcount > 0
+            if updated:
+                notify_in_tx(cur, event)
+
+    if updated:
+        publish_after_commit(event)
+    finish_claim(job_id)
+    log.warn("pdf_too_large", job_id=job_id, pages=page_count, limit=MAX_PDF_PAGES)
+
+
+def finish_subjob(
+    conn, job_id: int, parent_id: int, success: bool, timing: Optional[OcrTiming] = None
+) -> Optional[str]:
+    """
+    sub-job 결과를 기록하고 부모의 진행 카운터를 올린다.
+
+    - 이 워커가 PROCESSING 으로 잡고 있던 경우에만 기록하고 카운트한다 (같은 sub-job 이 두 번 끝나도 한 번만 셈).
+    - 마지막 sub-job 이면 페이지 결과를 부모 아래로 모으고 부모 상태를 확정한다.
+
+    반환값: 부모가 확정됐으면 그 상태(DONE / FAILED), 아니면 None
+    """
+    status = "DONE" if success else "FAILED"
+    event = build_job_event(job_id, status)
+    progress = None
+
+    with conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                f"UPDATE ocr_job SET {FINISH_SET_SQL} WHERE {FINISH_WHERE_SQL} RETURNING id",
+                (*finish_params(status, timing), job_id, WORKER_ID),
+            )
+            updated = cur.fetchone() is not None
+            if updated:
+                cur.execute(
+                    """
+                    UPDATE ocr_job
+                    SET subjob_done = subjob_done + 1,
+                        subjob_failed = subjob_failed + %s
+                    WHERE id = %s
+                    RETURNING subjob_done, subjob_failed, subjob_total, pdf_name
+                    """,
+                    (0 if success else 1, parent_id),
+                )
+                progress = cur.fetchone()
+                notify_in_tx(cur, event)
+
+    finish_claim(job_id)
+    if not updated:
+        # 리퍼가 이미 FAILED 로 돌렸거나 다른 워커가 다시 가져간 sub-job → 세지도, 이벤트를 내지도 않는다.
+        log.warn("status_update_skipped", job_id=job_id, status=status)
+        return None
+    publish_after_commit(event)
+    log.info("subjob_done", job_id=job_id, parent_id=parent_id, status=status)
+
+    if progress is None:
+        return None
+    done, failed, total, pdf_name = progress
+    if done < total:
+        return None
+
+    return _finish_parent(conn, parent_id, pdf_name, failed == 0)
+
+
+def finish_stuck_parents(conn, settle_sec: float, limit: int = 100) -> int:
+    """
+    모든 sub-job 이 끝났는데 PROCESSING 으로 남은 부모를 확정한다. (workers/job_reaper.py 에서 호출)
+
+    마지막 sub-job 을 끝낸 워커가 부모를 확정하기 전에 죽으면 부모가 영원히 PROCESSING 으로 남는다.
+    마지막 sub-job 이 끝난 지 settle_sec 이 지난 부모만 본다 (지금 확정 중인 워커와 겹치지 않게).
+
+    반환값: 확정한 부모 수
+    """
+    with conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                SELECT p.id, p.pdf_name, p.subjob_failed
+                FROM ocr_job p
+                WHERE p.status = 'PROCESSING'
+                  AND p.subjob_total IS NOT NULL
+                  AND p.subjob_done >= p.subjob_total
+                  AND NOT EXISTS (
+                    SELECT 1 FROM ocr_job s
+                    WHERE s.parent_id = p.id AND COALESCE(s.finished_at, s.created_at) > %s
+                  )
+                ORDER BY p.id
+                LIMIT %s
+                """,
+                (datetime.now() - timedelta(seconds=settle_sec), limit),
+            )
+            rows = cur.fetchall()
+
+    for parent_id, pdf_name, failed in rows:
+        log.warn("fanout_parent_stuck", job_id=parent_id)
+        _finish_parent(conn, parent_id, pdf_name, failed == 0)
+    return len(rows)
+
+
+def _finish_parent(conn, parent_id: int, pdf_name: str, success: bool) -> str:
+    """
+    모든 sub-job 이 끝난 부모 Job 의 페이지 결과를 모으고 상태를 DONE / FAILED 로 바꾼다.
+    """
+    if success:
+        success = _merge_results(conn, parent_id, pdf_name)
+
+    status = "DONE" if success else "FAILED"
+    event = build_job_event(parent_id, status)
+    with conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                "UPDATE ocr_job SET status = %s, finished_at = %s WHERE id = %s AND status = 'PROCESSING'",
+                (status, datetime.now(), parent_id),
+            )
+            notify_in_tx(cur, event)
+
+    publish_after_commit(event)
+    log.info("fanout_done", job_id=parent_id, status=status)
+    return status
+
+
+def _merge_results(conn, parent_id: int, pdf_name: str) -> bool:
+    """
+    sub-job 들의 페이지 결과를 부모 Job 아래로 모은다.
+
+    - 체크포인트 저장소가 꺼져 있으면 모을 결과가 없으므로 그대로 성공 처리한다.
+    - 공유 저장소(postgres)일 때만 fan-out 하므로(FANOUT_ENABLED) 모든 sub-job 결과가 한곳에 있다.
+    """
+    store = get_checkpoint_store()
+    if store is None:
+        return True
+
+    with conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                "SELECT id, page_end - page_start FROM ocr_job WHERE parent_id = %s",
+                (parent_id,),
+            )
+            rows = cur.fetchall()
+
+    try:
+        digest = file_digest(DATA_DIR / pdf_name)
+        merged = store.merge(parent_id, [row[0] for row in rows], digest)
+    except Exception as e:
+        log.error("fanout_merge_failed", job_id=parent_id, error=e)
+        return False
+
+    expected = sum(row[1] for row in rows)
+    if merged < expected:
+        log.warn("fanout_merge_incomplete", job_id=parent_id, merged=merged, expected=expected)
+        return False
+
+    # 부모 아래로 복사했으므로 sub-job 쪽 결과는 지운다 (같은 페이지를 두 벌 보관하지 않도록)
+    try:
+        store.delete([row[0] for row in rows])
+    except Exception as e:
+        log.warn("fanout_subjob_cleanup_failed", job_id=parent_id, error=e)
+    return True
@@ -0,0 +1,232 @@
+# ocr-worker/workers/idempotency.py
+"""
+중복 전달 메시지를 DB 에 가기 전에 걸러내는 idempotency fast path.
+
+세 브로커 모두 at-least-once 라서 리밸런스 / requeue / 재전달 때 같은 jobId 가 여러 번 온다.
+지금은 중복 메시지마다 claim_job 의 조건부 UPDATE(행 잠금 트랜잭션)를 한 번씩 해야
+"이미 PENDING 이 아님" 을 알 수 있다.
+
+여기서는 jobId 별로 TTL 이 있는 claim 키를 두고 DB 보다 먼저 확인한다.
+
+키 상태:
+- processing:<owner> : 어떤 워커가 claim 을 시도했거나 처리 중 (OCR_IDEMPOTENCY_LEASE_SEC 동안 유지)
+- done               : DONE / FAILED / 만료 / 없는 Job 등 더 처리할 필요가 없음 (OCR_IDEMPOTENCY_TTL_SEC 동안 유지)
+
+판단 규칙 (begin_claim):
+- done 이면 중복 → DB 를 건드리지 않고 ACK
+- 다른 워커가 processing 중이면 중복 → ACK.
+  단 reclaim(재전달 / XAUTOCLAIM / Kafka 재읽기)이면 이전 워커가 죽었을 수 있으므로 DB 로 보낸다.
+- 키가 없으면 processing 으로 잡고 DB claim 진행
+- claim 하지 않고 다른 lane 으로 옮긴 메시지는 release_claim 으로 자기 processing 키를 지운다
+  (옮겨진 메시지를 받은 워커가 중복으로 버리지 않도록)
+
+키는 힌트일 뿐이고 최종 판단은 항상 DB(claim_job)가 한다.
+키 저장소에 문제가 생기면 DB 로 그대로 보낸다 (fast path 만 꺼짐).
+
+저장소 (OCR_IDEMPOTENCY 환경변수):
+- local : 워커 프로세스 안의 메모리 테이블 (기본값). 같은 프로세스로 다시 온 중복만 거른다.
+- redis : Redis SET NX EX. 같은 Redis 를 보는 모든 워커가 공유한다.
+- off   : 사용하지 않음
+"""
+import os
+import socket
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Optional
+
+from workers.worker_log import get_worker_logger
+
+IDEMPOTENCY_MODE = os.getenv("OCR_IDEMPOTENCY", "local").lower()
+
+# processing 키 유지 시간(초). 워커가 처리 도중 죽었을 때 이 시간이 지나면 다른 워커가 다시 claim 할 수 있다.
+LEASE_SEC = int(os.getenv("OCR_IDEMPOTENCY_LEASE_SEC", "600"))
+# done 키 유지 시간(초). 이 시간 안에 오는 중복은 DB 없이 버린다.
+DONE_TTL_SEC = int(os.getenv("OCR_IDEMPOTENCY_TTL_SEC", "3600"))
+# local 테이블 최대 항목 수 (넘으면 오래된 것부터 버림)
+LOCAL_MAX_ENTRIES = int(os.getenv("OCR_IDEMPOTENCY_LOCAL_MAX", "100000"))
+
+REDIS_KEY_PREFIX = "ocr:claim:"
+
+REDIS_CONFIG = {
+    "host": os.getenv("REDIS_HOST", "localhost"),
+    "port": int(os.getenv("REDIS_PORT", "6379")),
+    "db": 0,
+    "decode_responses": True,
+}
+
+DONE = "done"
+_PROCESSING_PREFIX = "processing:"
+
+
+def _is_duplicate(value: Optional[str], owner: str, reclaim: bool) -> bool:
+    if value is None:
+        return False
+    if value == DONE:
+        return True
+    return not reclaim and value != _PROCESSING_PREFIX + owner
+
+
+class ClaimGuard(ABC):
+    """
+    jobId 별 claim 키 저장소 인터페이스.
+    """
+
+    def __init__(self, owner: str) -> None:
+        self.owner = owner
+
+    @abstractmethod
+    def begin(self, job_id: int, reclaim: bool = False) -> bool:
+        """
+        이 메시지를 DB claim 으로 보내도 되면 True, 중복이라 버려도 되면 False.
+        """
+
+    @abstractmethod
+    def finish(self, job_id: int) -> None:
+        """더 처리할 필요가 없는 Job 으로 기록한다."""
+
+    @abstractmethod
+    def release(self, job_id: int) -> None:
+        """이 워커가 잡은 processing 키를 지운다 (다른 워커가 잡은 키는 그대로 둔다)."""
+
+
+class LocalClaimGuard(ClaimGuard):
+    """
+    프로세스 메모리 안의 TTL 테이블. {job_id: (value, expires_at)}
+    """
+
+    def __init__(self, owner: str, max_entries: int = LOCAL_MAX_ENTRIES) -> None:
+        super().__init__(owner)
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[int, tuple[str, float]] = OrderedDict()
+
+    def _get(self, job_id: int, now: float) -> Optional[str]:
+        entry = self._entries.get(job_id)
+        if entry is None:
+            return None
+        if entry[1] <= now:
+            del self._entries[job_id]
+            return None
+        return entry[0]
+
+    def _set(self, job_id: int, value: str, ttl_sec: float, now: float) -> None:
+        self._entries[job_id] = (value, now + ttl_sec)
+        self._entries.move_to_end(job_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def begin(self, job_id: int, reclaim: bool = False) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            if _is_duplicate(self._get(job_id, now), self.owner, reclaim):
+                return False
+            self._set(job_id, _PROCESSING_PREFIX + self.owner, LEASE_SEC, now)
+            return True
+
+    def finish(self, job_id: int) -> None:
+        with self._lock:
+            self._set(job_id, DONE, DONE_TTL_SEC, time.monotonic())
+
+    def release(self, job_id: int) -> None:
+        with self._lock:
+            if self._get(job_id, time.monotonic()) == _PROCESSING_PREFIX + self.owner:
+                del self._entries[job_id]
+
+
+class RedisClaimGuard(ClaimGuard):
+    """
+    Redis 키(ocr:claim:<jobId>) 기반. 키가 없을 때는 SET NX EX 한 번으로 끝난다.
+    """
+
+    def __init__(self, owner: str) -> None:
+        super().__init__(owner)
+        import redis
+
+        self._redis = redis.Redis(**REDIS_CONFIG)
+
+    def begin(self, job_id: int, reclaim: bool = False) -> bool:
+        key = f"{REDIS_KEY_PREFIX}{job_id}"
+        value = _PROCESSING_PREFIX + self.owner
+        if self._redis.set(key, value, nx=True, ex=LEASE_SEC):
+            return True
+
+        if _is_duplicate(self._redis.get(key), self.owner, reclaim):
+            return False
+        # 이전 워커가 죽었을 수 있는 reclaim → 이 워커가 lease 를 가져간다 (최종 판단은 DB)
+        self._redis.set(key, value, ex=LEASE_SEC)
+        return True
+
+    def finish(self, job_id: int) -> None:
+        self._redis.set(f"{REDIS_KEY_PREFIX}{job_id}", DONE, ex=DONE_TTL_SEC)
+
+    def release(self, job_id: int) -> None:
+        # 키는 힌트일 뿐이라 GET / DEL 사이의 경합은 허용한다 (최종 판단은 DB)
+        key = f"{REDIS_KEY_PREFIX}{job_id}"
+        if self._redis.get(key) == _PROCESSING_PREFIX + self.owner:
+            self._redis.delete(key)
+
+
+_claim_guard: Optional[ClaimGuard] = None
+
+
+def get_claim_guard() -> Optional[ClaimGuard]:
+    """
+    설정(OCR_IDEMPOTENCY)에 맞는 프로세스 전역 ClaimGuard 를 반환한다. "off" 이면 None.
+    """
+    global _claim_guard
+
+    if IDEMPOTENCY_MODE == "off":
+        return None
+
+    if _claim_guard is None:
+        owner = f"{socket.gethostname()}-{os.getpid()}"
+        if IDEMPOTENCY_MODE == "redis":
+            _claim_guard = RedisClaimGuard(owner)
+        elif IDEMPOTENCY_MODE == "local":
+            _claim_guard = LocalClaimGuard(owner)
+        else:
+            raise ValueError(f"unknown OCR_IDEMPOTENCY: {IDEMPOTENCY_MODE}")
+
+    return _claim_guard
+
+
+def begin_claim(job_id: int, reclaim: bool = False) -> bool:
+    """
+    DB claim 전에 부른다. False 면 중복 메시지이므로 DB 를 건드리지 않고 ACK 하면 된다.
+    """
+    guard = get_claim_guard()
+    if guard is None:
+        return True
+    try:
+        return guard.begin(job_id, reclaim)
+    except Exception as e:
+        get_worker_logger().warn("idempotency_unavailable", job_id=job_id, error=e)
+        return True
+
+
+def finish_claim(job_id: int) -> None:
+    """
+    Job 이 DONE / FAILED 로 끝났거나 처리할 필요가 없다고 확인됐을 때 부른다.
+    """
+    guard = get_claim_guard()
+    if guard is None:
+        return
+    try:
+        guard.finish(job_id)
+    except Exception as e:
+        get_worker_logger().warn("idempotency_unavailable", job_id=job_id, error=e)
+
+
+def release_claim(job_id: int) -> None:
+    """
+    begin_claim 후 DB claim 없이 메시지를 다른 lane 으로 넘겼을 때 부른다.
+    """
+    guard = get_claim_guard()
+    if guard is None:
+        return
+    try:
+        guard.release(job_id)
+    except Exception as e:
+        get_worker_logger().warn("idempotency_unavailable", job_id=job_id, error=e)
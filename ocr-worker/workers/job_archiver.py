@@ -0,0 +1,303 @@
+# ocr-worker/workers/job_archiver.py
+"""
+끝난(DONE / FAILED) ocr_job 행을 월별 파티션 아카이브 테이블로 옮기는 유지보수 작업.
+
+ocr_job 은 모든 상태 변경과 DB 큐(V3) claim 이 같이 쓰는 테이블인데, 끝난 행이 계속 쌓이고
+PENDING → PROCESSING → DONE 갱신마다 죽은 튜플이 생겨서, 시간이 갈수록 claim / 상태 UPDATE 가 느려진다.
+여기서는
+
+1) OCR_ARCHIVE_RETENTION_HOURS(기본 24시간)보다 오래된 끝난 행을 OCR_ARCHIVE_BATCH 개씩
+   "DELETE ... RETURNING → INSERT" 한 문장으로 ocr_job_archive 로 옮긴다.
+   - 배치마다 따로 커밋하고 잠깐 쉬어서, 워커의 claim / 상태 UPDATE 와 잠금을 오래 겹치지 않게 한다.
+   - FOR UPDATE SKIP LOCKED 로 골라서 다른 트랜잭션이 잡고 있는 행은 다음 차례로 미룬다.
+   - fan-out sub-job 은 부모가 끝난 뒤에만 옮긴다 (부모 확정 시 sub-job 행을 읽기 때문, fanout.py).
+2) ocr_job_archive 는 created_at 기준 월별 RANGE 파티션(ocr_job_archive_YYYYMM)이다.
+   필요한 파티션은 옮기기 전에 만들고, --drop-after-months 를 주면 오래된 파티션을 통째로 DROP 한다
+   (DELETE 없이 공간 회수).
+3) ocr_job 자체는 fillfactor 를 낮추고 autovacuum 을 자주 돌게 한다.
+   status / 단계별 시각 컬럼에는 인덱스가 없으므로, 페이지에 빈 공간이 있으면 상태 UPDATE 가 HOT 으로 처리되어
+   인덱스를 건드리지 않고 같은 페이지 안에서 끝난다. (그래서 status 에 인덱스 / 부분 인덱스를 두지 않는다)
+
+아카이브 테이블의 컬럼은 ocr_job 을 따라간다. API 서버가 ocr_job 을 다시 만들면서(ddl-auto) 컬럼이 늘면
+시작할 때 아카이브에 없는 컬럼을 추가한다.
+
+아카이브로 옮긴 Job 은 API 의 상태 조회(GET /vN/ocr/jobs/{id})에서 보이지 않는다.
+보관 기간은 클라이언트가 결과를 조회하는 시간보다 충분히 길게 잡는다.
+
+환경변수:
+- OCR_ARCHIVE_RETENTION_HOURS : 끝난 뒤 ocr_job 에 남겨 둘 시간 (기본 24)
+- OCR_ARCHIVE_BATCH           : 한 번에 옮기는 행 수 (기본 1000)
+- OCR_ARCHIVE_BATCH_PAUSE_SEC : 배치 사이 쉬는 시간(초, 기본 0.1)
+- OCR_ARCHIVE_INTERVAL_SEC    : 반복 주기(초, 기본 300)
+- OCR_JOB_FILLFACTOR          : ocr_job fillfactor (기본 70, 0 이면 바꾸지 않음)
+
+사용 예 (ocr-worker 디렉터리에서):
+    python -m workers.job_archiver
+    python -m workers.job_archiver --once --retention-hours 1 --drop-after-months 6
+"""
+import argparse
+import os
+import time
+from datetime import date, datetime, timedelta
+
+import psycopg2
+
+from workers.db_worker import DB_CONFIG
+from workers.worker_log import get_worker_logger
+
+ARCHIVE_TABLE = "ocr_job_archive"
+ARCHIVE_RETENTION_HOURS = float(os.getenv("OCR_ARCHIVE_RETENTION_HOURS", "24"))
+ARCHIVE_BATCH = int(os.getenv("OCR_ARCHIVE_BATCH", "1000"))
+ARCHIVE_BATCH_PAUSE_SEC = float(os.getenv("OCR_ARCHIVE_BATCH_PAUSE_SEC", "0.1"))
+ARCHIVE_INTERVAL_SEC = float(os.getenv("OCR_ARCHIVE_INTERVAL_SEC", "300"))
+JOB_FILLFACTOR = int(os.getenv("OCR_JOB_FILLFACTOR", "70"))
+
+TERMINAL_STATUSES = ("DONE", "FAILED")
+
+log = get_worker_logger()
+
+
+def _month_start(value: datetime) -> date:
+    return date(value.year, value.month, 1)
+
+
+def _next_month(value: date) -> date:
+    return date(value.year + value.month // 12, value.month % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{ARCHIVE_TABLE}_{month:%Y%m}"
+
+
+class JobArchiver:
+    """
+    ocr_job → ocr_job_archive 이동. ensure_schema 후 archive_once 를 주기적으로 부른다.
+    """
+
+    def __init__(
+        self,
+        conn,
+        retention_hours: float = ARCHIVE_RETENTION_HOURS,
+        batch_size: int = ARCHIVE_BATCH,
+        batch_pause_sec: float = ARCHIVE_BATCH_PAUSE_SEC,
+        drop_after_months: int = 0,
+    ) -> None:
+        self.conn = conn
+        self.retention = timedelta(hours=retention_hours)
+        self.batch_size = max(1, batch_size)
+        self.batch_pause_sec = batch_pause_sec
+        self.drop_after_months = drop_after_months
+        self._columns: list[str] = []
+        self._partitions: set[date] = set()
+
+    # --------------------------------------------------------
+    # 스키마
+    # --------------------------------------------------------
+    def ensure_schema(self) -> None:
+        """아카이브 부모 테이블 / 컬럼 / 인덱스를 맞추고, ocr_job 의 fillfactor / autovacuum 을 설정한다."""
+        with self.conn:
+            with self.conn.cursor() as cur:
+                cur.execute(
+                    f"""
+                    CREATE TABLE IF NOT EXISTS {ARCHIVE_TABLE} (LIKE ocr_job INCLUDING DEFAULTS)
+                    PARTITION BY RANGE (created_at)
+                    """
+                )
+                missing = self._missing_columns(cur)
+                for name, type_name in missing:
+                    cur.execute(f'ALTER TABLE {ARCHIVE_TABLE} ADD COLUMN "{name}" {type_name}')
+                # 아카이브 조회는 id / 부모 id 로 한다 (파티션마다 자동으로 만들어진다)
+                cur.execute(f"CREATE INDEX IF NOT EXISTS {ARCHIVE_TABLE}_id_idx ON {ARCHIVE_TABLE} (id)")
+                cur.execute(
+                    f"CREATE INDEX IF NOT EXISTS {ARCHIVE_TABLE}_parent_id_idx ON {ARCHIVE_TABLE} (parent_id)"
+                )
+                if JOB_FILLFACTOR > 0:
+                    # 상태 UPDATE 가 같은 페이지 안에서 HOT 으로 끝날 자리를 남기고,
+                    # 죽은 튜플이 조금만 쌓여도 autovacuum 이 돌게 한다.
+                    cur.execute(
+                        """
+                        ALTER TABLE ocr_job SET (
+                            fillfactor = %s,
+                            autovacuum_vacuum_scale_factor = 0.02,
+                            autovacuum_analyze_scale_factor = 0.05
+                        )
+                        """,
+                        (JOB_FILLFACTOR,),
+                    )
+                cur.execute(
+                    "SELECT attname FROM pg_attribute WHERE attrelid = 'ocr_job'::regclass AND attnum > 0 "
+                    "AND NOT attisdropped ORDER BY attnum"
+                )
+                self._columns = [row[0] for row in cur.fetchall()]
+
+        if missing:
+            log.info("archive_columns_added", columns=",".join(name for name, _ in missing))
+
+    @staticmethod
+    def _missing_columns(cur) -> list[tuple[str, str]]:
+        """ocr_job 에는 있고 아카이브에는 없는 (컬럼명, 타입)."""
+        cur.execute(
+            f"""
+            SELECT a.attname, format_type(a.atttypid, a.atttypmod)
+            FROM pg_attribute a
+            WHERE a.attrelid = 'ocr_job'::regclass AND a.attnum > 0 AND NOT a.attisdropped
+              AND NOT EXISTS (
+                SELECT 1 FROM pg_attribute b
+                WHERE b.attrelid = '{ARCHIVE_TABLE}'::regclass AND b.attname = a.attname AND NOT b.attisdropped
+              )
+            ORDER BY a.attnum
+            """
+        )
+        return cur.fetchall()
+
+    def _ensure_partitions(self, cur, oldest: datetime, cutoff: datetime) -> None:
+        month = _month_start(oldest)
+        while month <= _month_start(cutoff):
+            if month not in self._partitions:
+                cur.execute(
+                    f"""
+                    CREATE TABLE IF NOT EXISTS {partition_name(month)}
+                    PARTITION OF {ARCHIVE_TABLE} FOR VALUES FROM (%s) TO (%s)
+                    """,
+                    (month, _next_month(month)),
+                )
+                self._partitions.add(month)
+            month = _next_month(month)
+
+    # --------------------------------------------------------
+    # 이동
+    # --------------------------------------------------------
+    def archive_once(self) -> int:
+        """보관 기간이 지난 끝난 행을 모두 옮기고 옮긴 행 수를 반환한다."""
+        cutoff = datetime.now() - self.retention
+        total = 0
+        started_at = time.monotonic()
+
+        while True:
+            moved = self._archive_batch(cutoff)
+            total += moved
+            if moved < self.batch_size:
+                break
+            time.sleep(self.batch_pause_sec)
+
+        dropped = self.drop_old_partitions() if self.drop_after_months > 0 else []
+        if total or dropped:
+            log.info(
+                "archived",
+                rows=total,
+                cutoff=cutoff,
+                elapsed_sec=round(time.monotonic() - started_at, 2),
+                dropped=",".join(dropped) or None,
+            )
+        return total
+
+    def _archive_batch(self, cutoff: datetime) -> int:
+        columns = ", ".join(f'"{name}"' for name in self._columns)
+        with self.conn:
+            with self.conn.cursor() as cur:
+                cur.execute(
+                    """
+                    SELECT min(created_at) FROM ocr_job
+                    WHERE status = ANY(%s) AND created_at < %s
+                    """,
+                    (list(TERMINAL_STATUSES), cutoff),
+                )
+                oldest = cur.fetchone()[0]
+                if oldest is None:
+                    return 0
+                self._ensure_partitions(cur, oldest, cutoff)
+
+                cur.execute(
+                    f"""
+                    WITH picked AS (
+                        SELECT j.id FROM ocr_job j
+                        WHERE j.status = ANY(%(statuses)s) AND j.created_at < %(cutoff)s
+                          AND (
+                            j.parent_id IS NULL
+                            OR NOT EXISTS (
+                                SELECT 1 FROM ocr_job p
+                                WHERE p.id = j.parent_id AND p.status <> ALL(%(statuses)s)
+                            )
+                          )
+                        ORDER BY j.id
+                        LIMIT %(limit)s
+                        FOR UPDATE SKIP LOCKED
+                    ),
+                    moved AS (
+                        DELETE FROM ocr_job WHERE id IN (SELECT id FROM picked)
+                        RETURNING {columns}
+                    )
+                    INSERT INTO {ARCHIVE_TABLE} ({columns}) SELECT {columns} FROM moved
+                    """,
+                    {"statuses": list(TERMINAL_STATUSES), "cutoff": cutoff, "limit": self.batch_size},
+                )
+                return cur.rowcount
+
+    def drop_old_partitions(self) -> list[str]:
+        """drop_after_months 개월보다 오래된 월 파티션을 DROP 한다."""
+        keep_from = _month_start(datetime.now())
+        for _ in range(self.drop_after_months):
+            keep_from = date(keep_from.year - (keep_from.month == 1), (keep_from.month - 2) % 12 + 1, 1)
+
+        dropped = []
+        with self.conn:
+            with self.conn.cursor() as cur:
+                cur.execute(
+                    """
+                    SELECT c.relname FROM pg_inherits i
+                    JOIN pg_class c ON c.oid = i.inhrelid
+                    WHERE i.inhparent = %s::regclass
+                    """,
+                    (ARCHIVE_TABLE,),
+                )
+                for (name,) in cur.fetchall():
+                    suffix = name[len(ARCHIVE_TABLE) + 1:]
+                    if not (suffix.isdigit() and len(suffix) == 6):
+                        continue
+                    month = date(int(suffix[:4]), int(suffix[4:]), 1)
+                    if month < keep_from:
+                        cur.execute(f"DROP TABLE IF EXISTS {name}")
+                        self._partitions.discard(month)
+                        dropped.append(name)
+        return dropped
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="끝난 ocr_job 행을 월별 파티션 아카이브로 옮긴다")
+    parser.add_argument("--retention-hours", type=float, default=ARCHIVE_RETENTION_HOURS)
+    parser.add_argument("--batch-size", type=int, default=ARCHIVE_BATCH)
+    parser.add_argument("--interval", type=float, default=ARCHIVE_INTERVAL_SEC, help="반복 주기(초)")
+    parser.add_argument(
+        "--drop-after-months", type=int, default=0, help="이 개월 수보다 오래된 아카이브 파티션 DROP (0 이면 보관)"
+    )
+    parser.add_argument("--once", action="store_true", help="한 번만 옮기고 종료")
+    args = parser.parse_args()
+
+    conn = psycopg2.connect(**DB_CONFIG)
+    archiver = JobArchiver(
+        conn,
+        retention_hours=args.retention_hours,
+        batch_size=args.batch_size,
+        drop_after_months=args.drop_after_months,
+    )
+    print(
+        f"[Worker] job archiver retention={args.retention_hours}h batch={args.batch_size} "
+        f"interval={args.interval}s",
+        flush=True,
+    )
+
+    try:
+        while True:
+            # API 서버 재시작(ddl-auto)으로 ocr_job 이 다시 만들어졌을 수 있으므로 매번 맞춘다.
+            archiver.ensure_schema()
+            moved = archiver.archive_once()
+            if args.once:
+                print(f"[Worker] archived rows={moved}", flush=True)
+                return
+            time.sleep(args.interval)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
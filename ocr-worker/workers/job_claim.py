@@ -0,0 +1,226 @@
+# ocr-worker/workers/job_claim.py
+"""
+브로커 워커(Redis / RabbitMQ / Kafka)용 Job claim.
+
+기존 mark_job_processing_if_valid 는 메시지마다
+BEGIN → SELECT ... FOR UPDATE → (Python 에서 만료 검사) → UPDATE → COMMIT
+으로 여러 번 왕복하고, 이미 만료된 Job 에도 행 잠금을 잡았다.
+
+여기서는
+1) 메시지에 실린 createdAt(epoch ms)으로 먼저 만료를 판단해서, 만료된 메시지는 DB 를 건드리지 않고 버린다.
+   (만료 Job 의 FAILED 처리는 ExpiredJobBuffer 가 모아서 한 번에 UPDATE)
+2) 유효해 보이는 메시지는 "상태 검사 + 만료 검사 + 상태 변경" 을 조건부 UPDATE 한 문장으로 처리하고,
+   결과(CLAIMED / EXPIRED / NOT_PENDING / NOT_FOUND / LEASED)를 돌려받는다.
+"""
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+
+from workers.job_events import build_job_event, notify_in_tx, publish_after_commit
+from workers.job_timing import WORKER_ID, enqueued_at_from_message
+from workers.worker_log import get_worker_logger
+
+# claim 결과
+CLAIMED = "CLAIMED"          # PROCESSING 으로 변경 완료 → 처리 진행
+EXPIRED = "EXPIRED"          # 만료되어 FAILED 로 변경됨
+NOT_PENDING = "NOT_PENDING"  # 이미 다른 워커가 처리 중이거나 끝난 Job
+NOT_FOUND = "NOT_FOUND"      # DB 에 없는 Job
+LEASED = "LEASED"            # 재수거 요청이지만 다른 워커의 lease(reclaim_lease_sec)가 아직 남은 PROCESSING Job
+
+# 만료 Job 을 모아 FAILED 로 바꾸는 기준 (개수 / 시간)
+EXPIRED_FLUSH_SIZE = 100
+EXPIRED_FLUSH_SEC = 1.0
+
+_CLAIM_SQL = """
+WITH target AS (
+    SELECT status FROM ocr_job WHERE id = %(job_id)s
+),
+claimed AS (
+    UPDATE ocr_job
+    SET status = CASE
+            WHEN created_at < %(cutoff)s AND parent_id IS NULL THEN 'FAILED'
+            ELSE 'PROCESSING'
+        END,
+        finished_at = CASE
+            WHEN created_at < %(cutoff)s AND parent_id IS NULL THEN %(picked_at)s
+        END,
+        picked_at = %(picked_at)s,
+        worker_id = %(worker_id)s,
+        backend = %(backend)s,
+        enqueued_at = COALESCE(%(enqueued_at)s, enqueued_at, created_at)
+    WHERE id = %(job_id)s
+      AND (
+        status = 'PENDING'
+        OR (
+            %(allow_reclaim)s AND status = 'PROCESSING'
+            AND (%(reclaim_before)s::timestamp IS NULL OR COALESCE(picked_at, created_at) < %(reclaim_before)s)
+        )
+      )
+    RETURNING status
+)
+SELECT (SELECT status FROM claimed), (SELECT status FROM target)
+"""
+
+# 같은 문장의 asyncpg 버전
+# ($n 위치 파라미터: job_id, cutoff, allow_reclaim, picked_at, worker_id, backend, enqueued_at, reclaim_before)
+# workers/async_worker.py 에서 사용
+ASYNC_CLAIM_SQL = (
+    _CLAIM_SQL.replace("%(job_id)s", "$1")
+    .replace("%(cutoff)s", "$2")
+    .replace("%(allow_reclaim)s", "$3")
+    .replace("%(picked_at)s", "$4")
+    .replace("%(worker_id)s", "$5")
+    .replace("%(backend)s", "$6")
+    .replace("%(enqueued_at)s", "$7")
+    .replace("%(reclaim_before)s", "$8")
+)
+
+
+def is_message_expired(created_at_ms, max_wait_sec: float, now_ms: Optional[float] = None) -> bool:
+    """
+    메시지의 createdAt(epoch ms 문자열)으로 만료 여부를 판단한다.
+
+    - createdAt 은 API 서버가 커밋 후 enqueue 할 때 찍은 시각이라 DB 의 created_at 보다 늦다.
+      따라서 여기서 만료라면 DB 기준으로도 반드시 만료다 (반대는 아닐 수 있음 → claim_job 이 최종 판단).
+    - createdAt 이 없거나 숫자가 아니면 만료로 보지 않는다 (DB 에서 판단).
+    """
+    if created_at_ms is None:
+        return False
+    try:
+        created = float(created_at_ms)
+    except (TypeError, ValueError):
+        return False
+    now_ms = time.time() * 1000 if now_ms is None else now_ms
+    return now_ms - created > max_wait_sec * 1000
+
+
+def reclaim_before(now: datetime, reclaim_lease_sec: Optional[float]) -> Optional[datetime]:
+    """재수거 가능한 picked_at 기준 시각. lease 가 없으면 None (PROCESSING 이면 모두 재수거)."""
+    if reclaim_lease_sec is None:
+        return None
+    return now - timedelta(seconds=reclaim_lease_sec)
+
+
+def claim_job(
+    conn,
+    job_id: int,
+    max_wait_sec: float,
+    allow_reclaim: bool = False,
+    backend: Optional[str] = None,
+    created_at_ms=None,
+    reclaim_lease_sec: Optional[float] = None,
+) -> str:
+    """
+    한 번의 조건부 UPDATE 로 Job 을 PROCESSING 으로 가져온다.
+
+    - PENDING(또는 allow_reclaim 이면 PROCESSING) 인 경우에만 행을 바꾼다.
+      동시에 여러 워커가 같은 Job 을 claim 해도 UPDATE 의 재검사 덕분에 하나만 성공한다.
+    - reclaim_lease_sec 를 주면 picked_at 이 그보다 오래된 PROCESSING 행만 재수거한다.
+      ("다시 읽음" / "오래 ACK 안 됨" 이 "이전 워커가 죽음" 을 뜻하지 않는 경우. 아직 처리 중인 Job 은 LEASED)
+    - created_at 이 만료 기준보다 오래됐으면 같은 문장에서 FAILED 로 바꾸고 EXPIRED 를 반환한다.
+      단, fan-out sub-job(parent_id 있음)은 만료시키지 않는다 (fanout.py 참고).
+    - 만료 기준 시각은 기존과 같이 워커의 datetime.now() 로 계산한다 (created_at 과 같은 로컬 시각 기준).
+    - 같은 문장에서 picked_at / worker_id / backend / enqueued_at 도 기록한다 (workers/job_timing.py).
+      enqueued_at 은 메시지 createdAt(created_at_ms), 없으면 created_at.
+
+    반환값: CLAIMED / EXPIRED / NOT_PENDING / NOT_FOUND / LEASED
+    """
+    now = datetime.now()
+    cutoff = now - timedelta(seconds=max_wait_sec)
+    event = None
+
+    with conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                _CLAIM_SQL,
+                {
+                    "job_id": job_id,
+                    "cutoff": cutoff,
+                    "allow_reclaim": allow_reclaim,
+                    "picked_at": now,
+                    "worker_id": WORKER_ID,
+                    "backend": backend,
+                    "enqueued_at": enqueued_at_from_message(created_at_ms),
+                    "reclaim_before": reclaim_before(now, reclaim_lease_sec),
+                },
+            )
+            new_status, old_status = cur.fetchone()
+
+            if new_status == "PROCESSING":
+                return CLAIMED
+            if new_status == "FAILED":
+                event = build_job_event(job_id, "FAILED")
+                notify_in_tx(cur, event)
+            elif old_status is None:
+                return NOT_FOUND
+            elif allow_reclaim and old_status == "PROCESSING":
+                return LEASED
+            else:
+                return NOT_PENDING
+
+    publish_after_commit(event)
+    return EXPIRED
+
+
+class ExpiredJobBuffer:
+    """
+    메시지 단계에서 만료로 판정된 Job 들을 모아 두었다가 한 번의 UPDATE 로 FAILED 처리한다.
+
+    - 폭주 상황에서 만료 메시지마다 DB 왕복을 하지 않기 위함.
+    - EXPIRED_FLUSH_SIZE 개가 모이거나, 마지막 flush 후 EXPIRED_FLUSH_SEC 가 지나면 flush 한다.
+    - backend / enqueued_at 도 같이 기록해서 latency_report 가 백엔드별 만료 수를 셀 수 있게 한다.
+    - PENDING 인 Job 만 바꾼다. 재전달된 메시지(다른 워커가 처리 중일 수 있음)는 넣지 않고 claim_job 으로 판단한다.
+    - 메시지는 add 직후 바로 ACK 해도 된다. flush 전에 워커가 죽으면 그 Job 들은 PENDING 으로 남지만,
+      어차피 만료된 Job 이라 다른 경로(재전달 / DB 워커 / 정리 작업)에서 FAILED 로 바뀐다.
+    """
+
+    def __init__(
+        self,
+        flush_size: int = EXPIRED_FLUSH_SIZE,
+        flush_sec: float = EXPIRED_FLUSH_SEC,
+        backend: Optional[str] = None,
+    ) -> None:
+        self.backend = backend
+        self.flush_size = flush_size
+        self.flush_sec = flush_sec
+        self._job_ids: list[int] = []
+        self._last_flush_at = time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self._job_ids)
+
+    def add(self, conn, job_id: int) -> None:
+        self._job_ids.append(job_id)
+        if len(self._job_ids) >= self.flush_size:
+            self.flush(conn)
+
+    def flush_if_due(self, conn) -> None:
+        if self._job_ids and time.monotonic() - self._last_flush_at >= self.flush_sec:
+            self.flush(conn)
+
+    def flush(self, conn) -> None:
+        self._last_flush_at = time.monotonic()
+        if not self._job_ids:
+            return
+
+        job_ids, self._job_ids = self._job_ids, []
+        with conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    """
+                    UPDATE ocr_job
+                    SET status = 'FAILED', finished_at = %s,
+                        backend = COALESCE(backend, %s), enqueued_at = COALESCE(enqueued_at, created_at)
+                    WHERE id = ANY(%s) AND status = 'PENDING'
+                    RETURNING id
+                    """,
+                    (datetime.now(), self.backend, job_ids),
+                )
+                failed = [row[0] for row in cur.fetchall()]
+                events = [build_job_event(job_id, "FAILED") for job_id in failed]
+                for event in events:
+                    notify_in_tx(cur, event)
+
+        for event in events:
+            publish_after_commit(event)
+        get_worker_logger().info("expired_batch", failed=len(failed), total=len(job_ids))
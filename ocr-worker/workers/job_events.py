@@ -0,0 +1,101 @@
+# ocr-worker/workers/job_events.py
+"""
+Job 완료 이벤트 발행.
+
+클라이언트가 GET /jobs/{id} 를 1초마다 polling 하는 대신,
+워커가 update_job_status 커밋 시점에 완료 이벤트를 발행하고
+API 서버의 long-poll 엔드포인트(GET /jobs/{id}/wait)가 이벤트를 받아 바로 응답한다.
+
+이벤트 형식 (JSON):
+    {"jobId": 1, "status": "DONE", "resultRef": "sqlite://...", "finishedAt": 1735000000000}
+
+발행 방식 (OCR_JOB_EVENTS 환경변수):
+- redis    : 커밋 후 Redis Pub/Sub 채널 ocr:job-events 로 PUBLISH (기본값)
+- postgres : 같은 트랜잭션 안에서 pg_notify('ocr_job_events', ...) → 커밋될 때만 전달됨
+- off      : 발행하지 않음 (기존 polling 만 사용)
+
+이벤트 발행 실패는 Job 처리 결과에 영향을 주지 않는다 (클라이언트는 polling 으로 fallback).
+"""
+import json
+import os
+import time
+from typing import Optional
+
+from ocr_engine.checkpoint import get_checkpoint_store
+from workers.worker_log import get_worker_logger
+
+JOB_EVENTS_MODE = os.getenv("OCR_JOB_EVENTS", "redis").lower()
+
+# Redis Pub/Sub 채널 (API 서버 JobEventConfig.REDIS_CHANNEL 과 동일해야 함)
+REDIS_EVENT_CHANNEL = "ocr:job-events"
+
+# Postgres LISTEN/NOTIFY 채널
+PG_EVENT_CHANNEL = "ocr_job_events"
+
+REDIS_CONFIG = {
+    "host": os.getenv("REDIS_HOST", "localhost"),
+    "port": int(os.getenv("REDIS_PORT", "6379")),
+    "db": 0,
+    "decode_responses": True,
+}
+
+_redis_client = None
+
+
+def build_job_event(job_id: int, status: str) -> dict:
+    """
+    완료 이벤트 payload 를 만든다.
+
+    - resultRef 는 페이지 체크포인트 저장소의 결과 위치 (DONE 이고 저장소가 켜져 있을 때만).
+    """
+    result_ref: Optional[str] = None
+    if status == "DONE":
+        store = get_checkpoint_store()
+        if store is not None:
+            result_ref = store.result_ref(job_id)
+
+    return {
+        "jobId": job_id,
+        "status": status,
+        "resultRef": result_ref,
+        "finishedAt": int(time.time() * 1000),
+    }
+
+
+def notify_in_tx(cur, event: dict) -> None:
+    """
+    postgres 모드일 때, 상태 UPDATE 와 같은 트랜잭션에서 NOTIFY 를 건다.
+
+    - NOTIFY 는 트랜잭션이 커밋될 때만 전달되므로, 롤백된 상태 변경이 알려지는 일은 없다.
+    """
+    if JOB_EVENTS_MODE != "postgres":
+        return
+    cur.execute(
+        "SELECT pg_notify(%s, %s)",
+        (PG_EVENT_CHANNEL, json.dumps(event)),
+    )
+
+
+def _get_redis():
+    global _redis_client
+
+    if _redis_client is None:
+        import redis
+
+        _redis_client = redis.Redis(**REDIS_CONFIG)
+
+    return _redis_client
+
+
+def publish_after_commit(event: dict) -> None:
+    """
+    redis 모드일 때, 커밋이 끝난 뒤 Pub/Sub 채널로 이벤트를 발행한다.
+
+    - 커밋 전에 발행하면 API 서버가 아직 이전 상태를 읽을 수 있으므로 반드시 커밋 후에 부른다.
+    """
+    if JOB_EVENTS_MODE != "redis":
+        return
+    try:
+        _get_redis().publish(REDIS_EVENT_CHANNEL, json.dumps(event))
+    except Exception as e:
+        get_worker_logger().warn("job_event_publish_failed", job_id=event["jobId"], error=e)
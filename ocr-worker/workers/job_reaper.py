@@ -0,0 +1,278 @@
+# ocr-worker/workers/job_reaper.py
+"""
+만료 / 멈춘 Job 을 모아서 FAILED 로 바꾸는 백그라운드 reaper (모든 백엔드 공통).
+
+기존에는 만료를 그때그때 한 건씩 처리했다.
+- db_worker 는 claim 트랜잭션 안에서 만료된 행을 하나씩 FAILED 로 바꾸며 다음 행을 찾았고,
+- 브로커 워커는 그 Job 의 메시지를 읽었을 때만 FAILED 로 바꿨다. (메시지가 밀려 있으면 클라이언트는 한참 PENDING 을 봄)
+- 워커가 처리 도중 죽어서 PROCESSING 으로 남은 Job 은 아무도 끝내지 않았다.
+
+reaper 는 OCR_REAPER_INTERVAL_SEC 마다
+1) 만료된 PENDING Job (created_at 이 MAX_WAIT_SEC 지남, fan-out sub-job 제외)
+2) OCR_PROCESSING_TIMEOUT_SEC 넘게 PROCESSING 인 Job (picked_at 기준, 없으면 created_at)
+   - 일반 Job 은 FAILED 로, sub-job 은 finish_subjob 으로 실패 처리해서 부모 진행 카운터도 올린다.
+   - fan-out 부모는 sub-job 이 끝나야 끝나므로 여기서 실패시키지 않는다.
+3) 모든 sub-job 이 끝났는데 PROCESSING 으로 남은 fan-out 부모 (fanout.finish_stuck_parents)
+를 집합 단위 UPDATE 로 OCR_REAPER_BATCH 개씩 처리하고, 바뀐 Job 마다 상태 이벤트를 발행한다.
+(reaper 는 어느 백엔드로 들어온 Job 인지 모르므로 backend 는 비워 두고 enqueued_at 만 created_at 으로 채운다.
+ latency_report 가 시간상 가까운 Job 의 백엔드로 센다)
+
+- 배치는 FOR UPDATE SKIP LOCKED 로 고르므로 claim 중인 행과 겹치지 않는다.
+- 워커마다 reaper 스레드를 띄우지만, Postgres advisory lock 을 잡은 하나만 실제로 돈다.
+  (잡고 있던 워커가 죽으면 커넥션과 함께 lock 이 풀리고 다른 워커가 이어받는다)
+- reaper 가 만료를 처리하므로 DB 큐 claim(db_worker / async DbSource)은 만료된 행을 아예 조회하지 않는다.
+- PROCESSING 타임아웃은 가장 긴 Job 의 처리 시간보다 넉넉하게 잡는다.
+  (아직 처리 중인 Job 을 실패시키면, 늦게 끝난 워커가 DONE 으로 다시 덮어쓴다)
+- 같은 스레드에서 CHECKPOINT_PURGE_INTERVAL_SEC 마다 OCR_CHECKPOINT_TTL_HOURS 가 지난 페이지 결과
+  (ocr_page_result)를 지운다. 공유 저장소(postgres)는 리더만, 호스트 로컬 저장소(sqlite)는 워커마다 지운다.
+
+환경변수:
+- OCR_REAPER                 : 1 이면 워커가 reaper 스레드를 띄움 (기본 1)
+- OCR_REAPER_INTERVAL_SEC    : 주기(초, 기본 2)
+- OCR_REAPER_BATCH           : 한 번에 바꾸는 행 수 (기본 500)
+- OCR_PROCESSING_TIMEOUT_SEC : PROCESSING 타임아웃(초, 기본 900)
+- OCR_CHECKPOINT_TTL_HOURS   : 페이지 결과 보관 시간 (기본 24, 0 이면 지우지 않음, ocr_engine/config.py)
+
+사용 예 (ocr-worker 디렉터리에서, 워커와 별도로 돌릴 때):
+    OCR_REAPER=0 python -m workers.redis_worker
+    python -m workers.job_reaper
+"""
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+
+import psycopg2
+
+from ocr_engine.checkpoint import get_checkpoint_store
+from ocr_engine.config import CHECKPOINT_TTL_HOURS
+from workers.fanout import finish_stuck_parents, finish_subjob
+from workers.idempotency import finish_claim
+from workers.job_events import build_job_event, notify_in_tx, publish_after_commit
+from workers.worker_log import get_worker_logger
+
+REAPER_ENABLED = os.getenv("OCR_REAPER", "1") == "1"
+REAPER_INTERVAL_SEC = float(os.getenv("OCR_REAPER_INTERVAL_SEC", "2"))
+REAPER_BATCH = int(os.getenv("OCR_REAPER_BATCH", "500"))
+PROCESSING_TIMEOUT_SEC = float(os.getenv("OCR_PROCESSING_TIMEOUT_SEC", "900"))
+
+# 요청 후 몇 초가 지나면 타임아웃으로 간주할지 (각 워커의 MAX_WAIT_SEC 와 같음)
+MAX_WAIT_SEC = 60
+
+# 오래된 체크포인트(페이지 결과)를 지우는 주기(초)
+CHECKPOINT_PURGE_INTERVAL_SEC = 600
+
+# pg_try_advisory_lock 키 (여러 워커 중 하나만 reaper 를 돌린다)
+REAPER_LOCK_KEY = 0x6F63725F72656170  # "ocr_reap"
+
+log = get_worker_logger()
+
+_EXPIRE_PENDING_SQL = """
+WITH picked AS (
+    SELECT id FROM ocr_job
+    WHERE status = 'PENDING' AND parent_id IS NULL AND created_at < %(cutoff)s
+    ORDER BY id
+    LIMIT %(limit)s
+    FOR UPDATE SKIP LOCKED
+)
+UPDATE ocr_job j
+SET status = 'FAILED', finished_at = %(now)s, enqueued_at = COALESCE(j.enqueued_at, j.created_at)
+FROM picked
+WHERE j.id = picked.id
+RETURNING j.id
+"""
+
+_FAIL_PROCESSING_SQL = """
+WITH picked AS (
+    SELECT id FROM ocr_job
+    WHERE status = 'PROCESSING' AND parent_id IS NULL AND subjob_total IS NULL
+      AND COALESCE(picked_at, created_at) < %(cutoff)s
+    ORDER BY id
+    LIMIT %(limit)s
+    FOR UPDATE SKIP LOCKED
+)
+UPDATE ocr_job j
+SET status = 'FAILED', finished_at = %(now)s, enqueued_at = COALESCE(j.enqueued_at, j.created_at)
+FROM picked
+WHERE j.id = picked.id
+RETURNING j.id
+"""
+
+_STUCK_SUBJOBS_SQL = """
+SELECT id, parent_id FROM ocr_job
+WHERE status = 'PROCESSING' AND parent_id IS NOT NULL
+  AND COALESCE(picked_at, created_at) < %s
+ORDER BY id
+LIMIT %s
+"""
+
+
+def expired_claim_filter(max_wait_sec: float = MAX_WAIT_SEC) -> Optional[datetime]:
+    """
+    DB 큐 claim 이 건너뛸 만료 기준 시각. reaper 가 꺼져 있으면 None (claim 이 직접 FAILED 처리).
+    """
+    if not REAPER_ENABLED:
+        return None
+    return datetime.now() - timedelta(seconds=max_wait_sec)
+
+
+class JobReaper:
+    """reap_once 를 주기적으로 부른다. conn 은 reaper 전용 커넥션."""
+
+    def __init__(
+        self,
+        conn,
+        batch_size: int = REAPER_BATCH,
+        max_wait_sec: float = MAX_WAIT_SEC,
+        processing_timeout_sec: float = PROCESSING_TIMEOUT_SEC,
+    ) -> None:
+        self.conn = conn
+        self.batch_size = max(1, batch_size)
+        self.max_wait_sec = max_wait_sec
+        self.processing_timeout_sec = processing_timeout_sec
+        self.is_leader = False
+
+    def try_lead(self) -> bool:
+        """advisory lock 을 잡았으면 True. 세션 lock 이라 한 번 잡으면 커넥션이 닫힐 때까지 유지된다."""
+        if not self.is_leader:
+            with self.conn:
+                with self.conn.cursor() as cur:
+                    cur.execute("SELECT pg_try_advisory_lock(%s)", (REAPER_LOCK_KEY,))
+                    self.is_leader = bool(cur.fetchone()[0])
+            if self.is_leader:
+                log.info("reaper_leader")
+        return self.is_leader
+
+    def reap_once(self) -> dict:
+        now = datetime.now()
+        counts = {
+            "expired": self._fail_in_batches(_EXPIRE_PENDING_SQL, now - timedelta(seconds=self.max_wait_sec)),
+            "stuck": self._fail_in_batches(
+                _FAIL_PROCESSING_SQL, now - timedelta(seconds=self.processing_timeout_sec)
+            ),
+            "stuck_subjobs": self._fail_stuck_subjobs(now - timedelta(seconds=self.processing_timeout_sec)),
+            "stuck_parents": finish_stuck_parents(self.conn, REAPER_INTERVAL_SEC * 5, self.batch_size),
+        }
+        if any(counts.values()):
+            log.info("reaped", **counts)
+        return counts
+
+    def _fail_in_batches(self, sql: str, cutoff: datetime) -> int:
+        total = 0
+        while True:
+            events = []
+            with self.conn:
+                with self.conn.cursor() as cur:
+                    cur.execute(sql, {"cutoff": cutoff, "limit": self.batch_size, "now": datetime.now()})
+                    job_ids = [row[0] for row in cur.fetchall()]
+                    for job_id in job_ids:
+                        event = build_job_event(job_id, "FAILED")
+                        notify_in_tx(cur, event)
+                        events.append(event)
+
+            # 커밋 이후에 발행 → 이벤트를 받은 API 서버가 항상 최종 상태를 읽는다.
+            for event in events:
+                publish_after_commit(event)
+            for job_id in job_ids:
+                finish_claim(job_id)
+
+            total += len(job_ids)
+            if len(job_ids) < self.batch_size:
+                return total
+
+    def _fail_stuck_subjobs(self, cutoff: datetime) -> int:
+        # sub-job 은 부모 진행 카운터를 같이 올려야 하므로 finish_subjob 으로 한 건씩 (드문 경우)
+        with self.conn:
+            with self.conn.cursor() as cur:
+                cur.execute(_STUCK_SUBJOBS_SQL, (cutoff, self.batch_size))
+                rows = cur.fetchall()
+        for job_id, parent_id in rows:
+            finish_subjob(self.conn, job_id, parent_id, False)
+        return len(rows)
+
+
+class CheckpointPurger:
+    """체크포인트 저장소에서 ttl_hours 가 지난 페이지 결과를 interval_sec 마다 지운다."""
+
+    def __init__(
+        self, ttl_hours: float = CHECKPOINT_TTL_HOURS, interval_sec: float = CHECKPOINT_PURGE_INTERVAL_SEC
+    ) -> None:
+        self.ttl_hours = ttl_hours
+        self.interval_sec = interval_sec
+        self._last_purge_at: Optional[float] = None
+
+    def purge_if_due(self, is_leader: bool) -> int:
+        now = time.monotonic()
+        if self.ttl_hours <= 0 or (self._last_purge_at is not None and now - self._last_purge_at < self.interval_sec):
+            return 0
+        self._last_purge_at = now
+
+        try:
+            store = get_checkpoint_store()
+            # 공유 저장소는 리더 하나만 지우면 된다. 호스트 로컬 저장소는 각자 지운다.
+            if store is None or (store.shared and not is_leader):
+                return 0
+            deleted = store.purge(self.ttl_hours * 3600)
+        except Exception as e:
+            log.error("checkpoint_purge_error", error=e)
+            return 0
+
+        if deleted:
+            log.info("checkpoints_purged", deleted=deleted, ttl_hours=self.ttl_hours)
+        return deleted
+
+
+def run_reaper(db_config: dict, stop: Optional[threading.Event] = None) -> None:
+    """
+    reaper 루프. 리더가 아니면 주기마다 lock 만 다시 시도한다.
+    DB 오류가 나면 커넥션을 새로 만든다 (lock 도 다시 잡음).
+    """
+    stop = stop or threading.Event()
+    conn = None
+    reaper = None
+    purger = CheckpointPurger()
+    while not stop.is_set():
+        try:
+            if conn is None or conn.closed:
+                conn = psycopg2.connect(**db_config)
+                reaper = JobReaper(conn)
+            if reaper.try_lead():
+                reaper.reap_once()
+            purger.purge_if_due(reaper.is_leader)
+        except Exception as e:
+            log.error("reaper_error", error=e)
+            if conn is not None:
+                conn.close()
+            conn = None
+        stop.wait(REAPER_INTERVAL_SEC)
+
+    if conn is not None:
+        conn.close()
+
+
+def start_job_reaper(db_config: dict) -> Optional[threading.Thread]:
+    """워커 main_loop 에서 호출. OCR_REAPER=0 이면 띄우지 않는다."""
+    if not REAPER_ENABLED:
+        return None
+    thread = threading.Thread(target=run_reaper, args=(db_config,), name="job-reaper", daemon=True)
+    thread.start()
+    return thread
+
+
+def main() -> None:
+    from workers.db_worker import DB_CONFIG
+
+    print(
+        f"[Worker] job reaper interval={REAPER_INTERVAL_SEC}s batch={REAPER_BATCH} "
+        f"max_wait={MAX_WAIT_SEC}s processing_timeout={PROCESSING_TIMEOUT_SEC}s",
+        flush=True,
+    )
+    try:
+        run_reaper(DB_CONFIG)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
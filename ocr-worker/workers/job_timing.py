@@ -0,0 +1,70 @@
+# ocr-worker/workers/job_timing.py
+"""
+Job 단계별 시각 기록 (tools/latency_report.py 의 입력).
+
+ocr_job 에는 원래 created_at 과 status 뿐이라, 끝난 Job 이 큐에서 기다린 시간인지
+OCR 이 오래 걸린 것인지 구분할 수 없었다. 워커가 아래 컬럼을 채운다.
+
+- enqueued_at    : 큐에 들어간 시각. 메시지의 createdAt(API 서버가 커밋 후 enqueue 한 시각),
+                   없으면(DB 큐 / sub-job) created_at
+- picked_at      : 워커가 claim 해서 PROCESSING 으로 바꾼 시각
+- ocr_started_at : run_ocr 시작 시각
+- ocr_ended_at   : run_ocr 이 끝난 시각
+- finished_at    : DONE / FAILED 로 바꾼 시각
+- worker_id      : 처리한 워커 (CONSUMER_NAME, 없으면 hostname-pid)
+- backend        : 큐 백엔드 (db / redis / rabbit / kafka)
+
+picked_at / worker_id / backend / enqueued_at 은 claim UPDATE 에, OCR 시각과 finished_at 은
+최종 상태 UPDATE 에 같이 싣는다 (Job 당 DB 왕복은 늘리지 않음).
+시각은 created_at 과 같이 워커의 로컬 시각(naive datetime)으로 기록한다.
+"""
+import os
+import socket
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Optional
+
+WORKER_ID = os.getenv("CONSUMER_NAME") or f"{socket.gethostname()}-{os.getpid()}"
+
+# 최종 상태 UPDATE 의 SET 절. 파라미터: status, ocr_started_at, ocr_ended_at, finished_at
+# (OCR 시각이 없으면 기존 값을 유지)
+FINISH_SET_SQL = """
+    status = %s,
+    ocr_started_at = COALESCE(%s, ocr_started_at),
+    ocr_ended_at = COALESCE(%s, ocr_ended_at),
+    finished_at = %s
+"""
+
+# 최종 상태 UPDATE 의 WHERE 절. 파라미터: job_id, worker_id
+# 이 워커가 아직 PROCESSING 으로 잡고 있는 Job 만 바꾼다 → 리퍼가 먼저 FAILED 로 돌렸거나
+# 다른 워커가 다시 가져간 Job 을, 늦게 끝난 결과가 덮어쓰지 않는다.
+FINISH_WHERE_SQL = "id = %s AND status = 'PROCESSING' AND worker_id = %s"
+
+
+@dataclass
+class OcrTiming:
+    """process_job 앞뒤로 찍는 OCR 시작 / 종료 시각."""
+
+    started_at: datetime = field(default_factory=datetime.now)
+    ended_at: Optional[datetime] = None
+
+    def stop(self) -> "OcrTiming":
+        self.ended_at = datetime.now()
+        return self
+
+
+def enqueued_at_from_message(created_at_ms) -> Optional[datetime]:
+    """메시지 createdAt(epoch ms 문자열) → 로컬 시각. 없거나 잘못된 값이면 None (DB 에서 created_at 사용)."""
+    if created_at_ms is None:
+        return None
+    try:
+        return datetime.fromtimestamp(float(created_at_ms) / 1000)
+    except (TypeError, ValueError, OverflowError, OSError):
+        return None
+
+
+def finish_params(status: str, timing: Optional[OcrTiming]) -> tuple:
+    """FINISH_SET_SQL 의 파라미터."""
+    if timing is None:
+        return status, None, None, datetime.now()
+    return status, timing.started_at, timing.ended_at, datetime.now()
@@ -3,13 +3,25 @@ import os
 import socket
 import time
 import json
-from datetime import datetime, timedelta
+from typing import Optional
 
 import psycopg2
-from kafka import KafkaConsumer
-
-from ocr_engine.schemas import PredictRequest
-from ocr_engine.predictor import run_ocr
+from kafka import KafkaConsumer, KafkaProducer
+from kafka.admin import KafkaAdminClient, NewTopic
+from kafka.errors import TopicAlreadyExistsError
+
+from ocr_engine.cpu_budget import apply_cpu_budget, cpu_budget_from_env
+from ocr_engine.schemas import WorkerPredictRequest
+from ocr_engine.predictor import count_pdf_pages, run_ocr
+from workers.job_claim import CLAIMED, EXPIRED, NOT_FOUND, claim_job
+from workers.deadline import deadline_from_message, profile_for_job
+from workers.fanout import PageRange, finish_subjob, maybe_fan_out, page_range_from_message, subjob_message
+from workers.idempotency import LEASE_SEC, begin_claim, finish_claim, release_claim
+from workers.lanes import LANE_LARGE, LANE_SMALL, WORKER_LANES, LaneScheduler, should_move_to_large
+from workers.job_events import build_job_event, notify_in_tx, publish_after_commit
+from workers.job_reaper import start_job_reaper
+from workers.job_timing import FINISH_SET_SQL, FINISH_WHERE_SQL, WORKER_ID, OcrTiming, finish_params
+from workers.worker_log import get_worker_logger
 
 # ------------------------------------------------------------
 # DB 접속 설정 (V3/V4/V5와 동일)
@@ -27,7 +39,18 @@ DB_CONFIG = {
 # ------------------------------------------------------------
 KAFKA_BOOTSTRAP_SERVERS = os.getenv("KAFKA_BOOTSTRAP_SERVERS", "localhost:9092")
 KAFKA_TOPIC = "ocr.jobs"
+# 큰 문서 / fan-out sub-job 용 large lane 토픽 (workers/lanes.py). 없으면 워커가 만든다.
+KAFKA_LARGE_TOPIC = "ocr.jobs.large"
+KAFKA_TOPICS = {LANE_SMALL: KAFKA_TOPIC, LANE_LARGE: KAFKA_LARGE_TOPIC}
+LANE_BY_TOPIC = {topic: lane for lane, topic in KAFKA_TOPICS.items()}
 KAFKA_GROUP_ID = "ocr-workers"
+# 토픽 파티션 수. API 서버와 같이 jobId % 4 파티션으로 보낸다 (lane 이동 / fan-out sub-job)
+KAFKA_PARTITIONS = 4
+
+# lane 하나만 열어 두고 기다리는 시간(ms). 이 안에 메시지가 없으면 다음 lane 을 본다.
+LANE_POLL_MS = 100
+
+_producer = None
 
 _env_name = os.getenv("CONSUMER_NAME")
 if _env_name:
@@ -43,6 +66,12 @@ POLL_INTERVAL_SEC = 1.0
 # 요청 후 몇 초가 지나면 타임아웃으로 간주할지 (요구사항: 60초)
 MAX_WAIT_SEC = 60
 
+# ocr_job.backend 에 기록하는 큐 백엔드 이름 (tools/latency_report.py)
+BACKEND = "kafka"
+
+# 메시지 단위 로그는 백그라운드 스레드가 모아서 출력 (OCR_LOG_LEVEL / OCR_LOG_SAMPLE / OCR_LOG_RATE_LIMIT)
+log = get_worker_logger()
+
 
 def get_db_connection():
     """
@@ -58,17 +87,35 @@ def get_db_connection():
     return conn
 
 
+def ensure_large_topic():
+    """
+    large lane 토픽이 없으면 만든다.
+
+    - 토픽이 자동 생성되기를 기다리면, 컨슈머가 메타데이터를 갱신하기 전에 들어온 메시지를
+      auto_offset_reset=latest 때문에 건너뛸 수 있다. 그래서 구독 전에 미리 만들어 둔다.
+    """
+    admin = KafkaAdminClient(bootstrap_servers=KAFKA_BOOTSTRAP_SERVERS.split(","))
+    try:
+        admin.create_topics([NewTopic(KAFKA_LARGE_TOPIC, num_partitions=KAFKA_PARTITIONS, replication_factor=1)])
+        print(f"[Worker] created topic {KAFKA_LARGE_TOPIC} (partitions={KAFKA_PARTITIONS})", flush=True)
+    except TopicAlreadyExistsError:
+        pass
+    finally:
+        admin.close()
+
+
 def get_kafka_consumer():
     """
     Kafka Consumer 생성.
     - group_id = 'ocr-workers' 로 설정해서 컨슈머 그룹 사용.
     - enable_auto_commit=False 로 두고, 처리 후 수동 commit.
     - value_deserializer 로 JSON 문자열을 dict 로 변환.
+    - 이 워커가 소비하는 lane 의 토픽(OCR_LANES)을 모두 구독한다.
     """
     print("[Worker] connecting to Kafka...", flush=True)
 
     consumer = KafkaConsumer(
-        KAFKA_TOPIC,
+        *(KAFKA_TOPICS[lane] for lane in WORKER_LANES),
         bootstrap_servers=KAFKA_BOOTSTRAP_SERVERS.split(","),
         group_id=KAFKA_GROUP_ID,
         client_id=CONSUMER_CLIENT_ID,
@@ -78,114 +125,151 @@ def get_kafka_consumer():
     )
 
     print(
-        f"[Worker] Kafka connected. topic={KAFKA_TOPIC}, group={KAFKA_GROUP_ID}, client_id={CONSUMER_CLIENT_ID}",
+        f"[Worker] Kafka connected. topics={','.join(KAFKA_TOPICS[lane] for lane in WORKER_LANES)}, "
+        f"group={KAFKA_GROUP_ID}, client_id={CONSUMER_CLIENT_ID}",
         flush=True,
     )
     return consumer
 
 
-def mark_job_processing_if_valid(conn, job_id: int) -> bool:
+def get_kafka_producer():
+    """
+    fan-out sub-job 메시지를 보낼 Kafka Producer. 처음 필요할 때 한 번만 만든다.
+    """
+    global _producer
+
+    if _producer is None:
+        _producer = KafkaProducer(
+            bootstrap_servers=KAFKA_BOOTSTRAP_SERVERS.split(","),
+            value_serializer=lambda v: json.dumps(v).encode("utf-8"),
+        )
+
+    return _producer
+
+
+def poll_next_records(consumer: KafkaConsumer, scheduler: LaneScheduler):
+    """
+    lane 가중치 순서대로 메시지를 한 건 가져온다.
+
+    - 이번 차례 lane 토픽의 파티션만 열어 두고(나머지는 pause) LANE_POLL_MS 동안 poll 한다.
+    - 비어 있으면 다음 lane 을 보고, 모두 비어 있으면 전체를 열어 두고 1초 기다린다.
+    - max_records=1 → 메시지마다 commit 하는 위치가 실제 처리한 메시지와 일치한다.
+    """
+    assigned = consumer.assignment()
+    for lane in scheduler.order():
+        lane_partitions = {tp for tp in assigned if tp.topic == KAFKA_TOPICS[lane]}
+        if not lane_partitions:
+            continue
+        consumer.pause(*(assigned - lane_partitions))
+        consumer.resume(*lane_partitions)
+        records = consumer.poll(timeout_ms=LANE_POLL_MS, max_records=1)
+        if records:
+            return records
+
+    consumer.resume(*assigned)
+    return consumer.poll(timeout_ms=1000, max_records=1)
+
+
+def mark_job_processing_if_valid(conn, job_id: int, allow_reclaim: bool = False, created_at_ms=None) -> bool:
     """
     Kafka 에서 받은 job_id 기준으로,
-    - DB 에서 해당 Job 을 조회하고
-    - 만료 여부 / 상태를 검사한 뒤
-    - 유효하면 PROCESSING 으로 변경.
+    만료 여부 / 상태를 검사하고 유효하면 PROCESSING 으로 변경한다.
+
+    - 검사와 상태 변경은 job_claim.claim_job 의 조건부 UPDATE 한 문장으로 처리한다.
+      (SELECT FOR UPDATE → UPDATE 로 여러 번 왕복하지 않음)
+    - 만료된 Job 은 같은 문장에서 FAILED 로 바뀐다.
+    - 중복 전달은 호출한 쪽에서 페이지 수를 세기 전에 begin_claim 으로 먼저 거른다 (중복이면 DB 를 건드리지 않음).
 
-    Redis V4 의 mark_job_processing_if_valid 과 동일한 역할.
+    allow_reclaim=True 이면 PROCESSING 상태인 Job 도 다시 가져와
+    페이지 체크포인트부터 이어서 처리한다.
+    단 picked_at 이 OCR_IDEMPOTENCY_LEASE_SEC 보다 오래된 경우만이다. 다시 읽었다고 이전 워커가 죽은 것은 아니다.
+    (OCR 이 max.poll.interval 을 넘겨 파티션만 넘어간 경우 이전 워커는 아직 처리 중 → 중복으로 보고 넘김)
+
+    반환값:
+    - True  : PROCESSING 으로 변경 완료 → 실제 처리 진행
+    - False : 이미 만료되었거나 PENDING 이 아님 / 존재하지 않음 → 처리하지 않고 넘김
     """
-    with conn:
-        with conn.cursor() as cur:
-            cur.execute(
-                """
-                SELECT pdf_name, status, created_at
-                FROM ocr_job
-                WHERE id = %s
-                FOR UPDATE
-                """,
-                (job_id,),
-            )
-            row = cur.fetchone()
-
-            if row is None:
-                print(
-                    f"[Worker] job_id={job_id} not found in DB. skip.",
-                    flush=True,
-                )
-                return False
-
-            pdf_name, status, created_at = row
-            now = datetime.now()
-
-            if status != "PENDING":
-                print(
-                    f"[Worker] job_id={job_id} status is not PENDING ({status}). skip.",
-                    flush=True,
-                )
-                return False
-
-            if now - created_at > timedelta(seconds=MAX_WAIT_SEC):
-                print(
-                    f"[Worker] job_id={job_id} expired "
-                    f"(created_at={created_at}, now={now}), mark FAILED",
-                    flush=True,
-                )
-                cur.execute(
-                    "UPDATE ocr_job SET status = 'FAILED' WHERE id = %s",
-                    (job_id,),
-                )
-                return False
-
-            print(
-                f"[Worker] picked job_id={job_id}, pdf_name={pdf_name}",
-                flush=True,
-            )
-            cur.execute(
-                "UPDATE ocr_job SET status = 'PROCESSING' WHERE id = %s",
-                (job_id,),
-            )
-            return True
+    outcome = claim_job(
+        conn,
+        job_id,
+        MAX_WAIT_SEC,
+        allow_reclaim=allow_reclaim,
+        backend=BACKEND,
+        created_at_ms=created_at_ms,
+        reclaim_lease_sec=LEASE_SEC,
+    )
+
+    if outcome == CLAIMED:
+        log.info("picked", job_id=job_id)
+        return True
+
+    if outcome == EXPIRED:
+        log.info("expired", job_id=job_id, check="db")
+        finish_claim(job_id)
+    elif outcome == NOT_FOUND:
+        log.warn("not_found", job_id=job_id)
+        finish_claim(job_id)
+    else:
+        log.info("not_pending", job_id=job_id)
+    return False
 
 
-def update_job_status(conn, job_id: int, success: bool):
+def update_job_status(conn, job_id: int, success: bool, timing: Optional[OcrTiming] = None):
     """
     Job 처리 결과에 따라 상태를 DONE / FAILED 로 업데이트.
     """
     status = "DONE" if success else "FAILED"
 
+    event = build_job_event(job_id, status)
+
     with conn:
         with conn.cursor() as cur:
             cur.execute(
-                "UPDATE ocr_job SET status = %s WHERE id = %s",
-                (status, job_id),
+                f"UPDATE ocr_job SET {FINISH_SET_SQL} WHERE {FINISH_WHERE_SQL}",
+                (*finish_params(status, timing), job_id, WORKER_ID),
             )
-    print(f"[Worker] job_id={job_id} -> status={status}", flush=True)
-
-
-def process_job(job_id: int, pdf_name: str) -> bool:
+            updated = cur.rowcount > 0
+            if updated:
+                notify_in_tx(cur, event)
+    finish_claim(job_id)
+    if not updated:
+        # 리퍼가 이미 FAILED 로 돌렸거나 다른 워커가 다시 가져간 Job → 상태도 이벤트도 건드리지 않는다.
+        log.warn("status_update_skipped", job_id=job_id, status=status)
+        return
+    log.info("status_updated", job_id=job_id, status=status)
+
+    # 커밋 이후에 발행 → 이벤트를 받은 API 서버가 항상 최종 상태를 읽는다.
+    publish_after_commit(event)
+
+
+def process_job(
+    job_id: int, pdf_name: str, pages: Optional[PageRange] = None, profile: Optional[str] = None
+) -> bool:
     """
     실제 OCR 작업 수행.
     - ocr_engine.run_ocr 를 직접 호출.
     """
-    print(f"[Worker] run_ocr start job_id={job_id}, pdf_name={pdf_name}", flush=True)
+    log.info("ocr_start", job_id=job_id, pdf_name=pdf_name, pages=pages, profile=profile)
 
     try:
-        req = PredictRequest(pdf_name=pdf_name)
+        # job_id 를 넘기면 페이지 단위 체크포인트 → 재전달 시 이어서 처리
+        req = WorkerPredictRequest(
+            pdf_name=pdf_name,
+            job_id=job_id,
+            page_start=pages.page_start if pages is not None else None,
+            page_end=pages.page_end if pages is not None else None,
+            profile=profile,
+        )
         res = run_ocr(req)
 
-        if res.message.startswith("pdf not found"):
-            print(
-                f"[Worker] job_id={job_id} failed: {res.message}",
-                flush=True,
-            )
+        if res.message.startswith(("pdf not found", "pdf too large")):
+            log.warn("ocr_failed", job_id=job_id, message=res.message)
             return False
 
-        print(
-            f"[Worker] job_id={job_id} succeeded (message={res.message})",
-            flush=True,
-        )
+        log.info("ocr_done", job_id=job_id, message=res.message)
         return True
     except Exception as e:
-        print(f"[Worker] job_id={job_id} ERROR: {e}", flush=True)
+        log.error("ocr_error", job_id=job_id, error=e)
         return False
 
 
@@ -201,15 +285,24 @@ def main_loop():
     5) DONE/FAILED 로 상태 업데이트
     6) 성공/실패와 무관하게 해당 offset commit (DB 상태가 진실의 근원)
     """
+    # 같은 호스트의 워커들이 코어를 나눠 쓰도록 pinning (OCR_WORKER_INDEX / OCR_WORKER_COUNT / OCR_CPU_CORES)
+    apply_cpu_budget(cpu_budget_from_env())
+
+    # 만료 / 멈춘 Job 을 모아서 FAILED 처리 (워커 중 하나만 실제로 돈다, OCR_REAPER)
+    start_job_reaper(DB_CONFIG)
+
     print(f"[Worker] starting main loop (Kafka) as client_id={CONSUMER_CLIENT_ID}...", flush=True)
     conn = get_db_connection()
+    ensure_large_topic()
     consumer = get_kafka_consumer()
+    scheduler = LaneScheduler()
+    print(f"[Worker] lanes={','.join(WORKER_LANES)} weights={scheduler.weights}", flush=True)
 
     try:
         while True:
             try:
-                # poll 사용하면 타임아웃 제어 가능
-                records = consumer.poll(timeout_ms=1000)
+                # lane 가중치(OCR_LANE_WEIGHTS) 순서로 poll → 큰 문서가 작은 Job 을 막지 않음
+                records = poll_next_records(consumer, scheduler)
 
                 if not records:
                     # 새 메시지가 없는 경우 잠깐 쉰다
@@ -217,22 +310,16 @@ def main_loop():
                     continue
 
                 for tp, messages in records.items():
+                    lane = LANE_BY_TOPIC.get(tp.topic, LANE_SMALL)
                     for msg in messages:
                         fields = msg.value  # dict (JSON 디코딩 결과)
-                        print(
-                            f"[Worker] received message: topic={msg.topic}, "
-                            f"partition={msg.partition}, offset={msg.offset}, value={fields}",
-                            flush=True,
-                        )
+                        log.debug("received", partition=msg.partition, offset=msg.offset, job_id=fields.get("jobId"))
 
                         job_id_str = fields.get("jobId")
                         pdf_name = fields.get("pdfName")
 
                         if job_id_str is None or pdf_name is None:
-                            print(
-                                "[Worker] invalid message fields (jobId/pdfName missing). skip.",
-                                flush=True,
-                            )
+                            log.warn("invalid_message", offset=msg.offset, reason="jobId/pdfName missing")
                             # 잘못된 메시지도 offset 은 소비 완료로 처리
                             consumer.commit()
                             continue
@@ -240,42 +327,87 @@ def main_loop():
                         try:
                             job_id = int(job_id_str)
                         except ValueError:
-                            print(
-                                f"[Worker] invalid jobId value (not int). jobId={job_id_str}",
-                                flush=True,
-                            )
+                            log.warn("invalid_message", offset=msg.offset, reason="jobId not int", job_id=job_id_str)
+                            consumer.commit()
+                            continue
+
+                        # fan-out 으로 만든 sub-job 메시지면 페이지 범위가 들어 있다.
+                        pages = page_range_from_message(fields)
+
+                        # Kafka 는 처음 읽은 메시지와 다시 읽은 메시지를 구분할 수 없으므로
+                        # (Redis 의 XAUTOCLAIM / RabbitMQ 의 redelivered 에 해당하는 표시가 없음)
+                        # 메시지 createdAt 만으로 만료 처리하지 않고 항상 claim_job 으로 판단한다.
+                        # → 다른 컨슈머가 아직 처리 중인 Job 을 다시 읽어도 FAILED 로 바꾸지 않는다.
+
+                        # 중복 전달은 페이지 수를 세기 전에 idempotency 키로 먼저 거른다 (PDF 를 열지 않고 commit)
+                        if not begin_claim(job_id, reclaim=True):
+                            log.info("duplicate", job_id=job_id)
                             consumer.commit()
                             continue
 
+                        # 페이지 수는 메시지마다 한 번만 센다 (lane 이동 / fan-out / 프로필 선택이 같이 쓴다)
+                        page_count = count_pdf_pages(str(pdf_name)) if pages is None else None
+
+                        # small lane 의 큰 문서는 claim 하지 않고 large lane 토픽으로 옮긴다 (createdAt 그대로).
+                        if should_move_to_large(lane, page_count, pages is not None):
+                            producer = get_kafka_producer()
+                            producer.send(KAFKA_LARGE_TOPIC, value=fields, partition=job_id % KAFKA_PARTITIONS)
+                            producer.flush()
+                            consumer.commit()
+                            release_claim(job_id)
+                            log.info("lane_moved", job_id=job_id, lane=LANE_LARGE)
+                            continue
+
                         # DB 에서 Job 유효성 체크 + PROCESSING 변경
-                        is_valid = mark_job_processing_if_valid(conn, job_id)
+                        # 파티션은 그룹 내 한 컨슈머만 읽고 메시지마다 commit 하므로,
+                        # commit 안 된 메시지를 다시 읽었다면 이전 컨슈머가 죽었거나 파티션을 뺏긴 것이다.
+                        # → lease 가 지난 PROCESSING Job 만 재수거해서 체크포인트부터 이어서 처리
+                        is_valid = mark_job_processing_if_valid(
+                            conn, job_id, allow_reclaim=True, created_at_ms=fields.get("createdAt")
+                        )
                         if not is_valid:
                             # 만료/이미 처리 등 -> Kafka offset 만 commit
                             consumer.commit()
                             continue
 
+                        # 큰 문서면 직접 처리하지 않고 페이지 범위 sub-job 으로 나눠 large lane 토픽에 다시 넣는다.
+                        if pages is None:
+                            subjobs = maybe_fan_out(conn, job_id, str(pdf_name), page_count)
+                            if subjobs is not None:
+                                producer = get_kafka_producer()
+                                for sub in subjobs:
+                                    producer.send(
+                                        KAFKA_LARGE_TOPIC,
+                                        value=subjob_message(sub, str(pdf_name), job_id),
+                                        partition=sub.job_id % KAFKA_PARTITIONS,
+                                    )
+                                producer.flush()
+                                consumer.commit()
+                                continue
+
                         # 실제 OCR 처리
-                        success = process_job(job_id, str(pdf_name))
+                        # 마감까지 남은 시간이 부족하면 더 빠른 처리 프로필로 낮춘다.
+                        profile = profile_for_job(job_id, page_count, pages, deadline_from_message(fields.get("createdAt")))
+                        timing = OcrTiming()
+                        success = process_job(job_id, str(pdf_name), pages, profile)
+                        timing.stop()
 
                         # DB 상태 업데이트
-                        update_job_status(conn, job_id, success)
+                        # (sub-job 이면 부모 진행 카운터를 올리고, 마지막이면 부모를 확정)
+                        if pages is not None:
+                            finish_subjob(conn, job_id, pages.parent_id, success, timing)
+                        else:
+                            update_job_status(conn, job_id, success, timing)
 
                         # 이 메시지에 대한 offset commit
                         consumer.commit()
-                        print(
-                            f"[Worker] committed offset topic={msg.topic}, "
-                            f"partition={msg.partition}, offset={msg.offset}",
-                            flush=True,
-                        )
+                        log.debug("committed", partition=msg.partition, offset=msg.offset)
 
             except KeyboardInterrupt:
                 print("[Worker] KeyboardInterrupt received. stopping...", flush=True)
                 break
             except Exception as e:
-                print(
-                    f"[Worker] unexpected error while handling message: {e}, keep running...",
-                    flush=True,
-                )
+                log.error("unexpected_error", error=e)
                 time.sleep(3.0)
 
     finally:
@@ -0,0 +1,106 @@
+# ocr-worker/workers/lanes.py
+"""
+문서 크기(예상 비용)별 lane 으로 큐를 나눠 head-of-line blocking 을 막는다.
+
+기존에는 백엔드마다 FIFO 하나(ocr:jobs stream, ocr.jobs queue/topic, DB 의 ORDER BY id)라서
+100 페이지짜리 PDF 하나가 앞에 있으면 뒤의 1 페이지짜리 Job 들이 60초 마감을 넘겼다.
+
+lane:
+- small : API 서버가 넣는 기본 큐 (ocr:jobs / ocr.jobs). 모든 Job 이 여기로 들어온다.
+- large : 페이지 수가 OCR_LANE_LARGE_PAGES 이상인 Job 과 fan-out sub-job.
+          (ocr:jobs:large / ocr.jobs.large, DB 워커는 ocr_job.lane = 'large')
+
+흐름:
+1) small lane 에서 받은 Job 은 claim 전에 페이지 수를 센다 (페이지 캐시 메타 → 대부분 파일을 다시 열지 않음).
+2) 큰 Job 이면 메시지를 그대로(createdAt 유지) large lane 으로 옮기고 ACK 한다.
+3) 워커는 smooth weighted round robin 으로 lane 을 번갈아 가며 가져온다 (OCR_LANE_WEIGHTS).
+   고른 lane 이 비어 있으면 다음 lane 에서 가져온다.
+4) OCR_LANES=small 로 띄운 워커는 small lane 만 소비한다 (작은 Job 전용 워커).
+
+환경변수:
+- OCR_LANE_LARGE_PAGES : large 로 보내는 페이지 수 기준 (기본 8, 0 이면 분류하지 않음)
+- OCR_LANE_WEIGHTS     : lane 별 가중치 (기본 "small=4,large=1")
+- OCR_LANES            : 이 워커가 소비할 lane (기본 "small,large")
+"""
+import os
+from typing import Optional
+
+LANE_SMALL = "small"
+LANE_LARGE = "large"
+ALL_LANES = (LANE_SMALL, LANE_LARGE)
+
+LARGE_LANE_MIN_PAGES = int(os.getenv("OCR_LANE_LARGE_PAGES", "8"))
+
+
+def _parse_weights(spec: str) -> dict[str, int]:
+    weights = {LANE_SMALL: 4, LANE_LARGE: 1}
+    for item in spec.split(","):
+        if "=" not in item:
+            continue
+        name, weight = item.split("=", 1)
+        name = name.strip()
+        if name not in ALL_LANES:
+            continue
+        try:
+            weights[name] = max(1, int(weight))
+        except ValueError:
+            continue
+    return weights
+
+
+def _parse_lanes(spec: str) -> tuple[str, ...]:
+    lanes = tuple(lane for lane in ALL_LANES if lane in {s.strip() for s in spec.split(",")})
+    return lanes or ALL_LANES
+
+
+LANE_WEIGHTS = _parse_weights(os.getenv("OCR_LANE_WEIGHTS", ""))
+WORKER_LANES = _parse_lanes(os.getenv("OCR_LANES", ",".join(ALL_LANES)))
+
+
+def classify_job(page_count: Optional[int]) -> str:
+    """
+    PDF 페이지 수로 lane 을 정한다.
+
+    - 페이지 수를 알 수 없으면(파일 없음 등) small → 처리 단계에서 "pdf not found" 로 바로 끝난다.
+    """
+    if LARGE_LANE_MIN_PAGES <= 0:
+        return LANE_SMALL
+    if page_count is not None and page_count >= LARGE_LANE_MIN_PAGES:
+        return LANE_LARGE
+    return LANE_SMALL
+
+
+def should_move_to_large(lane: str, page_count: Optional[int], is_subjob: bool) -> bool:
+    """
+    small lane 에서 받은 일반 Job 중 large 로 옮겨야 하는 Job 인지.
+
+    - page_count 는 워커가 메시지마다 한 번 센 값 (fan-out / 프로필 선택에도 같은 값을 넘긴다)
+    """
+    if lane != LANE_SMALL or is_subjob:
+        return False
+    return classify_job(page_count) == LANE_LARGE
+
+
+class LaneScheduler:
+    """
+    smooth weighted round robin (nginx 방식).
+
+    - 매 차례 각 lane 의 current 에 weight 를 더하고, 가장 큰 lane 을 고른 뒤 전체 weight 합을 뺀다.
+    - small=4, large=1 이면 small small large small small ... 처럼 고르게 섞인다.
+    - order() 는 이번 차례 lane 을 맨 앞에, 나머지를 current 순으로 돌려준다.
+      (고른 lane 이 비어 있으면 다음 lane 에서 가져오기 위함)
+    """
+
+    def __init__(self, lanes: tuple[str, ...] = WORKER_LANES, weights: Optional[dict[str, int]] = None) -> None:
+        self.lanes = lanes
+        self.weights = {lane: (weights or LANE_WEIGHTS).get(lane, 1) for lane in lanes}
+        self._current = {lane: 0 for lane in lanes}
+
+    def order(self) -> list[str]:
+        total = sum(self.weights.values())
+        for lane in self.lanes:
+            self._current[lane] += self.weights[lane]
+        picked = max(self.lanes, key=lambda lane: self._current[lane])
+        self._current[picked] -= total
+        rest = sorted((lane for lane in self.lanes if lane != picked), key=lambda lane: -self._current[lane])
+        return [picked, *rest]
@@ -1,16 +1,27 @@
 # ocr-worker/workers/rabbit_worker.py
 
+import functools
 import json
 import os
 import socket
-import time
-from datetime import datetime, timedelta
+import threading
 
+from typing import Optional
 import pika
 import psycopg2
 
-from ocr_engine.schemas import PredictRequest
-from ocr_engine.predictor import run_ocr
+from ocr_engine.cpu_budget import apply_cpu_budget, cpu_budget_from_env
+from ocr_engine.schemas import WorkerPredictRequest
+from ocr_engine.predictor import count_pdf_pages, run_ocr
+from workers.job_claim import CLAIMED, EXPIRED, NOT_FOUND, ExpiredJobBuffer, claim_job, is_message_expired
+from workers.deadline import deadline_from_message, profile_for_job
+from workers.fanout import PageRange, finish_subjob, maybe_fan_out, page_range_from_message, subjob_message
+from workers.idempotency import begin_claim, finish_claim, release_claim
+from workers.lanes import LANE_LARGE, LANE_SMALL, WORKER_LANES, LaneScheduler, should_move_to_large
+from workers.job_events import build_job_event, notify_in_tx, publish_after_commit
+from workers.job_reaper import start_job_reaper
+from workers.job_timing import FINISH_SET_SQL, FINISH_WHERE_SQL, WORKER_ID, OcrTiming, finish_params
+from workers.worker_log import get_worker_logger
 
 # ------------------------------------------------------------
 # DB 접속 설정 (V3/V4와 동일)
@@ -33,8 +44,19 @@ RABBITMQ_CONFIG = {
     "password": "jewan",
 }
 
+# 연결 heartbeat 주기(초). OCR 은 별도 스레드에서 돌고 연결 스레드는 계속 I/O 를 처리하므로
+# 긴 Job 중에도 heartbeat 가 끊기지 않는다.
+RABBITMQ_HEARTBEAT_SEC = int(os.getenv("OCR_RABBIT_HEARTBEAT_SEC", "60"))
+
 # Spring 쪽 RabbitMqConfig 에서 만든 큐 이름과 동일하게 맞춘다.
 QUEUE_NAME = "ocr.jobs"
+# API 서버(RabbitMqConfig)와 같은 exchange. large lane 으로 메시지를 넣을 때 사용
+EXCHANGE_NAME = "ocr.jobs.exchange"
+
+# 큰 문서 / fan-out sub-job 용 large lane 큐 (workers/lanes.py). 워커가 선언하고 같은 exchange 에 바인딩한다.
+LARGE_QUEUE_NAME = "ocr.jobs.large"
+LARGE_ROUTING_KEY = "ocr.jobs.large"
+QUEUE_NAMES = {LANE_SMALL: QUEUE_NAME, LANE_LARGE: LARGE_QUEUE_NAME}
 
 # 여러 워커를 띄웠을 때 구분용 (로그용으로만 사용)
 _env_name = os.getenv("CONSUMER_NAME")
@@ -51,6 +73,12 @@ RETRY_SLEEP_SEC = 3.0
 # Job 생성 후 몇 초가 지나면 타임아웃으로 간주할지 (요구사항: 60초)
 MAX_WAIT_SEC = 60
 
+# ocr_job.backend 에 기록하는 큐 백엔드 이름 (tools/latency_report.py)
+BACKEND = "rabbit"
+
+# 메시지 단위 로그는 백그라운드 스레드가 모아서 출력 (OCR_LOG_LEVEL / OCR_LOG_SAMPLE / OCR_LOG_RATE_LIMIT)
+log = get_worker_logger()
+
 
 def get_db_connection():
     """
@@ -73,7 +101,10 @@ def get_rabbitmq_channel():
     RabbitMQ BlockingConnection + Channel 생성.
 
     - queue_declare(durable=True) 로 큐를 보장한다.
-    - basic_qos(prefetch_count=1) 로 한 워커가 한 번에 한 메시지만 처리하게 한다.
+    - large lane 큐는 워커가 만들고 API 서버와 같은 exchange 에 바인딩한다.
+    - basic_qos(prefetch_count=1) 로 lane 큐(컨슈머)마다 한 번에 한 메시지만 받는다.
+      (global_qos=False 이면 RabbitMQ 는 prefetch 를 컨슈머 단위로 적용한다)
+    - heartbeat 는 RABBITMQ_HEARTBEAT_SEC. 연결 스레드가 OCR 에 막히지 않으므로 짧게 둬도 된다.
     """
     print("[Worker] connecting to RabbitMQ...", flush=True)
 
@@ -84,6 +115,7 @@ def get_rabbitmq_channel():
         host=RABBITMQ_CONFIG["host"],
         port=RABBITMQ_CONFIG["port"],
         credentials=credentials,
+        heartbeat=RABBITMQ_HEARTBEAT_SEC,
     )
 
     connection = pika.BlockingConnection(params)
@@ -91,126 +123,114 @@ def get_rabbitmq_channel():
 
     # 큐가 없으면 생성 (durable=True → 브로커 재시작해도 유지)
     channel.queue_declare(queue=QUEUE_NAME, durable=True)
+    channel.exchange_declare(exchange=EXCHANGE_NAME, exchange_type="topic", durable=True)
+    channel.queue_declare(queue=LARGE_QUEUE_NAME, durable=True)
+    channel.queue_bind(queue=LARGE_QUEUE_NAME, exchange=EXCHANGE_NAME, routing_key=LARGE_ROUTING_KEY)
 
-    # 한 번에 한 메시지씩만 전달받도록 설정
+    # lane 큐마다 한 번에 한 메시지씩만 전달받도록 설정
     channel.basic_qos(prefetch_count=1)
 
-    print(f"[Worker] RabbitMQ connected. queue={QUEUE_NAME}", flush=True)
+    print(f"[Worker] RabbitMQ connected. queues={QUEUE_NAME},{LARGE_QUEUE_NAME}", flush=True)
     return connection, channel
 
 
-def mark_job_processing_if_valid(conn, job_id: int) -> bool:
+def mark_job_processing_if_valid(conn, job_id: int, allow_reclaim: bool = False, created_at_ms=None) -> bool:
     """
     RabbitMQ 에서 받은 job_id 기준으로,
-    - DB 에서 해당 Job 을 조회하고
-    - 만료 여부 / 상태를 검사한 뒤
-    - 유효하면 PROCESSING 으로 변경한다.
+    만료 여부 / 상태를 검사하고 유효하면 PROCESSING 으로 변경한다.
+
+    - 검사와 상태 변경은 job_claim.claim_job 의 조건부 UPDATE 한 문장으로 처리한다.
+      (SELECT FOR UPDATE → UPDATE 로 여러 번 왕복하지 않음)
+    - 만료된 Job 은 같은 문장에서 FAILED 로 바뀐다.
+    - 중복 전달은 호출한 쪽에서 페이지 수를 세기 전에 begin_claim 으로 먼저 거른다 (중복이면 DB 를 건드리지 않음).
 
-    V3/V4 의 역할과 동일하지만, "어느 Job 을 가져올지"는 RabbitMQ 가 결정하고
-    여기서는 "그 Job 이 아직 유효한지 검증 + PROCESSING 변경"만 담당한다.
+    allow_reclaim=True 는 재전달(redelivered)된 메시지용으로, 이전 워커가 처리 도중 죽어
+    PROCESSING 으로 남은 Job 도 다시 가져와 페이지 체크포인트부터 이어서 처리한다.
 
     반환값:
     - True  : PROCESSING 으로 변경 완료 → 실제 처리 진행
     - False : 이미 만료되었거나 PENDING 이 아님 / 존재하지 않음 → 처리하지 않고 넘김
     """
-    with conn:
-        with conn.cursor() as cur:
-            cur.execute(
-                """
-                SELECT pdf_name, status, created_at
-                FROM ocr_job
-                WHERE id = %s
-                FOR UPDATE
-                """,
-                (job_id,),
-            )
-            row = cur.fetchone()
+    outcome = claim_job(
+        conn, job_id, MAX_WAIT_SEC, allow_reclaim=allow_reclaim, backend=BACKEND, created_at_ms=created_at_ms
+    )
 
-            if row is None:
-                print(
-                    f"[Worker] job_id={job_id} not found in DB. skip.",
-                    flush=True,
-                )
-                return False
+    if outcome == CLAIMED:
+        log.info("picked", job_id=job_id)
+        return True
 
-            pdf_name, status, created_at = row
-            now = datetime.now()
+    if outcome == EXPIRED:
+        log.info("expired", job_id=job_id, check="db")
+        finish_claim(job_id)
+    elif outcome == NOT_FOUND:
+        log.warn("not_found", job_id=job_id)
+        finish_claim(job_id)
+    else:
+        log.info("not_pending", job_id=job_id)
+    return False
 
-            if status != "PENDING":
-                print(
-                    f"[Worker] job_id={job_id} status is not PENDING ({status}). skip.",
-                    flush=True,
-                )
-                return False
 
-            if now - created_at > timedelta(seconds=MAX_WAIT_SEC):
-                print(
-                    f"[Worker] job_id={job_id} expired "
-                    f"(created_at={created_at}, now={now}), mark FAILED",
-                    flush=True,
-                )
-                cur.execute(
-                    "UPDATE ocr_job SET status = 'FAILED' WHERE id = %s",
-                    (job_id,),
-                )
-                return False
-
-            print(
-                f"[Worker] picked job_id={job_id}, pdf_name={pdf_name}",
-                flush=True,
-            )
-            cur.execute(
-                "UPDATE ocr_job SET status = 'PROCESSING' WHERE id = %s",
-                (job_id,),
-            )
-            return True
-
-
-def update_job_status(conn, job_id: int, success: bool):
+def update_job_status(conn, job_id: int, success: bool, timing: Optional[OcrTiming] = None):
     """
     Job 처리 결과에 따라 상태를 DONE / FAILED 로 업데이트한다.
     """
     status = "DONE" if success else "FAILED"
 
+    event = build_job_event(job_id, status)
+
     with conn:
         with conn.cursor() as cur:
             cur.execute(
-                "UPDATE ocr_job SET status = %s WHERE id = %s",
-                (status, job_id),
+                f"UPDATE ocr_job SET {FINISH_SET_SQL} WHERE {FINISH_WHERE_SQL}",
+                (*finish_params(status, timing), job_id, WORKER_ID),
             )
-    print(f"[Worker] job_id={job_id} -> status={status}", flush=True)
-
-
-def process_job(job_id: int, pdf_name: str) -> bool:
+            updated = cur.rowcount > 0
+            if updated:
+                notify_in_tx(cur, event)
+    finish_claim(job_id)
+    if not updated:
+        # 리퍼가 이미 FAILED 로 돌렸거나 다른 워커가 다시 가져간 Job → 상태도 이벤트도 건드리지 않는다.
+        log.warn("status_update_skipped", job_id=job_id, status=status)
+        return
+    log.info("status_updated", job_id=job_id, status=status)
+
+    # 커밋 이후에 발행 → 이벤트를 받은 API 서버가 항상 최종 상태를 읽는다.
+    publish_after_commit(event)
+
+
+def process_job(
+    job_id: int, pdf_name: str, pages: Optional[PageRange] = None, profile: Optional[str] = None
+) -> bool:
     """
     실제 OCR 작업을 수행한다.
 
-    - FastAPI HTTP 호출 없이, ocr_engine 의 run_ocr(PredictRequest)를 직접 호출한다.
+    - FastAPI HTTP 호출 없이, ocr_engine 의 run_ocr(WorkerPredictRequest)를 직접 호출한다.
     - PDF 존재 여부 등은 run_ocr 의 결과 message 로 판단한다.
 
     반환값:
     - 성공 시 True, 실패 시 False
     """
-    print(f"[Worker] run_ocr start job_id={job_id}, pdf_name={pdf_name}", flush=True)
+    log.info("ocr_start", job_id=job_id, pdf_name=pdf_name, pages=pages, profile=profile)
 
     try:
-        req = PredictRequest(pdf_name=pdf_name)
+        # job_id 를 넘기면 페이지 단위 체크포인트 → 재전달 시 이어서 처리
+        req = WorkerPredictRequest(
+            pdf_name=pdf_name,
+            job_id=job_id,
+            page_start=pages.page_start if pages is not None else None,
+            page_end=pages.page_end if pages is not None else None,
+            profile=profile,
+        )
         res = run_ocr(req)
 
-        if res.message.startswith("pdf not found"):
-            print(
-                f"[Worker] job_id={job_id} failed: {res.message}",
-                flush=True,
-            )
+        if res.message.startswith(("pdf not found", "pdf too large")):
+            log.warn("ocr_failed", job_id=job_id, message=res.message)
             return False
 
-        print(
-            f"[Worker] job_id={job_id} succeeded (message={res.message})",
-            flush=True,
-        )
+        log.info("ocr_done", job_id=job_id, message=res.message)
         return True
     except Exception as e:
-        print(f"[Worker] job_id={job_id} ERROR: {e}", flush=True)
+        log.error("ocr_error", job_id=job_id, error=e)
         return False
 
 
@@ -219,27 +239,96 @@ def main_loop():
     워커 메인 루프 (V5: RabbitMQ 기반).
 
     흐름:
-    1) RabbitMQ 큐(ocr.jobs)에서 메시지를 consume 한다.
+    1) lane 큐(ocr.jobs / ocr.jobs.large)를 basic_consume 으로 구독한다 (push → 대기 중인 워커는 바로 받음).
+       lane 마다 최대 한 건을 받아 두고, OCR 중이 아닐 때 가중치 차례인 lane 의 메시지부터 처리한다.
     2) 메시지(body)는 JSON 문자열이라고 가정한다.
        - {"jobId": "1", "pdfName": "sample.pdf", "createdAt": "..."}
     3) DB 에서 jobId 기준으로 유효성 검사 + PROCESSING 변경
-    4) OCR 처리
+    4) OCR 처리 (별도 스레드)
     5) DONE/FAILED 업데이트
     6) 성공/실패 여부에 따라 basic_ack / basic_nack(requeue) 처리
+
+    pika BlockingConnection 은 연결 스레드가 start_consuming / process_data_events 안에 있을 때만 I/O 를 처리한다.
+    예전처럼 이 스레드에서 OCR 을 돌리면 그동안 heartbeat 를 못 보내서, 긴 Job 이면 브로커가 연결을 끊고
+    메시지를 다른 워커에 재전달해 같은 OCR 이 두 번 돌았다.
+    → OCR 만 별도 스레드에서 돌리고, 끝나면 add_callback_threadsafe 로 연결 스레드에 완료 처리를 넘긴다.
+      DB 상태 기록과 ack / nack 은 모두 연결 스레드에서 한다 (pika 채널 / psycopg2 커넥션을 스레드 간에 공유하지 않음).
+      OCR 중에 도착한 메시지는 받아 두기만 하고, 완료 처리 후에 다음 메시지를 고른다.
     """
+    # 같은 호스트의 워커들이 코어를 나눠 쓰도록 pinning (OCR_WORKER_INDEX / OCR_WORKER_COUNT / OCR_CPU_CORES)
+    apply_cpu_budget(cpu_budget_from_env())
+
+    # 만료 / 멈춘 Job 을 모아서 FAILED 처리 (워커 중 하나만 실제로 돈다, OCR_REAPER)
+    start_job_reaper(DB_CONFIG)
+
     print(f"[Worker] starting main loop (RabbitMQ) as consumer={CONSUMER_NAME}...", flush=True)
 
     conn = get_db_connection()
     rabbit_conn, channel = get_rabbitmq_channel()
+    expired_jobs = ExpiredJobBuffer(backend=BACKEND)
+
+    def flush_expired_jobs():
+        """메시지가 뜸해도 모아 둔 만료 Job 이 오래 남지 않도록 주기적으로 flush."""
+        try:
+            expired_jobs.flush_if_due(conn)
+        except Exception as e:
+            log.error("expired_flush_failed", error=e)
+        rabbit_conn.call_later(expired_jobs.flush_sec, flush_expired_jobs)
+
+    rabbit_conn.call_later(expired_jobs.flush_sec, flush_expired_jobs)
+
+    # OCR 중인 메시지 {delivery_tag: job_id}. 한 번에 하나 (prefetch_count=1 과 같은 의미). 연결 스레드에서만 쓴다.
+    in_flight: dict[int, int] = {}
+
+    def finish_ocr(ch, delivery_tag: int, job_id: int, pages, success: bool, timing: OcrTiming):
+        """OCR 스레드가 끝나면 연결 스레드에서 호출된다 (add_callback_threadsafe)."""
+        in_flight.pop(delivery_tag, None)
+        try:
+            # 4. 처리 결과에 따라 DONE/FAILED 업데이트
+            # (sub-job 이면 부모 진행 카운터를 올리고, 마지막이면 부모를 확정)
+            if pages is not None:
+                finish_subjob(conn, job_id, pages.parent_id, success, timing)
+            else:
+                update_job_status(conn, job_id, success, timing)
+
+            # 5. 최종 ACK
+            ch.basic_ack(delivery_tag=delivery_tag)
+            log.debug("acked", delivery_tag=delivery_tag, job_id=job_id)
+        except Exception as e:
+            # 연결이 끊겼다면 ack 도 실패한다. 상태는 이미 기록됐으므로 재전달된 메시지는 claim 에서 걸러진다.
+            log.error("complete_failed", job_id=job_id, error=e)
+            try:
+                ch.basic_nack(delivery_tag=delivery_tag, requeue=True)
+            except Exception as nack_err:
+                log.error("nack_failed", error=nack_err)
+
+        # OCR 이 끝났으니 받아 둔 다음 메시지를 처리한다.
+        dispatch()
+
+    def start_ocr(ch, delivery_tag: int, job_id: int, pdf_name: str, pages, profile):
+        """OCR 을 별도 스레드에서 시작한다. 연결 스레드는 바로 돌아가 I/O 를 계속 처리한다."""
+
+        def run():
+            timing = OcrTiming()
+            success = process_job(job_id, pdf_name, pages, profile)
+            timing.stop()
+            rabbit_conn.add_callback_threadsafe(
+                functools.partial(finish_ocr, ch, delivery_tag, job_id, pages, success, timing)
+            )
+
+        in_flight[delivery_tag] = job_id
+        # daemon: 종료 시 OCR 을 기다리지 않는다. ack 하지 않은 메시지는 재전달되어 체크포인트부터 이어서 처리된다.
+        threading.Thread(target=run, name=f"ocr-{job_id}", daemon=True).start()
 
     # 콜백 내부에서 DB 커넥션과 채널을 사용한다.
-    def on_message(ch, method, properties, body):
+    def on_message(ch, method, properties, body, lane=LANE_SMALL):
         """
         RabbitMQ 메시지 한 건을 처리하는 콜백.
 
         - body: 프로듀서(Spring)에서 보낸 JSON 문자열 (bytes)
+        - lane: 메시지를 가져온 lane (small / large)
         """
-        print(f"[Worker] received raw message: delivery_tag={method.delivery_tag}", flush=True)
+        log.debug("received", delivery_tag=method.delivery_tag)
 
         try:
             # 1. JSON 파싱
@@ -250,10 +339,7 @@ def main_loop():
             pdf_name = payload.get("pdfName")
 
             if job_id_str is None or pdf_name is None:
-                print(
-                    f"[Worker] invalid message payload (jobId/pdfName missing): {payload}",
-                    flush=True,
-                )
+                log.warn("invalid_message", delivery_tag=method.delivery_tag, reason="jobId/pdfName missing")
                 # 재시도해도 의미 없으므로 바로 ACK 처리
                 ch.basic_ack(delivery_tag=method.delivery_tag)
                 return
@@ -261,58 +347,126 @@ def main_loop():
             try:
                 job_id = int(job_id_str)
             except ValueError:
-                print(
-                    f"[Worker] invalid jobId value (not int). jobId={job_id_str}",
-                    flush=True,
+                log.warn("invalid_message", delivery_tag=method.delivery_tag, reason="jobId not int", job_id=job_id_str)
+                ch.basic_ack(delivery_tag=method.delivery_tag)
+                return
+
+            # fan-out 으로 만든 sub-job 메시지면 페이지 범위가 들어 있다.
+            pages = page_range_from_message(payload)
+
+            # 메시지의 createdAt 으로 이미 만료된 Job 이면 DB claim 없이 ACK
+            # (FAILED 처리는 모아서 한 번에. sub-job 은 만료 대상 아님)
+            if pages is None and not method.redelivered and is_message_expired(payload.get("createdAt"), MAX_WAIT_SEC):
+                log.info("expired", job_id=job_id, check="message")
+                expired_jobs.add(conn, job_id)
+                ch.basic_ack(delivery_tag=method.delivery_tag)
+                return
+
+            # 중복 전달은 페이지 수를 세기 전에 idempotency 키로 먼저 거른다 (PDF 를 열지 않고 ACK)
+            if not begin_claim(job_id, reclaim=method.redelivered):
+                log.info("duplicate", job_id=job_id)
+                ch.basic_ack(delivery_tag=method.delivery_tag)
+                return
+
+            # 페이지 수는 메시지마다 한 번만 센다 (lane 이동 / fan-out / 프로필 선택이 같이 쓴다)
+            page_count = count_pdf_pages(str(pdf_name)) if pages is None else None
+
+            # small lane 의 큰 문서는 claim 하지 않고 large lane 으로 옮긴다 (body 그대로 → createdAt 유지).
+            # 재전달 메시지는 이미 PROCESSING 일 수 있으므로 옮기지 않고 여기서 이어서 처리한다.
+            if not method.redelivered and should_move_to_large(lane, page_count, pages is not None):
+                ch.basic_publish(
+                    exchange=EXCHANGE_NAME,
+                    routing_key=LARGE_ROUTING_KEY,
+                    body=body,
+                    properties=pika.BasicProperties(delivery_mode=2),
                 )
                 ch.basic_ack(delivery_tag=method.delivery_tag)
+                release_claim(job_id)
+                log.info("lane_moved", job_id=job_id, lane=LANE_LARGE)
                 return
 
             # 2. DB 에서 Job 상태 확인 + PROCESSING 변경
-            is_valid = mark_job_processing_if_valid(conn, job_id)
+            # (재전달 메시지면 처리 도중 끊긴 PROCESSING Job 도 이어서 처리)
+            is_valid = mark_job_processing_if_valid(
+                conn, job_id, allow_reclaim=method.redelivered, created_at_ms=payload.get("createdAt")
+            )
             if not is_valid:
                 # 이미 만료/처리된 Job 이면 재전달 의미 없으므로 ACK
                 ch.basic_ack(delivery_tag=method.delivery_tag)
                 return
 
-            # 3. 실제 OCR 처리
-            success = process_job(job_id, str(pdf_name))
-
-            # 4. 처리 결과에 따라 DONE/FAILED 업데이트
-            update_job_status(conn, job_id, success)
-
-            # 5. 최종 ACK
-            ch.basic_ack(delivery_tag=method.delivery_tag)
-            print(f"[Worker] ACK delivery_tag={method.delivery_tag}, job_id={job_id}", flush=True)
+            # 큰 문서면 직접 처리하지 않고 페이지 범위 sub-job 으로 나눠 large lane 큐에 다시 넣는다.
+            if pages is None:
+                subjobs = maybe_fan_out(conn, job_id, str(pdf_name), page_count)
+                if subjobs is not None:
+                    for sub in subjobs:
+                        ch.basic_publish(
+                            exchange=EXCHANGE_NAME,
+                            routing_key=LARGE_ROUTING_KEY,
+                            body=json.dumps(subjob_message(sub, str(pdf_name), job_id)),
+                            properties=pika.BasicProperties(delivery_mode=2),
+                        )
+                    ch.basic_ack(delivery_tag=method.delivery_tag)
+                    return
+
+            # 3. 실제 OCR 처리 (별도 스레드, 완료 처리는 finish_ocr)
+            # 마감까지 남은 시간이 부족하면 더 빠른 처리 프로필로 낮춘다.
+            profile = profile_for_job(job_id, page_count, pages, deadline_from_message(payload.get("createdAt")))
+            start_ocr(ch, method.delivery_tag, job_id, str(pdf_name), pages, profile)
 
         except Exception as e:
             # 예기치 못한 오류가 난 경우:
             # - 일단 로그를 남기고,
             # - requeue=True 로 NACK 을 날려 재시도 기회를 남긴다.
-            print(f"[Worker] unexpected error while handling message: {e}", flush=True)
+            log.error("unexpected_error", error=e)
             try:
                 ch.basic_nack(delivery_tag=method.delivery_tag, requeue=True)
             except Exception as nack_err:
-                print(f"[Worker] failed to NACK message: {nack_err}", flush=True)
-
-            # 너무 자주 도는 것 방지용으로 약간 sleep
-            time.sleep(RETRY_SLEEP_SEC)
-
-    # 큐 소비 시작
-    channel.basic_consume(
-        queue=QUEUE_NAME,
-        on_message_callback=on_message,
-        auto_ack=False,  # 반드시 수동 ACK 를 사용해야 재전달/재시도 제어 가능
-    )
+                log.error("nack_failed", error=nack_err)
+
+            # 너무 자주 도는 것 방지용으로 약간 쉰다.
+            # (time.sleep 은 연결 스레드를 막아 heartbeat 가 끊기므로 connection.sleep 으로 I/O 는 계속 처리)
+            rabbit_conn.sleep(RETRY_SLEEP_SEC)
+
+    # lane 별로 받아 두고 아직 처리하지 않은 메시지 {lane: (method, properties, body)}. 연결 스레드에서만 쓴다.
+    waiting: dict[str, tuple] = {}
+    scheduler = LaneScheduler()
+
+    def dispatch():
+        """OCR 중이 아니면 받아 둔 메시지 중 가중치 차례인 lane 부터 처리한다 (비어 있으면 다음 lane)."""
+        while not in_flight and waiting:
+            for lane in scheduler.order():
+                if lane in waiting:
+                    method, properties, body = waiting.pop(lane)
+                    on_message(channel, method, properties, body, lane)
+                    break
+
+    def on_delivery(ch, method, properties, body, lane=LANE_SMALL):
+        waiting[lane] = (method, properties, body)
+        dispatch()
+
+    # lane 큐 소비 시작
+    for lane in WORKER_LANES:
+        channel.basic_consume(
+            queue=QUEUE_NAMES[lane],
+            on_message_callback=functools.partial(on_delivery, lane=lane),
+            auto_ack=False,  # 반드시 수동 ACK 를 사용해야 재전달/재시도 제어 가능
+        )
 
+    print(f"[Worker] lanes={','.join(WORKER_LANES)} weights={scheduler.weights}", flush=True)
     print("[Worker] waiting for messages. To exit press CTRL+C", flush=True)
 
     try:
+        # heartbeat / call_later 타이머 / OCR 완료 콜백도 여기서 처리된다.
         channel.start_consuming()
     except KeyboardInterrupt:
         print("[Worker] KeyboardInterrupt received. stopping...", flush=True)
         channel.stop_consuming()
     finally:
+        try:
+            expired_jobs.flush(conn)
+        except Exception as e:
+            log.error("expired_flush_failed", error=e)
         rabbit_conn.close()
         conn.close()
         print("[Worker] RabbitMQ & DB connection closed.", flush=True)
@@ -2,13 +2,32 @@
 import os
 import socket
 import time
-from datetime import datetime, timedelta
+from typing import Optional
 
 import psycopg2
 import redis
 
-from ocr_engine.schemas import PredictRequest
-from ocr_engine.predictor import run_ocr
+from ocr_engine.cpu_budget import apply_cpu_budget, cpu_budget_from_env
+from ocr_engine.schemas import WorkerPredictRequest
+from ocr_engine.predictor import count_pdf_pages, run_ocr
+from workers.job_claim import (
+    CLAIMED,
+    EXPIRED,
+    LEASED,
+    NOT_FOUND,
+    ExpiredJobBuffer,
+    claim_job,
+    is_message_expired,
+)
+from workers.deadline import deadline_from_message, profile_for_job
+from workers.fanout import PageRange, finish_subjob, maybe_fan_out, page_range_from_message, subjob_message
+from workers.idempotency import LEASE_SEC, begin_claim, finish_claim, release_claim
+from workers.lanes import LANE_LARGE, LANE_SMALL, WORKER_LANES, LaneScheduler, should_move_to_large
+from workers.job_events import build_job_event, notify_in_tx, publish_after_commit
+from workers.job_reaper import start_job_reaper
+from workers.job_timing import FINISH_SET_SQL, FINISH_WHERE_SQL, WORKER_ID, OcrTiming, finish_params
+from workers.stream_trimmer import STREAM_TRIM_ENABLED, StreamTrimmer
+from workers.worker_log import get_worker_logger
 
 # ------------------------------------------------------------
 # DB 접속 설정
@@ -31,7 +50,10 @@ REDIS_CONFIG = {
     "decode_responses": True,  # 응답을 문자열(str)로 받기 위함
 }
 
-STREAM_KEY = "ocr:jobs"        # API 서버에서 XADD 하는 Stream 키
+STREAM_KEY = "ocr:jobs"        # API 서버에서 XADD 하는 Stream 키 (small lane)
+LARGE_STREAM_KEY = "ocr:jobs:large"  # 큰 문서 / fan-out sub-job 용 Stream (large lane, workers/lanes.py)
+STREAM_KEYS = {LANE_SMALL: STREAM_KEY, LANE_LARGE: LARGE_STREAM_KEY}
+LANE_BY_STREAM = {key: lane for lane, key in STREAM_KEYS.items()}
 GROUP_NAME = "ocr-workers"     # Spring 에서도 같은 이름으로 그룹 생성
 
 _env_name = os.getenv("CONSUMER_NAME")  # 필요하면 외부에서 강제로 지정 가능
@@ -46,12 +68,27 @@ else:
 # Redis XREADGROUP block 시간 (ms)
 REDIS_BLOCK_MS = 5000  # 5초
 
+# 다른 컨슈머가 이 시간(ms) 이상 ACK 하지 않은 메시지는 XAUTOCLAIM 으로 가져온다.
+# OCR 이 도는 동안에도 PEL idle 시간은 계속 늘어나므로, 가져왔다고 이전 컨슈머가 죽은 것은 아니다.
+# → PROCESSING Job 은 picked_at 이 RECLAIM_LEASE_SEC 보다 오래됐을 때만 재수거한다 (그 전에는 ACK 하지 않고 PEL 에 둔다).
+RECLAIM_MIN_IDLE_MS = 30000
+# 재수거 lease(초). 가장 긴 Job 의 처리 시간보다 길어야 한다 (OCR_IDEMPOTENCY_LEASE_SEC, 기본 600)
+RECLAIM_LEASE_SEC = LEASE_SEC
+# XAUTOCLAIM 확인 주기(초)
+RECLAIM_CHECK_SEC = 10.0
+
 # 처리할 Job 이 없을 때 다시 조회하기까지 대기 시간(초)
 POLL_INTERVAL_SEC = 1.0
 
 # 요청 후 몇 초가 지나면 타임아웃으로 간주할지 (요구사항: 60초)
 MAX_WAIT_SEC = 60
 
+# ocr_job.backend 에 기록하는 큐 백엔드 이름 (tools/latency_report.py)
+BACKEND = "redis"
+
+# 메시지 단위 로그는 백그라운드 스레드가 모아서 출력 (OCR_LOG_LEVEL / OCR_LOG_SAMPLE / OCR_LOG_RATE_LIMIT)
+log = get_worker_logger()
+
 
 def get_db_connection():
     """
@@ -82,18 +119,19 @@ def get_redis_connection():
     return conn
 
 
-def ensure_consumer_group(r: redis.Redis):
+def ensure_consumer_group(r: redis.Redis, stream_key: str = STREAM_KEY, start_id: str = "$"):
     """
     Redis Streams Consumer Group 이 없으면 생성한다.
 
     - Spring Boot 쪽 RedisConfig 에서 이미 생성했다면 BUSYGROUP 에러가 날 수 있는데,
       그 경우는 정상으로 보고 무시한다.
+    - large lane Stream 은 워커만 XADD 하므로 start_id='0' 으로 만들어 먼저 들어온 메시지도 놓치지 않는다.
     """
     try:
         # id='$' : 그룹 생성 후 새로 들어오는 메시지부터 소비
-        r.xgroup_create(name=STREAM_KEY, groupname=GROUP_NAME, id="$", mkstream=True)
+        r.xgroup_create(name=stream_key, groupname=GROUP_NAME, id=start_id, mkstream=True)
         print(
-            f"[Worker] Created consumer group group={GROUP_NAME} on stream={STREAM_KEY}",
+            f"[Worker] Created consumer group group={GROUP_NAME} on stream={stream_key}",
             flush=True,
         )
     except redis.ResponseError as e:
@@ -108,79 +146,105 @@ def ensure_consumer_group(r: redis.Redis):
             raise
 
 
-def mark_job_processing_if_valid(conn, job_id: int) -> bool:
+def reclaim_stale_messages(r: redis.Redis):
+    """
+    RECLAIM_MIN_IDLE_MS 이상 ACK 되지 않은 pending 메시지를 XAUTOCLAIM 으로 한 건 가져온다.
+    (처리 도중 죽은 컨슈머의 메시지일 수도, 아직 OCR 중인 메시지일 수도 있다 → claim 의 lease 로 구분)
+
+    - 반환 형식은 xreadgroup 과 같게 맞춘다: [(stream_key, [(message_id, fields), ...])]
+    - 이 워커가 소비하는 lane 의 Stream 을 차례로 본다.
+    - 가져올 메시지가 없으면 빈 리스트
+    """
+    for lane in WORKER_LANES:
+        stream_key = STREAM_KEYS[lane]
+        result = r.xautoclaim(
+            stream_key,
+            GROUP_NAME,
+            CONSUMER_NAME,
+            min_idle_time=RECLAIM_MIN_IDLE_MS,
+            start_id="0-0",
+            count=1,
+        )
+        # Redis 7+: [next_start_id, messages, deleted_ids] / 6.2: [next_start_id, messages]
+        messages = [(mid, fields) for mid, fields in result[1] if fields]
+        if messages:
+            return [(stream_key, messages)]
+    return []
+
+
+def read_next_messages(r: redis.Redis, scheduler: LaneScheduler):
+    """
+    lane 가중치 순서대로 새 메시지를 한 건 읽는다.
+
+    - 이번 차례 lane 부터 non-blocking XREADGROUP 으로 확인하고, 비어 있으면 다음 lane 을 본다.
+    - 모든 lane 이 비어 있으면 전체 lane Stream 에 대해 REDIS_BLOCK_MS 동안 blocking 으로 기다린다.
+      (이때는 lane 마다 최대 1건씩 올 수 있다)
+    """
+    for lane in scheduler.order():
+        entries = r.xreadgroup(
+            groupname=GROUP_NAME,
+            consumername=CONSUMER_NAME,
+            streams={STREAM_KEYS[lane]: ">"},
+            count=1,
+        )
+        if entries:
+            return entries
+
+    return r.xreadgroup(
+        groupname=GROUP_NAME,
+        consumername=CONSUMER_NAME,
+        streams={STREAM_KEYS[lane]: ">" for lane in WORKER_LANES},  # 새 메시지만
+        count=1,
+        block=REDIS_BLOCK_MS,
+    )
+
+
+def mark_job_processing_if_valid(conn, job_id: int, allow_reclaim: bool = False, created_at_ms=None) -> str:
     """
     Redis 에서 받은 job_id 기준으로,
-    - DB 에서 해당 Job 을 조회하고
-    - 만료 여부 / 상태를 검사한 뒤
-    - 유효하면 PROCESSING 으로 변경한다.
+    만료 여부 / 상태를 검사하고 유효하면 PROCESSING 으로 변경한다.
 
-    V3 의 fetch_next_pending_job 과 거의 동일한 역할을 수행하지만,
-    "다음 Job 을 고르는 역할"은 Redis 가 하고,
-    여기서는 "해당 Job 이 아직 유효한지 검증 + PROCESSING 변경"만 담당한다.
+    - 검사와 상태 변경은 job_claim.claim_job 의 조건부 UPDATE 한 문장으로 처리한다.
+      (SELECT FOR UPDATE → UPDATE 로 여러 번 왕복하지 않음)
+    - 만료된 Job 은 같은 문장에서 FAILED 로 바뀐다.
+    - 중복 전달은 호출한 쪽에서 페이지 수를 세기 전에 begin_claim 으로 먼저 거른다 (중복이면 DB 를 건드리지 않음).
 
-    반환값:
-    - True  : PROCESSING 으로 변경 완료 → 실제 처리 진행
-    - False : 이미 만료되었거나 PENDING 이 아님 → 처리하지 않고 넘김
+    allow_reclaim=True 는 XAUTOCLAIM 으로 가져온(오래 ACK 되지 않은) 메시지용으로,
+    picked_at 이 RECLAIM_LEASE_SEC 보다 오래된 PROCESSING Job 도 다시 가져와 페이지 체크포인트부터 이어서 처리한다.
+
+    반환값 (job_claim.claim_job 의 결과):
+    - CLAIMED : PROCESSING 으로 변경 완료 → 실제 처리 진행
+    - LEASED  : 다른 컨슈머가 아직 lease 안에서 처리 중 → ACK 하지 않고 PEL 에 남긴다
+    - 그 외   : 이미 만료되었거나 PENDING 이 아님 / 존재하지 않음 → 처리하지 않고 ACK
     """
-    with conn:
-        with conn.cursor() as cur:
-            cur.execute(
-                """
-                SELECT pdf_name, status, created_at
-                FROM ocr_job
-                WHERE id = %s
-                FOR UPDATE
-                """,
-                (job_id,),
-            )
-            row = cur.fetchone()
-
-            # 해당 ID 가 DB 에 없으면 처리 불가
-            if row is None:
-                print(
-                    f"[Worker] job_id={job_id} not found in DB. skip.",
-                    flush=True,
-                )
-                return False
-
-            pdf_name, status, created_at = row
-            now = datetime.now()
-
-            # 이미 PENDING 이 아니면(이미 다른 워커가 처리했거나 상태 변경됨) skip
-            if status != "PENDING":
-                print(
-                    f"[Worker] job_id={job_id} status is not PENDING ({status}). skip.",
-                    flush=True,
-                )
-                return False
-
-            # 생성 후 60초가 지났으면 타임아웃으로 간주 → FAILED 처리
-            if now - created_at > timedelta(seconds=MAX_WAIT_SEC):
-                print(
-                    f"[Worker] job_id={job_id} expired "
-                    f"(created_at={created_at}, now={now}), mark FAILED",
-                    flush=True,
-                )
-                cur.execute(
-                    "UPDATE ocr_job SET status = 'FAILED' WHERE id = %s",
-                    (job_id,),
-                )
-                return False
-
-            # 아직 유효한 Job 이면 PROCESSING 으로 변경
-            print(
-                f"[Worker] picked job_id={job_id}, pdf_name={pdf_name}",
-                flush=True,
-            )
-            cur.execute(
-                "UPDATE ocr_job SET status = 'PROCESSING' WHERE id = %s",
-                (job_id,),
-            )
-            return True
+    outcome = claim_job(
+        conn,
+        job_id,
+        MAX_WAIT_SEC,
+        allow_reclaim=allow_reclaim,
+        backend=BACKEND,
+        created_at_ms=created_at_ms,
+        reclaim_lease_sec=RECLAIM_LEASE_SEC,
+    )
 
+    if outcome == CLAIMED:
+        log.info("picked", job_id=job_id)
+        return outcome
 
-def update_job_status(conn, job_id: int, success: bool):
+    if outcome == EXPIRED:
+        log.info("expired", job_id=job_id, check="db")
+        finish_claim(job_id)
+    elif outcome == NOT_FOUND:
+        log.warn("not_found", job_id=job_id)
+        finish_claim(job_id)
+    elif outcome == LEASED:
+        log.info("reclaim_leased", job_id=job_id)
+    else:
+        log.info("not_pending", job_id=job_id)
+    return outcome
+
+
+def update_job_status(conn, job_id: int, success: bool, timing: Optional[OcrTiming] = None):
     """
     Job 처리 결과에 따라 상태를 DONE / FAILED 로 업데이트한다.
 
@@ -190,47 +254,63 @@ def update_job_status(conn, job_id: int, success: bool):
     """
     status = "DONE" if success else "FAILED"
 
+    event = build_job_event(job_id, status)
+
     with conn:
         with conn.cursor() as cur:
             cur.execute(
-                "UPDATE ocr_job SET status = %s WHERE id = %s",
-                (status, job_id),
+                f"UPDATE ocr_job SET {FINISH_SET_SQL} WHERE {FINISH_WHERE_SQL}",
+                (*finish_params(status, timing), job_id, WORKER_ID),
             )
-    print(f"[Worker] job_id={job_id} -> status={status}", flush=True)
-
-
-def process_job(job_id: int, pdf_name: str) -> bool:
+            updated = cur.rowcount > 0
+            if updated:
+                notify_in_tx(cur, event)
+    finish_claim(job_id)
+    if not updated:
+        # 리퍼가 이미 FAILED 로 돌렸거나 다른 워커가 다시 가져간 Job → 상태도 이벤트도 건드리지 않는다.
+        log.warn("status_update_skipped", job_id=job_id, status=status)
+        return
+    log.info("status_updated", job_id=job_id, status=status)
+
+    # 커밋 이후에 발행 → 이벤트를 받은 API 서버가 항상 최종 상태를 읽는다.
+    publish_after_commit(event)
+
+
+def process_job(
+    job_id: int, pdf_name: str, pages: Optional[PageRange] = None, profile: Optional[str] = None
+) -> bool:
     """
     실제 OCR 작업을 수행한다.
 
-    - FastAPI HTTP 호출 없이, ocr_engine 의 run_ocr(PredictRequest)를 직접 호출한다.
+    - FastAPI HTTP 호출 없이, ocr_engine 의 run_ocr(WorkerPredictRequest)를 직접 호출한다.
     - PDF 존재 여부 등은 run_ocr 의 결과 message 로 판단한다.
 
     반환값:
     - 성공 시 True, 실패 시 False
     """
-    print(f"[Worker] run_ocr start job_id={job_id}, pdf_name={pdf_name}", flush=True)
+    log.info("ocr_start", job_id=job_id, pdf_name=pdf_name, pages=pages, profile=profile)
 
     try:
-        req = PredictRequest(pdf_name=pdf_name)
+        # job_id 를 넘기면 페이지 단위 체크포인트 → 재전달 시 이어서 처리
+        req = WorkerPredictRequest(
+            pdf_name=pdf_name,
+            job_id=job_id,
+            page_start=pages.page_start if pages is not None else None,
+            page_end=pages.page_end if pages is not None else None,
+            profile=profile,
+        )
         res = run_ocr(req)
 
-        # message 내용으로 성공/실패 판별 (예시: pdf not found)
-        if res.message.startswith("pdf not found"):
-            print(
-                f"[Worker] job_id={job_id} failed: {res.message}",
-                flush=True,
-            )
+        # message 내용으로 성공/실패 판별 (예시: pdf not found, pdf too large)
+        if res.message.startswith(("pdf not found", "pdf too large")):
+            log.warn("ocr_failed", job_id=job_id, message=res.message)
             return False
 
-        print(
-            f"[Worker] job_id={job_id} succeeded (message={res.message})",
-            flush=True,
-        )
+        log.info("ocr_done", job_id=job_id, message=res.message)
         return True
     except Exception as e:
         # 예외 발생 시 실패 처리
-        print(f"[Worker] job_id={job_id} ERROR: {e}", flush=True)
+        log.error("ocr_error", job_id=job_id, error=e)
         return False
 
 
@@ -248,28 +328,50 @@ def main_loop():
     4) 성공/실패에 따라 DONE / FAILED 로 상태 업데이트
     5) Redis 에 XACK 으로 메시지 ACK
     """
+    # 같은 호스트의 워커들이 코어를 나눠 쓰도록 pinning (OCR_WORKER_INDEX / OCR_WORKER_COUNT / OCR_CPU_CORES)
+    apply_cpu_budget(cpu_budget_from_env())
+
+    # 만료 / 멈춘 Job 을 모아서 FAILED 처리 (워커 중 하나만 실제로 돈다, OCR_REAPER)
+    start_job_reaper(DB_CONFIG)
+
     print("[Worker] starting main loop (Redis Streams)...", flush=True)
     conn = get_db_connection()
     r = get_redis_connection()
     ensure_consumer_group(r)
+    ensure_consumer_group(r, LARGE_STREAM_KEY, start_id="0")
+    scheduler = LaneScheduler()
+    print(f"[Worker] lanes={','.join(WORKER_LANES)} weights={scheduler.weights}", flush=True)
+
+    last_reclaim_at = 0.0
+    expired_jobs = ExpiredJobBuffer(backend=BACKEND)
+    # ACK 된 엔트리를 주기적으로 지워 stream 메모리를 처리 중인 backlog 수준으로 유지 (OCR_STREAM_TRIM)
+    trimmer = StreamTrimmer(STREAM_KEYS.values()) if STREAM_TRIM_ENABLED else None
 
     try:
         while True:
             try:
+                expired_jobs.flush_if_due(conn)
+                if trimmer is not None:
+                    trimmer.trim_if_due(r)
+
+                # 주기적으로, 다른 컨슈머가 처리 도중 멈춘 메시지를 먼저 재수거한다.
+                entries = []
+                if time.monotonic() - last_reclaim_at >= RECLAIM_CHECK_SEC:
+                    last_reclaim_at = time.monotonic()
+                    entries = reclaim_stale_messages(r)
+                reclaimed = bool(entries)
+                if reclaimed:
+                    log.info("reclaimed")
+
                 # XREADGROUP 으로 새 메시지를 읽는다.
                 #
                 # - groupname : GROUP_NAME (ocr-workers)
                 # - consumername : CONSUMER_NAME (worker-1, worker-2 ...)
-                # - streams = { STREAM_KEY: '>' } → 이 그룹에서 아직 전달되지 않은 메시지
-                # - count = 1 → 한 번에 최대 1개
-                # - block = REDIS_BLOCK_MS(ms) → 최대 block 시간까지 대기
-                entries = r.xreadgroup(
-                    groupname=GROUP_NAME,
-                    consumername=CONSUMER_NAME,
-                    streams={STREAM_KEY: ">"},  # 새 메시지만
-                    count=1,
-                    block=REDIS_BLOCK_MS,
-                )
+                # - streams = { lane Stream: '>' } → 이 그룹에서 아직 전달되지 않은 메시지
+                # - lane 은 가중치(OCR_LANE_WEIGHTS) 순서로 고른다 → 큰 문서가 작은 Job 을 막지 않음
+                # - block = REDIS_BLOCK_MS(ms) → 모든 lane 이 비었을 때 최대 block 시간까지 대기
+                if not reclaimed:
+                    entries = read_next_messages(r, scheduler)
 
                 # 새 메시지가 없으면 잠시 대기 후 다시 루프
                 if not entries:
@@ -286,60 +388,110 @@ def main_loop():
                 #   )
                 # ]
                 for stream_key, messages in entries:
+                    lane = LANE_BY_STREAM.get(stream_key, LANE_SMALL)
                     for message_id, fields in messages:
-                        print(
-                            f"[Worker] received message: id={message_id}, fields={fields}",
-                            flush=True,
-                        )
+                        log.debug("received", message_id=message_id, job_id=fields.get("jobId"))
 
                         # Redis 필드에서 jobId, pdfName 꺼내기
                         job_id_str = fields.get("jobId")
                         pdf_name = fields.get("pdfName")
 
                         if job_id_str is None or pdf_name is None:
-                            print(
-                                f"[Worker] invalid message fields (jobId/pdfName missing). id={message_id}",
-                                flush=True,
-                            )
+                            log.warn("invalid_message", message_id=message_id, reason="jobId/pdfName missing")
                             # 잘못된 메시지는 재전달 의미가 없으므로 ACK 처리
-                            r.xack(STREAM_KEY, GROUP_NAME, message_id)
+                            r.xack(stream_key, GROUP_NAME, message_id)
                             continue
 
                         try:
                             job_id = int(job_id_str)
                         except ValueError:
-                            print(
-                                f"[Worker] invalid jobId value (not int). id={message_id}, jobId={job_id_str}",
-                                flush=True,
-                            )
-                            r.xack(STREAM_KEY, GROUP_NAME, message_id)
+                            log.warn("invalid_message", message_id=message_id, reason="jobId not int", job_id=job_id_str)
+                            r.xack(stream_key, GROUP_NAME, message_id)
+                            continue
+
+                        # fan-out 으로 만든 sub-job 메시지면 페이지 범위가 들어 있다.
+                        pages = page_range_from_message(fields)
+
+                        # 메시지의 createdAt 으로 이미 만료된 Job 이면 DB claim 없이 ACK
+                        # (FAILED 처리는 모아서 한 번에. sub-job 은 만료 대상 아님)
+                        if pages is None and not reclaimed and is_message_expired(fields.get("createdAt"), MAX_WAIT_SEC):
+                            log.info("expired", job_id=job_id, check="message")
+                            expired_jobs.add(conn, job_id)
+                            r.xack(stream_key, GROUP_NAME, message_id)
+                            continue
+
+                        # 중복 전달은 페이지 수를 세기 전에 idempotency 키로 먼저 거른다 (PDF 를 열지 않고 ACK)
+                        if not begin_claim(job_id, reclaim=reclaimed):
+                            log.info("duplicate", job_id=job_id)
+                            r.xack(stream_key, GROUP_NAME, message_id)
+                            continue
+
+                        # 페이지 수는 메시지마다 한 번만 센다 (lane 이동 / fan-out / 프로필 선택이 같이 쓴다)
+                        page_count = count_pdf_pages(str(pdf_name)) if pages is None else None
+
+                        # small lane 의 큰 문서는 claim 하지 않고 large lane 으로 옮긴다 (createdAt 그대로).
+                        # 재수거한 메시지는 이미 PROCESSING 일 수 있으므로 옮기지 않고 여기서 이어서 처리한다.
+                        if not reclaimed and should_move_to_large(lane, page_count, pages is not None):
+                            pipe = r.pipeline(transaction=True)
+                            pipe.xadd(LARGE_STREAM_KEY, fields)
+                            pipe.xack(stream_key, GROUP_NAME, message_id)
+                            pipe.execute()
+                            release_claim(job_id)
+                            log.info("lane_moved", job_id=job_id, lane=LANE_LARGE)
                             continue
 
                         # DB 에서 이 Job 이 아직 유효한지 검사하고 PROCESSING 으로 변경
-                        is_valid = mark_job_processing_if_valid(conn, job_id)
-                        if not is_valid:
+                        outcome = mark_job_processing_if_valid(
+                            conn, job_id, allow_reclaim=reclaimed, created_at_ms=fields.get("createdAt")
+                        )
+                        if outcome == LEASED:
+                            # 이전 컨슈머가 아직 OCR 중 → ACK 하지 않는다. 그 컨슈머가 끝나면 XACK 하고,
+                            # 죽었다면 lease 가 지난 뒤 다시 XAUTOCLAIM 되어 여기서 이어서 처리한다.
+                            continue
+                        if outcome != CLAIMED:
                             # 만료되었거나 이미 처리된 Job 이면 메시지만 ACK 하고 넘어감
-                            r.xack(STREAM_KEY, GROUP_NAME, message_id)
+                            r.xack(stream_key, GROUP_NAME, message_id)
                             continue
 
+                        # 큰 문서면 직접 처리하지 않고 페이지 범위 sub-job 으로 나눠 large lane Stream 에 다시 넣는다.
+                        if pages is None:
+                            subjobs = maybe_fan_out(conn, job_id, str(pdf_name), page_count)
+                            if subjobs is not None:
+                                for sub in subjobs:
+                                    r.xadd(LARGE_STREAM_KEY, subjob_message(sub, str(pdf_name), job_id))
+                                r.xack(stream_key, GROUP_NAME, message_id)
+                                continue
+
                         # 실제 OCR 처리 수행
-                        success = process_job(job_id, str(pdf_name))
+                        # 마감까지 남은 시간이 부족하면 더 빠른 처리 프로필로 낮춘다.
+                        profile = profile_for_job(job_id, page_count, pages, deadline_from_message(fields.get("createdAt")))
+                        timing = OcrTiming()
+                        success = process_job(job_id, str(pdf_name), pages, profile)
+                        timing.stop()
 
                         # 처리 결과에 따라 DONE / FAILED 로 업데이트
-                        update_job_status(conn, job_id, success)
+                        # (sub-job 이면 부모 진행 카운터를 올리고, 마지막이면 부모를 확정)
+                        if pages is not None:
+                            finish_subjob(conn, job_id, pages.parent_id, success, timing)
+                        else:
+                            update_job_status(conn, job_id, success, timing)
 
                         # 처리 완료 후 메시지 ACK
-                        r.xack(STREAM_KEY, GROUP_NAME, message_id)
-                        print(f"[Worker] ACK message id={message_id}", flush=True)
+                        r.xack(stream_key, GROUP_NAME, message_id)
+                        log.debug("acked", message_id=message_id)
 
             except redis.RedisError as e:
-                print(f"[Worker] Redis error: {e}, retry after sleep...", flush=True)
+                log.error("redis_error", error=e)
                 time.sleep(5.0)
             except Exception as e:
-                print(f"[Worker] unexpected error: {e}, keep running...", flush=True)
+                log.error("unexpected_error", error=e)
                 time.sleep(3.0)
 
     finally:
+        try:
+            expired_jobs.flush(conn)
+        except Exception as e:
+            log.error("expired_flush_failed", error=e)
         conn.close()
         print("[Worker] DB connection closed.", flush=True)
 
@@ -0,0 +1,199 @@
+# ocr-worker/workers/stream_trimmer.py
+"""
+Redis Streams(ocr:jobs / ocr:jobs:large) 크기를 처리 중인 backlog 수준으로 유지하는 트리머.
+
+API 서버는 XADD 만 하고 워커는 XACK 만 하므로, 이미 처리가 끝난 엔트리도 stream 에 계속 남아
+Redis 메모리가 "지금까지 들어온 전체 Job 수" 에 비례해 늘어난다. 여기서는 주기적으로
+
+1) ACK 기준 trim: 모든 consumer group 에 대해 "아직 필요한 가장 오래된 엔트리" 를 구하고
+   그보다 앞의 엔트리를 XTRIM MINID 로 지운다.
+   - group 에 pending(전달됐지만 ACK 안 된) 엔트리가 있으면 그중 가장 오래된 id
+   - 없으면 last-delivered-id (그 뒤의 엔트리는 아직 전달되지 않았으므로 남긴다)
+   - group 이 없으면 아무도 읽지 않은 stream 이므로 ACK 기준 trim 은 하지 않는다.
+2) 안전망: 멈춘 컨슈머가 pending 을 오래 쥐고 있어도 무한히 늘지 않도록
+   - OCR_STREAM_MAX_AGE_SEC 보다 오래된 엔트리 (XTRIM MINID, 요청 후 60초면 만료되므로 넉넉한 값)
+   - OCR_STREAM_MAXLEN 을 넘는 엔트리 (XTRIM MAXLEN)
+   를 지운다. 안전망이 지운 엔트리는 ACK 되지 않았을 수 있으므로 warn 으로 남긴다.
+   (pending 목록에 남은 지워진 엔트리는 XAUTOCLAIM 이 deleted id 로 돌려주고, 워커는 fields 가 없는 것을 건너뛴다)
+
+trim 은 모두 근사(~) 모드로 한다. radix tree 노드 단위로 지워서 싸고, 경계 근처 엔트리가 조금 남을 뿐이다.
+여러 워커가 동시에 돌려도 같은 결과가 되므로(멱등) redis_worker / async 런타임이 각자 돌리고,
+워커 없이 따로 돌릴 수도 있다.
+
+환경변수:
+- OCR_STREAM_TRIM         : 1 이면 워커가 주기적으로 trim (기본 1)
+- OCR_STREAM_TRIM_SEC     : trim 주기(초, 기본 10)
+- OCR_STREAM_MAXLEN       : stream 최대 길이 (기본 100000, 0 이면 사용 안 함)
+- OCR_STREAM_MAX_AGE_SEC  : 이보다 오래된 엔트리는 ACK 여부와 관계없이 지움 (기본 3600, 0 이면 사용 안 함)
+
+사용 예 (ocr-worker 디렉터리에서, 워커와 별도로 돌릴 때):
+    python -m workers.stream_trimmer --interval 5
+"""
+import argparse
+import os
+import time
+from typing import Iterable, Optional
+
+from workers.worker_log import get_worker_logger
+
+STREAM_TRIM_ENABLED = os.getenv("OCR_STREAM_TRIM", "1") == "1"
+STREAM_TRIM_SEC = float(os.getenv("OCR_STREAM_TRIM_SEC", "10"))
+STREAM_MAXLEN = int(os.getenv("OCR_STREAM_MAXLEN", "100000"))
+STREAM_MAX_AGE_SEC = float(os.getenv("OCR_STREAM_MAX_AGE_SEC", "3600"))
+
+log = get_worker_logger()
+
+
+def parse_stream_id(stream_id: str) -> tuple[int, int]:
+    """"1764505825504-0" → (1764505825504, 0). 비교용."""
+    ms, _, seq = str(stream_id).partition("-")
+    return int(ms), int(seq or 0)
+
+
+def ack_floor(groups: list[dict], pending: dict[str, dict]) -> Optional[str]:
+    """
+    모든 group 이 아직 필요로 하는 가장 오래된 엔트리 id. 이보다 앞(id 가 작은) 엔트리는 지워도 된다.
+
+    - groups  : XINFO GROUPS 결과 (name / pending / last-delivered-id)
+    - pending : group 이름 → XPENDING 요약 (pending / min)
+    - group 이 없으면 None (trim 하지 않음)
+    """
+    floor = None
+    for group in groups:
+        summary = pending.get(group["name"]) or {}
+        if summary.get("pending") and summary.get("min"):
+            needed = summary["min"]
+        else:
+            needed = group["last-delivered-id"]
+        if floor is None or parse_stream_id(needed) < parse_stream_id(floor):
+            floor = needed
+    return floor
+
+
+class StreamTrimmer:
+    """
+    stream 목록을 주기적으로 trim 한다. trim_if_due 를 워커 루프에서 부르면 된다.
+
+    - redis-py 동기 클라이언트는 trim_if_due, redis.asyncio 클라이언트는 trim_if_due_async.
+    """
+
+    def __init__(
+        self,
+        stream_keys: Iterable[str],
+        interval_sec: float = STREAM_TRIM_SEC,
+        maxlen: int = STREAM_MAXLEN,
+        max_age_sec: float = STREAM_MAX_AGE_SEC,
+    ) -> None:
+        self.stream_keys = tuple(stream_keys)
+        self.interval_sec = interval_sec
+        self.maxlen = maxlen
+        self.max_age_sec = max_age_sec
+        self._last_trim_at = 0.0
+
+    def _due(self) -> bool:
+        now = time.monotonic()
+        if now - self._last_trim_at < self.interval_sec:
+            return False
+        self._last_trim_at = now
+        return True
+
+    def _age_minid(self) -> Optional[str]:
+        if self.max_age_sec <= 0:
+            return None
+        return f"{int((time.time() - self.max_age_sec) * 1000)}-0"
+
+    def _report(self, stream_key: str, acked: int, hard: int) -> None:
+        if hard:
+            # 안전망 trim 은 ACK 되지 않은(멈춘 컨슈머가 쥐고 있던) 엔트리를 지웠을 수 있다.
+            log.warn("stream_trimmed", stream=stream_key, acked=acked, hard=hard)
+        elif acked:
+            log.info("stream_trimmed", stream=stream_key, acked=acked)
+
+    # --------------------------------------------------------
+    # 동기 (redis_worker)
+    # --------------------------------------------------------
+    def trim_if_due(self, r) -> None:
+        if self._due():
+            for stream_key in self.stream_keys:
+                self.trim_stream(r, stream_key)
+
+    def trim_stream(self, r, stream_key: str) -> tuple[int, int]:
+        """stream 하나를 trim 하고 (ACK 기준으로 지운 수, 안전망이 지운 수) 를 반환한다."""
+        if not r.exists(stream_key):
+            return 0, 0
+
+        groups = r.xinfo_groups(stream_key)
+        pending = {g["name"]: r.xpending(stream_key, g["name"]) for g in groups if g["pending"]}
+        floor = ack_floor(groups, pending)
+        acked = r.xtrim(stream_key, minid=floor, approximate=True) if floor else 0
+
+        hard = 0
+        age_minid = self._age_minid()
+        if age_minid is not None:
+            hard += r.xtrim(stream_key, minid=age_minid, approximate=True)
+        if self.maxlen > 0:
+            hard += r.xtrim(stream_key, maxlen=self.maxlen, approximate=True)
+
+        self._report(stream_key, acked, hard)
+        return acked, hard
+
+    # --------------------------------------------------------
+    # 비동기 (workers/async_worker.py 의 RedisSource)
+    # --------------------------------------------------------
+    async def trim_if_due_async(self, r) -> None:
+        if self._due():
+            for stream_key in self.stream_keys:
+                await self.trim_stream_async(r, stream_key)
+
+    async def trim_stream_async(self, r, stream_key: str) -> tuple[int, int]:
+        """trim_stream 의 redis.asyncio 버전."""
+        if not await r.exists(stream_key):
+            return 0, 0
+
+        groups = await r.xinfo_groups(stream_key)
+        pending = {g["name"]: await r.xpending(stream_key, g["name"]) for g in groups if g["pending"]}
+        floor = ack_floor(groups, pending)
+        acked = await r.xtrim(stream_key, minid=floor, approximate=True) if floor else 0
+
+        hard = 0
+        age_minid = self._age_minid()
+        if age_minid is not None:
+            hard += await r.xtrim(stream_key, minid=age_minid, approximate=True)
+        if self.maxlen > 0:
+            hard += await r.xtrim(stream_key, maxlen=self.maxlen, approximate=True)
+
+        self._report(stream_key, acked, hard)
+        return acked, hard
+
+
+def main() -> None:
+    import redis
+
+    from workers.redis_worker import REDIS_CONFIG, STREAM_KEYS
+
+    parser = argparse.ArgumentParser(description="Redis Streams ACK 기준 trim (워커와 별도 실행용)")
+    parser.add_argument("--interval", type=float, default=STREAM_TRIM_SEC, help="trim 주기(초)")
+    parser.add_argument("--maxlen", type=int, default=STREAM_MAXLEN, help="stream 최대 길이 (0 이면 사용 안 함)")
+    parser.add_argument("--max-age-sec", type=float, default=STREAM_MAX_AGE_SEC, help="엔트리 최대 보관 시간")
+    parser.add_argument("--once", action="store_true", help="한 번만 trim 하고 종료")
+    args = parser.parse_args()
+
+    r = redis.Redis(**REDIS_CONFIG)
+    trimmer = StreamTrimmer(STREAM_KEYS.values(), args.interval, args.maxlen, args.max_age_sec)
+    print(
+        f"[Worker] stream trimmer streams={','.join(trimmer.stream_keys)} interval={args.interval}s "
+        f"maxlen={args.maxlen} max_age={args.max_age_sec}s",
+        flush=True,
+    )
+    while True:
+        for stream_key in trimmer.stream_keys:
+            acked, hard = trimmer.trim_stream(r, stream_key)
+            if args.once:
+                print(f"[Worker] trimmed stream={stream_key} acked={acked} hard={hard}", flush=True)
+        if args.once:
+            return
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+# ocr-worker/workers/worker_log.py
+"""
+워커 hot path 용 비동기 구조화 로거.
+
+기존에는 메시지마다 print(..., flush=True) 를 5~8번 호출했다.
+매번 처리 스레드에서 write syscall 이 일어나므로, 만료/잘못된 메시지가 몰리면 그 자체가 비용이 된다.
+
+여기서는
+- 처리 스레드는 (시각, 레벨, 이벤트, 필드) 튜플을 큐에 넣기만 한다. 문자열 포맷팅도 하지 않는다.
+- 백그라운드 스레드가 모아서 한 번의 write + flush 로 내보낸다.
+- 이벤트별 샘플링(OCR_LOG_SAMPLE)과 초당 개수 제한(OCR_LOG_RATE_LIMIT)을 적용한다.
+  제한으로 버려진 개수는 주기적으로 한 줄로 요약해서 남긴다.
+- 큐가 가득 차면 기다리지 않고 버린다(개수만 센다). 로그 때문에 처리 스레드가 막히지 않게 하기 위함.
+- WARN / ERROR 는 샘플링/개수 제한을 적용하지 않는다.
+
+출력 형식 (기존 print 와 같은 [Worker] 접두사 + logfmt):
+    2025-01-01T12:00:00.123 [Worker] INFO picked job_id=1 pdf_name=sample.pdf
+
+환경변수:
+- OCR_LOG_LEVEL      : DEBUG / INFO / WARN / ERROR (기본 INFO)
+- OCR_LOG_SAMPLE     : 이벤트별 샘플링 비율. 예) "received=0.01,expired=0.1"
+- OCR_LOG_RATE_LIMIT : 이벤트별 초당 최대 기록 수 (기본 50, 0 이면 제한 없음)
+"""
+import atexit
+import os
+import queue
+import random
+import sys
+import threading
+import time
+from typing import Optional
+
+LEVELS = {"DEBUG": 10, "INFO": 20, "WARN": 30, "ERROR": 40}
+
+LOG_LEVEL = os.getenv("OCR_LOG_LEVEL", "INFO").upper()
+LOG_SAMPLE = os.getenv("OCR_LOG_SAMPLE", "")
+LOG_RATE_LIMIT = int(os.getenv("OCR_LOG_RATE_LIMIT", "50"))
+
+# 큐 최대 길이. 넘치면 버린다.
+QUEUE_MAX_SIZE = 10000
+# 한 번에 모아서 쓰는 최대 레코드 수 / 최대 대기 시간(초)
+FLUSH_BATCH_SIZE = 256
+FLUSH_INTERVAL_SEC = 0.2
+# 버려진 개수 요약 로그 주기(초)
+DROP_REPORT_SEC = 10.0
+
+
+def _parse_sample(spec: str) -> dict[str, float]:
+    rates = {}
+    for item in spec.split(","):
+        if "=" not in item:
+            continue
+        name, rate = item.split("=", 1)
+        try:
+            rates[name.strip()] = max(0.0, min(1.0, float(rate)))
+        except ValueError:
+            continue
+    return rates
+
+
+def _format_value(value) -> str:
+    text = str(value)
+    if text == "" or any(c in text for c in ' "='):
+        return '"' + text.replace('"', '\\"') + '"'
+    return text
+
+
+class WorkerLogger:
+    """
+    처리 스레드에서는 enqueue 만 하고, 포맷/쓰기는 백그라운드 스레드가 담당하는 로거.
+    """
+
+    def __init__(
+        self,
+        stream=None,
+        level: str = LOG_LEVEL,
+        sample: Optional[dict[str, float]] = None,
+        rate_limit: int = LOG_RATE_LIMIT,
+        prefix: str = "[Worker]",
+    ) -> None:
+        self.stream = stream if stream is not None else sys.stdout
+        self.level = LEVELS.get(level, LEVELS["INFO"])
+        self.sample = _parse_sample(LOG_SAMPLE) if sample is None else sample
+        self.rate_limit = rate_limit
+        self.prefix = prefix
+
+        self._queue: queue.Queue = queue.Queue(maxsize=QUEUE_MAX_SIZE)
+        # 이벤트별 (현재 1초 구간 시작, 구간 내 기록 수)
+        self._windows: dict[str, list] = {}
+        # 이벤트별 버려진 수 (샘플링 / 개수 제한 / 큐 포화)
+        self._dropped: dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="worker-log", daemon=True)
+        self._thread.start()
+
+    # --------------------------------------------------------
+    # 처리 스레드에서 호출하는 부분 (가볍게 유지)
+    # --------------------------------------------------------
+    def debug(self, event: str, **fields) -> None:
+        self._log(10, event, fields)
+
+    def info(self, event: str, **fields) -> None:
+        self._log(20, event, fields)
+
+    def warn(self, event: str, **fields) -> None:
+        self._log(30, event, fields)
+
+    def error(self, event: str, **fields) -> None:
+        self._log(40, event, fields)
+
+    def _log(self, level: int, event: str, fields: dict) -> None:
+        if level < self.level:
+            return
+
+        if level < LEVELS["WARN"] and not self._admit(event):
+            return
+
+        try:
+            self._queue.put_nowait((time.time(), level, event, fields))
+        except queue.Full:
+            self._count_drop(event)
+
+    def _admit(self, event: str) -> bool:
+        rate = self.sample.get(event)
+        if rate is not None and random.random() >= rate:
+            self._count_drop(event)
+            return False
+
+        if self.rate_limit <= 0:
+            return True
+
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.get(event)
+            if window is None or now - window[0] >= 1.0:
+                self._windows[event] = [now, 1]
+                return True
+            if window[1] >= self.rate_limit:
+                self._dropped[event] = self._dropped.get(event, 0) + 1
+                return False
+            window[1] += 1
+            return True
+
+    def _count_drop(self, event: str) -> None:
+        with self._lock:
+            self._dropped[event] = self._dropped.get(event, 0) + 1
+
+    # --------------------------------------------------------
+    # 백그라운드 스레드
+    # --------------------------------------------------------
+    def _format(self, record) -> str:
+        ts, level, event, fields = record
+        name = next(k for k, v in LEVELS.items() if v == level)
+        stamp = time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(ts)) + f".{int(ts % 1 * 1000):03d}"
+        parts = [stamp, self.prefix, name, event]
+        parts.extend(f"{key}={_format_value(value)}" for key, value in fields.items())
+        return " ".join(parts)
+
+    def _drain(self, first=None) -> list:
+        batch = [first] if first is not None else []
+        while len(batch) < FLUSH_BATCH_SIZE:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch: list) -> None:
+        if not batch:
+            return
+        try:
+            self.stream.write("\n".join(self._format(r) for r in batch) + "\n")
+            self.stream.flush()
+        except Exception:
+            # 로그 출력 실패로 워커를 멈추지 않는다.
+            pass
+
+    def _report_drops(self) -> None:
+        with self._lock:
+            dropped, self._dropped = self._dropped, {}
+        if dropped:
+            self._write([(time.time(), LEVELS["INFO"], "log_suppressed", dropped)])
+
+    def _run(self) -> None:
+        last_report_at = time.monotonic()
+        while not self._stopped.is_set():
+            try:
+                first = self._queue.get(timeout=FLUSH_INTERVAL_SEC)
+            except queue.Empty:
+                first = None
+            self._write(self._drain(first))
+
+            if time.monotonic() - last_report_at >= DROP_REPORT_SEC:
+                last_report_at = time.monotonic()
+                self._report_drops()
+
+    def flush(self) -> None:
+        """큐에 남은 레코드를 현재 스레드에서 모두 내보낸다."""
+        while True:
+            batch = self._drain()
+            if not batch:
+                break
+            self._write(batch)
+
+    def close(self) -> None:
+        self._stopped.set()
+        self._thread.join(timeout=1.0)
+        self.flush()
+        self._report_drops()
+
+
+_logger: Optional[WorkerLogger] = None
+
+
+def get_worker_logger() -> WorkerLogger:
+    """
+    프로세스 전역 WorkerLogger 를 반환한다. 종료 시(atexit) 남은 로그를 flush 한다.
+    """
+    global _logger
+
+    if _logger is None:
+        _logger = WorkerLogger()
+        atexit.register(_logger.close)
+
+    return _logger